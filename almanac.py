@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""almanac.py — 多年黄历：按节分月 + 逐日干支 / 冲 / 宜（活动标签），查表不现算。
+
+以前年度报告绑死在 almanac_2027.py 上：365 个 dict 的 Python 字面量（45 KB），换一年就要
+再生成一个模块、再改 import，年份越多导入越慢。现在逐日记录存在 almanac.bin 里，
+一天一条定长记录、字段都是小整数：
+
+    b"ALM1" + <HHII（起始立春年、结束立春年、首日的 date.toordinal()、天数）
+    每天 4 字节 <BBH：日柱六十甲子序号（0=甲子）、冲的地支序号（0=子）、宜的标签位图（TAGS 的顺序）
+
+覆盖从起始年立春到结束年次年立春前一天；文件由 tools/gen_almanac.py 用 lunar-python 生成
+（宜 → 标签的对应见 TAG_SOURCES）。第一次查询时 mmap 进来，导入本身不读文件，
+查询只解出用到的那几天 —— 和覆盖多少年无关。
+
+月份不进文件：节月边界来自 solar_terms，月柱按五虎遁现算（ganzhi.month_pillar）。
+
+    almanac.days(date(2027, 3, 1), date(2027, 3, 31))   # 含首尾，老 ALMANAC_2027_DAYS 的格式
+    almanac.months(2027)                                # 12 个节月，老 ALMANAC_2027_MONTHS 的格式
+    almanac.year_days(2027)                             # 立春 2027 → 立春 2028 前一天
+    almanac.index(2027)                                 # 按月 / 日支 / 标签的位图索引（YearIndex）
+"""
+import mmap
+import os
+import struct
+import threading
+from datetime import date, timedelta
+
+import ganzhi
+import solar_terms
+
+ALMANAC_PATH = os.getenv("ALMANAC_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "almanac.bin")
+MAGIC = b"ALM1"
+HEADER = struct.Struct("<4sHHII")
+RECORD = struct.Struct("<BBH")
+
+GAN, ZHI, SHENGXIAO = ganzhi.GAN, ganzhi.ZHI, ganzhi.SHENGXIAO
+
+# 标签 -> 黄历「宜」里任一项出现就算（顺序即位图的位序，改了要重新生成 almanac.bin）
+TAG_SOURCES = {
+    'wedding': ('嫁娶',),
+    'engagement': ('纳采', '订盟'),
+    'business': ('开市',),
+    'contract': ('立券', '交易'),
+    'moving': ('移徙', '入宅', '安床'),
+    'travel': ('出行',),
+    'renovation': ('动土', '修造'),
+    'wealth': ('纳财',),
+    'blessing': ('祈福',),
+}
+TAGS = tuple(TAG_SOURCES)
+# 位图 -> 标签列表（按字母序，和老的 almanac_2027 一致）；9 个标签，512 种组合，预先展开
+_TAG_LISTS = [sorted(t for i, t in enumerate(TAGS) if mask >> i & 1)
+              for mask in range(1 << len(TAGS))]
+
+_lock = threading.Lock()
+_data = None        # (first_year, last_year, start_ordinal, n_days, buffer)
+_months = {}        # 立春年 -> 月份列表
+_years = {}         # 立春年 -> 全年逐日列表
+
+
+def _load():
+    global _data
+    with _lock:
+        if _data is None:
+            with open(ALMANAC_PATH, "rb") as f:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, first, last, start, n = HEADER.unpack_from(buf, 0)
+            if magic != MAGIC or len(buf) != HEADER.size + n * RECORD.size:
+                raise ValueError(f"{ALMANAC_PATH}: not an almanac table (or truncated)")
+            _data = (first, last, start, n, buf)
+    return _data
+
+
+def coverage():
+    """(首日, 末日)：表里有的日期范围。"""
+    _, _, start, n, _ = _load()
+    return date.fromordinal(start), date.fromordinal(start + n - 1)
+
+
+def records(start, end):
+    """[start, end] 每天的原始整数记录 (ordinal, 六十甲子序号, 冲支序号, 标签位图)。"""
+    _, _, first_ordinal, n, buf = _load()
+    lo, hi = start.toordinal() - first_ordinal, end.toordinal() - first_ordinal
+    if lo < 0 or hi >= n:
+        a, b = coverage()
+        raise ValueError(f"almanac covers {a} ~ {b}, asked for {start} ~ {end}")
+    return [(first_ordinal + i,) + RECORD.unpack_from(buf, HEADER.size + i * RECORD.size)
+            for i in range(lo, hi + 1)]
+
+
+def _day(ordinal, gz, chong, mask):
+    return {'d': date.fromordinal(ordinal).isoformat(), 'gz': ganzhi.name(gz),
+            'zhi': ZHI[gz % 12], 'chong': ZHI[chong], 'chong_sx': SHENGXIAO[chong],
+            'tags': list(_TAG_LISTS[mask])}
+
+
+def days(start, end):
+    """[start, end]（含首尾）逐日：{'d', 'gz', 'zhi', 'chong', 'chong_sx', 'tags'}。"""
+    return [_day(*r) for r in records(start, end)]
+
+
+def year_ganzhi(year):
+    return ganzhi.name(ganzhi.year_pillar(year))
+
+
+def months(year):
+    """立春年 year 的 12 个节月：{'idx', 'zhi', 'ganzhi', 'term', 'start', 'end'}（start/end 含首尾）。"""
+    cached = _months.get(year)
+    if cached is not None:
+        return cached
+    year_stem = ganzhi.year_pillar(year) % 10
+    out = []
+    for i in range(12):
+        nxt = solar_terms.term_date(year + (i == 11), (i + 1) % 12)
+        out.append({'idx': i + 1, 'zhi': ZHI[(i + 2) % 12],
+                    'ganzhi': ganzhi.name(ganzhi.month_pillar(year_stem, i)),
+                    'term': solar_terms.TERM_NAMES[i],
+                    'start': solar_terms.term_date(year, i).isoformat(),
+                    'end': (nxt - timedelta(days=1)).isoformat()})
+    _months[year] = out
+    return out
+
+
+def year_days(year):
+    """立春年 year 的全部日子（调用方只读，结果按年缓存）。"""
+    cached = _years.get(year)
+    if cached is None:
+        m = months(year)
+        cached = _years[year] = days(date.fromisoformat(m[0]['start']),
+                                     date.fromisoformat(m[-1]['end']))
+    return cached
+
+
+class YearIndex:
+    """一个立春年的位图索引：每个集合是一个 int，第 i 位 = year_days(year) 的第 i 天。
+
+    month[m]    第 m 个节月（0=寅月）的日子
+    branch[b]   日支为 b（0=子）的日子；「冲 b 的日子」就是 branch[(b + 6) % 12]
+    tag[t]      宜 t 的日子；tagged = 有任一标签的日子
+    """
+
+    def __init__(self, year):
+        self.year = year
+        self.days = year_days(year)
+        self.months = months(year)
+        self.month = [0] * 12
+        self.branch = [0] * 12
+        self.tag = dict.fromkeys(TAGS, 0)
+        self.tagged = 0
+        first = date.fromisoformat(self.days[0]['d']).toordinal()
+        bounds = [date.fromisoformat(m['end']).toordinal() - first for m in self.months]
+        m = 0
+        for i, (_, gz, _, mask) in enumerate(records(date.fromordinal(first),
+                                                       date.fromordinal(first + len(self.days) - 1))):
+            while i > bounds[m]:
+                m += 1
+            bit = 1 << i
+            self.month[m] |= bit
+            self.branch[gz % 12] |= bit
+            if mask:
+                self.tagged |= bit
+                for j, t in enumerate(TAGS):
+                    if mask >> j & 1:
+                        self.tag[t] |= bit
+
+    def clashing(self, b):
+        """日支冲 b 的日子。"""
+        return self.branch[ganzhi.CHONG_OF[b]]
+
+    def pick(self, mask, limit=None):
+        """位图里的日子（按日期），最多 limit 个。"""
+        out = []
+        while mask and (limit is None or len(out) < limit):
+            low = mask & -mask
+            out.append(self.days[low.bit_length() - 1])
+            mask ^= low
+        return out
+
+
+_indexes = {}
+
+
+def index(year):
+    """立春年 year 的 YearIndex（按年缓存，第一次调用时建）。"""
+    idx = _indexes.get(year)
+    if idx is None:
+        idx = _indexes[year] = YearIndex(year)
+    return idx
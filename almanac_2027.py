@@ -1,10 +0,0 @@
-# Auto-generated by gen_almanac_2027.py — 2027 DingWei year almanac.
-# Months are exact solar-term boundaries (lunar-python); days carry day-ganzhi,
-# clash branch/zodiac and auspicious-activity tags from the traditional almanac.
-
-ANNUAL_YEAR = 2027
-ANNUAL_YEAR_GANZHI = '丁未'
-
-ALMANAC_2027_MONTHS = [{'idx': 1, 'zhi': '寅', 'ganzhi': '壬寅', 'term': '立春', 'start': '2027-02-04', 'end': '2027-03-05'}, {'idx': 2, 'zhi': '卯', 'ganzhi': '癸卯', 'term': '惊蛰', 'start': '2027-03-06', 'end': '2027-04-04'}, {'idx': 3, 'zhi': '辰', 'ganzhi': '甲辰', 'term': '清明', 'start': '2027-04-05', 'end': '2027-05-05'}, {'idx': 4, 'zhi': '巳', 'ganzhi': '乙巳', 'term': '立夏', 'start': '2027-05-06', 'end': '2027-06-05'}, {'idx': 5, 'zhi': '午', 'ganzhi': '丙午', 'term': '芒种', 'start': '2027-06-06', 'end': '2027-07-06'}, {'idx': 6, 'zhi': '未', 'ganzhi': '丁未', 'term': '小暑', 'start': '2027-07-07', 'end': '2027-08-07'}, {'idx': 7, 'zhi': '申', 'ganzhi': '戊申', 'term': '立秋', 'start': '2027-08-08', 'end': '2027-09-07'}, {'idx': 8, 'zhi': '酉', 'ganzhi': '己酉', 'term': '白露', 'start': '2027-09-08', 'end': '2027-10-07'}, {'idx': 9, 'zhi': '戌', 'ganzhi': '庚戌', 'term': '寒露', 'start': '2027-10-08', 'end': '2027-11-06'}, {'idx': 10, 'zhi': '亥', 'ganzhi': '辛亥', 'term': '立冬', 'start': '2027-11-07', 'end': '2027-12-06'}, {'idx': 11, 'zhi': '子', 'ganzhi': '壬子', 'term': '大雪', 'start': '2027-12-07', 'end': '2028-01-05'}, {'idx': 12, 'zhi': '丑', 'ganzhi': '癸丑', 'term': '小寒', 'start': '2028-01-06', 'end': '2028-02-03'}]
-
-ALMANAC_2027_DAYS = [{'d': '2027-02-04', 'gz': '甲寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': ['contract', 'wealth']}, {'d': '2027-02-05', 'gz': '乙卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': ['blessing', 'business', 'contract', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-02-06', 'gz': '丙辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': ['blessing', 'engagement', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-02-07', 'gz': '丁巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': []}, {'d': '2027-02-08', 'gz': '戊午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': ['blessing', 'business', 'contract', 'engagement', 'moving', 'travel']}, {'d': '2027-02-09', 'gz': '己未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': ['renovation', 'wedding']}, {'d': '2027-02-10', 'gz': '庚申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': []}, {'d': '2027-02-11', 'gz': '辛酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': []}, {'d': '2027-02-12', 'gz': '壬戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': []}, {'d': '2027-02-13', 'gz': '癸亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': []}, {'d': '2027-02-14', 'gz': '甲子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': ['blessing', 'business', 'contract', 'renovation', 'travel', 'wealth', 'wedding']}, {'d': '2027-02-15', 'gz': '乙丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': ['blessing']}, {'d': '2027-02-16', 'gz': '丙寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': ['contract']}, {'d': '2027-02-17', 'gz': '丁卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': ['blessing', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-02-18', 'gz': '戊辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': ['blessing', 'moving']}, {'d': '2027-02-19', 'gz': '己巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': []}, {'d': '2027-02-20', 'gz': '庚午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': ['wedding']}, {'d': '2027-02-21', 'gz': '辛未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': ['blessing', 'engagement', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-02-22', 'gz': '壬申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': []}, {'d': '2027-02-23', 'gz': '癸酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': ['blessing', 'business', 'engagement', 'moving', 'renovation', 'travel']}, {'d': '2027-02-24', 'gz': '甲戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': []}, {'d': '2027-02-25', 'gz': '乙亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': ['blessing', 'engagement', 'moving', 'renovation', 'travel']}, {'d': '2027-02-26', 'gz': '丙子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': ['blessing', 'business', 'engagement', 'renovation', 'travel', 'wedding']}, {'d': '2027-02-27', 'gz': '丁丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': ['blessing']}, {'d': '2027-02-28', 'gz': '戊寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': ['contract', 'engagement']}, {'d': '2027-03-01', 'gz': '己卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': ['blessing', 'business', 'contract', 'moving', 'renovation', 'travel']}, {'d': '2027-03-02', 'gz': '庚辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': []}, {'d': '2027-03-03', 'gz': '辛巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': []}, {'d': '2027-03-04', 'gz': '壬午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': ['blessing', 'business', 'engagement', 'moving', 'renovation', 'wedding']}, {'d': '2027-03-05', 'gz': '癸未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': ['engagement', 'travel', 'wedding']}, {'d': '2027-03-06', 'gz': '甲申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': ['blessing', 'moving', 'renovation', 'wedding']}, {'d': '2027-03-07', 'gz': '乙酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': []}, {'d': '2027-03-08', 'gz': '丙戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': ['business', 'contract', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-03-09', 'gz': '丁亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': ['blessing', 'business', 'contract', 'moving', 'renovation']}, {'d': '2027-03-10', 'gz': '戊子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': ['wedding']}, {'d': '2027-03-11', 'gz': '己丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': ['blessing', 'moving', 'renovation', 'wedding']}, {'d': '2027-03-12', 'gz': '庚寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': ['contract', 'moving', 'renovation']}, {'d': '2027-03-13', 'gz': '辛卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': ['blessing', 'business', 'contract', 'travel', 'wedding']}, {'d': '2027-03-14', 'gz': '壬辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': []}, {'d': '2027-03-15', 'gz': '癸巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': ['business', 'contract', 'moving', 'renovation', 'wealth']}, {'d': '2027-03-16', 'gz': '甲午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': ['blessing', 'wedding']}, {'d': '2027-03-17', 'gz': '乙未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': ['blessing', 'moving', 'renovation', 'travel', 'wealth', 'wedding']}, {'d': '2027-03-18', 'gz': '丙申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': ['blessing', 'moving', 'travel', 'wedding']}, {'d': '2027-03-19', 'gz': '丁酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': []}, {'d': '2027-03-20', 'gz': '戊戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': ['contract', 'engagement', 'moving', 'renovation']}, {'d': '2027-03-21', 'gz': '己亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': ['blessing']}, {'d': '2027-03-22', 'gz': '庚子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': ['contract', 'wealth']}, {'d': '2027-03-23', 'gz': '辛丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': ['blessing', 'engagement', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-03-24', 'gz': '壬寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': ['contract', 'renovation']}, {'d': '2027-03-25', 'gz': '癸卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': ['contract', 'travel', 'wealth']}, {'d': '2027-03-26', 'gz': '甲辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': []}, {'d': '2027-03-27', 'gz': '乙巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': ['business', 'contract', 'moving', 'wealth']}, {'d': '2027-03-28', 'gz': '丙午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': ['contract', 'wealth', 'wedding']}, {'d': '2027-03-29', 'gz': '丁未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': ['blessing', 'business', 'contract', 'engagement', 'moving', 'wedding']}, {'d': '2027-03-30', 'gz': '戊申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': ['blessing', 'moving', 'renovation', 'travel']}, {'d': '2027-03-31', 'gz': '己酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': []}, {'d': '2027-04-01', 'gz': '庚戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': ['renovation', 'travel', 'wedding']}, {'d': '2027-04-02', 'gz': '辛亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': ['business', 'contract', 'engagement', 'moving', 'renovation', 'travel', 'wealth']}, {'d': '2027-04-03', 'gz': '壬子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': ['wedding']}, {'d': '2027-04-04', 'gz': '癸丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': ['blessing', 'moving', 'renovation', 'travel']}, {'d': '2027-04-05', 'gz': '甲寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': ['blessing', 'business', 'contract', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-04-06', 'gz': '乙卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': ['contract', 'moving']}, {'d': '2027-04-07', 'gz': '丙辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': ['travel']}, {'d': '2027-04-08', 'gz': '丁巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': ['blessing', 'engagement']}, {'d': '2027-04-09', 'gz': '戊午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': ['business', 'contract', 'moving', 'travel', 'wedding']}, {'d': '2027-04-10', 'gz': '己未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': []}, {'d': '2027-04-11', 'gz': '庚申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': []}, {'d': '2027-04-12', 'gz': '辛酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': []}, {'d': '2027-04-13', 'gz': '壬戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': []}, {'d': '2027-04-14', 'gz': '癸亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': []}, {'d': '2027-04-15', 'gz': '甲子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': ['blessing', 'business', 'contract', 'moving', 'renovation']}, {'d': '2027-04-16', 'gz': '乙丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': ['wealth']}, {'d': '2027-04-17', 'gz': '丙寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': ['business', 'contract', 'engagement', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-04-18', 'gz': '丁卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': ['moving', 'renovation', 'travel']}, {'d': '2027-04-19', 'gz': '戊辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': []}, {'d': '2027-04-20', 'gz': '己巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': ['blessing', 'moving', 'wedding']}, {'d': '2027-04-21', 'gz': '庚午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': ['business', 'engagement', 'moving', 'travel', 'wedding']}, {'d': '2027-04-22', 'gz': '辛未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': []}, {'d': '2027-04-23', 'gz': '壬申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': ['blessing']}, {'d': '2027-04-24', 'gz': '癸酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': ['blessing', 'engagement', 'travel']}, {'d': '2027-04-25', 'gz': '甲戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': []}, {'d': '2027-04-26', 'gz': '乙亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': []}, {'d': '2027-04-27', 'gz': '丙子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': ['blessing', 'engagement']}, {'d': '2027-04-28', 'gz': '丁丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': []}, {'d': '2027-04-29', 'gz': '戊寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': ['business', 'contract', 'engagement', 'moving', 'travel', 'wedding']}, {'d': '2027-04-30', 'gz': '己卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': ['blessing', 'contract', 'wealth']}, {'d': '2027-05-01', 'gz': '庚辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': ['travel']}, {'d': '2027-05-02', 'gz': '辛巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': []}, {'d': '2027-05-03', 'gz': '壬午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': ['business', 'contract', 'engagement', 'moving', 'travel', 'wedding']}, {'d': '2027-05-04', 'gz': '癸未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': []}, {'d': '2027-05-05', 'gz': '甲申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': ['blessing', 'business', 'contract']}, {'d': '2027-05-06', 'gz': '乙酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': ['blessing', 'business', 'contract', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-05-07', 'gz': '丙戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': ['blessing', 'moving', 'renovation', 'wedding']}, {'d': '2027-05-08', 'gz': '丁亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': []}, {'d': '2027-05-09', 'gz': '戊子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': ['blessing', 'engagement', 'moving', 'renovation', 'wedding']}, {'d': '2027-05-10', 'gz': '己丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': ['blessing', 'business', 'contract', 'moving', 'renovation', 'travel']}, {'d': '2027-05-11', 'gz': '庚寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': ['engagement', 'moving', 'travel']}, {'d': '2027-05-12', 'gz': '辛卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': ['blessing', 'business', 'contract', 'moving', 'renovation', 'travel']}, {'d': '2027-05-13', 'gz': '壬辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': ['contract', 'wedding']}, {'d': '2027-05-14', 'gz': '癸巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': []}, {'d': '2027-05-15', 'gz': '甲午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': ['blessing', 'engagement', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-05-16', 'gz': '乙未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': ['engagement', 'moving']}, {'d': '2027-05-17', 'gz': '丙申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': ['business', 'contract', 'engagement', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-05-18', 'gz': '丁酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': ['blessing', 'business', 'contract', 'moving', 'renovation', 'travel']}, {'d': '2027-05-19', 'gz': '戊戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': ['blessing', 'engagement', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-05-20', 'gz': '己亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': []}, {'d': '2027-05-21', 'gz': '庚子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': ['blessing', 'engagement', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-05-22', 'gz': '辛丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': ['blessing', 'business', 'contract', 'engagement', 'renovation', 'wealth']}, {'d': '2027-05-23', 'gz': '壬寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': []}, {'d': '2027-05-24', 'gz': '癸卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': ['blessing', 'business', 'contract', 'engagement', 'renovation', 'travel', 'wedding']}, {'d': '2027-05-25', 'gz': '甲辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': ['moving', 'travel', 'wedding']}, {'d': '2027-05-26', 'gz': '乙巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': []}, {'d': '2027-05-27', 'gz': '丙午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': ['blessing', 'engagement', 'moving', 'renovation', 'wedding']}, {'d': '2027-05-28', 'gz': '丁未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': ['engagement', 'wedding']}, {'d': '2027-05-29', 'gz': '戊申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': ['moving']}, {'d': '2027-05-30', 'gz': '己酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': ['blessing', 'moving']}, {'d': '2027-05-31', 'gz': '庚戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': ['blessing', 'engagement', 'renovation', 'wedding']}, {'d': '2027-06-01', 'gz': '辛亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': []}, {'d': '2027-06-02', 'gz': '壬子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': []}, {'d': '2027-06-03', 'gz': '癸丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': ['business', 'contract', 'renovation']}, {'d': '2027-06-04', 'gz': '甲寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': []}, {'d': '2027-06-05', 'gz': '乙卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': ['blessing', 'engagement', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-06-06', 'gz': '丙辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': []}, {'d': '2027-06-07', 'gz': '丁巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': ['moving', 'renovation']}, {'d': '2027-06-08', 'gz': '戊午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': []}, {'d': '2027-06-09', 'gz': '己未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': ['blessing', 'business', 'contract', 'engagement', 'moving', 'renovation', 'travel', 'wealth', 'wedding']}, {'d': '2027-06-10', 'gz': '庚申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': ['blessing', 'business', 'moving', 'renovation', 'travel', 'wealth', 'wedding']}, {'d': '2027-06-11', 'gz': '辛酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': ['wedding']}, {'d': '2027-06-12', 'gz': '壬戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': ['blessing', 'contract', 'engagement', 'moving', 'renovation', 'travel', 'wealth', 'wedding']}, {'d': '2027-06-13', 'gz': '癸亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': []}, {'d': '2027-06-14', 'gz': '甲子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': []}, {'d': '2027-06-15', 'gz': '乙丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': ['moving', 'renovation', 'travel']}, {'d': '2027-06-16', 'gz': '丙寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': ['business', 'contract', 'moving', 'renovation']}, {'d': '2027-06-17', 'gz': '丁卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': []}, {'d': '2027-06-18', 'gz': '戊辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': ['blessing', 'engagement', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-06-19', 'gz': '己巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': ['moving', 'renovation', 'wealth', 'wedding']}, {'d': '2027-06-20', 'gz': '庚午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': ['travel']}, {'d': '2027-06-21', 'gz': '辛未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': ['blessing', 'contract', 'moving', 'renovation', 'travel', 'wealth', 'wedding']}, {'d': '2027-06-22', 'gz': '壬申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': ['blessing', 'business', 'engagement', 'renovation']}, {'d': '2027-06-23', 'gz': '癸酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': []}, {'d': '2027-06-24', 'gz': '甲戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': ['blessing', 'contract', 'engagement', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-06-25', 'gz': '乙亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': ['blessing', 'engagement', 'moving', 'renovation', 'travel']}, {'d': '2027-06-26', 'gz': '丙子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': []}, {'d': '2027-06-27', 'gz': '丁丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': ['blessing', 'contract', 'travel', 'wedding']}, {'d': '2027-06-28', 'gz': '戊寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': ['business', 'contract', 'engagement', 'renovation']}, {'d': '2027-06-29', 'gz': '己卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': []}, {'d': '2027-06-30', 'gz': '庚辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': ['blessing', 'moving', 'renovation']}, {'d': '2027-07-01', 'gz': '辛巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': ['moving', 'renovation', 'wedding']}, {'d': '2027-07-02', 'gz': '壬午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': ['contract', 'wealth']}, {'d': '2027-07-03', 'gz': '癸未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': ['engagement', 'moving', 'renovation', 'travel', 'wealth', 'wedding']}, {'d': '2027-07-04', 'gz': '甲申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': ['business', 'contract', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-07-05', 'gz': '乙酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': ['wedding']}, {'d': '2027-07-06', 'gz': '丙戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': ['blessing', 'engagement', 'moving', 'renovation', 'travel']}, {'d': '2027-07-07', 'gz': '丁亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': ['blessing', 'moving', 'renovation']}, {'d': '2027-07-08', 'gz': '戊子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': []}, {'d': '2027-07-09', 'gz': '己丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': []}, {'d': '2027-07-10', 'gz': '庚寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': ['business', 'contract', 'engagement', 'renovation', 'travel', 'wealth', 'wedding']}, {'d': '2027-07-11', 'gz': '辛卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': ['blessing', 'business', 'contract', 'engagement', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-07-12', 'gz': '壬辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': ['contract', 'wealth']}, {'d': '2027-07-13', 'gz': '癸巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': ['blessing', 'engagement', 'moving', 'renovation', 'wedding']}, {'d': '2027-07-14', 'gz': '甲午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': []}, {'d': '2027-07-15', 'gz': '乙未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': ['contract', 'travel', 'wealth', 'wedding']}, {'d': '2027-07-16', 'gz': '丙申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': ['renovation']}, {'d': '2027-07-17', 'gz': '丁酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': ['business', 'contract', 'engagement', 'moving', 'travel', 'wedding']}, {'d': '2027-07-18', 'gz': '戊戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': ['wedding']}, {'d': '2027-07-19', 'gz': '己亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': ['blessing', 'business', 'contract', 'engagement', 'renovation', 'travel', 'wealth']}, {'d': '2027-07-20', 'gz': '庚子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': ['blessing', 'moving']}, {'d': '2027-07-21', 'gz': '辛丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': []}, {'d': '2027-07-22', 'gz': '壬寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': ['business', 'contract', 'moving', 'wedding']}, {'d': '2027-07-23', 'gz': '癸卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': ['blessing', 'engagement', 'wedding']}, {'d': '2027-07-24', 'gz': '甲辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': ['blessing', 'engagement', 'moving', 'travel', 'wedding']}, {'d': '2027-07-25', 'gz': '乙巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': ['engagement', 'moving', 'wedding']}, {'d': '2027-07-26', 'gz': '丙午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': []}, {'d': '2027-07-27', 'gz': '丁未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': ['renovation', 'travel']}, {'d': '2027-07-28', 'gz': '戊申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': []}, {'d': '2027-07-29', 'gz': '己酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': ['blessing', 'business', 'contract', 'moving', 'travel', 'wealth']}, {'d': '2027-07-30', 'gz': '庚戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': []}, {'d': '2027-07-31', 'gz': '辛亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': ['blessing', 'contract', 'engagement', 'moving']}, {'d': '2027-08-01', 'gz': '壬子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': []}, {'d': '2027-08-02', 'gz': '癸丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': []}, {'d': '2027-08-03', 'gz': '甲寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': ['business', 'contract', 'engagement', 'moving', 'travel', 'wealth', 'wedding']}, {'d': '2027-08-04', 'gz': '乙卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': ['blessing', 'engagement', 'moving', 'renovation', 'travel']}, {'d': '2027-08-05', 'gz': '丙辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': ['wealth']}, {'d': '2027-08-06', 'gz': '丁巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': ['wedding']}, {'d': '2027-08-07', 'gz': '戊午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': []}, {'d': '2027-08-08', 'gz': '己未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': ['renovation']}, {'d': '2027-08-09', 'gz': '庚申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': ['travel', 'wealth']}, {'d': '2027-08-10', 'gz': '辛酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': ['moving', 'renovation']}, {'d': '2027-08-11', 'gz': '壬戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': ['engagement', 'moving', 'renovation', 'travel']}, {'d': '2027-08-12', 'gz': '癸亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': []}, {'d': '2027-08-13', 'gz': '甲子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': ['blessing', 'contract', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-08-14', 'gz': '乙丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': []}, {'d': '2027-08-15', 'gz': '丙寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': []}, {'d': '2027-08-16', 'gz': '丁卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': ['blessing', 'business', 'contract', 'moving', 'travel', 'wedding']}, {'d': '2027-08-17', 'gz': '戊辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': ['blessing', 'business', 'contract', 'engagement', 'moving', 'renovation', 'travel']}, {'d': '2027-08-18', 'gz': '己巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': ['blessing', 'contract', 'moving', 'renovation', 'wedding']}, {'d': '2027-08-19', 'gz': '庚午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': ['engagement', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-08-20', 'gz': '辛未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': ['moving', 'renovation', 'travel']}, {'d': '2027-08-21', 'gz': '壬申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': ['blessing', 'engagement', 'moving', 'travel', 'wealth', 'wedding']}, {'d': '2027-08-22', 'gz': '癸酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': ['blessing', 'moving', 'renovation']}, {'d': '2027-08-23', 'gz': '甲戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': ['wedding']}, {'d': '2027-08-24', 'gz': '乙亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': []}, {'d': '2027-08-25', 'gz': '丙子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': ['blessing', 'engagement', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-08-26', 'gz': '丁丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': []}, {'d': '2027-08-27', 'gz': '戊寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': []}, {'d': '2027-08-28', 'gz': '己卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': ['blessing', 'business', 'contract', 'engagement', 'moving']}, {'d': '2027-08-29', 'gz': '庚辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': ['blessing', 'business', 'contract', 'moving', 'renovation', 'wedding']}, {'d': '2027-08-30', 'gz': '辛巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': ['business', 'contract', 'engagement', 'moving', 'wealth', 'wedding']}, {'d': '2027-08-31', 'gz': '壬午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': ['business', 'engagement', 'renovation', 'travel', 'wealth', 'wedding']}, {'d': '2027-09-01', 'gz': '癸未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': ['blessing', 'wedding']}, {'d': '2027-09-02', 'gz': '甲申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': ['travel', 'wealth', 'wedding']}, {'d': '2027-09-03', 'gz': '乙酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': []}, {'d': '2027-09-04', 'gz': '丙戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': ['wedding']}, {'d': '2027-09-05', 'gz': '丁亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': ['engagement', 'moving', 'travel']}, {'d': '2027-09-06', 'gz': '戊子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': ['blessing', 'engagement', 'moving', 'renovation', 'wedding']}, {'d': '2027-09-07', 'gz': '己丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': []}, {'d': '2027-09-08', 'gz': '庚寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': []}, {'d': '2027-09-09', 'gz': '辛卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': []}, {'d': '2027-09-10', 'gz': '壬辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': ['engagement', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-09-11', 'gz': '癸巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': ['blessing', 'business', 'contract', 'moving', 'renovation', 'wealth']}, {'d': '2027-09-12', 'gz': '甲午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': ['wedding']}, {'d': '2027-09-13', 'gz': '乙未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': []}, {'d': '2027-09-14', 'gz': '丙申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': ['wedding']}, {'d': '2027-09-15', 'gz': '丁酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': ['travel']}, {'d': '2027-09-16', 'gz': '戊戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': ['business', 'engagement', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-09-17', 'gz': '己亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': ['business', 'contract', 'engagement', 'moving', 'renovation', 'wealth']}, {'d': '2027-09-18', 'gz': '庚子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': []}, {'d': '2027-09-19', 'gz': '辛丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': ['blessing', 'renovation', 'wealth']}, {'d': '2027-09-20', 'gz': '壬寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': ['renovation']}, {'d': '2027-09-21', 'gz': '癸卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': []}, {'d': '2027-09-22', 'gz': '甲辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': ['blessing', 'engagement', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-09-23', 'gz': '乙巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': ['blessing', 'business', 'contract', 'engagement', 'moving', 'wedding']}, {'d': '2027-09-24', 'gz': '丙午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': []}, {'d': '2027-09-25', 'gz': '丁未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': []}, {'d': '2027-09-26', 'gz': '戊申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': ['moving', 'renovation', 'travel']}, {'d': '2027-09-27', 'gz': '己酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': ['travel']}, {'d': '2027-09-28', 'gz': '庚戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': ['blessing', 'engagement', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-09-29', 'gz': '辛亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': ['business', 'contract', 'moving', 'travel']}, {'d': '2027-09-30', 'gz': '壬子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': []}, {'d': '2027-10-01', 'gz': '癸丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': ['blessing', 'business', 'contract', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-10-02', 'gz': '甲寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': []}, {'d': '2027-10-03', 'gz': '乙卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': []}, {'d': '2027-10-04', 'gz': '丙辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': ['blessing', 'contract', 'engagement', 'moving', 'renovation']}, {'d': '2027-10-05', 'gz': '丁巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': ['business', 'engagement', 'moving', 'renovation', 'wedding']}, {'d': '2027-10-06', 'gz': '戊午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': ['wedding']}, {'d': '2027-10-07', 'gz': '己未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': []}, {'d': '2027-10-08', 'gz': '庚申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': ['blessing', 'business', 'contract', 'moving', 'travel', 'wealth', 'wedding']}, {'d': '2027-10-09', 'gz': '辛酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': ['blessing', 'moving', 'renovation', 'wedding']}, {'d': '2027-10-10', 'gz': '壬戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': ['blessing', 'moving', 'travel', 'wealth']}, {'d': '2027-10-11', 'gz': '癸亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': ['moving', 'travel']}, {'d': '2027-10-12', 'gz': '甲子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': ['engagement', 'moving']}, {'d': '2027-10-13', 'gz': '乙丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': []}, {'d': '2027-10-14', 'gz': '丙寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': []}, {'d': '2027-10-15', 'gz': '丁卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': ['blessing', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-10-16', 'gz': '戊辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': []}, {'d': '2027-10-17', 'gz': '己巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': ['moving', 'wealth']}, {'d': '2027-10-18', 'gz': '庚午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': ['blessing', 'business', 'contract', 'engagement', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-10-19', 'gz': '辛未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': ['moving', 'wealth']}, {'d': '2027-10-20', 'gz': '壬申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': ['blessing', 'renovation', 'travel', 'wedding']}, {'d': '2027-10-21', 'gz': '癸酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': ['moving', 'travel', 'wedding']}, {'d': '2027-10-22', 'gz': '甲戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': ['moving', 'renovation', 'travel']}, {'d': '2027-10-23', 'gz': '乙亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': ['moving', 'renovation', 'travel']}, {'d': '2027-10-24', 'gz': '丙子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': ['business', 'contract', 'engagement', 'moving']}, {'d': '2027-10-25', 'gz': '丁丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': []}, {'d': '2027-10-26', 'gz': '戊寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': []}, {'d': '2027-10-27', 'gz': '己卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': ['blessing', 'engagement', 'moving', 'travel', 'wedding']}, {'d': '2027-10-28', 'gz': '庚辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': []}, {'d': '2027-10-29', 'gz': '辛巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': ['contract', 'engagement', 'wealth']}, {'d': '2027-10-30', 'gz': '壬午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': ['business', 'contract', 'engagement', 'moving', 'travel', 'wedding']}, {'d': '2027-10-31', 'gz': '癸未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': ['wealth']}, {'d': '2027-11-01', 'gz': '甲申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': ['blessing', 'engagement', 'moving', 'travel', 'wedding']}, {'d': '2027-11-02', 'gz': '乙酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': []}, {'d': '2027-11-03', 'gz': '丙戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': ['blessing', 'business', 'contract', 'engagement', 'moving', 'wedding']}, {'d': '2027-11-04', 'gz': '丁亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': ['business', 'moving', 'travel']}, {'d': '2027-11-05', 'gz': '戊子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': ['business', 'contract', 'moving', 'wealth']}, {'d': '2027-11-06', 'gz': '己丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': []}, {'d': '2027-11-07', 'gz': '庚寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': ['business', 'contract', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-11-08', 'gz': '辛卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': ['blessing', 'business', 'contract', 'moving', 'travel', 'wedding']}, {'d': '2027-11-09', 'gz': '壬辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': []}, {'d': '2027-11-10', 'gz': '癸巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': []}, {'d': '2027-11-11', 'gz': '甲午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': ['blessing', 'business', 'engagement', 'moving', 'renovation', 'travel', 'wealth', 'wedding']}, {'d': '2027-11-12', 'gz': '乙未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': ['blessing', 'renovation']}, {'d': '2027-11-13', 'gz': '丙申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': []}, {'d': '2027-11-14', 'gz': '丁酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': ['blessing', 'business', 'contract', 'renovation', 'travel', 'wedding']}, {'d': '2027-11-15', 'gz': '戊戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': ['moving', 'wedding']}, {'d': '2027-11-16', 'gz': '己亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': ['travel']}, {'d': '2027-11-17', 'gz': '庚子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': ['blessing', 'business', 'contract', 'engagement', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-11-18', 'gz': '辛丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': []}, {'d': '2027-11-19', 'gz': '壬寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': ['business', 'contract', 'moving', 'renovation', 'travel', 'wealth']}, {'d': '2027-11-20', 'gz': '癸卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': ['blessing', 'contract', 'engagement', 'moving', 'renovation', 'travel', 'wealth', 'wedding']}, {'d': '2027-11-21', 'gz': '甲辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': ['engagement', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-11-22', 'gz': '乙巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': []}, {'d': '2027-11-23', 'gz': '丙午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': []}, {'d': '2027-11-24', 'gz': '丁未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': ['blessing', 'engagement', 'renovation']}, {'d': '2027-11-25', 'gz': '戊申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': []}, {'d': '2027-11-26', 'gz': '己酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': ['blessing', 'business', 'renovation', 'travel', 'wealth']}, {'d': '2027-11-27', 'gz': '庚戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': []}, {'d': '2027-11-28', 'gz': '辛亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': ['travel']}, {'d': '2027-11-29', 'gz': '壬子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': ['moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-11-30', 'gz': '癸丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': []}, {'d': '2027-12-01', 'gz': '甲寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': ['business', 'contract', 'engagement', 'moving', 'renovation', 'travel', 'wealth']}, {'d': '2027-12-02', 'gz': '乙卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': ['blessing', 'business', 'contract', 'engagement', 'moving', 'renovation', 'travel', 'wealth']}, {'d': '2027-12-03', 'gz': '丙辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': ['blessing', 'engagement', 'moving', 'wedding']}, {'d': '2027-12-04', 'gz': '丁巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': []}, {'d': '2027-12-05', 'gz': '戊午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': ['engagement', 'moving', 'wedding']}, {'d': '2027-12-06', 'gz': '己未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': ['blessing', 'contract', 'engagement', 'renovation', 'wealth']}, {'d': '2027-12-07', 'gz': '庚申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': []}, {'d': '2027-12-08', 'gz': '辛酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': ['moving']}, {'d': '2027-12-09', 'gz': '壬戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': ['blessing', 'moving', 'renovation']}, {'d': '2027-12-10', 'gz': '癸亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': ['renovation']}, {'d': '2027-12-11', 'gz': '甲子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': ['contract']}, {'d': '2027-12-12', 'gz': '乙丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': ['blessing', 'contract', 'engagement', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-12-13', 'gz': '丙寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': ['business', 'contract', 'engagement', 'moving', 'travel']}, {'d': '2027-12-14', 'gz': '丁卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': []}, {'d': '2027-12-15', 'gz': '戊辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': ['blessing', 'engagement', 'moving', 'renovation', 'travel']}, {'d': '2027-12-16', 'gz': '己巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': ['blessing', 'moving', 'wedding']}, {'d': '2027-12-17', 'gz': '庚午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': []}, {'d': '2027-12-18', 'gz': '辛未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': ['moving', 'travel']}, {'d': '2027-12-19', 'gz': '壬申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': ['blessing', 'moving', 'travel', 'wedding']}, {'d': '2027-12-20', 'gz': '癸酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': ['wealth']}, {'d': '2027-12-21', 'gz': '甲戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': ['blessing', 'engagement', 'moving', 'renovation']}, {'d': '2027-12-22', 'gz': '乙亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': ['moving', 'renovation', 'travel']}, {'d': '2027-12-23', 'gz': '丙子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': []}, {'d': '2027-12-24', 'gz': '丁丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': ['blessing', 'business', 'contract', 'engagement', 'moving', 'renovation', 'travel']}, {'d': '2027-12-25', 'gz': '戊寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': ['engagement', 'renovation']}, {'d': '2027-12-26', 'gz': '己卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': []}, {'d': '2027-12-27', 'gz': '庚辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': ['blessing', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2027-12-28', 'gz': '辛巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': ['blessing', 'engagement', 'moving', 'renovation', 'wedding']}, {'d': '2027-12-29', 'gz': '壬午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': []}, {'d': '2027-12-30', 'gz': '癸未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': ['contract', 'moving', 'wealth']}, {'d': '2027-12-31', 'gz': '甲申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': ['blessing', 'engagement', 'moving', 'renovation', 'travel']}, {'d': '2028-01-01', 'gz': '乙酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': ['moving', 'wealth']}, {'d': '2028-01-02', 'gz': '丙戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': ['blessing', 'engagement', 'renovation']}, {'d': '2028-01-03', 'gz': '丁亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': ['engagement', 'moving', 'renovation']}, {'d': '2028-01-04', 'gz': '戊子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': []}, {'d': '2028-01-05', 'gz': '己丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': ['blessing', 'engagement', 'renovation', 'travel', 'wedding']}, {'d': '2028-01-06', 'gz': '庚寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': ['business', 'contract', 'engagement', 'renovation', 'wealth']}, {'d': '2028-01-07', 'gz': '辛卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': ['business', 'contract', 'moving', 'travel', 'wealth', 'wedding']}, {'d': '2028-01-08', 'gz': '壬辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': []}, {'d': '2028-01-09', 'gz': '癸巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': ['moving', 'renovation', 'wedding']}, {'d': '2028-01-10', 'gz': '甲午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': ['blessing', 'engagement', 'moving', 'renovation', 'travel', 'wedding']}, {'d': '2028-01-11', 'gz': '乙未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': []}, {'d': '2028-01-12', 'gz': '丙申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': ['business', 'contract', 'engagement', 'moving', 'renovation', 'wealth', 'wedding']}, {'d': '2028-01-13', 'gz': '丁酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': []}, {'d': '2028-01-14', 'gz': '戊戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': ['wealth']}, {'d': '2028-01-15', 'gz': '己亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': ['blessing', 'engagement']}, {'d': '2028-01-16', 'gz': '庚子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': ['blessing', 'contract', 'wealth']}, {'d': '2028-01-17', 'gz': '辛丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': []}, {'d': '2028-01-18', 'gz': '壬寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': ['moving', 'renovation', 'wedding']}, {'d': '2028-01-19', 'gz': '癸卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': ['contract', 'moving', 'travel', 'wealth', 'wedding']}, {'d': '2028-01-20', 'gz': '甲辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': []}, {'d': '2028-01-21', 'gz': '乙巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': ['engagement', 'moving', 'wedding']}, {'d': '2028-01-22', 'gz': '丙午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': []}, {'d': '2028-01-23', 'gz': '丁未', 'zhi': '未', 'chong': '丑', 'chong_sx': '牛', 'tags': []}, {'d': '2028-01-24', 'gz': '戊申', 'zhi': '申', 'chong': '寅', 'chong_sx': '虎', 'tags': ['business', 'contract', 'wealth']}, {'d': '2028-01-25', 'gz': '己酉', 'zhi': '酉', 'chong': '卯', 'chong_sx': '兔', 'tags': []}, {'d': '2028-01-26', 'gz': '庚戌', 'zhi': '戌', 'chong': '辰', 'chong_sx': '龙', 'tags': ['engagement', 'wealth', 'wedding']}, {'d': '2028-01-27', 'gz': '辛亥', 'zhi': '亥', 'chong': '巳', 'chong_sx': '蛇', 'tags': ['business', 'contract', 'engagement', 'moving']}, {'d': '2028-01-28', 'gz': '壬子', 'zhi': '子', 'chong': '午', 'chong_sx': '马', 'tags': ['contract', 'moving', 'wealth']}, {'d': '2028-01-29', 'gz': '癸丑', 'zhi': '丑', 'chong': '未', 'chong_sx': '羊', 'tags': []}, {'d': '2028-01-30', 'gz': '甲寅', 'zhi': '寅', 'chong': '申', 'chong_sx': '猴', 'tags': ['business', 'contract', 'engagement', 'moving', 'wealth']}, {'d': '2028-01-31', 'gz': '乙卯', 'zhi': '卯', 'chong': '酉', 'chong_sx': '鸡', 'tags': ['blessing', 'business', 'contract', 'engagement', 'moving', 'travel', 'wealth', 'wedding']}, {'d': '2028-02-01', 'gz': '丙辰', 'zhi': '辰', 'chong': '戌', 'chong_sx': '狗', 'tags': ['wedding']}, {'d': '2028-02-02', 'gz': '丁巳', 'zhi': '巳', 'chong': '亥', 'chong_sx': '猪', 'tags': []}, {'d': '2028-02-03', 'gz': '戊午', 'zhi': '午', 'chong': '子', 'chong_sx': '鼠', 'tags': ['moving', 'travel', 'wedding']}]
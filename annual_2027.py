@@ -7,12 +7,15 @@ personal /api/generate-section chapters are prompted, but scoped to the full
 丁未 year: 2027-02-04 → 2028-02-03).
 
 Calendar facts are NEVER invented by the AI:
-  - almanac_2027.py holds the pre-computed almanac (exact solar-term month
-    boundaries + per-day ganzhi / clash / auspicious-activity tags for all
-    365 days of the 丁未 year, generated with lunar-python).
+  - almanac.py serves the pre-computed almanac (exact solar-term month
+    boundaries + per-day ganzhi / clash / auspicious-activity tags, generated
+    with lunar-python into almanac.bin for 2020–2050). The calendar helpers
+    below take a `year` argument (default ANNUAL_YEAR); the chapter prose is
+    still written for 丁未.
   - This module personalizes it in code: each client's favorable days are
     filtered against their own chart branches, month-stem Ten Gods and all
-    month-branch interactions (冲/合/刑/害) against the four pillars are
+    month-branch interactions (冲/合/刑/害/破/半合/三合/三会, via
+    branch_interactions) against the four pillars are
     pre-computed, and the AI is instructed to reason FROM these facts.
 
 Style contract (v2, per owner feedback): flowing master-voice prose, bullets
@@ -23,77 +26,22 @@ Chinese reports).
 
 from typing import Dict, Any, List
 
-from almanac_2027 import (
-    ANNUAL_YEAR,
-    ANNUAL_YEAR_GANZHI,
-    ALMANAC_2027_MONTHS,
-    ALMANAC_2027_DAYS,
-)
-
-# ---------------------------------------------------------------------------
-# Branch interaction tables (六冲 / 六合 / 相刑 / 相害)
-# ---------------------------------------------------------------------------
-
-LIU_CHONG = {'子': '午', '丑': '未', '寅': '申', '卯': '酉', '辰': '戌', '巳': '亥',
-             '午': '子', '未': '丑', '申': '寅', '酉': '卯', '戌': '辰', '亥': '巳'}
-
-LIU_HE = {'子': '丑', '丑': '子', '寅': '亥', '亥': '寅', '卯': '戌', '戌': '卯',
-          '辰': '酉', '酉': '辰', '巳': '申', '申': '巳', '午': '未', '未': '午'}
-
-LIU_HAI = {'子': '未', '未': '子', '丑': '午', '午': '丑', '寅': '巳', '巳': '寅',
-           '卯': '辰', '辰': '卯', '申': '亥', '亥': '申', '酉': '戌', '戌': '酉'}
-
-# 相刑 (pairs; 自刑 handled separately)
-XING_PAIRS = {('寅', '巳'), ('巳', '申'), ('申', '寅'),
-              ('丑', '戌'), ('戌', '未'), ('未', '丑'),
-              ('子', '卯'), ('卯', '子')}
-ZI_XING = {'辰', '午', '酉', '亥'}   # self-punishment branches
-
-
-def _branch_relation(a: str, b: str) -> str:
-    """Relation of branch a (month) to branch b (chart): 冲/合/刑/害 or ''."""
-    if LIU_CHONG.get(a) == b:
-        return '冲'
-    if LIU_HE.get(a) == b:
-        return '合'
-    if (a, b) in XING_PAIRS or (b, a) in XING_PAIRS or (a == b and a in ZI_XING):
-        return '刑'
-    if LIU_HAI.get(a) == b:
-        return '害'
-    return ''
+import almanac
+import branch_interactions
+import ganzhi
 
+ANNUAL_YEAR = 2027
+ANNUAL_YEAR_GANZHI = almanac.year_ganzhi(ANNUAL_YEAR)
 
 # ---------------------------------------------------------------------------
-# Ten God of a stem relative to the day master (deterministic lookup)
+# Ten Gods — table lookup in ganzhi (small-int core). Branch interactions come
+# from branch_interactions (冲/合/刑/害/破/半合/三合/三会 against all pillars).
 # ---------------------------------------------------------------------------
 
-STEM_INFO = {  # element, yang?
-    '甲': ('木', True), '乙': ('木', False), '丙': ('火', True), '丁': ('火', False),
-    '戊': ('土', True), '己': ('土', False), '庚': ('金', True), '辛': ('金', False),
-    '壬': ('水', True), '癸': ('水', False),
-}
-SHENG = {'木': '火', '火': '土', '土': '金', '金': '水', '水': '木'}   # produces
-KE = {'木': '土', '土': '水', '水': '火', '火': '金', '金': '木'}       # controls
-
-
 def ten_god(day_stem: str, other_stem: str) -> str:
     """十神 of other_stem relative to day_stem."""
-    if day_stem not in STEM_INFO or other_stem not in STEM_INFO:
-        return ''
-    de, dy = STEM_INFO[day_stem]
-    oe, oy = STEM_INFO[other_stem]
-    same_pol = (dy == oy)
-    if oe == de:
-        return '比肩' if same_pol else '劫财'
-    if SHENG[de] == oe:
-        return '食神' if same_pol else '伤官'
-    if KE[de] == oe:
-        return '偏财' if same_pol else '正财'
-    if KE[oe] == de:
-        return '七杀' if same_pol else '正官'
-    if SHENG[oe] == de:
-        return '偏印' if same_pol else '正印'
-    return ''
+    d, o = ganzhi.stem(day_stem), ganzhi.stem(other_stem)
+    return ganzhi.ten_god_name(d, o) if d >= 0 and o >= 0 else ''
 
 
 # 2027 annual flying stars (Period 9, annual star 9 in the center; standard
@@ -147,7 +95,7 @@ ANNUAL_SECTION_TYPES = [
 # Chart helpers
 # ---------------------------------------------------------------------------
 
-PILLAR_CN = {'year': '年柱', 'month': '月柱', 'day': '日柱', 'hour': '时柱'}
+PILLAR_CN = branch_interactions.PILLAR_CN
 
 
 def get_user_branches(bazi_json: Dict[str, Any]) -> Dict[str, str]:
@@ -169,23 +117,24 @@ def get_day_stem(bazi_json: Dict[str, Any]) -> str:
     return gz[0] if gz else ''
 
 
-def annual_month_table() -> str:
-    """Markdown table of the 12 solar-term months of the 丁未 year."""
+def annual_month_table(year: int = ANNUAL_YEAR) -> str:
+    """Markdown table of the 12 solar-term months of the year (丁未 by default)."""
     lines = [
-        f"### The 12 months of {ANNUAL_YEAR_GANZHI} {ANNUAL_YEAR} "
+        f"### The 12 months of {almanac.year_ganzhi(year)} {year} "
         f"(exact solar-term boundaries — use these, do NOT recalculate)\n",
         "| # | Gregorian range | Month pillar | Branch |",
         "|---|-----------------|--------------|--------|",
     ]
-    for m in ALMANAC_2027_MONTHS:
+    for m in almanac.months(year):
         lines.append(f"| {m['idx']} | {m['start']} ~ {m['end']} "
                      f"| {m['ganzhi']} | {m['zhi']} |")
     return "\n".join(lines)
 
 
-def month_pillar_analysis(bazi_json: Dict[str, Any]) -> str:
+def month_pillar_analysis(bazi_json: Dict[str, Any], year: int = ANNUAL_YEAR) -> str:
     """Per-month PRE-COMPUTED facts: month-stem Ten God vs the day master +
-    every month-branch interaction (冲/合/刑/害) against all four pillars.
+    every month-branch interaction (冲/合/刑/害/破/半合, and 三合/三会 completed
+    with the chart or the year branch) against all four pillars.
     These are the confirmed technical facts the AI must reason FROM."""
     ub = get_user_branches(bazi_json)
     ds = get_day_stem(bazi_json)
@@ -195,39 +144,40 @@ def month_pillar_analysis(bazi_json: Dict[str, Any]) -> str:
         "calculated — treat them as ground truth; do NOT invent additional "
         "interactions, but DO interpret what each means for this client.)\n",
     ]
-    for m in ALMANAC_2027_MONTHS:
+    months = almanac.months(year)
+    yz = almanac.year_ganzhi(year)[1]
+    by_month = [[] for _ in months]
+    for e in branch_interactions.scan([m['zhi'] for m in months], ub,
+                                      flow_years=[yz] * len(months)):
+        by_month[e['i']].append(branch_interactions.describe(e))
+    for m, inter in zip(months, by_month):
         gan, zhi = m['ganzhi'][0], m['ganzhi'][1]
         tg = ten_god(ds, gan) or '?'
-        inter = []
-        for pk in ('year', 'month', 'day', 'hour'):
-            uz = ub.get(pk)
-            if not uz:
-                continue
-            rel = _branch_relation(zhi, uz)
-            if rel:
-                inter.append(f"{zhi}-{uz}{rel}({PILLAR_CN[pk]})")
-        inter_s = '、'.join(inter) if inter else '与四柱地支无冲合刑害,以五行生克论'
+        inter_s = '；'.join(inter) if inter else '与四柱地支无冲合刑害破、不成局,以五行生克论'
         lines.append(f"- Month {m['idx']} {m['ganzhi']} ({m['start']} ~ {m['end']}): "
-                     f"月干{gan}={tg}; 月支{zhi}: {inter_s}")
+                     f"月干{gan}={tg}; {inter_s}")
     return "\n".join(lines)
 
 
-def year_pillar_relation(bazi_json: Dict[str, Any]) -> str:
-    """How 丁未 itself lands on this chart (stem Ten God + branch relations)."""
+def year_pillar_relation(bazi_json: Dict[str, Any], year: int = ANNUAL_YEAR) -> str:
+    """How the year pillar (丁未 by default) lands on this chart (stem Ten God + branch relations)."""
     ub = get_user_branches(bazi_json)
     ds = get_day_stem(bazi_json)
-    notes = [f"- 年干丁 vs day master {ds}: Ten God = {ten_god(ds, '丁') or '?'} "
-             f"(interpret what a {ten_god(ds, '丁') or '?'} year means)."]
+    yg, yz = almanac.year_ganzhi(year)
+    notes = [f"- 年干{yg} vs day master {ds}: Ten God = {ten_god(ds, yg) or '?'} "
+             f"(interpret what a {ten_god(ds, yg) or '?'} year means)."]
+    for e in branch_interactions.scan([yz], ub):
+        text = branch_interactions.describe(e, source='年支')
+        if e['kind'] == '冲':
+            notes.append(f"- **{text}** — 冲太岁 on that pillar.")
+        else:
+            notes.append(f"- {text}.")
     for pk, uz in ub.items():
-        rel = _branch_relation('未', uz)
-        if rel == '冲':
-            notes.append(f"- 年支未 **冲** {PILLAR_CN[pk]}地支{uz} — 冲太岁 on that pillar.")
-        elif rel:
-            notes.append(f"- 年支未 与 {PILLAR_CN[pk]}地支{uz} 相{rel}.")
-        elif uz == '未':
-            notes.append(f"- {PILLAR_CN[pk]}地支即是未 — 值太岁.")
+        if uz == yz:
+            notes.append(f"- {PILLAR_CN[pk]}地支即是{yz} — 值太岁.")
     if len(notes) == 1:
-        notes.append("- 年支未与四柱地支无直接冲合刑害;以土旺之年对命局五行的影响论。")
+        notes.append(f"- 年支{yz}与四柱地支无直接冲合刑害破;"
+                     f"以{ganzhi.ELEMENTS[ganzhi.BRANCH_ELEMENT[ganzhi.branch(yz)]]}旺之年对命局五行的影响论。")
     return "\n".join(notes)
 
 
@@ -235,19 +185,15 @@ def year_pillar_relation(bazi_json: Dict[str, Any]) -> str:
 # Personalized auspicious-day calendar (computed, not AI-generated)
 # ---------------------------------------------------------------------------
 
-def _day_ok_for_user(day: Dict[str, Any], user_branches: Dict[str, str]) -> bool:
-    """A day is excluded if its branch clashes the client's day or year branch,
-    or if the day 'chong' target IS the client's day/year branch."""
-    protect = {user_branches.get('day'), user_branches.get('year')} - {None}
-    if day['chong'] in protect:
-        return False
-    if any(LIU_CHONG.get(day['zhi']) == b for b in protect):
-        return False
-    return True
+def _protected_branches(user_branches: Dict[str, str]) -> List[int]:
+    """Branch indices a favorable day must not clash: the client's day and year
+    branches. (A day whose branch clashes one of them is excluded.)"""
+    out = {ganzhi.branch(user_branches.get(k)) for k in ('day', 'year')}
+    return sorted(out - {-1})
 
 
 def personal_calendar(bazi_json: Dict[str, Any], lang_code: str = 'en',
-                      per_month: int = 8) -> str:
+                      per_month: int = 8, year: int = ANNUAL_YEAR) -> str:
     """Markdown: for each month, the client's personally favorable days
     (generic almanac-good days minus days clashing their chart), plus the
     days they specifically must avoid. Labels follow the report language."""
@@ -260,7 +206,7 @@ def personal_calendar(bazi_json: Dict[str, Any], lang_code: str = 'en',
     star_note = ('【六合】(与您的日支六合,格外有利)' if zh
                  else "[Liu He] (combines with the client's day branch — extra favorable)")
     lines = [
-        "### THE CLIENT'S PERSONAL 2027 DAY CALENDAR",
+        f"### THE CLIENT'S PERSONAL {year} DAY CALENDAR",
         "(pre-computed from the traditional almanac AND this client's own chart: "
         "generically auspicious days that clash this client's day/year branch have "
         "already been REMOVED; 'caution days' are days whose branch clashes the "
@@ -268,18 +214,27 @@ def personal_calendar(bazi_json: Dict[str, Any], lang_code: str = 'en',
         "never invent, add or drop dates. The labels are already in the report "
         "language.)\n",
     ]
-    for m in ALMANAC_2027_MONTHS:
-        mdays = [d for d in ALMANAC_2027_DAYS if m['start'] <= d['d'] <= m['end']]
-        good = [d for d in mdays if d['tags'] and _day_ok_for_user(d, ub)]
-        good.sort(key=lambda d: (0 if LIU_HE.get(d['zhi']) == day_branch else 1, d['d']))
-        pick = sorted(good[:per_month], key=lambda d: d['d'])
-        caution = [d['d'] for d in mdays
-                   if day_branch and LIU_CHONG.get(d['zhi']) == day_branch]
+    # 位图索引：月份 × 日支 × 有无标签的交集，不再逐月扫全年 365 天
+    ix = almanac.index(year)
+    blocked = 0
+    for b in _protected_branches(ub):
+        blocked |= ix.clashing(b)
+    good_all = ix.tagged & ~blocked
+    db = ganzhi.branch(day_branch)
+    he_branch = ganzhi.LIU_HE_OF[db] if db >= 0 else -1
+    he_all = ix.branch[he_branch] if db >= 0 else 0
+    caution_all = ix.clashing(db) if db >= 0 else 0
+    for mi, m in enumerate(ix.months):
+        good = good_all & ix.month[mi]
+        first = ix.pick(good & he_all, per_month)
+        pick = sorted(first + ix.pick(good & ~he_all, per_month - len(first)),
+                      key=lambda d: d['d'])
+        caution = [d['d'] for d in ix.pick(caution_all & ix.month[mi])]
         lines.append(f"\n**Month {m['idx']} — {m['start']} ~ {m['end']} "
                      f"({m['ganzhi']}月)**")
         if pick:
             for d in pick:
-                star = ' ' + star_note if LIU_HE.get(d['zhi']) == day_branch else ''
+                star = ' ' + star_note if ganzhi.branch(d['zhi']) == he_branch else ''
                 tags = ('、' if zh else ', ').join(labels[t] for t in d['tags'])
                 if zh:
                     lines.append(f"- {d['d']}({d['gz']}日):宜 {tags}{star}")
@@ -351,7 +306,7 @@ def build_annual_specific_prompt(
     year_frame = f"""
 ### ⚠ SCOPE ANCHOR — THE {ANNUAL_YEAR_GANZHI} YEAR ONLY ⚠
 This chapter belongs to a dedicated **{ANNUAL_YEAR} Year-Ahead report**.
-The year runs {ALMANAC_2027_MONTHS[0]['start']} → {ALMANAC_2027_MONTHS[-1]['end']}
+The year runs {almanac.months(ANNUAL_YEAR)[0]['start']} → {almanac.months(ANNUAL_YEAR)[-1]['end']}
 (from 立春 {ANNUAL_YEAR} to the eve of 立春 {ANNUAL_YEAR + 1}).
 Everything you write must be scoped to THIS year. Do not drift into other years
 except for brief context. Never invent calendar dates — every date you mention
@@ -359,9 +314,9 @@ must come from the tables provided below.
 
 {annual_month_table()}
 
-{year_pillar_relation(bazi_json)}
-
 {STYLE_RULES}
+
+{year_pillar_relation(bazi_json)}
 """
 
     tone = ("温暖鼓励但要具体,先讲清命理机制再给方向,像一位资深师傅在给客户写信。"
@@ -536,8 +491,8 @@ Then 2-4 paragraphs of connected prose (NOT bullet fields) that must:
 
 1. **Open with the mechanism**: what this month's stem is to the day master
    (use the pre-computed Ten God) and what the month branch does to the four
-   pillars (use the pre-computed 冲/合/刑/害 facts). Explain what that
-   specific interaction touches — which pillar, which life domain, and why.
+   pillars (use the pre-computed 冲/合/刑/害/破 and 半合/三合/三会 facts).
+   Explain what that specific interaction touches — which pillar, which life domain, and why.
 2. **Then the lived month**: career and money, love and people, body and
    mind — woven as narrative that follows FROM the mechanism, not as
    separate labeled fields. A month with a clash on the day pillar reads
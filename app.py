@@ -2,33 +2,57 @@
 # v6.1 - 动态24个月流年预测 + 跨章节一致性
 # 修改要点:
 #   1. 流年预测改为从"今天"起算未来24个月（agnostic of year）
-#   2. 将当前日期、干支时间线、相冲/相合月份预先计算后注入prompt
+#   2. 将当前日期、干支时间线、冲合刑害破 / 成局月份预先计算后注入prompt
 #   3. 旧的 2026_forecast / forecast_2026 自动映射到 forecast
 #   4. 【v6.1新增】支持 previous_chapters 参数：前面章节内容会被注入到
 #      当前章节的 prompt 里，AI 会保持跨章节一致性，不再自相矛盾
 # ========================================================
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, g
 from flask_cors import CORS
 import requests
 import os
+import hmac
 import json
+import threading
 import time
 import traceback
-from datetime import datetime, date, timedelta
+from datetime import datetime, date, timedelta, timezone
+
+import branch_interactions
+import chapter_digest
+import chart_sessions
+import fast_json
+import ganzhi
+import gemini_cache
+import llm_breaker
+import llm_budget
+import llm_cache
+import llm_continue
+import llm_hedge
+import llm_ledger
+import llm_limiter
+import llm_transport
+import prompt_budget
+import prompt_templates
+import singleflight
+import solar_terms
 
 app = Flask(__name__)
+# request.json / jsonify 走 orjson（装了的话），/api/* 接受 gzip 压缩的请求体 —— 见 fast_json
+fast_json.install(app)
+app.wsgi_app = fast_json.DecompressRequests(app.wsgi_app)
 
 CORS(app,
      resources={r"/api/*": {"origins": "*"}},
      methods=["GET", "POST", "OPTIONS"],
-     allow_headers=["Content-Type", "Authorization"],
+     allow_headers=["Content-Type", "Authorization", "Content-Encoding"],
      supports_credentials=False)
 
 @app.after_request
 def after_request(response):
     response.headers.add('Access-Control-Allow-Origin', '*')
-    response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
+    response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization,Content-Encoding')
     response.headers.add('Access-Control-Allow-Methods', 'GET,POST,OPTIONS')
     return response
 
@@ -37,15 +61,23 @@ GOOGLE_GEMINI_API_KEY = os.getenv("GOOGLE_GEMINI_API_KEY")
 SITE_URL = os.getenv("SITE_URL", "https://theqiflow.com")
 APP_NAME = "Bazi Pro Calculator"
 MODEL_ID = "gemini-3.1-pro-preview"
+# 响应头 Server-Timing：总耗时 / 等上游 / 限流排队 / 在途合并等待 / 服务端自身开销（ms）
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1") == "1"
 FORECAST_MONTHS = 24  # 流年预测窗口（农历月数）
+# /api/admin/* 的访问口令；不设则 admin 端点一律拒绝（403）
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
 
 # ---- 报告生成 LLM 供应商切换（默认 gemini，行为与历史版本完全一致）----
 # REPORT_LLM_PROVIDER=deepseek 时走 DeepSeek，失败自动回退 Gemini。
 REPORT_LLM_PROVIDER = os.getenv("REPORT_LLM_PROVIDER", "gemini").strip().lower()
 DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY", "")
 DEEPSEEK_MODEL_ID = os.getenv("DEEPSEEK_MODEL_ID", "deepseek-v4-flash")
-DEEPSEEK_URL = "https://api.deepseek.com/chat/completions"
+# 两个上游地址可改：压测时指向 tools/fake_llm.py 起的假供应商，不花真钱
+DEEPSEEK_URL = os.getenv("DEEPSEEK_URL", "https://api.deepseek.com/chat/completions")
+GEMINI_BASE_URL = gemini_cache.GEMINI_API_BASE
 DEEPSEEK_MAX_TOKENS = int(os.getenv("DEEPSEEK_MAX_TOKENS", "65536"))
+# Gemini 单次输出上限（含 thinking）。builder 给的 max_tokens 是默认值，llm_budget 学到更大需求时最多放到这里。
+GEMINI_MAX_OUTPUT_TOKENS = int(os.getenv("GEMINI_MAX_OUTPUT_TOKENS", "65536"))
 # V4 Flash 只有 low/high/max 三档（无 medium，也无 budget_tokens）。
 # 实测同一章中文：low 思考 409 token / 57s；high 思考 18378 token / 245s。
 # high 多接住了引擎已算好的字段（纳音、地势）并能识别巳酉半合这类结构，值这个钱。
@@ -358,34 +390,10 @@ MODE_CONFIGS = {
 
 # ================= 干支与流年时间线工具 =================
 
-TIAN_GAN = ['甲', '乙', '丙', '丁', '戊', '己', '庚', '辛', '壬', '癸']
-DI_ZHI = ['子', '丑', '寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌', '亥']
+# 干支、五虎遁、冲合都查 ganzhi 的整数表；这里只留节月地支的顺序（寅月起）
 LUNAR_MONTH_ZHI = ['寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌', '亥', '子', '丑']
 
-# 五虎遁元: 年干 -> 正月（寅月）月干
-WU_HU_DUN = {
-    '甲': '丙', '己': '丙',
-    '乙': '戊', '庚': '戊',
-    '丙': '庚', '辛': '庚',
-    '丁': '壬', '壬': '壬',
-    '戊': '甲', '癸': '甲',
-}
-
-# 地支六冲
-CHONG_PAIRS = {
-    '子': '午', '午': '子', '丑': '未', '未': '丑',
-    '寅': '申', '申': '寅', '卯': '酉', '酉': '卯',
-    '辰': '戌', '戌': '辰', '巳': '亥', '亥': '巳',
-}
-
-# 地支六合
-LIU_HE = {
-    '子': '丑', '丑': '子', '寅': '亥', '亥': '寅',
-    '卯': '戌', '戌': '卯', '辰': '酉', '酉': '辰',
-    '巳': '申', '申': '巳', '午': '未', '未': '午',
-}
-
-# 节气近似日（实际每年浮动 ±1 天，生产环境建议接节气库）
+# 节气近似日（实际每年浮动 ±1 天）：只在 solar_terms 精确表（1900–2100）之外兜底
 # 顺序: 寅月->丑月
 SOLAR_TERMS = [
     (2, 4, '立春'), (3, 6, '惊蛰'), (4, 5, '清明'), (5, 6, '立夏'),
@@ -396,8 +404,7 @@ SOLAR_TERMS = [
 
 def ganzhi_year(lunar_year):
     """农历年干支（已过立春）。1984=甲子年作为基准。"""
-    offset = lunar_year - 1984
-    return TIAN_GAN[offset % 10] + DI_ZHI[offset % 12]
+    return ganzhi.name(ganzhi.year_pillar(lunar_year))
 
 
 def ganzhi_month(lunar_year, month_idx):
@@ -405,15 +412,15 @@ def ganzhi_month(lunar_year, month_idx):
     月柱干支
     month_idx: 0=寅月, 1=卯月, ..., 11=丑月
     """
-    year_gan = ganzhi_year(lunar_year)[0]
-    first_gan = WU_HU_DUN[year_gan]
-    gan = TIAN_GAN[(TIAN_GAN.index(first_gan) + month_idx) % 10]
-    zhi = DI_ZHI[(2 + month_idx) % 12]  # 寅 索引=2
-    return gan + zhi
+    return ganzhi.name(ganzhi.month_pillar(ganzhi.year_pillar(lunar_year) % 10, month_idx))
 
 
 def _term_date(lunar_year, idx):
-    """该农历月起始的公历日期"""
+    """该农历月起始的公历日期（交节当天，北京时间）"""
+    try:
+        return solar_terms.term_date(lunar_year, idx)
+    except ValueError:
+        pass
     m, d, _ = SOLAR_TERMS[idx]
     if idx == 11:  # 丑月（小寒）在公历下一年1月
         return date(lunar_year + 1, m, d)
@@ -422,6 +429,10 @@ def _term_date(lunar_year, idx):
 
 def locate_lunar_month(g_date):
     """公历日期 -> (lunar_year, month_idx)"""
+    try:
+        return solar_terms.locate(g_date)
+    except ValueError:
+        pass
     y = g_date.year
     # 立春前属上一年的丑月
     if g_date < date(y, 2, 4):
@@ -497,50 +508,40 @@ def get_user_branches(bazi_data):
 
 
 def find_key_interactions(timeline, user_branches):
-    """找出窗口内月支与命主四柱的相冲、相合月份"""
-    user_branches = [b for b in user_branches if b]
-    chong_months = []
-    he_months = []
-    
-    for t in timeline:
-        mz = t['month_zhi']
-        # 相冲
-        for ub in user_branches:
-            if CHONG_PAIRS.get(ub) == mz:
-                chong_months.append({
-                    'step': t['step'],
-                    'date_range': f"{t['gregorian_start']} ~ {t['gregorian_end']}",
-                    'month_ganzhi': t['month_ganzhi'],
-                    'description': f"月支{mz}冲命主{ub}",
-                })
-                break
-        # 六合
-        for ub in user_branches:
-            if LIU_HE.get(ub) == mz:
-                he_months.append({
-                    'step': t['step'],
-                    'date_range': f"{t['gregorian_start']} ~ {t['gregorian_end']}",
-                    'month_ganzhi': t['month_ganzhi'],
-                    'description': f"月支{mz}与命主{ub}六合",
-                })
-                break
-    
-    return {'chong': chong_months, 'he': he_months}
+    """窗口内每个流月的月支对命主四柱的全部作用（冲合刑害破、半合三合三会，流年支可参与成局）。
+    返回 branch_interactions 的事件列表，每条另带 step / date_range / month_ganzhi / description。"""
+    events = branch_interactions.scan([t['month_zhi'] for t in timeline], user_branches,
+                                      flow_years=[t['year_ganzhi'][1] for t in timeline])
+    for e in events:
+        t = timeline[e.pop('i')]
+        e.update(step=t['step'], date_range=f"{t['gregorian_start']} ~ {t['gregorian_end']}",
+                 month_ganzhi=t['month_ganzhi'], description=branch_interactions.describe(e))
+    return events
 
 
-def format_key_interactions(interactions):
-    """格式化关键月份给prompt"""
+def interaction_steps(events, kinds):
+    """事件里出现过 kinds 中任一种作用的流月序号。"""
+    return {e['step'] for e in events if e['kind'] in kinds}
+
+
+def format_key_interactions(events):
+    """格式化关键月份给prompt：同一个月的多条作用并成一行"""
     parts = []
-    if interactions['chong']:
-        parts.append("**相冲月份（需谨慎应对）**:")
-        for c in interactions['chong'][:10]:
-            parts.append(f"- 第{c['step']}月 {c['month_ganzhi']} ({c['date_range']}): {c['description']}")
-    if interactions['he']:
-        parts.append("\n**相合月份（关系/合作较有利）**:")
-        for h in interactions['he'][:10]:
-            parts.append(f"- 第{h['step']}月 {h['month_ganzhi']} ({h['date_range']}): {h['description']}")
+    for kinds, title in ((branch_interactions.TENSE, "**冲刑害破月份（需谨慎应对）**:"),
+                         (branch_interactions.HARMONY,
+                          "**合局月份（六合/半合/三合/三会，关系/合作较有利）**:")):
+        months = {}
+        for e in events:
+            if e['kind'] in kinds:
+                months.setdefault(e['step'], []).append(e)
+        if not months:
+            continue
+        parts.append(("\n" if parts else "") + title)
+        for step, evs in months.items():
+            parts.append(f"- 第{step}月 {evs[0]['month_ganzhi']} ({evs[0]['date_range']}): "
+                         + "；".join(e['description'] for e in evs))
     if not parts:
-        return "  本窗口内无明显与命主四柱相冲/相合的月份。"
+        return "  本窗口内无明显与命主四柱冲合刑害、成局的月份。"
     return "\n".join(parts)
 
 
@@ -553,22 +554,80 @@ def get_forecast_years_summary(timeline):
             seen.append(key)
     return "、".join(f"{y}年（{gz}）" for y, gz in seen)
 
+
+# 流年时间线只在交节（换月）时才变：按 (起始节月, 月数) 缓存时间线和给 prompt 的渲染，
+# 过了下一个节自然换键，旧条目顺手清掉。健康检查和每章 forecast 都从这里取，不再每次重建。
+_timeline_cache = {}        # (lunar_year, month_idx, num_months) -> entry
+_timeline_lock = threading.Lock()
+_timeline_counters = {"hits": 0, "builds": 0}
+
+
+def forecast_timeline(today=None, num_months=FORECAST_MONTHS):
+    """today 所在节月起 num_months 个月的时间线（缓存）。
+
+    返回 {"timeline", "prompt", "years", "valid_until"}，valid_until 是下一个节的日期
+    （那天起换新条目）。调用方只读，不要改里面的 list / dict。
+    """
+    today = today or datetime.now().date()
+    key = locate_lunar_month(today) + (num_months,)
+    entry = _timeline_cache.get(key)
+    if entry is not None:
+        with _timeline_lock:
+            _timeline_counters["hits"] += 1
+        return entry
+    timeline = build_forecast_timeline(today, num_months)
+    entry = {
+        "timeline": timeline,
+        "prompt": format_forecast_timeline_for_prompt(timeline),
+        "years": get_forecast_years_summary(timeline),
+        "valid_until": (date.fromisoformat(timeline[0]['gregorian_end'])
+                        + timedelta(days=1)).isoformat() if timeline else today.isoformat(),
+    }
+    with _timeline_lock:
+        _timeline_counters["builds"] += 1
+        for k in [k for k, e in _timeline_cache.items() if e["valid_until"] <= today.isoformat()]:
+            del _timeline_cache[k]
+        _timeline_cache[key] = entry
+    return entry
+
+
+def forecast_timeline_prompt(timeline):
+    """format_forecast_timeline_for_prompt，时间线是缓存里那份（同起点同长度）时直接取渲染好的。"""
+    if timeline:
+        t0 = timeline[0]
+        key = (t0['lunar_year'], (ganzhi.branch(t0['month_zhi']) - 2) % 12, len(timeline))
+        entry = _timeline_cache.get(key)
+        if entry is not None and entry["timeline"][0]['gregorian_start'] == t0['gregorian_start']:
+            return entry["prompt"]
+    return format_forecast_timeline_for_prompt(timeline)
+
+
+def forecast_timeline_stats():
+    with _timeline_lock:
+        return dict(_timeline_counters, entries=len(_timeline_cache))
+
 # ================= 工具函数 =================
 
-def format_previous_chapters_context(previous_chapters):
+def format_previous_chapters_context(previous_chapters, mode=None):
     """
     v6.1 新增：把前面已经生成的章节内容格式化成 prompt 上下文，
     用于跨章节一致性。worker 端会在调用第 N 章时把前 N-1 章传过来。
 
     previous_chapters: list of {'type': str, 'content': str}
+    mode: 'digest'（默认，CHAPTER_DIGEST_MODE）只带每章的已确立结论（chapter_digest）；
+          'full' 整章原文回灌（旧做法）。结论抽不出来的章节即使在 digest 模式下也带全文。
     Returns: 一段可以直接拼进 system prompt 的字符串（无内容时返回空）
     """
     if not previous_chapters:
         return ""
 
+    mode = (mode or chapter_digest.CHAPTER_DIGEST_MODE).strip().lower()
+    use_digest = mode != "full"
+
     parts = [
         "",
-        "## PREVIOUS CHAPTERS — AUTHORITATIVE CONTEXT 前面章节已确立的内容",
+        ("## PREVIOUS CHAPTERS — ESTABLISHED FACTS 前面章节已确立的结论" if use_digest
+         else "## PREVIOUS CHAPTERS — AUTHORITATIVE CONTEXT 前面章节已确立的内容"),
         "",
         "The following chapters have ALREADY been generated for this same client.",
         "You MUST read them and ensure your current chapter does NOT contradict",
@@ -585,17 +644,49 @@ def format_previous_chapters_context(previous_chapters):
         "以保持一致。建立在已有章节之上，不要重新评估基础判断。",
         "",
     ]
+    if use_digest:
+        parts += [
+            "Below are the conclusions extracted from each chapter, quoted from its text.",
+            "以下为各章原文中摘出的结论句。",
+            "",
+        ]
+    full_chars = used_chars = 0
     for ch in previous_chapters:
-        parts.append(f"### Previously in chapter '{ch.get('type', '?')}':")
+        content = ch.get('content', '').strip()
+        full_chars += len(content)
+        digest = chapter_digest.digest(content) if use_digest else None
+        body = chapter_digest.render(digest) if digest else content
+        used_chars += len(body)
+        label = "Established in" if digest else "Previously in"
+        parts.append(f"### {label} chapter '{ch.get('type', '?')}':")
         parts.append("")
-        parts.append(ch.get('content', '').strip())
+        parts.append(body)
         parts.append("")
         parts.append("---")
         parts.append("")
 
+    if use_digest:
+        print(f"Previous chapters digest: {full_chars} → {used_chars} chars "
+              f"({len(previous_chapters)} chapter(s))")
     return "\n".join(parts)
 
 
+def previous_chapters_trims(previous_chapters, mode=None):
+    """prompt_budget 超预算时前文的逐步缩减：全文先换成摘要，再从最早的一章开始丢，
+    至少留最近的 PROMPT_BUDGET_KEEP_CHAPTERS 章。"""
+    mode = (mode or chapter_digest.CHAPTER_DIGEST_MODE).strip().lower()
+    if mode == "full":
+        yield format_previous_chapters_context(previous_chapters, "digest")
+    keep = max(0, prompt_budget.PROMPT_BUDGET_KEEP_CHAPTERS)
+    for k in range(1, len(previous_chapters) - keep + 1):
+        yield format_previous_chapters_context(previous_chapters[k:], "digest")
+
+
+def _with_prompt_meta(ai_result, prompt_meta):
+    """ask_ai 的 meta 加上 prompt_budget 的按块 token 计数（响应里的 meta.prompt）。"""
+    return dict(ai_result.get("meta") or {}, prompt=prompt_meta)
+
+
 def get_gender_instruction(gender, lang_code):
     """获取性别相关的解读指令"""
     rule_lang = "zh" if lang_code in ("zh", "zh-tw") else "en"
@@ -821,30 +912,172 @@ def _age_year_table(bazi_json):
                 "conversion in the report.)")
 
 
-def ask_ai(system_prompt, user_prompt, max_tokens=16000):
-    """统一 LLM 入口：按 REPORT_LLM_PROVIDER 分发，DeepSeek 失败自动回退 Gemini。"""
+def _client_facts(name, bazi_json, previous_context="", label=None, age_table=None):
+    """本次请求专属的客户事实，拼在 user prompt 末尾。
+
+    ⚠️ 供应商的前缀缓存按「从第一个 token 起一字不差」命中：姓名、日主强弱、
+       带当天日期的年龄表以前嵌在 system prompt 中段，每个客户（甚至每天）都把
+       后面几千 token 的格式规则、模式说明一起变成未命中。现在 system prompt 只随
+       (产品, 模式, 语言, 性别) 变化，这些会变的事实统一放到最后。
+    age_table: 会话里缓存的年龄表（见 chart_sessions）；不给就现算。
+    """
+    who = f" — {label}" if label else ""
+    if age_table is None:
+        age_table = _age_year_table(bazi_json)
+    return f"""
+
+## CLIENT FACTS 客户事实{who}
+
+**Name 姓名**: {name}
+**Day Master strength 日主强弱（引擎判定，不得推翻）**: **{str(bazi_json.get('dayMasterStrength', 'unknown')).upper()}**
+**Age-year table 年龄年份对照**: {age_table}
+
+{previous_context}
+"""
+
+
+def ask_ai(system_prompt, user_prompt, max_tokens=16000, fresh=False, tag=None):
+    """统一 LLM 入口：按 REPORT_LLM_PROVIDER 分发，DeepSeek 失败自动回退 Gemini。
+
+    fresh=True：客户要求重写，跳过应答缓存（见 llm_cache）。
+    tag = {"product", "section", "mode", "language"}：章节标签，对冲策略（llm_hedge）和
+    自适应 max_tokens（llm_budget）都按它分桶；不带 tag 的内部调用用默认预算。
+    成功时结果里带 meta = {provider, model, cache: hit/miss/bypass}。
+
+    DeepSeek 为主且 Gemini 可用时走对冲：DeepSeek 到阈值还没出 token / 没写完，
+    并行拉起 Gemini，先合格者胜；策略为 off 时才是原来的顺序回退。
+
+    熔断（llm_breaker）：哪家熔断了就不碰它，直接走另一家，也不对冲。
+    """
+    deepseek_ok = bool(DEEPSEEK_API_KEY) and not llm_breaker.is_open("deepseek")
+    gemini_ok = bool(GOOGLE_GEMINI_API_KEY) and not llm_breaker.is_open("gemini")
+    result = None
     if REPORT_LLM_PROVIDER == "deepseek" and DEEPSEEK_API_KEY:
-        result = _ask_deepseek(system_prompt, user_prompt)
+        if deepseek_ok:
+            policy = llm_hedge.policy_name(tag, max_tokens)
+            if llm_hedge.LLM_HEDGE_ENABLED and gemini_ok and policy != "off":
+                return _ask_hedged(system_prompt, user_prompt, max_tokens, fresh, tag, policy)
+            result = _ask_deepseek(system_prompt, user_prompt, fresh=fresh, tag=tag)
+            if result and "choices" in result:
+                return result
+            print("DeepSeek failed after retries -> falling back to Gemini")
+        else:
+            print("DeepSeek circuit open -> straight to Gemini")
+    elif not gemini_ok and deepseek_ok:
+        print("Gemini circuit open -> routing to DeepSeek")
+        result = _ask_deepseek(system_prompt, user_prompt, fresh=fresh, tag=tag)
         if result and "choices" in result:
             return result
-        print("DeepSeek failed after retries -> falling back to Gemini")
-    return _ask_gemini(system_prompt, user_prompt, max_tokens)
-
-
-def _ask_deepseek(system_prompt, user_prompt):
+    fallback = _ask_gemini(system_prompt, user_prompt, max_tokens, fresh=fresh, tag=tag)
+    if "choices" not in fallback and result and result.get("retry_after"):
+        return result   # 两边都没成、DeepSeek 是排队满：回它，调用方能拿到 429 + Retry-After
+    return fallback
+
+
+def _ask_hedged(system_prompt, user_prompt, max_tokens, fresh, tag, policy):
+    """DeepSeek 主、Gemini 备的对冲调用；两路都走流式接口，便于观测首 token 和中途取消。"""
+    # 两路在各自线程里读流，请求线程这段时间全在等上游：整段记成 upstream
+    t0 = time.time()
+    # ⚠️ llm_limiter.patient() 是线程局部的：jobs 的请求线程里设了，对冲腿的线程看不到，
+    #    会被当成在线请求按队长拒掉。在这里取下来，每一路进腿再挂上
+    patient = llm_limiter.is_patient()
+    winner, hedged, errors, retry_after = llm_hedge.race(
+        ("deepseek", lambda attempt: _leg_stream(patient, _stream_deepseek(
+            system_prompt, user_prompt, fresh=fresh, tag=tag, attempt=attempt)), 3,
+         DEEPSEEK_BUDGET),
+        ("gemini", lambda attempt: _leg_stream(patient, _stream_gemini(
+            system_prompt, user_prompt, max_tokens, fresh=fresh, tag=tag, attempt=attempt)), 1),
+        tag, policy)
+    llm_transport.account("upstream", time.time() - t0)
+    if winner is None:
+        print(f"Hedged call failed: {errors}")
+        if retry_after:
+            # 有一路是排队满：同 ask_ai 的顺序回退，带上 retry_after，端点回 429 + Retry-After
+            return {"error": "All providers failed", "details": errors,
+                    "retry_after": retry_after}
+        return {"error": "All providers failed", "details": errors}
+    print(f"Hedged call won by {winner.provider} (hedged={hedged}, policy={policy})")
+    return {"choices": [{"message": {"content": winner.content}}],
+            "meta": {"provider": winner.provider,
+                     "model": DEEPSEEK_MODEL_ID if winner.provider == "deepseek" else MODEL_ID,
+                     "cache": winner.info.get("cache"),
+                     "continuations": winner.info.get("continuations", 0),
+                     "hedged": hedged, "hedge_policy": policy}}
+
+
+def _leg_stream(patient, gen):
+    """对冲腿的事件生成器在腿自己的线程里迭代：需要时在那边重新进入 llm_limiter.patient()。"""
+    if not patient:
+        yield from gen
+        return
+    with llm_limiter.patient():
+        yield from gen
+
+
+# 缓存键用的是 nominal 预算（DeepSeek 全局值 / builder 给 Gemini 的值），不是 llm_budget 学到的值：
+# 完整收尾的应答与实际给了多少预算无关，键跟着学习结果漂移只会让缓存白白失效。
+def _deepseek_cache_key(system_prompt, user_prompt):
+    return llm_cache.key("deepseek", DEEPSEEK_MODEL_ID, DEEPSEEK_REASONING_EFFORT,
+                         DEEPSEEK_MAX_TOKENS, system_prompt + "\n\n" + user_prompt)
+
+
+def _gemini_cache_key(system_prompt, user_prompt, max_tokens):
+    return llm_cache.key("gemini", MODEL_ID, "", max_tokens,
+                         system_prompt + "\n\n" + user_prompt, temperature=0.75)
+
+
+def _cached_result(content, provider, model):
+    return {"choices": [{"message": {"content": content}}],
+            "meta": {"provider": provider, "model": model, "cache": "hit"}}
+
+
+def _busy_result(e):
+    """llm_limiter 排不上队：和其它失败一样回 error，额外带 retry_after 给端点转 429。"""
+    print(f"LLM limiter: {e}")
+    return {"error": f"Upstream busy: {e}", "retry_after": e.retry_after}
+
+
+def _ai_error_response(ai_result):
+    """章节端点的 AI 失败出口：排队满的回 429 + Retry-After，其它照旧 500。"""
+    if ai_result.get("retry_after"):
+        return (jsonify(ai_result), 429,
+                {"Retry-After": str(ai_result["retry_after"])})
+    return jsonify(ai_result), 500
+
+
+def _ask_deepseek(system_prompt, user_prompt, fresh=False, tag=None):
     """调用 DeepSeek（OpenAI 兼容格式）。
 
     防线（推理模型专属，缺一不可）：
     - 空 content 重试：preview 版曾有空响应问题，正式版保留兜底
-    - finish_reason=length 重试：思考过程吃掉输出预算时章节会被截断，
-      截断的报告绝不能交付
+    - finish_reason=length：思考过程吃掉输出预算时章节会被截断，截断的报告绝不能交付。
+      先保留已写部分续写（llm_continue），续不上才整章重试
     """
+    cache_key = _deepseek_cache_key(system_prompt, user_prompt)
+    cached = llm_cache.get(cache_key, fresh=fresh)
+    if cached is not None:
+        return _cached_result(cached, "deepseek", DEEPSEEK_MODEL_ID)
+    try:
+        ticket = llm_limiter.acquire("deepseek", tag)
+    except llm_limiter.LimiterBusy as e:
+        return _busy_result(e)
+    try:
+        return _ask_deepseek_upstream(cache_key, system_prompt, user_prompt, fresh, tag)
+    finally:
+        llm_limiter.release(ticket)
+
+
+def _ask_deepseek_upstream(cache_key, system_prompt, user_prompt, fresh, tag):
+    """缓存未命中、已拿到限流名额（llm_limiter）之后的真正上游调用。"""
+    if not llm_breaker.allow("deepseek"):
+        return {"error": "DeepSeek circuit open"}
+    budget = llm_budget.choose(tag, "deepseek", DEEPSEEK_MAX_TOKENS, DEEPSEEK_MAX_TOKENS)
     payload = {
         "model": DEEPSEEK_MODEL_ID,
         "messages": [
             {"role": "user", "content": system_prompt + "\n\n" + user_prompt}
         ],
-        "max_tokens": DEEPSEEK_MAX_TOKENS,
+        "max_tokens": budget,
         "reasoning_effort": DEEPSEEK_REASONING_EFFORT,
         "thinking": {"type": "enabled"},
     }
@@ -859,42 +1092,131 @@ def _ask_deepseek(system_prompt, user_prompt):
         if time.time() - started > DEEPSEEK_BUDGET:
             last_err = f"budget exhausted after {int(time.time() - started)}s ({last_err})"
             break
+        # 别的 worker 已经把它熔断了（或本次就是半开探测且已失败）：不再硬试，交 Gemini
+        if attempt > 1 and llm_breaker.is_open("deepseek"):
+            last_err = f"circuit opened ({last_err})"
+            break
+        t0 = time.time()
         try:
             print(f"Calling DeepSeek {DEEPSEEK_MODEL_ID} (attempt {attempt})")
-            response = requests.post(DEEPSEEK_URL, json=payload,
-                                     headers=headers, timeout=DEEPSEEK_TIMEOUT)
+            response = llm_transport.post(DEEPSEEK_URL, json=payload,
+                                          headers=headers, timeout=DEEPSEEK_TIMEOUT)
             response.raise_for_status()
             result = response.json()
             choice = result["choices"][0]
             content = (choice.get("message") or {}).get("content") or ""
             finish_reason = choice.get("finish_reason", "")
             usage = result.get("usage", {})
+            _ledger_deepseek(tag, usage, time.time() - t0, attempt, 0, finish_reason, content)
             print(f"DeepSeek ok: finish={finish_reason}, "
                   f"out={usage.get('completion_tokens')} "
                   f"(reasoning={ (usage.get('completion_tokens_details') or {}).get('reasoning_tokens') })")
+            llm_budget.record(tag, "deepseek", DEEPSEEK_MAX_TOKENS, budget,
+                              usage.get("completion_tokens"),
+                              (usage.get("completion_tokens_details") or {}).get("reasoning_tokens"),
+                              truncated=finish_reason == "length")
             if not content.strip():
                 last_err = "empty content"
+                llm_breaker.record("deepseek", "empty")
                 print(f"DeepSeek attempt {attempt}: empty content, retrying")
                 continue
+            continuations = 0
             if finish_reason == "length":
-                last_err = "truncated (finish_reason=length)"
-                print(f"DeepSeek attempt {attempt}: output truncated, retrying")
-                continue
-            return {"choices": [{"message": {"content": content}}]}
+                llm_breaker.record("deepseek", "truncated")
+                print(f"DeepSeek attempt {attempt}: output truncated at {len(content)} chars, "
+                      f"continuing")
+                content, continuations = _deepseek_continue(payload, headers, content, started,
+                                                            tag, attempt)
+                if content is None:
+                    last_err = "truncated (finish_reason=length)"
+                    print(f"DeepSeek attempt {attempt}: continuation failed, retrying")
+                    continue
+            else:
+                llm_breaker.record("deepseek", "ok")
+            llm_cache.put(cache_key, "deepseek", DEEPSEEK_MODEL_ID, content)
+            return {"choices": [{"message": {"content": content}}],
+                    "meta": {"provider": "deepseek", "model": DEEPSEEK_MODEL_ID,
+                             "cache": "bypass" if fresh else "miss",
+                             "continuations": continuations}}
         except Exception as e:
             last_err = str(e)
+            llm_breaker.record("deepseek", "error")
+            llm_ledger.record(tag, "deepseek", DEEPSEEK_MODEL_ID, DEEPSEEK_REASONING_EFFORT,
+                              None, time.time() - t0, attempt, outcome="error")
             print(f"DeepSeek attempt {attempt} error: {e}")
     return {"error": f"DeepSeek failed: {last_err}"}
 
 
-def _ask_gemini(system_prompt, user_prompt, max_tokens=16000):
-    """调用 Gemini API"""
-    if not GOOGLE_GEMINI_API_KEY:
-        print("ERROR: GOOGLE_GEMINI_API_KEY is missing!")
-        return {"error": "Server Configuration Error: API Key missing"}
-
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/{MODEL_ID}:generateContent?key={GOOGLE_GEMINI_API_KEY}"
+def _deepseek_continue(payload, headers, partial, started, tag=None, attempt=1):
+    """截断后续写：返回 (拼好的全文, 续写轮数)；LLM_MAX_CONTINUATIONS 轮内收不了尾返回 (None, n)。
 
+    started 是 _ask_deepseek_upstream 开跑的时刻：续写也算在 DEEPSEEK_BUDGET 里，超了就不再续。
+    续写请求本身出错也按收不了尾处理：台账 / 熔断在这里各记一次，不往外抛（外层再记就重复了）。"""
+    prompt = payload["messages"][0]["content"]
+    text = partial
+    for n in range(1, llm_continue.LLM_MAX_CONTINUATIONS + 1):
+        if time.time() - started > DEEPSEEK_BUDGET:
+            print(f"DeepSeek continuation {n}: budget exhausted after {int(time.time() - started)}s")
+            return None, n - 1
+        body = dict(payload, messages=llm_continue.messages(prompt, text))
+        t0 = time.time()
+        try:
+            response = llm_transport.post(DEEPSEEK_URL, json=body,
+                                          headers=headers, timeout=DEEPSEEK_TIMEOUT)
+            response.raise_for_status()
+            result = response.json()
+        except Exception as e:
+            llm_breaker.record("deepseek", "error")
+            llm_ledger.record(tag, "deepseek", DEEPSEEK_MODEL_ID, DEEPSEEK_REASONING_EFFORT,
+                              None, time.time() - t0, attempt, n, outcome="error")
+            print(f"DeepSeek continuation {n} error: {e}")
+            return None, n
+        choice = result["choices"][0]
+        more = (choice.get("message") or {}).get("content") or ""
+        finish_reason = choice.get("finish_reason", "")
+        _ledger_deepseek(tag, result.get("usage"), time.time() - t0, attempt, n,
+                         finish_reason, more)
+        text = llm_continue.stitch(text, more)
+        print(f"DeepSeek continuation {n}: +{len(more)} chars, finish={finish_reason}")
+        if finish_reason != "length" and more.strip():
+            llm_breaker.record("deepseek", "ok")
+            return text, n
+        llm_breaker.record("deepseek", "truncated" if more.strip() else "empty")
+    return None, llm_continue.LLM_MAX_CONTINUATIONS
+
+
+def _outcome(content, truncated):
+    """台账 / 熔断共用的结果分类。"""
+    if not content.strip():
+        return "empty"
+    return "truncated" if truncated else "ok"
+
+
+def _ledger_deepseek(tag, usage, latency, attempt, continuation, finish_reason, content):
+    llm_ledger.record(tag, "deepseek", DEEPSEEK_MODEL_ID, DEEPSEEK_REASONING_EFFORT, usage,
+                      latency, attempt, continuation, finish_reason,
+                      _outcome(content, finish_reason == "length"))
+
+
+def _ledger_gemini(tag, um, latency, finish_reason, content, attempt=1):
+    llm_ledger.record(tag, "gemini", MODEL_ID, "", um, latency, attempt, 0, finish_reason,
+                      _outcome(content, finish_reason != "STOP"))
+
+
+def _record_gemini_usage(tag, nominal, max_tokens, um, finish_reason):
+    thoughts = um.get("thoughtsTokenCount") or 0
+    llm_budget.record(tag, "gemini", nominal, max_tokens,
+                      (um.get("candidatesTokenCount") or 0) + thoughts, thoughts,
+                      truncated=finish_reason == "MAX_TOKENS")
+
+
+def _gemini_post(url, system_prompt, user_prompt, max_tokens, timeout, stream=False):
+    """发 Gemini 生成请求。显式缓存可用时 system prompt 走 cachedContent，只发 user prompt；
+    缓存名字失效（400/403/404）就作废它、改发完整 prompt 再来一次。
+
+    返回 (response, explicit)。
+    """
+    cached_content = gemini_cache.lookup(GOOGLE_GEMINI_API_KEY, MODEL_ID, system_prompt)
     payload = {
         "contents": [
             {"role": "user", "parts": [{"text": system_prompt + "\n\n" + user_prompt}]}
@@ -904,29 +1226,423 @@ def _ask_gemini(system_prompt, user_prompt, max_tokens=16000):
             "maxOutputTokens": max_tokens
         }
     }
+    if cached_content:
+        response = llm_transport.post(
+            url, json=dict(payload, cachedContent=cached_content,
+                           contents=[{"role": "user", "parts": [{"text": user_prompt}]}]),
+            timeout=timeout, stream=stream)
+        if response.status_code not in (400, 403, 404):
+            return response, True
+        print(f"Gemini cached content {cached_content} rejected "
+              f"({response.status_code}), retrying without it")
+        response.close()
+        gemini_cache.invalidate(cached_content)
+    return llm_transport.post(url, json=payload, timeout=timeout, stream=stream), False
+
+
+def _ask_gemini(system_prompt, user_prompt, max_tokens=16000, fresh=False, tag=None):
+    """调用 Gemini API"""
+    if not GOOGLE_GEMINI_API_KEY:
+        print("ERROR: GOOGLE_GEMINI_API_KEY is missing!")
+        return {"error": "Server Configuration Error: API Key missing"}
+
+    cache_key = _gemini_cache_key(system_prompt, user_prompt, max_tokens)
+    cached = llm_cache.get(cache_key, fresh=fresh)
+    if cached is not None:
+        return _cached_result(cached, "gemini", MODEL_ID)
+    try:
+        ticket = llm_limiter.acquire("gemini", tag)
+    except llm_limiter.LimiterBusy as e:
+        return _busy_result(e)
+    try:
+        return _ask_gemini_upstream(cache_key, system_prompt, user_prompt, max_tokens,
+                                    fresh, tag)
+    finally:
+        llm_limiter.release(ticket)
+
+
+def _ask_gemini_upstream(cache_key, system_prompt, user_prompt, max_tokens, fresh, tag):
+    if not llm_breaker.allow("gemini"):
+        return {"error": "Gemini circuit open"}
+    nominal, max_tokens = max_tokens, llm_budget.choose(tag, "gemini", max_tokens,
+                                                        GEMINI_MAX_OUTPUT_TOKENS)
 
+    url = f"{GEMINI_BASE_URL}/models/{MODEL_ID}:generateContent?key={GOOGLE_GEMINI_API_KEY}"
+
+    t0 = time.time()
     try:
         print(f"Calling Gemini API with model: {MODEL_ID}, max_tokens: {max_tokens}")
-        response = requests.post(url, json=payload, timeout=360)
+        response, explicit = _gemini_post(url, system_prompt, user_prompt, max_tokens, 360)
         print(f"Gemini response status: {response.status_code}")
         response.raise_for_status()
         result = response.json()
-        content = result["candidates"][0]["content"]["parts"][0]["text"]
-        # 隐式缓存命中监控：cachedContentTokenCount>0 说明 90% 输入折扣在生效
+        candidate = result["candidates"][0]
+        content = candidate["content"]["parts"][0]["text"]
+        # 只缓存正常收尾的应答；MAX_TOKENS 截断的照旧返回，但不能让重试再拿到它
+        if candidate.get("finishReason") == "STOP":
+            llm_breaker.record("gemini", "ok" if content.strip() else "empty")
+            llm_cache.put(cache_key, "gemini", MODEL_ID, content)
+        else:
+            llm_breaker.record("gemini", "truncated")
+        # 前缀缓存命中监控：cachedContentTokenCount>0 说明输入折扣在生效
         um = result.get("usageMetadata", {})
         print(f"Gemini usage: prompt={um.get('promptTokenCount')}, "
-              f"cached={um.get('cachedContentTokenCount', 0)}, "
+              f"cached={um.get('cachedContentTokenCount', 0)}"
+              f"{' (explicit)' if explicit else ''}, "
               f"out={um.get('candidatesTokenCount')}")
-        return {"choices": [{"message": {"content": content}}]}
+        _record_gemini_usage(tag, nominal, max_tokens, um, candidate.get("finishReason"))
+        gemini_cache.record(tag, um, explicit)
+        _ledger_gemini(tag, um, time.time() - t0, candidate.get("finishReason", ""), content)
+        return {"choices": [{"message": {"content": content}}],
+                "meta": {"provider": "gemini", "model": MODEL_ID,
+                         "cache": "bypass" if fresh else "miss"}}
     except requests.exceptions.HTTPError as http_err:
+        llm_breaker.record("gemini", "error")
+        llm_ledger.record(tag, "gemini", MODEL_ID, "", None, time.time() - t0, outcome="error")
         print(f"HTTP Error: {http_err}")
         print(f"Response body: {response.text}")
         return {"error": f"HTTP Error: {str(http_err)}", "details": response.text}
     except Exception as e:
+        llm_breaker.record("gemini", "error")
+        llm_ledger.record(tag, "gemini", MODEL_ID, "", None, time.time() - t0, outcome="error")
         print(f"Gemini API Error: {str(e)}")
         return {"error": str(e)}
 
 
+# ================= 流式输出（SSE） =================
+# 同步模式下一章要阻塞 worker 245–550s，期间一个字节都不回；worker 侧一次超时就整章白写。
+# 流式模式走各家的 streaming API，token 一到就转发，首字节从几分钟降到几秒，
+# worker 可以边收边落盘。事件序列：
+#   ("delta", text)     —— 正文增量
+#   ("thinking", None)  —— DeepSeek 思考链在走（不转发思考内容，只当心跳）
+#   ("done", {"finish_reason", "provider"})
+
+class StreamError(Exception):
+    """流式调用失败。emitted=True 表示失败前已经转发过正文，不能再换供应商重来。
+    retry_after 只在 llm_limiter 排不上队时有值（同 _busy_result）。"""
+
+    def __init__(self, message, emitted=False, retry_after=None):
+        super().__init__(message)
+        self.emitted = emitted
+        self.retry_after = retry_after
+
+
+def _iter_sse_data(response):
+    """逐条取上游 SSE 的 data 载荷（已 json 解析），遇到 [DONE] 结束。"""
+    # text/event-stream 常不带 charset，requests 会按 ISO-8859-1 解码 —— 中文全成乱码
+    response.encoding = 'utf-8'
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith('data:'):
+            continue
+        data = line[5:].strip()
+        if data == '[DONE]':
+            return
+        yield json.loads(data)
+
+
+def _stream_deepseek(system_prompt, user_prompt, fresh=False, tag=None, attempt=1):
+    """DeepSeek 流式（OpenAI 兼容 chunk 格式）。attempt = 调用方（对冲腿）的第几次尝试，记台账用。"""
+    cache_key = _deepseek_cache_key(system_prompt, user_prompt)
+    cached = llm_cache.get(cache_key, fresh=fresh)
+    if cached is not None:
+        yield "delta", cached
+        yield "done", {"finish_reason": "stop", "provider": "deepseek", "cache": "hit"}
+        return
+    try:
+        ticket = llm_limiter.acquire("deepseek", tag)
+    except llm_limiter.LimiterBusy as e:
+        raise StreamError(str(e), retry_after=e.retry_after)
+    try:
+        yield from _stream_deepseek_upstream(cache_key, system_prompt, user_prompt, fresh,
+                                             tag, attempt)
+    finally:
+        llm_limiter.release(ticket)
+
+
+def _stream_deepseek_upstream(cache_key, system_prompt, user_prompt, fresh, tag, attempt):
+    if not llm_breaker.allow("deepseek"):
+        raise StreamError("DeepSeek circuit open")
+    budget = llm_budget.choose(tag, "deepseek", DEEPSEEK_MAX_TOKENS, DEEPSEEK_MAX_TOKENS)
+    payload = {
+        "model": DEEPSEEK_MODEL_ID,
+        "messages": [
+            {"role": "user", "content": system_prompt + "\n\n" + user_prompt}
+        ],
+        "max_tokens": budget,
+        "reasoning_effort": DEEPSEEK_REASONING_EFFORT,
+        "thinking": {"type": "enabled"},
+        "stream": True,
+        "stream_options": {"include_usage": True},
+    }
+    headers = {
+        "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
+        "Content-Type": "application/json",
+    }
+    print(f"Streaming DeepSeek {DEEPSEEK_MODEL_ID}")
+    parts = []
+    out = {"finish_reason": "", "usage": {}}
+    t0 = time.time()
+    try:
+        for kind, data in _read_deepseek_stream(payload, headers, out):
+            if kind == "delta":
+                parts.append(data)
+            yield kind, data
+    except GeneratorExit:
+        # 对冲输掉被取消 / 客户端断开：上游已经在计费，用量拿不到也要记一笔
+        llm_ledger.record(tag, "deepseek", DEEPSEEK_MODEL_ID, DEEPSEEK_REASONING_EFFORT,
+                          out["usage"], time.time() - t0, attempt, outcome="cancelled")
+        raise
+    except Exception as e:
+        llm_breaker.record("deepseek", "error")
+        llm_ledger.record(tag, "deepseek", DEEPSEEK_MODEL_ID, DEEPSEEK_REASONING_EFFORT,
+                          out["usage"], time.time() - t0, attempt, outcome="error")
+        raise StreamError(f"DeepSeek stream failed: {e}", emitted=bool(parts))
+    finish_reason, usage = out["finish_reason"], out["usage"]
+    _ledger_deepseek(tag, usage, time.time() - t0, attempt, 0, finish_reason, "".join(parts))
+    if not parts:
+        llm_breaker.record("deepseek", "empty")
+        raise StreamError("DeepSeek stream: empty content")
+    llm_breaker.record("deepseek", "truncated" if finish_reason == "length" else "ok")
+    llm_budget.record(tag, "deepseek", DEEPSEEK_MAX_TOKENS, budget,
+                      usage.get("completion_tokens"),
+                      (usage.get("completion_tokens_details") or {}).get("reasoning_tokens"),
+                      truncated=finish_reason == "length")
+    content, continuations = "".join(parts), 0
+    if finish_reason == "length":
+        # 同 _ask_deepseek_upstream：先续写，续出来的部分接着当 delta 发；续不上才交给外层整章重试
+        print(f"DeepSeek stream truncated at {len(content)} chars, continuing")
+        content, finish_reason, continuations = yield from _stream_deepseek_continue(
+            payload, headers, content, t0, tag, attempt)
+    if finish_reason == "stop":
+        llm_cache.put(cache_key, "deepseek", DEEPSEEK_MODEL_ID, content)
+    yield "done", {"finish_reason": finish_reason, "provider": "deepseek",
+                   "cache": "bypass" if fresh else "miss", "continuations": continuations}
+
+
+def _read_deepseek_stream(body, headers, out):
+    """发一次 DeepSeek 流式请求，转发 thinking / delta；收尾的 finish_reason、usage 写进 out
+    （出错 / 被取消时 out 里是已经收到的部分，台账照样能记）。"""
+    response = llm_transport.post(DEEPSEEK_URL, json=body, headers=headers,
+                                  timeout=DEEPSEEK_TIMEOUT, stream=True)
+    # 先进 with 再查状态码：stream=True 的 4xx/5xx 不关掉，连接池里的长连接要等 GC 才回收
+    with response:
+        response.raise_for_status()
+        for chunk in _iter_sse_data(response):
+            if chunk.get("usage"):
+                usage = out["usage"] = chunk["usage"]
+                print(f"DeepSeek stream usage: out={usage.get('completion_tokens')} "
+                      f"(reasoning={(usage.get('completion_tokens_details') or {}).get('reasoning_tokens')})")
+            for choice in chunk.get("choices") or []:
+                delta = choice.get("delta") or {}
+                if delta.get("reasoning_content"):
+                    yield "thinking", None
+                if delta.get("content"):
+                    yield "delta", delta["content"]
+                if choice.get("finish_reason"):
+                    out["finish_reason"] = choice["finish_reason"]
+
+
+def _stream_deepseek_continue(payload, headers, partial, started, tag=None, attempt=1):
+    """_deepseek_continue 的流式版（yield from 调用）：续写内容照常发 delta，
+    返回 (全文, finish_reason, 续写轮数)；收不了尾时 finish_reason 仍是 length。
+
+    续写开头常把锚点再写一遍（见 llm_continue.stitch），去重要看续写的前 2×锚点 个字符：
+    先攒到这么长（或这一轮结束）再按 stitch 的结果发出新增部分，之后的 chunk 原样转发 ——
+    发出去的 delta 拼起来和 stitch 的结果一字不差。"""
+    prompt = payload["messages"][0]["content"]
+    settle = 2 * llm_continue.LLM_CONTINUE_ANCHOR
+    text = partial
+    for n in range(1, llm_continue.LLM_MAX_CONTINUATIONS + 1):
+        if time.time() - started > DEEPSEEK_BUDGET:
+            print(f"DeepSeek continuation {n}: budget exhausted after {int(time.time() - started)}s")
+            return text, "length", n - 1
+        body = dict(payload, messages=llm_continue.messages(prompt, text))
+        out = {"finish_reason": "", "usage": {}}
+        more, settled = [], False
+        t0 = time.time()
+        try:
+            for kind, data in _read_deepseek_stream(body, headers, out):
+                if kind != "delta":
+                    yield kind, data
+                    continue
+                more.append(data)
+                if settled:
+                    yield "delta", data
+                elif len("".join(more).lstrip()) >= settle:
+                    settled = True
+                    yield "delta", llm_continue.stitch(text, "".join(more))[len(text):]
+        except GeneratorExit:
+            llm_ledger.record(tag, "deepseek", DEEPSEEK_MODEL_ID, DEEPSEEK_REASONING_EFFORT,
+                              out["usage"], time.time() - t0, attempt, n, outcome="cancelled")
+            raise
+        except Exception as e:
+            # 同 _deepseek_continue：在这里记一次，当作收不了尾交回去
+            llm_breaker.record("deepseek", "error")
+            llm_ledger.record(tag, "deepseek", DEEPSEEK_MODEL_ID, DEEPSEEK_REASONING_EFFORT,
+                              out["usage"], time.time() - t0, attempt, n, outcome="error")
+            print(f"DeepSeek continuation {n} error: {e}")
+            return text, "length", n
+        more = "".join(more)
+        stitched = llm_continue.stitch(text, more)
+        if not settled and len(stitched) > len(text):
+            yield "delta", stitched[len(text):]
+        text, finish_reason = stitched, out["finish_reason"]
+        _ledger_deepseek(tag, out["usage"], time.time() - t0, attempt, n, finish_reason, more)
+        print(f"DeepSeek continuation {n}: +{len(more)} chars, finish={finish_reason}")
+        if finish_reason != "length" and more.strip():
+            llm_breaker.record("deepseek", "ok")
+            return text, finish_reason, n
+        llm_breaker.record("deepseek", "truncated" if more.strip() else "empty")
+    return text, "length", llm_continue.LLM_MAX_CONTINUATIONS
+
+
+def _stream_gemini(system_prompt, user_prompt, max_tokens=16000, fresh=False, tag=None,
+                   attempt=1):
+    """Gemini 流式（streamGenerateContent?alt=sse）。attempt 同 _stream_deepseek。"""
+    if not GOOGLE_GEMINI_API_KEY:
+        raise StreamError("Server Configuration Error: API Key missing")
+    cache_key = _gemini_cache_key(system_prompt, user_prompt, max_tokens)
+    cached = llm_cache.get(cache_key, fresh=fresh)
+    if cached is not None:
+        yield "delta", cached
+        yield "done", {"finish_reason": "STOP", "provider": "gemini", "cache": "hit"}
+        return
+    try:
+        ticket = llm_limiter.acquire("gemini", tag)
+    except llm_limiter.LimiterBusy as e:
+        raise StreamError(str(e), retry_after=e.retry_after)
+    try:
+        yield from _stream_gemini_upstream(cache_key, system_prompt, user_prompt, max_tokens,
+                                           fresh, tag, attempt)
+    finally:
+        llm_limiter.release(ticket)
+
+
+def _stream_gemini_upstream(cache_key, system_prompt, user_prompt, max_tokens, fresh, tag,
+                            attempt):
+    if not llm_breaker.allow("gemini"):
+        raise StreamError("Gemini circuit open")
+    nominal, max_tokens = max_tokens, llm_budget.choose(tag, "gemini", max_tokens,
+                                                        GEMINI_MAX_OUTPUT_TOKENS)
+    url = (f"{GEMINI_BASE_URL}/models/{MODEL_ID}"
+           f":streamGenerateContent?alt=sse&key={GOOGLE_GEMINI_API_KEY}")
+    print(f"Streaming Gemini {MODEL_ID}, max_tokens: {max_tokens}")
+    parts = []
+    finish_reason = ""
+    um = {}
+    explicit = False
+    t0 = time.time()
+    try:
+        response, explicit = _gemini_post(url, system_prompt, user_prompt, max_tokens, 360,
+                                          stream=True)
+        with response:      # 同 _stream_deepseek_upstream：出错也要关响应、还连接
+            response.raise_for_status()
+            for chunk in _iter_sse_data(response):
+                for cand in chunk.get("candidates") or []:
+                    for part in (cand.get("content") or {}).get("parts") or []:
+                        if part.get("text"):
+                            parts.append(part["text"])
+                            yield "delta", part["text"]
+                    if cand.get("finishReason"):
+                        finish_reason = cand["finishReason"]
+                um = chunk.get("usageMetadata") or um
+                if chunk.get("usageMetadata") and finish_reason:
+                    print(f"Gemini stream usage: prompt={um.get('promptTokenCount')}, "
+                          f"cached={um.get('cachedContentTokenCount', 0)}, "
+                          f"out={um.get('candidatesTokenCount')}")
+    except GeneratorExit:
+        llm_ledger.record(tag, "gemini", MODEL_ID, "", um, time.time() - t0, attempt,
+                          outcome="cancelled")
+        raise
+    except Exception as e:
+        llm_breaker.record("gemini", "error")
+        llm_ledger.record(tag, "gemini", MODEL_ID, "", um, time.time() - t0, attempt,
+                          outcome="error")
+        raise StreamError(f"Gemini stream failed: {e}", emitted=bool(parts))
+    _ledger_gemini(tag, um, time.time() - t0, finish_reason, "".join(parts), attempt)
+    if not parts:
+        llm_breaker.record("gemini", "empty")
+        raise StreamError("Gemini stream: empty content")
+    llm_breaker.record("gemini", "truncated" if finish_reason == "MAX_TOKENS" else "ok")
+    _record_gemini_usage(tag, nominal, max_tokens, um, finish_reason)
+    gemini_cache.record(tag, um, explicit)
+    if finish_reason == "STOP":
+        llm_cache.put(cache_key, "gemini", MODEL_ID, "".join(parts))
+    yield "done", {"finish_reason": finish_reason, "provider": "gemini",
+                   "cache": "bypass" if fresh else "miss"}
+
+
+def ask_ai_stream(system_prompt, user_prompt, max_tokens=16000, fresh=False, tag=None):
+    """ask_ai 的流式版：DeepSeek 在吐出第一个正文 token 之前失败才回退 Gemini；
+    一旦已经转发了正文，就不能再换供应商从头来（调用方手里已经有半章了）。
+    DeepSeek 熔断时直接走 Gemini。"""
+    if (REPORT_LLM_PROVIDER == "deepseek" and DEEPSEEK_API_KEY
+            and not llm_breaker.is_open("deepseek")):
+        try:
+            yield from _stream_deepseek(system_prompt, user_prompt, fresh=fresh, tag=tag)
+            return
+        except StreamError as e:
+            if e.emitted:
+                raise
+            print(f"{e} -> falling back to Gemini stream")
+    yield from _stream_gemini(system_prompt, user_prompt, max_tokens, fresh=fresh, tag=tag)
+
+
+SSE_HEARTBEAT_SECONDS = 15  # 思考链阶段没有正文，按这个间隔发注释行保活，防代理空闲断开
+
+
+def wants_event_stream():
+    """调用方显式要流（Accept: text/event-stream）才走 SSE，默认仍是一次性 JSON。"""
+    return 'text/event-stream' in (request.headers.get('Accept') or '')
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {fast_json.dumps(data)}\n\n"
+
+
+def stream_section(system_prompt, user_prompt, max_tokens=16000, label="section",
+                   fresh=False, tag=None, prompt_meta=None, on_done=None):
+    """章节端点的 SSE 出口。事件：
+      event: delta  data: {"text": "..."}            —— 正文增量，按到达顺序拼接即可
+      event: done   data: {"content", "finish_reason", "provider", "cache", "prompt"}
+      event: error  data: {"error", "partial"}       —— partial=True 表示之前的 delta 只是半章
+    DeepSeek 截断会先在流里续写（续写内容照样是 delta）；续不上、或 Gemini 截断
+    （finish_reason=length/MAX_TOKENS）照样发 error：截断的章节不能当成品交付。
+    on_done(content)：成品章节的回调（写回命盘会话），只在发 done 之前调一次。
+    """
+    def generate():
+        yield ": stream open\n\n"   # 立刻出首字节，让调用方和代理知道连接活着
+        parts = []
+        last_beat = time.time()
+        try:
+            for kind, data in ask_ai_stream(system_prompt, user_prompt, max_tokens,
+                                            fresh=fresh, tag=tag):
+                if kind == "delta":
+                    parts.append(data)
+                    yield _sse("delta", {"text": data})
+                elif kind == "thinking":
+                    if time.time() - last_beat >= SSE_HEARTBEAT_SECONDS:
+                        last_beat = time.time()
+                        yield ": thinking\n\n"
+                elif kind == "done":
+                    content = "".join(parts)
+                    if data["finish_reason"] in ("length", "MAX_TOKENS"):
+                        print(f"Stream {label}: truncated ({data['finish_reason']})")
+                        yield _sse("error", {"error": f"truncated (finish_reason={data['finish_reason']})",
+                                             "partial": True})
+                        return
+                    print(f"Stream {label} success! Content length: {len(content)}")
+                    if on_done:
+                        on_done(content)
+                    yield _sse("done", {"content": content, **data, "prompt": prompt_meta})
+        except Exception as e:
+            print(f"Stream {label} error: {e}")
+            yield _sse("error", {"error": str(e), "partial": bool(parts)})
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 # ================= AI 自检功能 =================
 
 def validate_report(full_report, bazi_data, language):
@@ -1111,10 +1827,21 @@ The Qi Flow Team
 
 # ================= 基础路由 =================
 
+@app.route('/healthz', methods=['GET'])
+def liveness_check():
+    """负载均衡探活用：不查库、不算时间线，进程能响应就是活的。"""
+    return jsonify({"status": "running"}), 200
+
+
 @app.route('/', methods=['GET'])
 def health_check():
+    # 公开探活页：只回状态、版本和预测窗口。各模块运行统计在 /api/admin/stats（要口令）。
+    # HEAD / 也是探活（Flask 会把 HEAD 交给 GET 路由）：只回状态码，预测窗口也不算
+    if request.method == 'HEAD':
+        return '', 200
     today = datetime.now().date()
-    sample_timeline = build_forecast_timeline(today, num_months=FORECAST_MONTHS)
+    forecast = forecast_timeline(today)
+    sample_timeline = forecast["timeline"]
     return jsonify({
         "status": "running",
         "version": "6.1-cross-chapter-consistency",
@@ -1128,7 +1855,8 @@ def health_check():
         "forecast_window_months": FORECAST_MONTHS,
         "forecast_starts": sample_timeline[0]['gregorian_start'] if sample_timeline else None,
         "forecast_ends": sample_timeline[-1]['gregorian_end'] if sample_timeline else None,
-        "forecast_years_covered": get_forecast_years_summary(sample_timeline) if sample_timeline else None,
+        "forecast_years_covered": forecast["years"] if sample_timeline else None,
+        "forecast_valid_until": forecast["valid_until"],
     }), 200
 
 
@@ -1211,74 +1939,31 @@ def finalize_report():
 
 # ================= 个人报告主端点 =================
 
-@app.route('/api/generate-section', methods=['POST'])
-def generate_section():
-    try:
-        print("=== Received request ===")
-
-        req_data = request.json
-        if not req_data:
-            print("ERROR: No JSON received")
-            return jsonify({"error": "No JSON received"}), 400
+@prompt_templates.compiled("personal")
+def _personal_system_prompt(section_type, lang_code, custom_lang, reading_mode, gender):
+    """个人报告 system prompt。只取决于 (章节, 语言, 模式, 性别)，按组合编译一次后复用；
+    客户事实在 user prompt 末尾（_client_facts）。"""
+    lang_config = get_language_config(lang_code, custom_lang)
+    mode_config = get_mode_config(reading_mode)
+    gender_info = get_gender_instruction(gender, lang_code)
 
-        print(f"Request data keys: {req_data.keys()}")
+    current_opening = lang_config.get('opening', "In this chapter...")
+    current_closing = lang_config.get('closing', "End of chapter.")
 
-        bazi_json = req_data.get('bazi_data', {})
-        section_type = req_data.get('section_type', 'core')
-
-        # 向后兼容：旧的 section_type 名字映射到新的 'forecast'
-        if section_type in ('2026_forecast', 'forecast_2026', 'annual_forecast', '2027_forecast'):
-            print(f"Mapping legacy section_type '{section_type}' -> 'forecast'")
-            section_type = 'forecast'
-
-        lang_code = req_data.get('language', 'en')
-        custom_lang = req_data.get('custom_language', None)
-        lang_config = get_language_config(lang_code, custom_lang)
-
-        reading_mode = req_data.get('mode', 'gentle')
-        mode_config = get_mode_config(reading_mode)
-        print(f"Reading Mode: {reading_mode} ({mode_config['name']})")
-
-        gender = bazi_json.get('gender', 'unknown')
-        client_name = bazi_json.get('name', 'Client')
-        print(f"Client: {client_name}, Gender: {gender}, Section: {section_type}, Mode: {reading_mode}")
-
-        gender_info = get_gender_instruction(gender, lang_code)
-
-        current_opening = lang_config.get('opening', "In this chapter...")
-        current_closing = lang_config.get('closing', "End of chapter.")
-
-        if gender == "non-binary":
-            current_pronoun_rule = lang_config.get('pronoun_rule_nonbinary', lang_config.get('pronoun_rule', "Address the user formally."))
-        else:
-            current_pronoun_rule = lang_config.get('pronoun_rule', "Address the user formally.")
-
-        if reading_mode == "authentic":
-            current_style = lang_config.get('style_authentic', lang_config.get('style_gentle'))
-        else:
-            current_style = lang_config.get('style_gentle')
-
-        context_str = format_bazi_context(bazi_json)
-
-        # v6.1: 读取前面章节内容用于跨章节一致性
-        previous_chapters = req_data.get('previous_chapters', []) or []
-        previous_context = format_previous_chapters_context(previous_chapters)
-        if previous_chapters:
-            print(f"Cross-chapter consistency: {len(previous_chapters)} previous chapter(s) provided")
+    if gender == "non-binary":
+        current_pronoun_rule = lang_config.get('pronoun_rule_nonbinary', lang_config.get('pronoun_rule', "Address the user formally."))
+    else:
+        current_pronoun_rule = lang_config.get('pronoun_rule', "Address the user formally.")
 
-        pillars = bazi_json.get('pillars', {})
-        day_master = bazi_json.get('dayMaster', '')
-        day_master_element = bazi_json.get('dayMasterElement', '')
-        current_dayun = bazi_json.get('currentDayun', {})
-        current_liunian = bazi_json.get('currentLiuNian', {})
-        special_palaces = bazi_json.get('specialPalaces', {})
-        five_elements = bazi_json.get('fiveElements', {})
-        yun_info = bazi_json.get('yunInfo', {})
+    if reading_mode == "authentic":
+        current_style = lang_config.get('style_authentic', lang_config.get('style_gentle'))
+    else:
+        current_style = lang_config.get('style_gentle')
 
-        # ================= 非二元性别额外指令 =================
-        nonbinary_extra_instruction = ""
-        if gender == "non-binary":
-            nonbinary_extra_instruction = """
+    # ================= 非二元性别额外指令 =================
+    nonbinary_extra_instruction = ""
+    if gender == "non-binary":
+        nonbinary_extra_instruction = """
 ## ⚠️ CRITICAL: GENDER-NEUTRAL LANGUAGE REQUIREMENT ⚠️
 
 This client has selected NON-BINARY gender. You MUST follow these rules STRICTLY:
@@ -1300,16 +1985,16 @@ This client has selected NON-BINARY gender. You MUST follow these rules STRICTLY
 This is NON-NEGOTIABLE. Violations will make the report inappropriate for this client.
 """
 
-        # 篇幅下限按章分配：流年章有 24 个月要逐月写，天然需要更多篇幅。
-        # 只设下限不设上限——上限会让模型（尤其 reasoning_effort=high 时它
-        # 真的会遵守）把报告压到远低于付费产品应有的分量。
-        if section_type == 'forecast':
-            _len_floor = "8000 words (Chinese: 12000 characters)"
-        else:
-            _len_floor = "3500 words (Chinese: 5500 characters)"
+    # 篇幅下限按章分配：流年章有 24 个月要逐月写，天然需要更多篇幅。
+    # 只设下限不设上限——上限会让模型（尤其 reasoning_effort=high 时它
+    # 真的会遵守）把报告压到远低于付费产品应有的分量。
+    if section_type == 'forecast':
+        _len_floor = "8000 words (Chinese: 12000 characters)"
+    else:
+        _len_floor = "3500 words (Chinese: 5500 characters)"
 
-        # ================= 核心 System Prompt =================
-        base_system_prompt = f"""
+    # ================= 核心 System Prompt =================
+    base_system_prompt = f"""
 You are a master of BaZi (Chinese Four Pillars of Destiny) with deep knowledge of classical texts like "San Ming Tong Hui" (三命通会), "Yuan Hai Zi Ping" (渊海子平), and "Di Tian Sui" (滴天髓).
 
 ## CRITICAL FORMATTING RULES - MUST FOLLOW
@@ -1340,7 +2025,6 @@ This rule is NON-NEGOTIABLE. Violations will break the PDF rendering.
 ## CLIENT INFORMATION - CRITICAL
 
 **Gender 性别**: {gender.upper() if gender != 'unknown' else 'UNKNOWN'}
-**Name 姓名**: {client_name}
 **Pronouns 代词**: {gender_info['pronoun']}
 
 **Gender-Specific BaZi Rules 性别专属解读规则**:
@@ -1430,15 +2114,77 @@ You have access to COMPLETE chart data including:
 
 1. **Second person only 第二人称铁律**: Address the client DIRECTLY in second person throughout ("you"/"你"), like a master explaining the chart face to face. NEVER narrate the client in third person ("he", "she", "命主", or the client's name in narration). The client's name may appear ONLY in the opening greeting.
 2. **Length 篇幅**: Write at least {_len_floor}. There is NO upper limit — a paid reading is expected to be substantial, and running long is never a fault. But length must be EARNED with substance, never with padding: do not restate a point you have already made, do not recycle the same Ten God or the same metaphor across sections, and do not write filler transitions. Earn every extra paragraph by examining something new in THIS chart — a pillar you have not yet read, its 纳音, its 十二长生 stage, a 刑冲合害 between specific branches, 空亡, 胎元/命宫/身宫, a hidden stem and what it implies, 调候 needs, or a concrete timing window. Depth and length together, not one at the cost of the other.
-3. **Day Master strength is engine-decided 日主强弱以引擎为准**: The chart engine has determined the Day Master strength = **{str(bazi_json.get('dayMasterStrength', 'unknown')).upper()}**. ALL of your conclusions (Useful God, favorable/unfavorable elements, industries, annual luck) MUST be consistent with this verdict. You may explain WHY it holds, but you may NOT overturn it.
+3. **Day Master strength is engine-decided 日主强弱以引擎为准**: The chart engine has determined the Day Master strength — see CLIENT FACTS at the end of the task. ALL of your conclusions (Useful God, favorable/unfavorable elements, industries, annual luck) MUST be consistent with this verdict. You may explain WHY it holds, but you may NOT overturn it.
 4. **Structural labels follow the report language 结构标签跟报告语言走**: Any structural labels shown in the task template (e.g. Month/Theme/Opportunity/Caution/Best for/Avoid, Part/Chapter headings) are format placeholders only — translate every label into the report language. Keep GanZhi (干支), solar terms and other BaZi terms in their original Chinese form with translations.
-5. **Age-year conversions: LOOK UP, never calculate 年龄年份只查表不心算**: {_age_year_table(bazi_json)} Whenever you mention an age together with a calendar year (e.g. "after age 35, i.e. after YYYY"), the pair MUST match this table exactly. Never do the arithmetic yourself.
-
-{previous_context}
+5. **Age-year conversions: LOOK UP, never calculate 年龄年份只查表不心算**: Use the age-year table in CLIENT FACTS. Whenever you mention an age together with a calendar year (e.g. "after age 35, i.e. after YYYY"), the pair MUST match this table exactly. Never do the arithmetic yourself.
 """
+    return base_system_prompt
+
+
+@app.route('/api/generate-section', methods=['POST'])
+def generate_section():
+    try:
+        print("=== Received request ===")
+
+        req_data = request.json
+        if not req_data:
+            print("ERROR: No JSON received")
+            return jsonify({"error": "No JSON received"}), 400
+        fresh = bool(req_data.get('fresh'))   # 客户要求重写：跳过 LLM 应答缓存
+        session, missing = _chart_session(req_data, 'personal')
+        if missing:
+            return missing
+
+        print(f"Request data keys: {req_data.keys()}")
+
+        bazi_json = req_data.get('bazi_data', {})
+        section_type = req_data.get('section_type', 'core')
+
+        # 向后兼容：旧的 section_type 名字映射到新的 'forecast'
+        if section_type in ('2026_forecast', 'forecast_2026', 'annual_forecast', '2027_forecast'):
+            print(f"Mapping legacy section_type '{section_type}' -> 'forecast'")
+            section_type = 'forecast'
+
+        lang_code = req_data.get('language', 'en')
+        custom_lang = req_data.get('custom_language', None)
+        lang_config = get_language_config(lang_code, custom_lang)
+
+        reading_mode = req_data.get('mode', 'gentle')
+        mode_config = get_mode_config(reading_mode)
+        print(f"Reading Mode: {reading_mode} ({mode_config['name']})")
+
+        gender = bazi_json.get('gender', 'unknown')
+        client_name = bazi_json.get('name', 'Client')
+        print(f"Client: {client_name}, Gender: {gender}, Section: {section_type}, Mode: {reading_mode}")
+
+        gender_info = get_gender_instruction(gender, lang_code)
+
+        context_str = _fact_context(session, bazi_json)
+
+        # v6.1: 读取前面章节内容用于跨章节一致性
+        previous_chapters = req_data.get('previous_chapters', []) or []
+        previous_context = format_previous_chapters_context(
+            previous_chapters, req_data.get('previous_chapters_mode'))
+        if previous_chapters:
+            print(f"Cross-chapter consistency: {len(previous_chapters)} previous chapter(s) provided")
+
+        pillars = bazi_json.get('pillars', {})
+        day_master = bazi_json.get('dayMaster', '')
+        day_master_element = bazi_json.get('dayMasterElement', '')
+        current_dayun = bazi_json.get('currentDayun', {})
+        current_liunian = bazi_json.get('currentLiuNian', {})
+        special_palaces = bazi_json.get('specialPalaces', {})
+        five_elements = bazi_json.get('fiveElements', {})
+        yun_info = bazi_json.get('yunInfo', {})
+
+        base_system_prompt = _personal_system_prompt(section_type, lang_code, custom_lang,
+                                                     reading_mode, gender)
+        client_facts = _client_facts(client_name, bazi_json, previous_context,
+                                     age_table=_fact_age_table(session, bazi_json))
 
         # ================= 各章节详细指令 =================
         specific_prompt = ""
+        timeline_str = ""
 
         if section_type == 'core':
             specific_prompt = f"""
@@ -1837,16 +2583,15 @@ Use correct pronouns: {gender_info['pronoun']}
             # ================= 动态24个月流年预测 =================
             now = datetime.now()
             today_str = now.strftime("%Y-%m-%d")
-            timeline = build_forecast_timeline(now.date(), num_months=FORECAST_MONTHS)
-            timeline_str = format_forecast_timeline_for_prompt(timeline)
+            timeline = _fact_timeline(session)
+            timeline_str = forecast_timeline_prompt(timeline)
             years_summary = get_forecast_years_summary(timeline)
 
             current_month = timeline[0]
             end_month = timeline[-1]
 
-            # 找出与命主四柱相冲/相合的关键月份
-            user_branches = get_user_branches(bazi_json)
-            interactions = find_key_interactions(timeline, user_branches)
+            # 找出与命主四柱冲合刑害破、成局的关键月份
+            interactions = _fact_interactions(session, timeline, bazi_json)
             key_interactions_str = format_key_interactions(interactions)
 
             if reading_mode == "authentic":
@@ -1882,7 +2627,7 @@ Compare across the lunar years in the window so they know which year favors whic
 2. **The forecast STARTS from the current month** ({current_month['lunar_month']}, {current_month['gregorian_start']}) and goes 24 months forward.
 3. **Use the timeline below — these are the EXACT ganzhi months you must analyze.** Do not invent or recalculate ganzhi yourself.
 4. **When mentioning a month, ALWAYS include its gregorian date range** so the reader can locate it in their calendar.
-5. **Reference the pre-computed key interactions** (clash/harmony months) provided below — these have already been calculated against the client's chart.
+5. **Reference the pre-computed key interactions** (clash / punishment / harm / break and combination months) provided below — these have already been calculated against the client's chart.
 
 {forecast_mode_instruction}
 
@@ -1942,7 +2687,7 @@ Format each month exactly like this:
 - **Best for**: (concrete activities favored this month)
 - **Avoid**: (concrete activities to defer)
 
-For months flagged in the key interactions above, explicitly note the clash or harmony and what it means.
+For months flagged in the key interactions above, explicitly note the clash, punishment, harm, break or combination and what it means.
 
 # Part 4: Strategic Plan Across the Window (跨窗口战略规划)
 
@@ -1984,20 +2729,34 @@ For each of the following, identify the best month(s) within the window:
         print(f"Calling AI for section: {section_type} in language: {lang_config['name']} with mode: {reading_mode}")
 
         # forecast 章节内容量大，使用更大的 max_tokens
-        if section_type == 'forecast':
-            ai_result = ask_ai(base_system_prompt, specific_prompt, max_tokens=24000)
-        else:
-            ai_result = ask_ai(base_system_prompt, specific_prompt)
+        max_tokens = 24000 if section_type == 'forecast' else 16000
+        tag = {"product": "personal", "section": section_type, "mode": reading_mode,
+               "language": lang_code}
+        system_prompt, user_prompt, prompt_meta = prompt_budget.fit(
+            tag, base_system_prompt, specific_prompt + client_facts,
+            {"bazi_context": context_str, "previous_chapters": previous_context,
+             "timeline": timeline_str},
+            [("previous_chapters", previous_chapters_trims(
+                previous_chapters, req_data.get('previous_chapters_mode')))])
+        save_chapter = _session_saver(session, 'personal', section_type)
+        if wants_event_stream():
+            return stream_section(system_prompt, user_prompt, max_tokens,
+                                  section_type, fresh=fresh, tag=tag,
+                                  prompt_meta=prompt_meta, on_done=save_chapter)
+        ai_result = ask_ai(system_prompt, user_prompt, max_tokens=max_tokens,
+                           fresh=fresh, tag=tag)
 
         print(f"AI result keys: {ai_result.keys() if isinstance(ai_result, dict) else 'not a dict'}")
 
         if ai_result and 'choices' in ai_result:
             content = ai_result['choices'][0]['message']['content']
+            if save_chapter:
+                save_chapter(content)
             print(f"Success! Content length: {len(content)}")
-            return jsonify({"content": content})
+            return jsonify({"content": content, "meta": _with_prompt_meta(ai_result, prompt_meta)})
         elif ai_result and 'error' in ai_result:
             print(f"AI Error: {ai_result}")
-            return jsonify(ai_result), 500
+            return _ai_error_response(ai_result)
         else:
             print(f"Unknown AI response: {ai_result}")
             return jsonify({"error": "AI response format invalid", "raw": str(ai_result)}), 500
@@ -2185,69 +2944,26 @@ For Partner B ({gender_b}):
 
 # ================= 合婚路由 =================
 
-@app.route('/api/generate-marriage-section', methods=['OPTIONS'])
-def marriage_options_handler():
-    return '', 204
-
-
-@app.route('/api/generate-marriage-section', methods=['POST'])
-def generate_marriage_section():
-    """生成合婚报告的单个章节"""
-    try:
-        print("=== Marriage Section Request ===")
-
-        req_data = request.json
-        if not req_data:
-            return jsonify({"error": "No JSON received"}), 400
-
-        bazi_a = req_data.get('bazi_a', {})
-        bazi_b = req_data.get('bazi_b', {})
-        scores = req_data.get('scores', {})
-        section_type = req_data.get('section_type', 'overview')
-
-        # 向后兼容：旧的 section_type 名字映射
-        if section_type in ('forecast_2026', '2026_forecast', '2027_forecast', 'annual_forecast'):
-            print(f"Mapping legacy marriage section_type '{section_type}' -> 'forecast'")
-            section_type = 'forecast'
-
-        lang_code = req_data.get('language', 'en')
-        custom_lang = req_data.get('custom_language', None)
-        lang_config = get_language_config(lang_code, custom_lang)
-
-        reading_mode = req_data.get('mode', 'gentle')
-        mode_config = get_mode_config(reading_mode)
-
-        name_a = bazi_a.get('name', 'Partner A')
-        name_b = bazi_b.get('name', 'Partner B')
-        gender_a = bazi_a.get('gender', 'unknown')
-        gender_b = bazi_b.get('gender', 'unknown')
-
-        print(f"Marriage Section: {section_type}, Mode: {reading_mode}, Lang: {lang_code}")
-        print(f"Partner A: {name_a} ({gender_a}), Partner B: {name_b} ({gender_b})")
+@prompt_templates.compiled("marriage")
+def _marriage_system_prompt(lang_code, custom_lang, reading_mode, gender_a, gender_b):
+    """合婚 system prompt。只取决于 (语言, 模式, 双方性别)，各章节共用，按组合编译一次后复用。"""
+    lang_config = get_language_config(lang_code, custom_lang)
+    mode_config = get_mode_config(reading_mode)
 
-        current_opening = lang_config.get('opening', "In this chapter...")
-        current_closing = lang_config.get('closing', "End of chapter.")
-
-        if reading_mode == "authentic":
-            current_style = lang_config.get('style_authentic', lang_config.get('style_gentle'))
-        else:
-            current_style = lang_config.get('style_gentle')
-
-        context_str = format_marriage_bazi_context(bazi_a, bazi_b)
-        scores_str = format_compatibility_scores(scores)
+    current_opening = lang_config.get('opening', "In this chapter...")
+    current_closing = lang_config.get('closing', "End of chapter.")
 
-        # v6.1: 读取前面章节内容用于跨章节一致性
-        previous_chapters = req_data.get('previous_chapters', []) or []
-        previous_context = format_previous_chapters_context(previous_chapters)
-        if previous_chapters:
-            print(f"Cross-chapter consistency: {len(previous_chapters)} previous marriage chapter(s) provided")
+    if reading_mode == "authentic":
+        current_style = lang_config.get('style_authentic', lang_config.get('style_gentle'))
+    else:
+        current_style = lang_config.get('style_gentle')
 
-        gender_instruction = get_marriage_gender_instruction(gender_a, gender_b, lang_code)
+    gender_instruction = get_marriage_gender_instruction(gender_a, gender_b, lang_code)
 
-        has_nonbinary = gender_a == "non-binary" or gender_b == "non-binary"
-        nonbinary_reminder = ""
-        if has_nonbinary:
-            nonbinary_reminder = """
+    has_nonbinary = gender_a == "non-binary" or gender_b == "non-binary"
+    nonbinary_reminder = ""
+    if has_nonbinary:
+        nonbinary_reminder = """
 ## ⚠️ GENDER-NEUTRAL LANGUAGE REQUIRED ⚠️
 
 At least one partner selected non-binary gender. You MUST:
@@ -2257,8 +2973,8 @@ At least one partner selected non-binary gender. You MUST:
 - Respect both partners' identities throughout
 """
 
-        # ================= 合婚专用 System Prompt =================
-        base_system_prompt = f"""
+    # ================= 合婚专用 System Prompt =================
+    base_system_prompt = f"""
 You are a master of BaZi (Chinese Four Pillars of Destiny) marriage compatibility analysis, with deep knowledge of classical texts and traditional 合婚 (marriage matching) techniques.
 
 ## CRITICAL FORMATTING RULES - MUST FOLLOW
@@ -2284,10 +3000,8 @@ You are a master of BaZi (Chinese Four Pillars of Destiny) marriage compatibilit
 
 ## COUPLE INFORMATION - USE THEIR ACTUAL NAMES
 
-**Partner A**: {name_a} ({gender_a})
-**Partner B**: {name_b} ({gender_b})
-
-CRITICAL: Always use their actual names "{name_a}" and "{name_b}" throughout the analysis. 
+The partners' names are given in CLIENT FACTS at the end of the task.
+CRITICAL: Always use their actual names throughout the analysis.
 NEVER use generic terms like "Partner A", "Partner B", "the man", "the woman".
 
 ## LANGUAGE REQUIREMENTS
@@ -2313,16 +3027,80 @@ NEVER use generic terms like "Partner A", "Partner B", "the man", "the woman".
 ## QUALITY RULES — HIGHEST PRIORITY 最高优先级质量规则
 
 1. **Length 篇幅**: Write at least 3500 words (Chinese: 5500 characters). There is NO upper limit — a paid reading is expected to be substantial, and running long is never a fault. But length must be EARNED with substance, never with padding: do not restate a point you have already made, do not recycle the same Ten God or the same metaphor across sections, and do not write filler transitions. Earn every extra paragraph by examining something new in THESE TWO charts — a pillar you have not yet read, its 纳音, its 十二长生 stage, a 刑冲合害 between their branches, 空亡, 胎元/命宫/身宫, a hidden stem and what it implies, how one partner's 用神 sits in the other's chart, or a concrete timing window. Depth and length together, not one at the cost of the other.
-2. **Use their real names 用真名**: Always refer to the partners as "{name_a}" and "{name_b}" — never use "Partner A / Partner B", "命主", "the man / the woman", or other generic labels. When addressing them as a couple, say "you two" / "你们".
-3. **Day Master strength is engine-decided 日主强弱以引擎为准**: {name_a}'s Day Master strength = **{str(bazi_a.get('dayMasterStrength', 'unknown')).upper()}**; {name_b}'s Day Master strength = **{str(bazi_b.get('dayMasterStrength', 'unknown')).upper()}**. ALL compatibility conclusions MUST be consistent with these verdicts. You may explain WHY, but you may NOT overturn them.
+2. **Use their real names 用真名**: Always refer to the partners by the names in CLIENT FACTS — never use "Partner A / Partner B", "命主", "the man / the woman", or other generic labels. When addressing them as a couple, say "you two" / "你们".
+3. **Day Master strength is engine-decided 日主强弱以引擎为准**: Each partner's Day Master strength is given in CLIENT FACTS. ALL compatibility conclusions MUST be consistent with these verdicts. You may explain WHY, but you may NOT overturn them.
 4. **Structural labels follow the report language 结构标签跟报告语言走**: Any structural labels in the template (Month/Theme/Opportunity/Caution etc.) are placeholders — translate them into the report language. Keep GanZhi and BaZi terms in Chinese with translations.
-5. **Age-year conversions: LOOK UP, never calculate 年龄年份只查表不心算**: {_age_year_table(bazi_a)} | {_age_year_table(bazi_b)} Whenever you mention an age together with a calendar year, the pair MUST match these tables. Never do the arithmetic yourself.
-
-{previous_context}
+5. **Age-year conversions: LOOK UP, never calculate 年龄年份只查表不心算**: Use the age-year tables in CLIENT FACTS. Whenever you mention an age together with a calendar year, the pair MUST match these tables. Never do the arithmetic yourself.
 """
+    return base_system_prompt
+
+
+@app.route('/api/generate-marriage-section', methods=['OPTIONS'])
+def marriage_options_handler():
+    return '', 204
+
+
+@app.route('/api/generate-marriage-section', methods=['POST'])
+def generate_marriage_section():
+    """生成合婚报告的单个章节"""
+    try:
+        print("=== Marriage Section Request ===")
+
+        req_data = request.json
+        if not req_data:
+            return jsonify({"error": "No JSON received"}), 400
+        fresh = bool(req_data.get('fresh'))   # 客户要求重写：跳过 LLM 应答缓存
+        session, missing = _chart_session(req_data, 'marriage')
+        if missing:
+            return missing
+
+        bazi_a = req_data.get('bazi_a', {})
+        bazi_b = req_data.get('bazi_b', {})
+        scores = req_data.get('scores', {})
+        section_type = req_data.get('section_type', 'overview')
+
+        # 向后兼容：旧的 section_type 名字映射
+        if section_type in ('forecast_2026', '2026_forecast', '2027_forecast', 'annual_forecast'):
+            print(f"Mapping legacy marriage section_type '{section_type}' -> 'forecast'")
+            section_type = 'forecast'
+
+        lang_code = req_data.get('language', 'en')
+        custom_lang = req_data.get('custom_language', None)
+        lang_config = get_language_config(lang_code, custom_lang)
+
+        reading_mode = req_data.get('mode', 'gentle')
+        mode_config = get_mode_config(reading_mode)
+
+        name_a = bazi_a.get('name', 'Partner A')
+        name_b = bazi_b.get('name', 'Partner B')
+        gender_a = bazi_a.get('gender', 'unknown')
+        gender_b = bazi_b.get('gender', 'unknown')
+
+        print(f"Marriage Section: {section_type}, Mode: {reading_mode}, Lang: {lang_code}")
+        print(f"Partner A: {name_a} ({gender_a}), Partner B: {name_b} ({gender_b})")
+
+        context_str = _fact_marriage_context(session, bazi_a, bazi_b)
+        scores_str = format_compatibility_scores(scores)
+
+        # v6.1: 读取前面章节内容用于跨章节一致性
+        previous_chapters = req_data.get('previous_chapters', []) or []
+        previous_context = format_previous_chapters_context(
+            previous_chapters, req_data.get('previous_chapters_mode'))
+        if previous_chapters:
+            print(f"Cross-chapter consistency: {len(previous_chapters)} previous marriage chapter(s) provided")
+
+        base_system_prompt = _marriage_system_prompt(lang_code, custom_lang, reading_mode,
+                                                     gender_a, gender_b)
+
+        client_facts = (_client_facts(f"{name_a} ({gender_a})", bazi_a, label="Partner A",
+                                      age_table=_fact_age_table(session, bazi_a, "_a"))
+                        + _client_facts(f"{name_b} ({gender_b})", bazi_b, previous_context,
+                                        label="Partner B",
+                                        age_table=_fact_age_table(session, bazi_b, "_b")))
 
         # ================= 各章节详细指令 =================
         specific_prompt = ""
+        timeline_str = ""
 
         if section_type == 'overview':
             specific_prompt = f"""
@@ -2737,42 +3515,39 @@ Based on both charts:
             # ================= 合婚动态24个月流年预测 =================
             now = datetime.now()
             today_str = now.strftime("%Y-%m-%d")
-            timeline = build_forecast_timeline(now.date(), num_months=FORECAST_MONTHS)
-            timeline_str = format_forecast_timeline_for_prompt(timeline)
+            timeline = _fact_timeline(session)
+            timeline_str = forecast_timeline_prompt(timeline)
             years_summary = get_forecast_years_summary(timeline)
 
             current_month = timeline[0]
             end_month = timeline[-1]
 
             # 分别计算两人与窗口月份的关键互动
-            branches_a = get_user_branches(bazi_a)
-            branches_b = get_user_branches(bazi_b)
-            interactions_a = find_key_interactions(timeline, branches_a)
-            interactions_b = find_key_interactions(timeline, branches_b)
+            interactions_a = _fact_interactions(session, timeline, bazi_a, "_a")
+            interactions_b = _fact_interactions(session, timeline, bazi_b, "_b")
 
             key_a_str = format_key_interactions(interactions_a)
             key_b_str = format_key_interactions(interactions_b)
 
-            # 找出两人都被冲/合的月份（共振月）
-            chong_steps_a = {c['step'] for c in interactions_a['chong']}
-            chong_steps_b = {c['step'] for c in interactions_b['chong']}
-            shared_chong = sorted(chong_steps_a & chong_steps_b)
-            he_steps_a = {h['step'] for h in interactions_a['he']}
-            he_steps_b = {h['step'] for h in interactions_b['he']}
-            shared_he = sorted(he_steps_a & he_steps_b)
+            # 找出两人都逢冲刑害破 / 都逢合局的月份（共振月）
+            tense, harmony = branch_interactions.TENSE, branch_interactions.HARMONY
+            shared_chong = sorted(interaction_steps(interactions_a, tense)
+                                  & interaction_steps(interactions_b, tense))
+            shared_he = sorted(interaction_steps(interactions_a, harmony)
+                               & interaction_steps(interactions_b, harmony))
 
             shared_lines = []
             if shared_chong:
-                shared_lines.append("**双方共同相冲月份（关系压力较大）**:")
+                shared_lines.append("**双方共同逢冲刑害破月份（关系压力较大）**:")
                 for s in shared_chong[:8]:
                     t = timeline[s - 1]
-                    shared_lines.append(f"- 第{s}月 {t['month_ganzhi']} ({t['gregorian_start']} ~ {t['gregorian_end']}): 两人都被冲，需共同应对")
+                    shared_lines.append(f"- 第{s}月 {t['month_ganzhi']} ({t['gregorian_start']} ~ {t['gregorian_end']}): 两人都逢冲刑害破，需共同应对")
             if shared_he:
-                shared_lines.append("\n**双方共同相合月份（关系最和谐）**:")
+                shared_lines.append("\n**双方共同逢合局月份（关系最和谐）**:")
                 for s in shared_he[:8]:
                     t = timeline[s - 1]
                     shared_lines.append(f"- 第{s}月 {t['month_ganzhi']} ({t['gregorian_start']} ~ {t['gregorian_end']}): 双方都受益，适合共同推进")
-            shared_str = "\n".join(shared_lines) if shared_lines else "  本窗口内双方无明显共同相冲/相合月份。"
+            shared_str = "\n".join(shared_lines) if shared_lines else "  本窗口内双方无明显共同冲刑害破 / 合局月份。"
 
             specific_prompt = f"""
 ## TASK: Write Chapter 6 - 24-Month Forecast & Harmony Tips
@@ -2908,18 +3683,32 @@ For each lunar year in {years_summary}:
         print(f"Calling AI for marriage section: {section_type}")
 
         # forecast 章节内容量大，使用更大的 max_tokens
-        if section_type == 'forecast':
-            ai_result = ask_ai(base_system_prompt, specific_prompt, max_tokens=24000)
-        else:
-            ai_result = ask_ai(base_system_prompt, specific_prompt)
+        max_tokens = 24000 if section_type == 'forecast' else 16000
+        tag = {"product": "marriage", "section": section_type, "mode": reading_mode,
+               "language": lang_code}
+        system_prompt, user_prompt, prompt_meta = prompt_budget.fit(
+            tag, base_system_prompt, specific_prompt + client_facts,
+            {"bazi_context": context_str, "scores": scores_str, "previous_chapters": previous_context,
+             "timeline": timeline_str},
+            [("previous_chapters", previous_chapters_trims(
+                previous_chapters, req_data.get('previous_chapters_mode')))])
+        save_chapter = _session_saver(session, 'marriage', section_type)
+        if wants_event_stream():
+            return stream_section(system_prompt, user_prompt, max_tokens,
+                                  f"marriage/{section_type}", fresh=fresh, tag=tag,
+                                  prompt_meta=prompt_meta, on_done=save_chapter)
+        ai_result = ask_ai(system_prompt, user_prompt, max_tokens=max_tokens,
+                           fresh=fresh, tag=tag)
 
         if ai_result and 'choices' in ai_result:
             content = ai_result['choices'][0]['message']['content']
+            if save_chapter:
+                save_chapter(content)
             print(f"Success! Marriage section content length: {len(content)}")
-            return jsonify({"content": content})
+            return jsonify({"content": content, "meta": _with_prompt_meta(ai_result, prompt_meta)})
         elif ai_result and 'error' in ai_result:
             print(f"AI Error: {ai_result}")
-            return jsonify(ai_result), 500
+            return _ai_error_response(ai_result)
         else:
             print(f"Unknown AI response: {ai_result}")
             return jsonify({"error": "AI response format invalid"}), 500
@@ -3131,13 +3920,16 @@ Output the message directly.
 
 # ================= 2027 流年报告 - ANNUAL 2027 YEAR-AHEAD =================
 # Prompt builders + personalized day calendar live in annual_2027.py;
-# the pre-computed almanac constant lives in almanac_2027.py.
+# the pre-computed day almanac is almanac.py reading almanac.bin (tools/gen_almanac.py).
 
 from annual_2027 import (
     build_annual_specific_prompt,
+    annual_month_table,
+    personal_calendar,
     ANNUAL_SECTION_TYPES,
     ANNUAL_YEAR,
     ANNUAL_YEAR_GANZHI,
+    STYLE_RULES as ANNUAL_STYLE_RULES,
 )
 
 
@@ -3160,6 +3952,10 @@ def generate_annual_section():
         req_data = request.json
         if not req_data:
             return jsonify({"error": "No JSON received"}), 400
+        fresh = bool(req_data.get('fresh'))   # 客户要求重写：跳过 LLM 应答缓存
+        session, missing = _chart_session(req_data, 'annual')
+        if missing:
+            return missing
 
         bazi_json = req_data.get('bazi_data', {})
         section_type = req_data.get('section_type', 'overview')
@@ -3190,9 +3986,10 @@ def generate_annual_section():
         else:
             style = lang_config.get('style_gentle')
 
-        context_str = format_bazi_context(bazi_json)
+        context_str = _fact_context(session, bazi_json)
         previous_chapters = req_data.get('previous_chapters', []) or []
-        previous_context = format_previous_chapters_context(previous_chapters)
+        previous_context = format_previous_chapters_context(
+            previous_chapters, req_data.get('previous_chapters_mode'))
 
         base_system_prompt = f"""
 You are a master of BaZi (Chinese Four Pillars of Destiny) with deep knowledge of classical texts like "San Ming Tong Hui" (三命通会), "Yuan Hai Zi Ping" (渊海子平), and "Di Tian Sui" (滴天髓). You are writing one chapter of a dedicated {ANNUAL_YEAR_GANZHI} {ANNUAL_YEAR} Year-Ahead report for a paying client.
@@ -3222,7 +4019,6 @@ This rule is NON-NEGOTIABLE. Violations will break the PDF rendering.
 ## CLIENT INFORMATION
 
 **Gender 性别**: {gender.upper() if gender != 'unknown' else 'UNKNOWN'}
-**Name 姓名**: {client_name}
 **Pronouns 代词**: {gender_info['pronoun']}
 
 **Gender-Specific BaZi Rules 性别专属解读规则**:
@@ -3254,10 +4050,14 @@ element) it rests on — reason first, advice second, every time.
 ## QUALITY RULES — HIGHEST PRIORITY 最高优先级质量规则
 
 1. **Second person only 第二人称铁律**: Address the client DIRECTLY in second person throughout ("you"/"你"), like a master explaining the chart face to face. NEVER use third person ("he", "she", "命主") or the client's name in narration — name only in the opening greeting.
-2. **Day Master strength is engine-decided 日主强弱以引擎为准**: The chart engine has determined the Day Master strength = **{str(bazi_json.get('dayMasterStrength', 'unknown')).upper()}**. ALL conclusions MUST be consistent with this verdict. You may explain WHY, but you may NOT overturn it.
+2. **Day Master strength is engine-decided 日主强弱以引擎为准**: The chart engine has determined the Day Master strength — see CLIENT FACTS at the end of the task. ALL conclusions MUST be consistent with this verdict. You may explain WHY, but you may NOT overturn it.
 3. **Structural labels follow the report language 结构标签跟报告语言走**: Any structural labels in the template are placeholders — translate them into the report language. Keep GanZhi and BaZi terms in Chinese with translations.
-4. **Age-year conversions: LOOK UP, never calculate 年龄年份只查表不心算**: {_age_year_table(bazi_json)} Whenever you mention an age together with a calendar year, the pair MUST match this table exactly. Never do the arithmetic yourself.
+4. **Age-year conversions: LOOK UP, never calculate 年龄年份只查表不心算**: Use the age-year table in CLIENT FACTS. Whenever you mention an age together with a calendar year, the pair MUST match this table exactly. Never do the arithmetic yourself.
 """
+        client_facts = _client_facts(client_name, bazi_json,
+                                     age_table=_fact_age_table(session, bazi_json))
+        # 和 builder 里嵌的择日表一字不差（同一函数、同样参数），prompt_budget 靠它计数和裁剪
+        calendar_str = personal_calendar(bazi_json, lang_code)
 
         built = build_annual_specific_prompt(
             section_type=section_type,
@@ -3270,16 +4070,35 @@ element) it rests on — reason first, advice second, every time.
 
         print(f"Calling AI for annual section: {section_type} "
               f"(max_tokens={built['max_tokens']})")
-        ai_result = ask_ai(base_system_prompt, built['prompt'],
-                           max_tokens=built['max_tokens'])
+        tag = {"product": "annual", "section": section_type, "mode": reading_mode,
+               "language": lang_code}
+        system_prompt, user_prompt, prompt_meta = prompt_budget.fit(
+            tag, base_system_prompt, built['prompt'] + client_facts,
+            {"bazi_context": context_str, "previous_chapters": previous_context,
+             "timeline": annual_month_table(), "calendar": calendar_str,
+             "style_contract": ANNUAL_STYLE_RULES},
+            [("previous_chapters", previous_chapters_trims(
+                previous_chapters, req_data.get('previous_chapters_mode'))),
+             ("calendar", (personal_calendar(bazi_json, lang_code, per_month=n)
+                           for n in range(7, prompt_budget.PROMPT_BUDGET_CALENDAR_MIN - 1, -1)))])
+        save_chapter = _session_saver(session, 'annual', section_type)
+        if wants_event_stream():
+            return stream_section(system_prompt, user_prompt,
+                                  built['max_tokens'], f"annual/{section_type}",
+                                  fresh=fresh, tag=tag, prompt_meta=prompt_meta,
+                                  on_done=save_chapter)
+        ai_result = ask_ai(system_prompt, user_prompt,
+                           max_tokens=built['max_tokens'], fresh=fresh, tag=tag)
 
         if ai_result and 'choices' in ai_result:
             content = ai_result['choices'][0]['message']['content']
+            if save_chapter:
+                save_chapter(content)
             print(f"Annual section success! Content length: {len(content)}")
-            return jsonify({"content": content})
+            return jsonify({"content": content, "meta": _with_prompt_meta(ai_result, prompt_meta)})
         elif ai_result and 'error' in ai_result:
             print(f"Annual AI Error: {ai_result}")
-            return jsonify(ai_result), 500
+            return _ai_error_response(ai_result)
         else:
             return jsonify({"error": "AI response format invalid",
                             "raw": str(ai_result)}), 500
@@ -3297,7 +4116,9 @@ element) it rests on — reason first, advice second, every time.
 
 from fengshui import (
     build_fengshui_prompt,
+    precomputed_facts as fengshui_facts,
     FENGSHUI_SECTION_TYPES,
+    STYLE_RULES as FENGSHUI_STYLE_RULES,
 )
 
 
@@ -3319,6 +4140,10 @@ def generate_fengshui_section():
         req_data = request.json
         if not req_data:
             return jsonify({"error": "No JSON received"}), 400
+        fresh = bool(req_data.get('fresh'))   # 客户要求重写：跳过 LLM 应答缓存
+        session, missing = _chart_session(req_data, 'fengshui')
+        if missing:
+            return missing
 
         bazi_json = req_data.get('bazi_data', {})
         section_type = req_data.get('section_type', 'constitution')
@@ -3349,9 +4174,10 @@ def generate_fengshui_section():
         else:
             style = lang_config.get('style_gentle')
 
-        context_str = format_bazi_context(bazi_json)
+        context_str = _fact_context(session, bazi_json)
         previous_chapters = req_data.get('previous_chapters', []) or []
-        previous_context = format_previous_chapters_context(previous_chapters)
+        previous_context = format_previous_chapters_context(
+            previous_chapters, req_data.get('previous_chapters_mode'))
 
         base_system_prompt = f"""
 You are a master of BaZi (Chinese Four Pillars) and 命理风水 (personal feng shui via the birth chart), grounded in classical remedy doctrine (五行补救·调候). You are writing one chapter of a Personal Feng Shui reading for a paying client — feng shui derived from the person's chart, NOT from a house survey.
@@ -3381,7 +4207,6 @@ This rule is NON-NEGOTIABLE. Violations will break the PDF rendering.
 ## CLIENT INFORMATION
 
 **Gender 性别**: {gender.upper() if gender != 'unknown' else 'UNKNOWN'}
-**Name 姓名**: {client_name}
 **Pronouns 代词**: {gender_info['pronoun']}
 
 **Gender-Specific BaZi Rules 性别专属解读规则**:
@@ -3407,10 +4232,12 @@ without first stating the BaZi reason it rests on.
 ## QUALITY RULES — HIGHEST PRIORITY 最高优先级质量规则
 
 1. **Second person only 第二人称铁律**: Address the client DIRECTLY in second person throughout ("you"/"你"). NEVER use third person ("he", "she", "命主") or the client's name in narration.
-2. **Day Master strength is engine-decided 日主强弱以引擎为准**: The chart engine has determined the Day Master strength = **{str(bazi_json.get('dayMasterStrength', 'unknown')).upper()}**. ALL element remedy conclusions MUST be consistent with this verdict.
+2. **Day Master strength is engine-decided 日主强弱以引擎为准**: The chart engine has determined the Day Master strength — see CLIENT FACTS at the end of the task. ALL element remedy conclusions MUST be consistent with this verdict.
 3. **Structural labels follow the report language 结构标签跟报告语言走**: Any structural labels in the template are placeholders — translate them into the report language. Keep GanZhi and BaZi terms in Chinese with translations.
-4. **Age-year conversions: LOOK UP, never calculate 年龄年份只查表不心算**: {_age_year_table(bazi_json)} Whenever you mention an age together with a calendar year, the pair MUST match this table exactly. Never do the arithmetic yourself.
+4. **Age-year conversions: LOOK UP, never calculate 年龄年份只查表不心算**: Use the age-year table in CLIENT FACTS. Whenever you mention an age together with a calendar year, the pair MUST match this table exactly. Never do the arithmetic yourself.
 """
+        client_facts = _client_facts(client_name, bazi_json,
+                                     age_table=_fact_age_table(session, bazi_json))
 
         built = build_fengshui_prompt(
             section_type=section_type,
@@ -3419,20 +4246,37 @@ without first stating the BaZi reason it rests on.
             previous_context=previous_context,
             mode=reading_mode,
             lang_code=lang_code,
+            facts=_fact_fengshui(session, bazi_json, lang_code),
         )
 
         print(f"Calling AI for fengshui section: {section_type} "
               f"(max_tokens={built['max_tokens']})")
-        ai_result = ask_ai(base_system_prompt, built['prompt'],
-                           max_tokens=built['max_tokens'])
+        tag = {"product": "fengshui", "section": section_type, "mode": reading_mode,
+               "language": lang_code}
+        system_prompt, user_prompt, prompt_meta = prompt_budget.fit(
+            tag, base_system_prompt, built['prompt'] + client_facts,
+            {"bazi_context": context_str, "previous_chapters": previous_context,
+             "style_contract": FENGSHUI_STYLE_RULES},
+            [("previous_chapters", previous_chapters_trims(
+                previous_chapters, req_data.get('previous_chapters_mode')))])
+        save_chapter = _session_saver(session, 'fengshui', section_type)
+        if wants_event_stream():
+            return stream_section(system_prompt, user_prompt,
+                                  built['max_tokens'], f"fengshui/{section_type}",
+                                  fresh=fresh, tag=tag, prompt_meta=prompt_meta,
+                                  on_done=save_chapter)
+        ai_result = ask_ai(system_prompt, user_prompt,
+                           max_tokens=built['max_tokens'], fresh=fresh, tag=tag)
 
         if ai_result and 'choices' in ai_result:
             content = ai_result['choices'][0]['message']['content']
+            if save_chapter:
+                save_chapter(content)
             print(f"Feng Shui section success! Content length: {len(content)}")
-            return jsonify({"content": content})
+            return jsonify({"content": content, "meta": _with_prompt_meta(ai_result, prompt_meta)})
         elif ai_result and 'error' in ai_result:
             print(f"Feng Shui AI Error: {ai_result}")
-            return jsonify(ai_result), 500
+            return _ai_error_response(ai_result)
         else:
             return jsonify({"error": "AI response format invalid",
                             "raw": str(ai_result)}), 500
@@ -3473,6 +4317,10 @@ def generate_iching_section():
         req_data = request.json
         if not req_data:
             return jsonify({"error": "No JSON received"}), 400
+        fresh = bool(req_data.get('fresh'))   # 客户要求重写：跳过 LLM 应答缓存
+        session, missing = _chart_session(req_data, 'iching')
+        if missing:
+            return missing
 
         cast = req_data.get('cast') or {}
         if not cast.get('primary'):
@@ -3492,7 +4340,8 @@ def generate_iching_section():
         client_name = (req_data.get('client_name') or '').strip()
 
         previous_chapters = req_data.get('previous_chapters', []) or []
-        previous_context = format_previous_chapters_context(previous_chapters)
+        previous_context = format_previous_chapters_context(
+            previous_chapters, req_data.get('previous_chapters_mode'))
 
         p = cast.get('primary', {})
         print(f"Cast {cast.get('cast_code')} #{p.get('number')} {p.get('english_name')} "
@@ -3537,8 +4386,13 @@ weighing on them. No mysticism, no cosmic language, no flattery. Short sentences
 more authority here than long ones. A reader who has sat with the Yi for thirty years
 does not need to perform.
 
+Structural labels in the template are placeholders — translate them into the report language.
+"""
+        # 日期每天变，放在 prompt 末尾，别让它打断上面静态前缀的缓存
+        client_facts = f"""
+
 ## TIME ANCHOR 时间锚点
-TODAY is {datetime.now():%Y-%m-%d}. Any year before {datetime.now().year} is in the PAST — never describe it as upcoming or future. Structural labels in the template are placeholders — translate them into the report language.
+TODAY is {datetime.now():%Y-%m-%d}. Any year before {datetime.now().year} is in the PAST — never describe it as upcoming or future.
 """
 
         built = build_iching_prompt(
@@ -3552,16 +4406,30 @@ TODAY is {datetime.now():%Y-%m-%d}. Any year before {datetime.now().year} is in
 
         print(f"Calling AI for iching section: {section_type} "
               f"(max_tokens={built['max_tokens']})")
-        ai_result = ask_ai(base_system_prompt, built['prompt'],
-                           max_tokens=built['max_tokens'])
+        tag = {"product": "iching", "section": section_type, "language": lang_code}
+        system_prompt, user_prompt, prompt_meta = prompt_budget.fit(
+            tag, base_system_prompt, built['prompt'] + client_facts,
+            {"previous_chapters": previous_context},
+            [("previous_chapters", previous_chapters_trims(
+                previous_chapters, req_data.get('previous_chapters_mode')))])
+        save_chapter = _session_saver(session, 'iching', section_type)
+        if wants_event_stream():
+            return stream_section(system_prompt, user_prompt,
+                                  built['max_tokens'], f"iching/{section_type}",
+                                  fresh=fresh, tag=tag, prompt_meta=prompt_meta,
+                                  on_done=save_chapter)
+        ai_result = ask_ai(system_prompt, user_prompt,
+                           max_tokens=built['max_tokens'], fresh=fresh, tag=tag)
 
         if ai_result and 'choices' in ai_result:
             content = ai_result['choices'][0]['message']['content']
+            if save_chapter:
+                save_chapter(content)
             print(f"I Ching section success! Content length: {len(content)}")
-            return jsonify({"content": content})
+            return jsonify({"content": content, "meta": _with_prompt_meta(ai_result, prompt_meta)})
         elif ai_result and 'error' in ai_result:
             print(f"I Ching AI Error: {ai_result}")
-            return jsonify(ai_result), 500
+            return _ai_error_response(ai_result)
         else:
             return jsonify({"error": "AI response format invalid",
                             "raw": str(ai_result)}), 500
@@ -3601,6 +4469,7 @@ def generate_ziwei_section():
         req_data = request.json
         if not req_data:
             return jsonify({"error": "No JSON received"}), 400
+        fresh = bool(req_data.get('fresh'))   # 客户要求重写：跳过 LLM 应答缓存
 
         section_type = req_data.get('section_type', 'verdict')
         if section_type not in zwp.ZIWEI_SECTION_TYPES:
@@ -3638,27 +4507,419 @@ def generate_ziwei_section():
               f"| verified={verified}")
 
         if section_type == 'verdict':
-            v = zwp.build_verdict(c, base_lang, lang_instruction)
+            with llm_cache.tracking() as tally:
+                v = zwp.build_verdict(c, base_lang, lang_instruction, fresh=fresh)
             return jsonify({"verdict": v,
                             "chart": zwp.chart_payload(c, base_lang),
-                            "verified": verified})
-
-        content, residual = zwp.generate_section(
-            section_type, c, base_lang,
-            verdict=req_data.get('verdict') or '',
-            lang_instruction=lang_instruction,
-        )
+                            "verified": verified,
+                            "meta": {"cache": tally}})
+
+        with llm_cache.tracking() as tally:
+            content, residual = zwp.generate_section(
+                section_type, c, base_lang,
+                verdict=req_data.get('verdict') or '',
+                lang_instruction=lang_instruction,
+                fresh=fresh,
+            )
         print(f"Ziwei section {section_type} ok: {len(content)} chars, "
               f"{len(residual)} soft residual")
         return jsonify({"content": content, "residual": residual,
-                        "verified": verified})
+                        "verified": verified,
+                        "meta": {"cache": tally}})
 
+    except llm_limiter.LimiterBusy as e:
+        print(f"Ziwei section rejected: {e}")
+        return (jsonify({"error": f"Upstream busy: {e}", "retry_after": e.retry_after}), 429,
+                {"Retry-After": str(e.retry_after)})
     except Exception as e:
         error_msg = traceback.format_exc()
         print(f"CRITICAL ERROR in generate_ziwei_section: {error_msg}")
         return jsonify({"error": "Internal Server Error", "details": str(e)}), 500
 
 
+# ================= 异步任务 - JOBS =================
+# POST /api/jobs {"endpoint": "/api/generate-section", "payload": {...原样的章节请求...},
+#                 "webhook_url": "https://..."(可选)}  -> 202 {"id", "status": "queued"}
+# GET  /api/jobs/<id> -> status = queued / running / done / error；完成后带 http_status + result
+# 后台直接跑原来的章节视图函数，result 就是同步调用会返回的 JSON，一个字段不差。
+
+import jobs
+
+JOB_ENDPOINTS = {
+    '/api/generate-section',
+    '/api/generate-marriage-section',
+    '/api/generate-annual-section',
+    '/api/generate-fengshui-section',
+    '/api/generate-iching-section',
+    '/api/generate-ziwei-section',
+}
+
+
+def _run_job_request(endpoint, payload):
+    """在后台线程里伪造一次 POST 请求，走完整的 Flask 分发（含 after_request）。"""
+    with app.test_request_context(endpoint, method='POST', json=payload), llm_limiter.patient():
+        response = app.full_dispatch_request()
+    return response.status_code, response.get_json(silent=True)
+
+
+jobs.init(_run_job_request)
+
+
+@app.before_request
+def _start_server_timing():
+    # 必须是第一个 before_request：合并等待、限流排队都要算进这次请求
+    g.started = time.time()
+    llm_transport.begin_timing()
+
+
+@app.after_request
+def _add_server_timing(response):
+    waits = llm_transport.end_timing()
+    if SERVER_TIMING and waits is not None and 'started' in g:
+        total = time.time() - g.started
+        metrics = [f"{kind};dur={secs * 1000:.1f}" for kind, secs in sorted(waits.items())]
+        metrics.append(f"app;dur={max(0.0, total - sum(waits.values())) * 1000:.1f}")
+        metrics.append(f"total;dur={total * 1000:.1f}")
+        response.headers['Server-Timing'] = ", ".join(metrics)
+    return response
+
+
+@app.after_request
+def _compress_response(response):
+    # after_request 倒序执行：这个在 _finish_flight 之后跑（合并等待者拿到的是未压缩的原文，
+    # 各自按自己的 Accept-Encoding 再压），在 Server-Timing 之前跑（压缩耗时算进 app）
+    if request.path.startswith('/api/'):
+        fast_json.compress_response(response, request.headers.get('Accept-Encoding'))
+    return response
+
+
+@app.before_request
+def _coalesce_duplicate_request():
+    """同一份章节请求还在途（别的 worker / 线程正在跑）：不再执行端点，等它的结果原样返回。
+    见 singleflight。流式请求不合并；fresh=true（客户要求重写，含会话里的重写）也不合并 ——
+    接上在途或刚跑完的那趟，拿到的正是客户想换掉的那一版。"""
+    if (request.method != 'POST' or request.path not in JOB_ENDPOINTS
+            or wants_event_stream()):
+        return None
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict) or not body or body.get('fresh'):
+        return None
+    k = singleflight.key(request.path, body)
+    role, value = singleflight.begin(k)
+    if role == "joined":
+        status, text, mimetype = value
+        return Response(text, status=status, mimetype=mimetype)
+    if role == "lead":
+        g.flight = (k, value)
+    return None
+
+
+@app.after_request
+def _finish_flight(response):
+    flight = g.pop('flight', None)
+    if flight:
+        singleflight.finish(*flight, response.status_code, response.get_data(as_text=True),
+                            response.mimetype)
+    return response
+
+
+@app.teardown_request
+def _abandon_flight(exc):
+    # 端点抛了未捕获异常时 after_request 不会跑：给等待者一个 500，别让它们干等到超时
+    flight = g.pop('flight', None)
+    if flight:
+        singleflight.finish(*flight, 500, json.dumps({"error": "Internal Server Error",
+                                                      "details": str(exc)}),
+                            'application/json')
+
+
+@app.before_request
+def _reject_when_llm_queue_full():
+    """章节端点入口：主供应商的排队已经超过 LLM_QUEUE_MAX 时立刻 429，
+    别让请求进来再占着 worker 排十分钟（jobs 的后台执行走 patient()，不受此限）。"""
+    if request.method != 'POST' or request.path not in JOB_ENDPOINTS:
+        return None
+    provider = ("deepseek" if request.path == '/api/generate-ziwei-section'
+                or (REPORT_LLM_PROVIDER == "deepseek" and DEEPSEEK_API_KEY) else "gemini")
+    wait = llm_limiter.overloaded(provider)
+    if wait is None:
+        return None
+    print(f"Rejecting {request.path}: {provider} queue full, retry after {wait}s")
+    return (jsonify({"error": "Upstream queue full, retry later", "retry_after": wait}), 429,
+            {"Retry-After": str(wait)})
+
+
+@app.route('/api/jobs', methods=['OPTIONS'])
+@app.route('/api/jobs/<job_id>', methods=['OPTIONS'])
+def jobs_options_handler(job_id=None):
+    return '', 204
+
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    try:
+        req_data = request.get_json(silent=True) or {}
+        endpoint = req_data.get('endpoint')
+        payload = req_data.get('payload')
+        webhook_url = req_data.get('webhook_url') or None
+        if endpoint not in JOB_ENDPOINTS:
+            return jsonify({"error": f"Unsupported endpoint: {endpoint}",
+                            "supported": sorted(JOB_ENDPOINTS)}), 400
+        if not isinstance(payload, dict):
+            return jsonify({"error": "Missing payload"}), 400
+        if webhook_url:
+            refused = jobs.webhook_error(str(webhook_url))
+            if refused:
+                return jsonify({"error": refused}), 400
+
+        job_id = jobs.submit(endpoint, payload, webhook_url)
+        print(f"Job {job_id} queued for {endpoint}")
+        return jsonify({"id": job_id, "status": "queued"}), 202
+
+    except jobs.JobQueueFull as e:
+        return jsonify({"error": "Job queue full", "details": str(e)}), 503
+    except Exception as e:
+        error_msg = traceback.format_exc()
+        print(f"CRITICAL ERROR in submit_job: {error_msg}")
+        return jsonify({"error": "Internal Server Error", "details": str(e)}), 500
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 200
+
+
+# ================= 命盘会话 - SESSIONS =================
+# POST   /api/sessions {bazi_data | bazi_a+bazi_b+scores | cast+question, language, mode, ...}
+#        -> 201 {"session_id", "ttl", "facts": [...]}
+# GET    /api/sessions/<id> -> 会话摘要（字段、已存的派生事实、已生成章节的类型和长度）
+# DELETE /api/sessions/<id>
+# 章节端点带 "session_id" 即可：命盘等字段从会话取（会话里的命盘优先于请求里的），
+# previous_chapters 缺省时用会话里本产品、排在本章之前的章节；成功的章节写回会话。
+
+CHART_FIELDS = ('bazi_data', 'bazi_a', 'bazi_b', 'scores', 'cast', 'question')
+
+
+def _chart_session(req_data, product):
+    """请求带 session_id 时按会话补全 req_data（原地改）。返回 (会话 或 None, 错误响应 或 None)。"""
+    sid = req_data.get('session_id')
+    if not sid:
+        return None, None
+    try:
+        session = chart_sessions.get(str(sid))
+    except chart_sessions.SessionNotFound:
+        return None, (jsonify({"error": "Session not found or expired"}), 404)
+    for k, v in session['data'].items():
+        if k in CHART_FIELDS:
+            req_data[k] = v
+        else:
+            req_data.setdefault(k, v)
+    if 'previous_chapters' not in req_data:
+        previous = []
+        for ch in chart_sessions.chapters(session, product):
+            if ch['type'] == req_data.get('section_type'):
+                break      # 重写某一章：只带它之前的章节
+            previous.append(ch)
+        req_data['previous_chapters'] = previous
+    print(f"Chart session {session['id'][:8]}: {len(req_data['previous_chapters'])} "
+          f"previous {product} chapter(s) from session")
+    return session, None
+
+
+def _session_saver(session, product, section_type):
+    """章节成功后写回会话的回调；没有会话时为 None。"""
+    if session is None:
+        return None
+    return lambda content: chart_sessions.save_chapter(session['id'], product,
+                                                       section_type, content)
+
+
+# 派生事实：章节端点和注册时的预计算共用，键名一致才命中。随日期变的键带 @日期。
+
+def _fact_context(session, bazi_json):
+    return chart_sessions.fact(session, "context", lambda: format_bazi_context(bazi_json))
+
+
+def _fact_age_table(session, bazi_json, who=""):
+    return chart_sessions.fact(session, f"age_table{who}@{date.today()}",
+                               lambda: _age_year_table(bazi_json))
+
+
+def _fact_timeline(session=None):
+    # 时间线和命盘无关、进程内已按节月缓存（forecast_timeline），不必再存进每个会话
+    return forecast_timeline()["timeline"]
+
+
+def _fact_interactions(session, timeline, bazi_json, who=""):
+    return chart_sessions.fact(session, f"branch_events{who}@{timeline[0]['gregorian_start']}",
+                               lambda: find_key_interactions(timeline, get_user_branches(bazi_json)))
+
+
+def _fact_marriage_context(session, bazi_a, bazi_b):
+    return chart_sessions.fact(session, "marriage_context",
+                               lambda: format_marriage_bazi_context(bazi_a, bazi_b))
+
+
+def _fact_fengshui(session, bazi_json, lang_code):
+    return chart_sessions.fact(session, f"fengshui:{lang_code}",
+                               lambda: fengshui_facts(bazi_json, lang_code))
+
+
+def _precompute_session_facts(data):
+    """注册时一次算好能算的派生事实（草稿会话，create() 一次写入）。"""
+    draft = {"facts": {}}
+    bazi = data.get('bazi_data')
+    if bazi:
+        _fact_context(draft, bazi)
+        _fact_age_table(draft, bazi)
+        _fact_interactions(draft, _fact_timeline(draft), bazi)
+        _fact_fengshui(draft, bazi, data.get('language', 'en'))
+    if data.get('bazi_a') and data.get('bazi_b'):
+        _fact_marriage_context(draft, data['bazi_a'], data['bazi_b'])
+        timeline = _fact_timeline(draft)
+        for who, b in (("_a", data['bazi_a']), ("_b", data['bazi_b'])):
+            _fact_age_table(draft, b, who)
+            _fact_interactions(draft, timeline, b, who)
+    return draft["facts"]
+
+
+@app.route('/api/sessions', methods=['OPTIONS'])
+@app.route('/api/sessions/<session_id>', methods=['OPTIONS'])
+def sessions_options_handler(session_id=None):
+    return '', 204
+
+
+@app.route('/api/sessions', methods=['POST'])
+def create_session():
+    try:
+        req_data = request.get_json(silent=True) or {}
+        if not any(req_data.get(k) for k in ('bazi_data', 'bazi_a', 'cast')):
+            return jsonify({"error": "Missing bazi_data, bazi_a/bazi_b or cast"}), 400
+        if req_data.get('bazi_a') and not req_data.get('bazi_b'):
+            return jsonify({"error": "Missing bazi_b"}), 400
+        t0 = time.time()
+        facts = _precompute_session_facts(req_data)
+        session_id = chart_sessions.create(req_data, facts)
+        print(f"Chart session {session_id[:8]} registered: {len(facts)} fact(s) "
+              f"in {(time.time() - t0) * 1000:.1f}ms")
+        return jsonify({"session_id": session_id, "ttl": chart_sessions.CHART_SESSION_TTL,
+                        "facts": sorted(facts)}), 201
+    except Exception as e:
+        error_msg = traceback.format_exc()
+        print(f"CRITICAL ERROR in create_session: {error_msg}")
+        return jsonify({"error": "Internal Server Error", "details": str(e)}), 500
+
+
+@app.route('/api/sessions/<session_id>', methods=['GET'])
+def get_session(session_id):
+    try:
+        session = chart_sessions.get(session_id)
+    except chart_sessions.SessionNotFound:
+        return jsonify({"error": "Session not found or expired"}), 404
+    return jsonify({"session_id": session_id, "fields": sorted(session['data']),
+                    "facts": sorted(session['facts']),
+                    "chapters": [{"product": c['product'], "type": c['type'],
+                                  "chars": len(c['content'])} for c in session['chapters']]}), 200
+
+
+@app.route('/api/sessions/<session_id>', methods=['DELETE'])
+def delete_session(session_id):
+    if not chart_sessions.delete(session_id):
+        return jsonify({"error": "Session not found or expired"}), 404
+    return jsonify({"session_id": session_id, "deleted": True}), 200
+
+
+# ================= 运维 - ADMIN =================
+# 只读的运维视图。要带 `Authorization: Bearer <token>`；没配 ADMIN_TOKEN 时整组关闭。
+
+def _admin_denied():
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Admin endpoints disabled (ADMIN_TOKEN not set)"}), 403
+    # ⚠️ 定长比较：!= 会在第一个不同的字节处提前返回，按响应时间可以逐字节猜口令
+    supplied = request.headers.get('Authorization', '').encode('utf-8')
+    if not hmac.compare_digest(supplied, f"Bearer {ADMIN_TOKEN}".encode('utf-8')):
+        return jsonify({"error": "Unauthorized"}), 401
+    return None
+
+
+@app.route('/api/admin/token-budgets', methods=['GET'])
+def admin_token_budgets():
+    """llm_budget 学到的各章节 token 预算；at_risk=True 的章节窗口内截断过或已顶到上限。"""
+    denied = _admin_denied()
+    if denied:
+        return denied
+    try:
+        return jsonify(llm_budget.table({"deepseek": DEEPSEEK_MAX_TOKENS,
+                                         "gemini": GEMINI_MAX_OUTPUT_TOKENS})), 200
+    except Exception as e:
+        print(f"ERROR in admin_token_budgets: {traceback.format_exc()}")
+        return jsonify({"error": "Internal Server Error", "details": str(e)}), 500
+
+
+@app.route('/api/admin/stats', methods=['GET'])
+def admin_stats():
+    """各模块的运行统计（缓存命中、对冲、熔断、限流、任务队列……）。原来挂在 GET / 上，
+    探活每打一次就要扫一遍十几个模块，还把内部状态公开出去，所以挪到 admin 下。"""
+    denied = _admin_denied()
+    if denied:
+        return denied
+    try:
+        return jsonify({
+            "llm_transport": llm_transport.stats(),
+            "jobs": jobs.stats(),
+            "llm_cache": llm_cache.stats(),
+            "gemini_cache": gemini_cache.stats(),
+            "prompt_templates": prompt_templates.stats(),
+            "chapter_digest": chapter_digest.stats(),
+            "chart_sessions": chart_sessions.stats(),
+            "prompt_budget": prompt_budget.stats(),
+            "forecast_timeline": forecast_timeline_stats(),
+            "json": fast_json.stats(),
+            "llm_hedge": llm_hedge.stats(),
+            "llm_breaker": llm_breaker.stats(),
+            "llm_limiter": llm_limiter.stats(),
+            "singleflight": singleflight.stats(),
+        }), 200
+    except Exception as e:
+        print(f"ERROR in admin_stats: {traceback.format_exc()}")
+        return jsonify({"error": "Internal Server Error", "details": str(e)}), 500
+
+
+def _utc_ts(value):
+    """ISO 日期/时间 → epoch 秒；不带时区的按 UTC。空值返回 None。"""
+    if not value:
+        return None
+    dt = datetime.fromisoformat(value)
+    return (dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)).timestamp()
+
+
+@app.route('/api/admin/ledger', methods=['GET'])
+def admin_ledger():
+    """LLM 调用台账聚合。
+
+    ?group_by=product,section（可选维度见 llm_ledger.DIMENSIONS）
+    &days=7 或 &since=2026-01-01&until=2026-01-08（ISO 日期/时间，UTC）
+    """
+    denied = _admin_denied()
+    if denied:
+        return denied
+    try:
+        group_by = [d for d in (request.args.get('group_by') or 'product').split(',') if d]
+        until = _utc_ts(request.args.get('until'))
+        since = _utc_ts(request.args.get('since'))
+        if since is None:
+            since = (until or time.time()) - float(request.args.get('days', 7)) * 86400
+        return jsonify(llm_ledger.aggregate(group_by, since, until)), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"ERROR in admin_ledger: {traceback.format_exc()}")
+        return jsonify({"error": "Internal Server Error", "details": str(e)}), 500
+
+
 # ================= 启动 =================
 
 if __name__ == '__main__':
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""branch_interactions.py — 时间线地支 × 命主四柱的全套作用关系：冲 合 刑 害 破 半合 三合 三会。
+
+以前有两套各扫各的：app.find_key_interactions 只看六冲、六合（24 个流月），
+annual_2027._branch_relation 多了刑、害，但都不管破、半合，也不管三支成局。现在统一走这里：
+
+    两两关系    ganzhi.RELATION[时间线支][命主支] 的位图（冲 六合 刑 害 破 半合），一次查表
+    三支成局    时间线支 + 命主任两柱（或一柱 + 流年支）凑齐 ganzhi.SAN_HE / SAN_HUI 的一组
+                —— 成三合时同组的半合不再重复列出
+
+scan() 吃一串地支序号（24 个流月、全年 12 个节月、多年的逐日都行），返回结构化事件列表。
+一条时间线里不同的 (地支, 流年支) 组合最多几十种，每种只算一次（按命盘缓存），
+再按位置铺回整条时间线 —— 逐日扫十年和扫 24 个月的代价差不多。
+
+事件 {'i', 'kind', 'zhi', 'pillars', 'partners', 'branches', 'element', 'flow_year'}：
+    i          在输入序列里的位置
+    kind       KINDS 之一
+    zhi        时间线这一位的地支
+    pillars    牵涉的命主柱（'year' / 'month' / 'day' / 'hour'，按柱序）
+    partners   这些柱上的地支（和 pillars 一一对应）
+    branches   成局的完整地支（三合 / 三会 / 半合），其余为 zhi + 对方
+    element    合局五行（三合 / 三会 / 半合），其余为 ''
+    flow_year  流年支参与了成局
+
+describe(e) 给 prompt 用的中文一句话；事件本身只用字符串和列表，可以直接存进会话。
+"""
+from functools import lru_cache
+
+import ganzhi
+
+PILLARS = ('year', 'month', 'day', 'hour')
+PILLAR_CN = {'year': '年柱', 'month': '月柱', 'day': '日柱', 'hour': '时柱'}
+
+# 事件在同一位上的排列顺序：先不利、再有利；TENSE / HARMONY 给调用方分组用
+KINDS = ('冲', '刑', '害', '破', '三会', '三合', '六合', '半合')
+TENSE = frozenset(('冲', '刑', '害', '破'))
+HARMONY = frozenset(('三会', '三合', '六合', '半合'))
+_ORDER = {k: i for i, k in enumerate(KINDS)}
+_DIRECTION = ('东方', '南方', '西方', '北方')       # 三会按 SAN_HUI 的组序
+
+
+def encode_chart(branches):
+    """命主四柱地支 -> 4 个序号（按 PILLARS，缺的记 -1）。
+
+    branches 可以是 {'year': '亥', ...}，也可以是按年月日时排好的列表。"""
+    if isinstance(branches, dict):
+        branches = [branches.get(p) for p in PILLARS]
+    out = [ganzhi.branch(b) for b in branches]
+    return tuple(out + [-1] * (4 - len(out)))
+
+
+def _event(kind, zhi, hits, branches, element=None, flow_year=False):
+    return {'kind': kind, 'zhi': ganzhi.ZHI[zhi],
+            'pillars': [PILLARS[p] for p, _ in hits],
+            'partners': [ganzhi.ZHI[b] for _, b in hits],
+            'branches': ''.join(ganzhi.ZHI[b] for b in branches),
+            'element': ganzhi.ELEMENTS[element] if element is not None else '',
+            'flow_year': flow_year}
+
+
+@lru_cache(maxsize=4096)
+def events_at(zhi, chart, flow_year=-1):
+    """地支 zhi（flow_year = 当时的流年支，-1 不看）对命盘 chart 的全部事件（不含 'i'）。"""
+    out = []
+    row = ganzhi.RELATION[zhi]
+    # 三支成局：zhi 所在的三合 / 三会组，另外两支由命主各柱（+ 流年支）补齐
+    done = set()
+    for kind, groups, of in (('三会', ganzhi.SAN_HUI, ganzhi.SAN_HUI_OF),
+                             ('三合', ganzhi.SAN_HE, ganzhi.SAN_HE_OF)):
+        members, element = groups[of[zhi]]
+        rest = [b for b in members if b != zhi]
+        hits = [(p, b) for p, b in enumerate(chart) if b in rest]
+        have = {b for _, b in hits}
+        if not hits:
+            continue
+        if have == set(rest):
+            out.append(_event(kind, zhi, hits, members, element))
+        elif flow_year >= 0 and have | {flow_year} == set(rest):
+            out.append(_event(kind, zhi, hits, members, element, flow_year=True))
+        else:
+            continue
+        done.add(kind)
+    # 两两关系：同一种关系、同一个对方支的几柱并成一条
+    for bit, kind in ganzhi.RELATION_NAMES:
+        if kind == '半合' and '三合' in done:
+            continue
+        by_partner = {}
+        for p, b in enumerate(chart):
+            if b >= 0 and row[b] & bit:
+                by_partner.setdefault(b, []).append((p, b))
+        for b, hits in by_partner.items():
+            if kind == '半合':
+                members, element = ganzhi.SAN_HE[ganzhi.SAN_HE_OF[zhi]]
+                out.append(_event(kind, zhi, hits, [m for m in members if m in (zhi, b)], element))
+            else:
+                out.append(_event(kind, zhi, hits, (zhi, b)))
+    out.sort(key=lambda e: (_ORDER[e['kind']], PILLARS.index(e['pillars'][0])))
+    return tuple(out)
+
+
+def scan(branches, chart, flow_years=None):
+    """整条时间线对命盘的事件列表（按位置、再按 KINDS 排序）。
+
+    branches    时间线每一位的地支（字或序号）
+    chart       encode_chart() 的结果，或直接给四柱地支（dict / 列表）
+    flow_years  每一位当时的流年支（和 branches 等长），不给则不看流年参与的成局
+    """
+    if not (isinstance(chart, tuple) and all(isinstance(b, int) for b in chart)):
+        chart = encode_chart(chart)
+    zhis = [b if isinstance(b, int) else ganzhi.branch(b) for b in branches]
+    years = ([-1] * len(zhis) if flow_years is None else
+             [y if isinstance(y, int) else ganzhi.branch(y) for y in flow_years])
+    per_key = {}
+    out = []
+    for i, key in enumerate(zip(zhis, years)):
+        evs = per_key.get(key)
+        if evs is None:
+            evs = per_key[key] = events_at(key[0], chart, key[1]) if key[0] >= 0 else ()
+        for e in evs:
+            out.append(dict(e, i=i))
+    return out
+
+
+def describe(e, source='月支'):
+    """一句中文描述，例：月支子冲命主日柱午；月支子与命主年柱申、日柱辰三合水局。"""
+    who = '、'.join(f"{PILLAR_CN[p]}{b}" for p, b in zip(e['pillars'], e['partners']))
+    kind, zhi = e['kind'], e['zhi']
+    if kind in ('三合', '三会'):
+        flow = '及流年' + next(b for b in e['branches'] if b not in e['partners'] + [zhi]) \
+            if e['flow_year'] else ''
+        local = _DIRECTION[ganzhi.SAN_HUI_OF[ganzhi.branch(zhi)]] if kind == '三会' else ''
+        return f"{source}{zhi}与命主{who}{flow}{kind}{local}{e['element']}局({e['branches']})"
+    if kind == '半合':
+        return f"{source}{zhi}与命主{who}半合{e['element']}局"
+    if kind == '冲':
+        return f"{source}{zhi}冲命主{who}"
+    if kind == '刑' and zhi in e['partners']:
+        return f"{source}{zhi}与命主{who}自刑"
+    if kind == '六合':
+        return f"{source}{zhi}与命主{who}六合"
+    return f"{source}{zhi}与命主{who}相{kind}"
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""calendar_batch.py — 一次算 N 个客户的年度个人吉日 / 忌日（营销邮件、免费试读页的预生成用）。
+
+annual_2027.personal_calendar 一次一个客户、输出的是给模型看的 Markdown；给几十万客户
+预生成时逐个调太慢，也不需要 Markdown。规则和它完全一样，只是换成 NumPy 整表计算：
+
+    日子的列（D = 全年天数）：日支、冲支（= 日支 + 6）、有无宜的标签、所属节月
+    客户的列（N）：日支、年支（地支序号 0=子，-1 = 缺）
+    blocked[N, D]  = 当天冲客户日支或年支
+    favorable      = 有标签 & ~blocked；每月最多 per_month 天，与客户日支六合的日子优先
+    caution[N, D]  = 当天冲客户日支
+
+每月取前 per_month 天用「月内累计计数」做：先数六合吉日，剩下的名额给其余吉日，按日期先后。
+客户按 CHUNK 行一块算（N × D 的布尔矩阵，一块几 MB），结果逐行写 JSONL，内存和客户数无关。
+
+NumPy 是可选依赖（web 服务不需要）：没装时 batch() 抛 RuntimeError。命令行见 tools/gen_calendars.py。
+"""
+import os
+from datetime import date
+
+import almanac
+import fast_json
+import ganzhi
+
+try:
+    import numpy as np
+except ImportError:     # 可选依赖
+    np = None
+
+CHUNK = int(os.getenv("CALENDAR_BATCH_CHUNK", "4096"))
+
+CHONG_IDX = np.array(ganzhi.CHONG_OF) if np is not None else None
+LIU_HE_IDX = np.array(ganzhi.LIU_HE_OF) if np is not None else None
+
+
+def encode_chart(bazi_json):
+    """命盘 -> (日支序号, 年支序号)，缺的记 -1。"""
+    from annual_2027 import get_user_branches
+    ub = get_user_branches(bazi_json)
+    return ganzhi.branch(ub.get('day')), ganzhi.branch(ub.get('year'))
+
+
+class YearColumns:
+    """一年的日子列（整数编码），从 almanac.bin 读一次。"""
+
+    def __init__(self, year):
+        if np is None:
+            raise RuntimeError("calendar_batch needs numpy (pip install numpy)")
+        ix = almanac.index(year)
+        self.year = year
+        self.days = ix.days
+        self.months = ix.months
+        recs = np.array(almanac.records(date.fromisoformat(ix.days[0]['d']),
+                                        date.fromisoformat(ix.days[-1]['d'])), dtype=np.int64)
+        self.branch = recs[:, 1] % 12
+        self.clash = CHONG_IDX[self.branch]
+        self.tagged = recs[:, 3] != 0
+        starts = np.array([date.fromisoformat(m['start']).toordinal() for m in ix.months])
+        self.month = np.searchsorted(starts, recs[:, 0], side='right') - 1
+        # 每个节月在全年里的起点（列号），用来把全年累计数换成月内累计数
+        self.month_start = starts - starts[0]
+
+
+def _month_cumsum(x, cols):
+    """x[N, D] 布尔 -> 月内累计计数（含当天）。"""
+    c = np.cumsum(x, axis=1, dtype=np.int32)
+    padded = np.concatenate([np.zeros((x.shape[0], 1), np.int32), c], axis=1)
+    return c - padded[:, cols.month_start][:, cols.month]
+
+
+def batch(day_branch, year_branch, year=2027, per_month=8, cols=None):
+    """N 个客户一次算完。返回 (favorable[N, D], liu_he[N, D], caution[N, D]) 三个布尔矩阵，
+    列的顺序 = almanac.year_days(year)。"""
+    cols = cols or YearColumns(year)
+    db = np.asarray(day_branch, dtype=np.int32)[:, None]
+    yb = np.asarray(year_branch, dtype=np.int32)[:, None]
+    clash = cols.clash[None, :]
+    blocked = ((clash == db) & (db >= 0)) | ((clash == yb) & (yb >= 0))
+    good = cols.tagged[None, :] & ~blocked
+    he_branch = np.where(db >= 0, np.take(LIU_HE_IDX, np.maximum(db, 0)), -1)
+    he = good & (cols.branch[None, :] == he_branch)
+    other = good & ~he
+    he_pick = he & (_month_cumsum(he, cols) <= per_month)
+    he_count = np.add.reduceat(he_pick.astype(np.int32), cols.month_start, axis=1)   # [N, 12]
+    slots = np.maximum(per_month - he_count, 0)[:, cols.month]
+    favorable = he_pick | (other & (_month_cumsum(other, cols) <= slots))
+    caution = (clash == db) & (db >= 0)
+    return favorable, he_pick, caution
+
+
+def iter_results(ids, day_branch, year_branch, year=2027, per_month=8):
+    """逐个客户产出 {'id', 'year', 'favorable': [{'d', 'gz', 'tags', 'liu_he'}], 'caution': [日期]}，
+    按 CHUNK 分块计算。"""
+    cols = YearColumns(year)
+    day_branch, year_branch = np.asarray(day_branch), np.asarray(year_branch)
+    for lo in range(0, len(ids), CHUNK):
+        hi = min(lo + CHUNK, len(ids))
+        favorable, he, caution = batch(day_branch[lo:hi], year_branch[lo:hi], year,
+                                       per_month, cols)
+        days = cols.days
+        for row in range(hi - lo):
+            yield {'id': ids[lo + row], 'year': year,
+                   'favorable': [{'d': days[i]['d'], 'gz': days[i]['gz'],
+                                  'tags': days[i]['tags'], 'liu_he': bool(he[row, i])}
+                                 for i in np.flatnonzero(favorable[row])],
+                   'caution': [days[i]['d'] for i in np.flatnonzero(caution[row])]}
+
+
+def write_jsonl(out, ids, day_branch, year_branch, year=2027, per_month=8):
+    """结果逐行写进文本流 out（一行一个客户，内容同 iter_results），返回写了多少行。
+
+    每天的 JSON 片段（六合 / 非六合两种）事先序列化好，一行就是片段的拼接，
+    不再为每个客户每一天建 dict 再编码。"""
+    cols = YearColumns(year)
+    fragments = [[fast_json.dumps({'d': d['d'], 'gz': d['gz'], 'tags': d['tags'], 'liu_he': he})
+                  for he in (False, True)] for d in cols.days]
+    dates = [fast_json.dumps(d['d']) for d in cols.days]
+    day_branch, year_branch = np.asarray(day_branch), np.asarray(year_branch)
+    head = ',"year":%d,"favorable":[' % year
+    for lo in range(0, len(ids), CHUNK):
+        hi = min(lo + CHUNK, len(ids))
+        favorable, he, caution = batch(day_branch[lo:hi], year_branch[lo:hi], year,
+                                       per_month, cols)
+        he = he.view(np.int8)
+        for row in range(hi - lo):
+            flags = he[row]
+            out.write('{"id":' + fast_json.dumps(ids[lo + row]) + head
+                      + ','.join([fragments[i][flags[i]] for i in np.flatnonzero(favorable[row])])
+                      + '],"caution":['
+                      + ','.join([dates[i] for i in np.flatnonzero(caution[row])]) + ']}\n')
+    return len(ids)
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""chapter_digest.py — 前面章节的「已确立结论」摘要，替代整章原文回灌。
+
+format_previous_chapters_context 以前把前几章全文贴进下一章的 prompt：末章带 3 章、
+每章 5500–12000 字，单章推理拖到 ~550s（首章无前文 ~245s），多出来的几乎全是在重读前文。
+一致性真正需要的只是前文**下过的结论**：
+
+    日主强弱 / 喜用忌神 / 关键时间点（年份、年龄、大运）/ 行业方向 / 婚恋时机
+
+这里逐章把这五类结论句抽出来（按关键词 + 结论性措辞打分，每类最多 CHAPTER_DIGEST_PER_TOPIC 句），
+按 sha256(正文) 缓存在进程内 —— 同一章在后面每一章的请求里都会再出现，只抽一次。
+
+- 纯文本规则，不调模型：抽取不占上游名额、不加延迟，结果确定。
+- 抽出来的结论太少（< CHAPTER_DIGEST_MIN_FACTS 句，例如周易章节、或关键词覆盖不到的语言）
+  的那一章自动退回全文，宁可长也不丢上下文。
+- CHAPTER_DIGEST_MODE=full（或请求里 previous_chapters_mode="full"）整体退回旧的全文回灌。
+"""
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+
+CHAPTER_DIGEST_MODE = os.getenv("CHAPTER_DIGEST_MODE", "digest").strip().lower()   # digest / full
+CHAPTER_DIGEST_PER_TOPIC = int(os.getenv("CHAPTER_DIGEST_PER_TOPIC", "6"))
+CHAPTER_DIGEST_MIN_FACTS = int(os.getenv("CHAPTER_DIGEST_MIN_FACTS", "4"))
+CHAPTER_DIGEST_CACHE_SIZE = 1024
+MAX_SENTENCE_CHARS = 300
+
+_YEAR_OR_AGE = (r"(?:19|20)\d{2}|\d{2}\s*(?:岁|歲|-\s*\d{2}\s*(?:岁|歲))|"
+                r"\bages?\s+\d{2}|\bAlter\s+\d{2}|\bedad\s+\d{2}|\bâge\s+\d{2}|"
+                r"\d{2}\s*(?:Jahre|años|ans)\b|大运|大運|流年")
+
+# (键, 标题, 主题词, 额外加分的词)；主题词必须命中，加分词决定同类里谁更像「结论」
+TOPICS = [
+    ("day_master", "Day Master strength 日主强弱",
+     r"身强|身弱|身旺|身衰|身強|日主|日元|day master|Tagesmeister|Maestro del D[ií]a|"
+     r"Ma[iî]tre du Jour",
+     r"强|弱|旺|衰|強|strong|weak|stark|schwach|fuerte|d[ée]bil|fort\b|faible|balanced|平衡|中和"),
+    ("favourable", "Favourable & unfavourable elements 喜用忌神",
+     r"用神|喜用|喜神|忌神|仇神|favou?rable|useful god|g[üu]nstig|desfavorable|d[ée]favorable",
+     r"金|木|水|火|土|metal|wood|water|fire|earth|Metall|Holz|Wasser|Feuer|Erde|"
+     r"agua|fuego|tierra|madera|eau|feu|terre|bois"),
+    ("timing", "Key timing calls 关键时间点", _YEAR_OR_AGE,
+     r"best|peak|turning|key|critical|avoid|caution|opportunit|最|关键|關鍵|转折|轉折|宜|忌|"
+     r"高峰|机会|機會|注意|beste|Höhepunkt|Wendepunkt|mejor|clave|meilleur|clé"),
+    ("industries", "Industries & career direction 行业方向",
+     r"行业|行業|职业|職業|事业方向|事業方向|industr|career|sector|profession|Branche|Beruf|"
+     r"industria|carrera|profesi[óo]n|secteur|carri[èe]re|m[ée]tier",
+     r"suit|ideal|best|favou?r|recommend|适合|適合|宜|利|有利|geeignet|ideal|adecuad|id[ée]al"),
+    ("marriage", "Marriage & relationship windows 婚恋时机",
+     r"婚|配偶|正缘|正緣|桃花|伴侣|伴侶|感情|marri|spouse|partner|wedding|romance|relationship|"
+     r"soulmate|Ehe|Heirat|Beziehung|matrimonio|boda|pareja|mariage|conjoint|couple",
+     _YEAR_OR_AGE),
+]
+_COMPILED = [(k, title, re.compile(subj, re.I), re.compile(bonus, re.I))
+             for k, title, subj, bonus in TOPICS]
+
+_SPLIT = re.compile(r"(?<=[。！？；!?])|(?<=[.;])\s+|\n+")
+_MARKDOWN = re.compile(r"\*\*|__|`|\||^\s*(?:#+|[-*+]|\d+[.)])\s*")
+
+_lock = threading.Lock()
+_cache = OrderedDict()      # sha256(正文) -> digest
+_counters = {"hits": 0, "extracted": 0, "fallback_full": 0}
+
+
+def _sentences(text):
+    for raw in _SPLIT.split(text or ""):
+        s = _MARKDOWN.sub("", raw or "").strip()
+        if 12 <= len(s) <= MAX_SENTENCE_CHARS:
+            yield s
+
+
+def extract(text):
+    """正文 -> {topic: [结论句, ...]}（每类按原文顺序，最多 CHAPTER_DIGEST_PER_TOPIC 句）。"""
+    picked = {k: [] for k, _, _, _ in _COMPILED}
+    seen = set()
+    for idx, s in enumerate(_sentences(text)):
+        if s in seen:
+            continue
+        best = None
+        for k, _, subj, bonus in _COMPILED:
+            hits = len(subj.findall(s))
+            if not hits:
+                continue
+            score = hits + 2 * len(bonus.findall(s))
+            if best is None or score > best[0]:
+                best = (score, k)
+        if best:
+            seen.add(s)
+            picked[best[1]].append((best[0], idx, s))
+    out = {}
+    for k, items in picked.items():
+        top = sorted(items, key=lambda t: -t[0])[:CHAPTER_DIGEST_PER_TOPIC]
+        out[k] = [s for _, _, s in sorted(top, key=lambda t: t[1])]
+    return out
+
+
+def digest(text):
+    """带缓存的 extract；结论句不足 CHAPTER_DIGEST_MIN_FACTS 时返回 None（调用方用全文）。"""
+    h = hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+    with _lock:
+        if h in _cache:
+            _cache.move_to_end(h)
+            _counters["hits"] += 1
+            d = _cache[h]
+            if d is None:
+                _counters["fallback_full"] += 1
+            return d
+    d = extract(text)
+    if sum(len(v) for v in d.values()) < CHAPTER_DIGEST_MIN_FACTS:
+        d = None
+    with _lock:
+        _counters["extracted"] += 1
+        if d is None:
+            _counters["fallback_full"] += 1
+        _cache[h] = d
+        while len(_cache) > CHAPTER_DIGEST_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return d
+
+
+def render(d):
+    """digest -> 拼进 prompt 的几行。"""
+    lines = []
+    for k, title, _, _ in _COMPILED:
+        if d.get(k):
+            lines.append(f"**{title}**")
+            lines.extend(f"- {s}" for s in d[k])
+    return "\n".join(lines)
+
+
+def stats():
+    with _lock:
+        out = dict(_counters)
+        out["cached"] = len(_cache)
+    out["mode"] = CHAPTER_DIGEST_MODE
+    return out
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""chart_sessions.py — 命盘会话：注册一次命盘，各章节只带 session_id。
+
+以前 worker 每写一章都把整份 bazi_data 加上前面所有章节全文再 POST 一遍，服务端每次
+重新解析、重新跑 format_bazi_context / build_forecast_timeline / find_key_interactions。
+现在：
+
+    POST /api/sessions {bazi_data, language, ...}  ->  {session_id}
+    POST /api/generate-section {session_id, section_type}
+
+- 会话存的是请求里「整份报告不变」的那些字段（命盘、合婚双方、卦、语言、模式……），
+  章节请求缺哪个字段就从会话里补；请求里显式带了的照旧以请求为准。
+- 派生事实（上下文字符串、冲合月份、年龄表、风水事实）注册时算好存进会话，
+  章节请求直接取；随日期变的事实键名带 `@日期`，换了日期自动重算并覆盖旧的。
+- 章节成功后由服务端追加进会话（同一产品同一章节重写时覆盖），下一章的 previous_chapters
+  不用再传。
+
+存储和其它跨 worker 状态一样落在 BAZI_DATA_DIR 的 SQLite 里；每个进程另有一个
+CHART_SESSION_MEMO 条的 LRU，按 rev 校验，没变过的会话不重复读库、不重复解析 JSON。
+CHART_SESSION_TTL 秒没用过的会话删掉；总大小超过 CHART_SESSION_MAX_MB 时按最近使用时间淘汰。
+
+⚠️ 单机存储（见 local_store）：多机部署时 session_id 只在注册它的那台机器上有效。
+"""
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+
+import local_store
+
+CHART_SESSION_TTL = int(os.getenv("CHART_SESSION_TTL", str(2 * 86400)))
+CHART_SESSION_MAX_MB = float(os.getenv("CHART_SESSION_MAX_MB", "256"))
+CHART_SESSION_MEMO = int(os.getenv("CHART_SESSION_MEMO", "256"))
+TOUCH_INTERVAL = 60         # 最近使用时间最多每分钟写一次，读多写少
+
+# 会话里保存、章节请求缺省时补上的字段
+SESSION_FIELDS = ('bazi_data', 'bazi_a', 'bazi_b', 'scores', 'cast', 'question',
+                  'client_name', 'language', 'custom_language', 'mode')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id         TEXT PRIMARY KEY,
+    data       TEXT NOT NULL,            -- SESSION_FIELDS 里的请求字段
+    facts      TEXT NOT NULL,            -- 派生事实 {键: 值}
+    chapters   TEXT NOT NULL,            -- [{product, type, content}]
+    size       INTEGER NOT NULL,
+    rev        INTEGER NOT NULL DEFAULT 1,
+    created_at REAL NOT NULL,
+    used_at    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_used_at ON sessions(used_at);
+"""
+
+
+class SessionNotFound(KeyError):
+    pass
+
+
+_lock = threading.Lock()
+_memo = OrderedDict()       # id -> 会话 dict（带 rev）
+_counters = {"created": 0, "loads": 0, "memo_hits": 0, "facts_computed": 0,
+             "chapters_saved": 0, "expired": 0}
+
+
+def _db():
+    return closing(local_store.connect("chart_sessions", _SCHEMA))
+
+
+def _count(field, n=1):
+    with _lock:
+        _counters[field] += n
+
+
+def _remember(session):
+    with _lock:
+        _memo[session["id"]] = session
+        _memo.move_to_end(session["id"])
+        while len(_memo) > CHART_SESSION_MEMO:
+            _memo.popitem(last=False)
+
+
+def _forget(sid):
+    with _lock:
+        _memo.pop(sid, None)
+
+
+def _size(*raw):
+    return sum(len(r.encode("utf-8")) for r in raw)
+
+
+def create(data, facts):
+    """登记一个会话，返回 session_id。data 只留 SESSION_FIELDS 里的字段。"""
+    data = {k: data[k] for k in SESSION_FIELDS if data.get(k) is not None}
+    sid = secrets.token_urlsafe(16)
+    now = time.time()
+    raw = (json.dumps(data, ensure_ascii=False), json.dumps(facts, ensure_ascii=False), "[]")
+    with _db() as db:
+        db.execute("INSERT INTO sessions (id, data, facts, chapters, size, created_at, used_at) "
+                   "VALUES (?, ?, ?, ?, ?, ?, ?)", (sid,) + raw + (_size(*raw), now, now))
+        _evict(db, now)
+    _count("created")
+    _remember({"id": sid, "rev": 1, "data": data, "facts": dict(facts), "chapters": []})
+    return sid
+
+
+def get(sid):
+    """会话 dict {id, rev, data, facts, chapters}；不存在或已过期抛 SessionNotFound。
+
+    返回的 dict 是进程内共享的，调用方只读；改动走 fact() / save_chapter()。
+    """
+    now = time.time()
+    with _db() as db:
+        row = db.execute("SELECT rev, used_at FROM sessions WHERE id=?", (sid,)).fetchone()
+        if row and now - row["used_at"] > CHART_SESSION_TTL:
+            db.execute("DELETE FROM sessions WHERE id=?", (sid,))
+            _count("expired")
+            row = None
+        if row is None:
+            _forget(sid)
+            raise SessionNotFound(sid)
+        if now - row["used_at"] > TOUCH_INTERVAL:
+            db.execute("UPDATE sessions SET used_at=? WHERE id=?", (now, sid))
+        with _lock:
+            cached = _memo.get(sid)
+        if cached is not None and cached["rev"] == row["rev"]:
+            _count("memo_hits")
+            _remember(cached)
+            return cached
+        full = db.execute("SELECT rev, data, facts, chapters FROM sessions WHERE id=?",
+                          (sid,)).fetchone()
+    if full is None:
+        raise SessionNotFound(sid)
+    _count("loads")
+    session = {"id": sid, "rev": full["rev"], "data": json.loads(full["data"]),
+               "facts": json.loads(full["facts"]), "chapters": json.loads(full["chapters"])}
+    _remember(session)
+    return session
+
+
+def _update(sid, change):
+    """读-改-写一行（BEGIN IMMEDIATE，跨 worker 串行）。change(facts, chapters) 原地修改。"""
+    with _db() as db:
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT rev, data, facts, chapters FROM sessions WHERE id=?",
+                             (sid,)).fetchone()
+            if row is None:
+                db.execute("ROLLBACK")
+                raise SessionNotFound(sid)
+            facts, chapters = json.loads(row["facts"]), json.loads(row["chapters"])
+            change(facts, chapters)
+            raw_facts = json.dumps(facts, ensure_ascii=False)
+            raw_chapters = json.dumps(chapters, ensure_ascii=False)
+            db.execute("UPDATE sessions SET facts=?, chapters=?, size=?, rev=rev+1, used_at=? "
+                       "WHERE id=?", (raw_facts, raw_chapters,
+                                      _size(row["data"], raw_facts, raw_chapters),
+                                      time.time(), sid))
+            db.execute("COMMIT")
+        except SessionNotFound:
+            raise
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+    _remember({"id": sid, "rev": row["rev"] + 1, "data": json.loads(row["data"]),
+               "facts": facts, "chapters": chapters})
+
+
+def fact(session, key, compute):
+    """会话里缓存的派生事实；没有就 compute() 一次并写回。session 为 None 时直接 compute()，
+    session 是 {"facts": {}} 这样没有 id 的草稿时只记在草稿里（注册时预计算用）。
+
+    键名带 `@`（如 `timeline@2026-10-18`）表示随日期变：写入新值时删掉同名不同日期的旧值。
+    写回失败只打日志 —— 事实照样返回，下次再算。
+    """
+    if session is None:
+        return compute()
+    if key in session["facts"]:
+        return session["facts"][key]
+    value = compute()
+    if session.get("id") is None:       # 注册前的草稿：只攒在 facts 里，create() 一次写入
+        session["facts"][key] = value
+        return value
+    _count("facts_computed")
+    stem = key.split("@")[0] + "@" if "@" in key else None
+
+    def change(facts, chapters):
+        if stem:
+            for k in [k for k in facts if k.startswith(stem)]:
+                del facts[k]
+        facts[key] = value
+    try:
+        _update(session["id"], change)
+    except Exception as e:
+        print(f"Chart session {session['id'][:8]}: fact {key} not saved ({e})")
+    session["facts"][key] = value
+    return value
+
+
+def chapters(session, product):
+    """本产品已生成的章节，按生成顺序，previous_chapters 的格式。"""
+    return [{"type": c["type"], "content": c["content"]}
+            for c in session["chapters"] if c.get("product") == product]
+
+
+def save_chapter(sid, product, section_type, content):
+    """章节成功后追加进会话；同一产品同一章节已有的（重写）原位覆盖。"""
+    def change(facts, chapters):
+        for c in chapters:
+            if c.get("product") == product and c.get("type") == section_type:
+                c["content"] = content
+                return
+        chapters.append({"product": product, "type": section_type, "content": content})
+    try:
+        _update(sid, change)
+        _count("chapters_saved")
+    except Exception as e:
+        print(f"Chart session {sid[:8]}: chapter {product}/{section_type} not saved ({e})")
+
+
+def delete(sid):
+    _forget(sid)
+    with _db() as db:
+        return db.execute("DELETE FROM sessions WHERE id=?", (sid,)).rowcount > 0
+
+
+def _evict(db, now):
+    n = db.execute("DELETE FROM sessions WHERE used_at < ?", (now - CHART_SESSION_TTL,)).rowcount
+    if n:
+        _count("expired", n)
+    limit = int(CHART_SESSION_MAX_MB * 1024 * 1024)
+    (total,) = db.execute("SELECT COALESCE(SUM(size), 0) FROM sessions").fetchone()
+    if total <= limit:
+        return
+    # 一次淘汰到 90%，和 llm_cache 一样
+    target = total - int(limit * 0.9)
+    freed = 0
+    victims = []
+    for row in db.execute("SELECT id, size FROM sessions ORDER BY used_at"):
+        victims.append(row["id"])
+        freed += row["size"]
+        if freed >= target:
+            break
+    db.executemany("DELETE FROM sessions WHERE id=?", [(v,) for v in victims])
+    for v in victims:
+        _forget(v)
+    print(f"Chart sessions evicted {len(victims)} ({freed} bytes)")
+
+
+def stats():
+    with _lock:
+        out = dict(_counters)
+        out["memo"] = len(_memo)
+    out.update(ttl=CHART_SESSION_TTL, max_mb=CHART_SESSION_MAX_MB)
+    try:
+        with _db() as db:
+            n, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM sessions").fetchone()
+        out.update(sessions=n, bytes=size)
+    except Exception as e:
+        out["error"] = str(e)
+    return out
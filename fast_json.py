@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""fast_json.py — 可插拔的 JSON 后端 + /api/* 的请求 / 响应压缩。
+
+章节应答是几十 KB 的中日韩文字，请求里带 previous_chapters，finalize 更是整份 full_report。
+Flask 默认走标准库 json：ensure_ascii=True 把每个汉字转义成 6 字节的 \\uXXXX（体积约 ×2），
+编解码也是纯 Python 的慢路径。这里两件事：
+
+1. JSON 后端（JSON_BACKEND=auto / orjson / stdlib，默认 auto）：装了 orjson 就用它做
+   request.json 解析和 jsonify 输出，直接出 UTF-8；没装或指定 stdlib 时退回标准库，
+   ensure_ascii=False。两种后端输出的是同一份 JSON（键照样排序、日期照 Flask 的 HTTP 日期格式），
+   只是字节不同。orjson 不支持的值（超 64 位的整数之类）自动退回标准库编码，不报错。
+2. 压缩：/api/* 的响应按 Accept-Encoding 用 br（装了 brotli 时）或 gzip 压缩，
+   小于 COMPRESS_MIN_BYTES 的、SSE 之类流式响应不压；请求体带 `Content-Encoding: gzip`
+   （或 br）时在 WSGI 层解压，端点和 singleflight 看到的就是原始 JSON。解压后超过
+   MAX_REQUEST_MB 直接 413，防压缩炸弹；解不了的编码回 415。
+   ⚠️ br 请求体要 Brotli ≥ 1.1（Decompressor.process 带 output_buffer_limit）才收：
+      老版本只能一口气全解，几十字节就能展开成几个 GB，宁可 415。
+
+实测见 tools/bench_json.py。
+"""
+import gzip
+import io
+import json
+import os
+import zlib
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:     # 可选依赖
+    orjson = None
+
+try:
+    import brotli
+except ImportError:     # 可选依赖
+    brotli = None
+# 能限制输出大小的流式解压（Brotli ≥ 1.1）；没有就不收 br 请求体，响应照样能用 br 压
+_BROTLI_BOUNDED = brotli is not None and hasattr(getattr(brotli, "Decompressor", None),
+                                                 "can_accept_more_data")
+
+JSON_BACKEND = os.getenv("JSON_BACKEND", "auto").strip().lower()     # auto / orjson / stdlib
+COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "1") == "1"
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "5"))
+MAX_REQUEST_MB = float(os.getenv("MAX_REQUEST_MB", "32"))
+
+_COMPRESSIBLE = ("application/json", "text/")
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """标准库 json，但不再把非 ASCII 转义成 \\uXXXX。"""
+    ensure_ascii = False
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """orjson 编解码；选项和 Flask 默认行为对齐（排序键、非字符串键、日期交给 Flask 的 default）。"""
+    ensure_ascii = False
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:      # 调用方要了 orjson 没有的参数（cls= / indent=4 ……），交给标准库
+            return super().dumps(obj, **kwargs)
+        return self._encode(obj).decode("utf-8")
+
+    def _encode(self, obj, indent=False):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=self.default, option=option)
+        except TypeError:   # 超 64 位整数等 orjson 编不了的，退回标准库
+            return json.dumps(obj, default=self.default, ensure_ascii=False,
+                              sort_keys=self.sort_keys, indent=2 if indent else None,
+                              separators=None if indent else (",", ":")).encode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(self._encode(obj, indent) + b"\n",
+                                        mimetype=self.mimetype)
+
+
+def backend():
+    """实际生效的后端名字。"""
+    if JSON_BACKEND == "stdlib" or orjson is None:
+        return "stdlib"
+    return "orjson"
+
+
+def install(app, name=None):
+    """给 app 换 JSON provider；name 不给用 JSON_BACKEND（auto 时有 orjson 就用）。"""
+    name = name or backend()
+    if name == "orjson" and orjson is None:
+        print("JSON_BACKEND=orjson but orjson is not installed -> stdlib")
+        name = "stdlib"
+    app.json = (OrjsonProvider if name == "orjson" else StdlibJSONProvider)(app)
+    return name
+
+
+def dumps(obj):
+    """给 SSE 之类不走 jsonify 的地方用的紧凑 UTF-8 JSON 字符串。"""
+    if orjson is not None and backend() == "orjson":
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False)
+
+
+# ================= 响应压缩 =================
+
+def _accepts(accept_encoding, coding):
+    for part in (accept_encoding or "").lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if name == coding:
+            return params.replace(" ", "") not in ("q=0", "q=0.0")
+    return False
+
+
+def compress_response(response, accept_encoding):
+    """after_request 用：能压就原地压缩并补 Content-Encoding / Vary。"""
+    if (not COMPRESS_ENABLED or response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or "Content-Encoding" in response.headers
+            or not (response.mimetype or "").startswith(_COMPRESSIBLE)):
+        return response
+    response.vary.add("Accept-Encoding")
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+    if brotli is not None and _accepts(accept_encoding, "br"):
+        coding, body = "br", brotli.compress(data, quality=COMPRESS_BROTLI_QUALITY)
+    elif _accepts(accept_encoding, "gzip"):
+        coding, body = "gzip", gzip.compress(data, compresslevel=COMPRESS_GZIP_LEVEL, mtime=0)
+    else:
+        return response
+    response.set_data(body)
+    response.headers["Content-Encoding"] = coding
+    return response
+
+
+# ================= 请求解压（WSGI 中间件）=================
+
+class DecompressRequests:
+    """/api/* 的 `Content-Encoding: gzip / deflate / br` 请求体在进 Flask 之前解压。"""
+
+    ACCEPTED = ("gzip", "deflate", "br") if _BROTLI_BOUNDED else ("gzip", "deflate")
+
+    def __init__(self, wsgi_app, prefix="/api/"):
+        self.wsgi_app = wsgi_app
+        self.prefix = prefix
+
+    def __call__(self, environ, start_response):
+        coding = environ.get("HTTP_CONTENT_ENCODING", "").strip().lower()
+        if coding and coding != "identity" and environ.get("PATH_INFO", "").startswith(self.prefix):
+            try:
+                body = self._decode(coding, environ["wsgi.input"].read())
+            except ValueError as e:
+                return self._reject(start_response, "413 Payload Too Large", str(e))
+            except NotImplementedError as e:
+                return self._reject(start_response, "415 Unsupported Media Type", str(e),
+                                    [("Accept-Encoding", ", ".join(self.ACCEPTED))])
+            except Exception as e:
+                return self._reject(start_response, "400 Bad Request",
+                                    f"Cannot decode {coding} request body: {e}")
+            environ["wsgi.input"] = io.BytesIO(body)
+            environ["CONTENT_LENGTH"] = str(len(body))
+            del environ["HTTP_CONTENT_ENCODING"]
+        return self.wsgi_app(environ, start_response)
+
+    @staticmethod
+    def _decode(coding, raw):
+        limit = int(MAX_REQUEST_MB * 1024 * 1024)
+        if coding in ("gzip", "x-gzip", "deflate"):
+            # gzip 带头、deflate 是 zlib 流；max_length 截住压缩炸弹，解不完就是超限
+            d = zlib.decompressobj(16 + zlib.MAX_WBITS if coding != "deflate" else zlib.MAX_WBITS)
+            body = d.decompress(raw, limit + 1)
+        elif coding == "br" and _BROTLI_BOUNDED:
+            # 同上：每次最多放出到 limit + 1 字节，有积压输出就接着排空，够数即停
+            d = brotli.Decompressor()
+            body = d.process(raw, output_buffer_limit=limit + 1)
+            while len(body) <= limit and not d.is_finished() and not d.can_accept_more_data():
+                body += d.process(b"", output_buffer_limit=limit + 1 - len(body))
+            if len(body) <= limit and not d.is_finished():
+                raise EOFError("truncated brotli stream")
+        else:
+            raise NotImplementedError(f"unsupported Content-Encoding {coding!r}")
+        if len(body) > limit:
+            raise ValueError(f"Decompressed request body exceeds {MAX_REQUEST_MB:g} MB")
+        return body
+
+    @staticmethod
+    def _reject(start_response, status, message, headers=()):
+        body = json.dumps({"error": message}, ensure_ascii=False).encode("utf-8")
+        start_response(status, [("Content-Type", "application/json"),
+                                ("Content-Length", str(len(body))),
+                                ("Access-Control-Allow-Origin", "*"), *headers])
+        return [body]
+
+
+def stats():
+    return {"backend": backend(), "orjson": orjson is not None, "brotli": brotli is not None,
+            "compress": COMPRESS_ENABLED, "compress_min_bytes": COMPRESS_MIN_BYTES}
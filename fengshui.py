@@ -21,6 +21,8 @@ Discipline (mirrors the 2027 almanac's calendar discipline):
 from datetime import datetime, date
 from typing import Dict, Any, List
 
+import ganzhi
+
 # ---------------------------------------------------------------------------
 # Five-element static maps (Later-Heaven bagua directions, colours, materials)
 # ---------------------------------------------------------------------------
@@ -59,17 +61,12 @@ ELEMENT_MAP = {
               'number': '1'},
 }
 
-STEM_ELEMENT = {
-    '甲': 'wood', '乙': 'wood', '丙': 'fire', '丁': 'fire', '戊': 'earth',
-    '己': 'earth', '庚': 'metal', '辛': 'metal', '壬': 'water', '癸': 'water',
-}
-BRANCH_ELEMENT = {
-    '寅': 'wood', '卯': 'wood', '巳': 'fire', '午': 'fire',
-    '辰': 'earth', '戌': 'earth', '丑': 'earth', '未': 'earth',
-    '申': 'metal', '酉': 'metal', '亥': 'water', '子': 'water',
-}
-SHENG = {'wood': 'fire', 'fire': 'earth', 'earth': 'metal', 'metal': 'water', 'water': 'wood'}
-KE = {'wood': 'earth', 'earth': 'water', 'water': 'fire', 'fire': 'metal', 'metal': 'wood'}
+# Character -> element name, expanded from ganzhi's integer tables (this module
+# keys everything by the English element name).
+STEM_ELEMENT = {g: ganzhi.ELEMENTS_EN[ganzhi.STEM_ELEMENT[i]] for i, g in enumerate(ganzhi.GAN)}
+BRANCH_ELEMENT = {z: ganzhi.ELEMENTS_EN[ganzhi.BRANCH_ELEMENT[i]] for i, z in enumerate(ganzhi.ZHI)}
+SHENG = {e: ganzhi.ELEMENTS_EN[ganzhi.produces(i)] for i, e in enumerate(ganzhi.ELEMENTS_EN)}
+KE = {e: ganzhi.ELEMENTS_EN[ganzhi.controls(i)] for i, e in enumerate(ganzhi.ELEMENTS_EN)}
 EL_ZH = {'wood': '木', 'fire': '火', 'earth': '土', 'metal': '金', 'water': '水'}
 EL_EN = {'wood': 'Wood', 'fire': 'Fire', 'earth': 'Earth', 'metal': 'Metal', 'water': 'Water'}
 
@@ -79,13 +76,10 @@ BRANCH_DIR = {
     '辰': ('ESE', '东南偏东'), '巳': ('SSE', '东南偏南'), '午': ('S', '南'), '未': ('SSW', '西南偏南'),
     '申': ('WSW', '西南偏西'), '酉': ('W', '西'), '戌': ('WNW', '西北偏西'), '亥': ('NNW', '西北偏北'),
 }
-LIU_CHONG = {'子': '午', '丑': '未', '寅': '申', '卯': '酉', '辰': '戌', '巳': '亥',
-             '午': '子', '未': '丑', '申': '寅', '酉': '卯', '戌': '辰', '亥': '巳'}
+LIU_CHONG = {z: ganzhi.ZHI[ganzhi.CHONG_OF[i]] for i, z in enumerate(ganzhi.ZHI)}
 
 # Annual afflictions are computed per year from the year's stem/branch — no
 # hard-coded year list, so the product never expires.
-TIAN_GAN = ['甲', '乙', '丙', '丁', '戊', '己', '庚', '辛', '壬', '癸']
-DI_ZHI = ['子', '丑', '寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌', '亥']
 
 # Three Killings (三煞): by the year branch's trine (三合局), the killings sit in
 # the opposite cardinal triad. Keyed by year branch -> (block name zh, block en).
@@ -109,8 +103,7 @@ FLIGHT_EN = ['center', 'NW', 'W', 'NE', 'S', 'N', 'SW', 'E', 'SE']
 
 def _year_ganzhi(y):
     """Solar-year ganzhi (post-LiChun). 1984 = 甲子."""
-    off = y - 1984
-    return TIAN_GAN[off % 10] + DI_ZHI[off % 12]
+    return ganzhi.name(ganzhi.year_pillar(y))
 
 
 def _annual_central_star(y):
@@ -414,10 +407,12 @@ STYLE_RULES = """
 
 
 def build_fengshui_prompt(section_type, bazi_json, context_str, previous_context,
-                          mode='gentle', lang_code='en') -> Dict[str, Any]:
+                          mode='gentle', lang_code='en', facts=None) -> Dict[str, Any]:
+    """facts: precomputed_facts(bazi_json, lang_code) 的结果（命盘会话里缓存的那份）；不给就现算。"""
     zh = lang_code in ('zh', 'zh-tw')
     dm_el = get_day_master_element(bazi_json)
-    facts = precomputed_facts(bazi_json, lang_code)
+    if facts is None:
+        facts = precomputed_facts(bazi_json, lang_code)
     ref = element_reference_block(lang_code)
     tone = ("温暖笃定,像一位深耕多年的师傅在给客户开方,先讲清命理机制再给具体布置。"
             if mode == 'gentle' else
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""ganzhi.py — 干支核心：天干 0–9、地支 0–11、六十甲子 0–59 全用小整数，关系全查表。
+
+以前每个引擎各带一套字符串表：app.py 的 TIAN_GAN / DI_ZHI / CHONG_PAIRS / LIU_HE，
+annual_2027 的 LIU_CHONG / LIU_HE / XING_PAIRS 和十神的 if 链，fengshui 又一份 LIU_CHONG /
+TIAN_GAN，ziwei 的 ZHI / GAN / Z 和逐个试 60 次的 nayin_element。热路径上到处是
+`TIAN_GAN.index(...)`。这里统一成一份，导入时把所有表算好：
+
+    甲=0 乙=1 … 癸=9          子=0 丑=1 … 亥=11          甲子=0 乙丑=1 … 癸亥=59
+    五行 0–4 = 木 火 土 金 水（天干五行 = 干 // 2）
+
+    SEXAGENARY[g][z]   干支 -> 六十甲子序号（阴阳不配的组合为 -1）
+    NAYIN[i]           六十甲子 -> 纳音五行
+    TEN_GOD[dm][g]     日主 dm 看天干 g 的十神序号（TEN_GOD_NAMES）
+    RELATION[a][b]     两支关系位图：CHONG / HE / XING / HAI / PO / BAN_HE
+    SAN_HE / SAN_HUI   三合局、三会局（三支 + 成局五行）
+    HIDDEN_STEMS[z]    地支藏干（本气、中气、余气，和 lunar-python 一致）
+    WU_HU_DUN[g]       年干 -> 寅月月干（五虎遁）
+
+字符 <-> 序号用 stem() / branch()（查字典，不认识的字返回 -1）。字符串只在进出 prompt 时出现。
+各表的正确性对照（和原来各模块的字符串实现逐项比）见 tools/bench_ganzhi.py --check。
+"""
+
+GAN = ('甲', '乙', '丙', '丁', '戊', '己', '庚', '辛', '壬', '癸')
+ZHI = ('子', '丑', '寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌', '亥')
+SHENGXIAO = ('鼠', '牛', '虎', '兔', '龙', '蛇', '马', '羊', '猴', '鸡', '狗', '猪')
+ELEMENTS = ('木', '火', '土', '金', '水')
+ELEMENTS_EN = ('wood', 'fire', 'earth', 'metal', 'water')
+
+_GAN_IDX = {c: i for i, c in enumerate(GAN)}
+_ZHI_IDX = {c: i for i, c in enumerate(ZHI)}
+
+
+def stem(ch):
+    """天干字 -> 0–9，不认识的返回 -1。"""
+    return _GAN_IDX.get(ch, -1)
+
+
+def branch(ch):
+    """地支字 -> 0–11，不认识的返回 -1。"""
+    return _ZHI_IDX.get(ch, -1)
+
+
+# ---------------------------------------------------------------- 六十甲子
+
+# 干支 -> 序号：i ≡ g (mod 10) 且 i ≡ z (mod 12)
+SEXAGENARY = [[-1] * 12 for _ in range(10)]
+for _i in range(60):
+    SEXAGENARY[_i % 10][_i % 12] = _i
+
+
+def sexagenary(ganzhi):
+    """'甲子' -> 0；不是有效干支返回 -1。"""
+    if len(ganzhi) < 2:
+        return -1
+    g, z = stem(ganzhi[0]), branch(ganzhi[1])
+    return SEXAGENARY[g][z] if g >= 0 and z >= 0 else -1
+
+
+def name(i):
+    """0 -> '甲子'"""
+    return GAN[i % 10] + ZHI[i % 12]
+
+
+def year_pillar(year):
+    """立春年 -> 年柱序号（1984 = 甲子）。"""
+    return (year - 1984) % 60
+
+
+# 纳音五行，每两位共一个纳音、15 对一轮：
+# 海中金 炉中火 大林木 路旁土 剑锋金 / 山头火 涧下水 城头土 白蜡金 杨柳木 / 泉中水 屋上土 霹雳火 松柏木 长流水
+_NAYIN_CYCLE = '金火木土金火水土金木水土火木水'
+NAYIN = tuple(ELEMENTS.index(_NAYIN_CYCLE[i // 2 % 15]) for i in range(60))
+
+
+def nayin_element(g, z):
+    """干、支序号 -> 纳音五行字；不是有效干支抛 ValueError。"""
+    i = SEXAGENARY[g][z] if 0 <= g < 10 and 0 <= z < 12 else -1
+    if i < 0:
+        raise ValueError(f'{GAN[g % 10]}{ZHI[z % 12]} 不是有效干支')
+    return ELEMENTS[NAYIN[i]]
+
+
+# ---------------------------------------------------------------- 五行、十神
+
+STEM_ELEMENT = tuple(g // 2 for g in range(10))
+BRANCH_ELEMENT = (4, 2, 0, 0, 2, 1, 1, 2, 3, 3, 2, 4)     # 子水 丑土 寅木 卯木 辰土 巳火 …
+
+
+def produces(a):
+    """a 生的五行（木生火 …）。"""
+    return (a + 1) % 5
+
+
+def controls(a):
+    """a 克的五行（木克土 …）。"""
+    return (a + 2) % 5
+
+
+TEN_GOD_NAMES = ('比肩', '劫财', '食神', '伤官', '偏财', '正财', '七杀', '正官', '偏印', '正印')
+
+
+def _ten_god(dm, g):
+    # 按「other 相对日主」的五行距离分五类，同阴阳取偏（前一个），异阴阳取正（后一个）
+    step = (STEM_ELEMENT[g] - STEM_ELEMENT[dm]) % 5      # 0 同我 1 我生 2 我克 3 克我 4 生我
+    return step * 2 + (dm % 2 != g % 2)
+
+
+TEN_GOD = tuple(tuple(_ten_god(dm, g) for g in range(10)) for dm in range(10))
+
+
+def ten_god_name(dm, g):
+    return TEN_GOD_NAMES[TEN_GOD[dm][g]]
+
+
+# ---------------------------------------------------------------- 地支关系
+
+CHONG, HE, XING, HAI, PO, BAN_HE = 1, 2, 4, 8, 16, 32
+RELATION_NAMES = ((CHONG, '冲'), (HE, '六合'), (XING, '刑'), (HAI, '害'), (PO, '破'), (BAN_HE, '半合'))
+
+CHONG_OF = tuple((z + 6) % 12 for z in range(12))
+LIU_HE_OF = (1, 0, 11, 10, 9, 8, 7, 6, 5, 4, 3, 2)             # 子丑 寅亥 卯戌 辰酉 巳申 午未
+LIU_HAI_OF = (7, 6, 5, 4, 3, 2, 1, 0, 11, 10, 9, 8)            # 子未 丑午 寅巳 卯辰 申亥 酉戌
+PO_OF = (9, 4, 11, 6, 1, 8, 3, 10, 5, 0, 7, 2)                 # 子酉 丑辰 寅亥 卯午 巳申 未戌
+# 相刑：寅巳申、丑戌未 两两互刑，子卯相刑，辰午酉亥自刑
+_XING_PAIRS = ((2, 5), (5, 8), (8, 2), (1, 10), (10, 7), (7, 1), (0, 3))
+_ZI_XING = (4, 6, 9, 11)
+
+# 三合局按 支 % 4 分组（申子辰 巳酉丑 寅午戌 亥卯未），三会按方位（寅卯辰 巳午未 申酉戌 亥子丑）。
+# 每组 (三个支, 成局五行)；SAN_HE_OF[z] / SAN_HUI_OF[z] = z 所在的组。
+SAN_HE = (((8, 0, 4), 4), ((5, 9, 1), 3), ((2, 6, 10), 1), ((11, 3, 7), 0))
+SAN_HUI = (((2, 3, 4), 0), ((5, 6, 7), 1), ((8, 9, 10), 3), ((11, 0, 1), 4))
+SAN_HE_OF = tuple(z % 4 for z in range(12))
+SAN_HUI_OF = tuple((z - 2) % 12 // 3 for z in range(12))
+# 半合：同一三合局里带旺支（子午卯酉）的两支；不带旺支的一对（如申辰）是拱合，不算
+_WANG = (0, 3, 6, 9)
+
+
+def _relation(a, b):
+    bits = 0
+    if CHONG_OF[a] == b:
+        bits |= CHONG
+    if LIU_HE_OF[a] == b:
+        bits |= HE
+    if (a, b) in _XING_PAIRS or (b, a) in _XING_PAIRS or (a == b and a in _ZI_XING):
+        bits |= XING
+    if LIU_HAI_OF[a] == b:
+        bits |= HAI
+    if PO_OF[a] == b:
+        bits |= PO
+    if a != b and SAN_HE_OF[a] == SAN_HE_OF[b] and (a in _WANG or b in _WANG):
+        bits |= BAN_HE
+    return bits
+
+
+RELATION = tuple(tuple(_relation(a, b) for b in range(12)) for a in range(12))
+
+
+# ---------------------------------------------------------------- 月柱、藏干
+
+# 五虎遁：甲己之年丙作首，乙庚之岁戊为头，丙辛必定寻庚起，丁壬壬位顺行流，戊癸何方发，甲寅之上好追求
+WU_HU_DUN = tuple((g % 5 * 2 + 2) % 10 for g in range(10))
+
+
+def month_pillar(year_stem, month_idx):
+    """年干 + 节月（0=寅月 … 11=丑月）-> 月柱六十甲子序号。"""
+    return SEXAGENARY[(WU_HU_DUN[year_stem] + month_idx) % 10][(month_idx + 2) % 12]
+
+
+HIDDEN_STEMS = (
+    (9,),           # 子: 癸
+    (5, 9, 7),      # 丑: 己 癸 辛
+    (0, 2, 4),      # 寅: 甲 丙 戊
+    (1,),           # 卯: 乙
+    (4, 1, 9),      # 辰: 戊 乙 癸
+    (2, 6, 4),      # 巳: 丙 庚 戊
+    (3, 5),         # 午: 丁 己
+    (5, 3, 1),      # 未: 己 丁 乙
+    (6, 8, 4),      # 申: 庚 壬 戊
+    (7,),           # 酉: 辛
+    (4, 7, 3),      # 戌: 戊 辛 丁
+    (8, 0),         # 亥: 壬 甲
+)
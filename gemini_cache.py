@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""gemini_cache.py — Gemini 显式缓存（cachedContents）+ 前缀缓存命中率统计。
+
+system prompt 现在只随 (产品, 模式, 语言, 性别) 变化（客户事实挪到 user prompt 末尾，
+见 app._client_facts），同一组合的几千 token 格式规则 / 模式说明对所有客户一字不差。
+
+- 隐式缓存：Gemini 2.5 自动按前缀命中，什么都不用做；usageMetadata.cachedContentTokenCount
+  就是命中的 token 数。这里按 产品/模式/语言 记账，`/` 里能看到命中率。
+  DeepSeek 的上下文硬盘缓存同理是自动的，前缀稳定就有折扣，不需要接口调用。
+- 显式缓存（GEMINI_EXPLICIT_CACHE=1 才开）：把 system prompt 建成 cachedContents，
+  生成时只发 user prompt + cachedContent 名字，折扣有保证而不是「看运气」。
+  注册表放 SQLite（按 sha256(模型 | 前缀) 索引），全机 worker 共用，过期前 GEMINI_CACHE_EARLY_EXPIRY
+  秒就当它没了，避免拿着将死的名字去生成。
+  前缀太短（低于模型的最小缓存 token 数）等创建失败的情况记成 rejected，
+  GEMINI_CACHE_REJECT_TTL 内不再尝试。
+
+建缓存失败、名字失效（生成时 400/403/404）一律退回不带缓存的普通请求，绝不影响出稿。
+"""
+import hashlib
+import os
+import threading
+import time
+from contextlib import closing
+
+import llm_transport
+import local_store
+
+GEMINI_EXPLICIT_CACHE = os.getenv("GEMINI_EXPLICIT_CACHE", "0") == "1"
+GEMINI_CACHE_TTL = int(os.getenv("GEMINI_CACHE_TTL", "3600"))
+GEMINI_CACHE_EARLY_EXPIRY = 120
+GEMINI_CACHE_REJECT_TTL = int(os.getenv("GEMINI_CACHE_REJECT_TTL", "86400"))
+GEMINI_API_BASE = os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta").rstrip("/")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS prefixes (
+    hash       TEXT PRIMARY KEY,
+    model      TEXT NOT NULL,
+    state      TEXT NOT NULL,      -- creating / ok / rejected
+    name       TEXT,               -- cachedContents/xxx
+    expires_at REAL NOT NULL,
+    detail     TEXT
+);
+"""
+
+_lock = threading.Lock()
+_usage = {}     # label -> {"calls", "explicit", "prompt_tokens", "cached_tokens"}
+_counters = {"created": 0, "reused": 0, "rejected": 0, "invalidated": 0}
+
+
+def _db():
+    return closing(local_store.connect("gemini_cache", _SCHEMA))
+
+
+def _count(field):
+    with _lock:
+        _counters[field] += 1
+
+
+def label(tag):
+    tag = tag or {}
+    return "/".join(str(tag.get(k) or "-") for k in ("product", "mode", "language"))
+
+
+def lookup(api_key, model, prefix):
+    """返回可用的 cachedContents 名字；没有（关闭、被拒、别的 worker 正在建、建失败）返回 None。"""
+    if not GEMINI_EXPLICIT_CACHE or not api_key or not prefix.strip():
+        return None
+    h = hashlib.sha256(f"{model}\n{prefix}".encode("utf-8")).hexdigest()
+    now = time.time()
+    try:
+        with _db() as db:
+            row = db.execute("SELECT * FROM prefixes WHERE hash=?", (h,)).fetchone()
+            if row and row["expires_at"] > now:
+                if row["state"] == "ok":
+                    _count("reused")
+                    return row["name"]
+                return None
+            # 原子认领：只让一个 worker 去建，其它的这次先走不带缓存的请求
+            claimed = db.execute(
+                "INSERT INTO prefixes (hash, model, state, expires_at) VALUES (?, ?, 'creating', ?) "
+                "ON CONFLICT(hash) DO UPDATE SET state='creating', name=NULL, "
+                "expires_at=excluded.expires_at WHERE prefixes.expires_at <= ?",
+                (h, model, now + 60, now)).rowcount
+    except Exception as e:
+        print(f"Gemini cache registry error (ignored): {e}")
+        return None
+    if not claimed:
+        return None
+    return _create(api_key, model, prefix, h)
+
+
+def _create(api_key, model, prefix, h):
+    payload = {
+        "model": f"models/{model}",
+        "contents": [{"role": "user", "parts": [{"text": prefix}]}],
+        "ttl": f"{GEMINI_CACHE_TTL}s",
+    }
+    name, detail = None, None
+    try:
+        response = llm_transport.post(f"{GEMINI_API_BASE}/cachedContents?key={api_key}",
+                                      json=payload, timeout=60)
+        if response.ok:
+            name = response.json().get("name")
+        else:
+            detail = f"HTTP {response.status_code}: {response.text[:300]}"
+    except Exception as e:
+        detail = str(e)
+    now = time.time()
+    if name:
+        state, expires = "ok", now + GEMINI_CACHE_TTL - GEMINI_CACHE_EARLY_EXPIRY
+        print(f"Gemini cache created {name} ({len(prefix)} chars, ttl {GEMINI_CACHE_TTL}s)")
+        _count("created")
+    else:
+        state, expires = "rejected", now + GEMINI_CACHE_REJECT_TTL
+        print(f"Gemini cache create failed, prefix {h[:12]} skipped for "
+              f"{GEMINI_CACHE_REJECT_TTL}s: {detail}")
+        _count("rejected")
+    try:
+        with _db() as db:
+            db.execute("UPDATE prefixes SET state=?, name=?, expires_at=?, detail=? WHERE hash=?",
+                       (state, name, expires, detail, h))
+    except Exception as e:
+        print(f"Gemini cache registry error (ignored): {e}")
+    return name
+
+
+def invalidate(name):
+    """生成时服务端说这个缓存不存在 / 过期了：从注册表删掉，下次重建。"""
+    _count("invalidated")
+    try:
+        with _db() as db:
+            db.execute("DELETE FROM prefixes WHERE name=?", (name,))
+    except Exception as e:
+        print(f"Gemini cache registry error (ignored): {e}")
+
+
+def record(tag, usage_metadata, explicit):
+    """记一次生成的前缀缓存效果（显式、隐式都从 cachedContentTokenCount 看）。"""
+    um = usage_metadata or {}
+    with _lock:
+        u = _usage.setdefault(label(tag), {"calls": 0, "explicit": 0,
+                                            "prompt_tokens": 0, "cached_tokens": 0})
+        u["calls"] += 1
+        u["explicit"] += int(bool(explicit))
+        u["prompt_tokens"] += um.get("promptTokenCount") or 0
+        u["cached_tokens"] += um.get("cachedContentTokenCount") or 0
+
+
+def stats():
+    with _lock:
+        usage = {k: dict(v) for k, v in _usage.items()}
+        out = dict(_counters)
+    for u in usage.values():
+        u["hit_rate"] = round(u["cached_tokens"] / u["prompt_tokens"], 3) if u["prompt_tokens"] else 0.0
+    out.update(explicit_enabled=GEMINI_EXPLICIT_CACHE, ttl_seconds=GEMINI_CACHE_TTL,
+               prefix_hit_rate=usage)
+    return out
@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""jobs.py — 章节生成的异步任务（提交 / 轮询 / 回调）。
+
+同步 gunicorn worker 下，一章 4–9 分钟就占死一个 worker，吞吐 = worker 数 / 章节时长。
+这里把章节请求放进任务表，立刻返回 job id，由进程内**有界**线程池在后台跑原来的
+章节端点（逻辑一行不改），调用方 `GET /api/jobs/<id>` 轮询，或留 webhook 等回调。
+
+任务表在 SQLite（local_store，跨 worker 可见）：
+- 认领是原子的：`UPDATE ... WHERE status='queued'`，多个 worker 同时扫到同一条也只有一个能跑。
+- worker 重启不丢活：进程启动时把「running 但主人进程已死」的任务重新排队，
+  再把所有 queued 的任务塞进本进程线程池。
+- 防毒任务：同一任务被认领超过 JOB_MAX_ATTEMPTS 次（每次都把 worker 弄死）直接判失败。
+
+⚠️ webhook 是服务器主动往外发的请求，地址又来自未鉴权的调用方 —— 不设防就是 SSRF
+   （内网服务、云厂商 metadata 169.254.169.254）。webhook_error() 在提交和发送前各查一次：
+   只认 http(s)；配了 JOB_WEBHOOK_HOSTS 就只许名单里的主机；无论如何，主机解析出的
+   任一地址是内网 / 回环 / 链路本地 / 保留地址都拒绝；发送时不跟随重定向。
+   发送时**直连查过的那个 IP**（Host 头 / TLS SNI 和证书校验仍用原主机名），
+   不让 HTTP 库自己再解析一遍 —— 否则短 TTL 的域名能在「查」和「连」之间改指向内网。
+
+⚠️ 线程池和恢复扫描都是**懒启动**、按 pid 记账：gunicorn `--preload` 时 import 发生在
+   fork 之前，父进程里起的线程不会跟到子进程。
+"""
+import ipaddress
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from urllib.parse import urlsplit
+
+import requests
+import urllib3
+
+import local_store
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))            # 每个 gunicorn worker 的后台并发章节数
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "200"))    # 全机排队上限，超了拒收
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", "7"))
+JOB_WEBHOOK_TIMEOUT = int(os.getenv("JOB_WEBHOOK_TIMEOUT", "10"))
+# 逗号分隔的主机名白名单；".example.com" 表示该域及其子域。空 = 不限主机（仍拒内网地址）
+JOB_WEBHOOK_HOSTS = [h.strip().lower() for h in os.getenv("JOB_WEBHOOK_HOSTS", "").split(",")
+                     if h.strip()]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id            TEXT PRIMARY KEY,
+    endpoint      TEXT NOT NULL,
+    payload       TEXT NOT NULL,
+    webhook_url   TEXT,
+    status        TEXT NOT NULL,          -- queued / running / done / error
+    owner         TEXT,                   -- host:pid，正在跑它的进程
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    http_status   INTEGER,
+    result        TEXT,
+    webhook_status TEXT,
+    created_at    REAL NOT NULL,
+    started_at    REAL,
+    finished_at   REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status);
+"""
+
+_lock = threading.Lock()
+_executor = None
+_executor_pid = None
+_runner = None      # (endpoint, payload) -> (http_status, body)，由 app.py 注入
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+def _db():
+    return closing(local_store.connect("jobs", _SCHEMA))
+
+
+def init(runner):
+    """app.py 启动时注入章节执行函数。"""
+    global _runner
+    _runner = runner
+
+
+def ensure_started():
+    """本进程第一次用到任务系统时：建线程池、回收死进程的任务、接手排队中的任务。"""
+    global _executor, _executor_pid
+    if _executor_pid == os.getpid():
+        return
+    with _lock:
+        if _executor_pid == os.getpid():
+            return
+        _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS,
+                                       thread_name_prefix="job")
+        _executor_pid = os.getpid()
+    _recover()
+
+
+def _recover():
+    now = time.time()
+    with _db() as db:
+        db.execute("DELETE FROM jobs WHERE status IN ('done','error') AND finished_at < ?",
+                   (now - JOB_RETENTION_DAYS * 86400,))
+        for row in db.execute("SELECT id, owner FROM jobs WHERE status='running'").fetchall():
+            if not local_store.owner_alive(row["owner"]):
+                db.execute("UPDATE jobs SET status='queued', owner=NULL "
+                           "WHERE id=? AND status='running' AND owner=?",
+                           (row["id"], row["owner"]))
+                print(f"Job {row['id']}: owner {row['owner']} gone, re-queued")
+        queued = [r["id"] for r in
+                  db.execute("SELECT id FROM jobs WHERE status='queued' ORDER BY created_at")]
+    for job_id in queued:
+        _executor.submit(_run, job_id)
+    if queued:
+        print(f"Jobs: picked up {len(queued)} queued job(s) in pid {os.getpid()}")
+
+
+def _host_allowed(host):
+    if not JOB_WEBHOOK_HOSTS:
+        return True
+    return any(host == h or (h.startswith('.') and (host.endswith(h) or host == h[1:]))
+               for h in JOB_WEBHOOK_HOSTS)
+
+
+def webhook_error(url):
+    """webhook 地址不可用时返回原因（给调用方看），可用返回 None。"""
+    return _check_webhook(url)[0]
+
+
+def _check_webhook(url):
+    """(拒绝原因 或 None, 通过检查的地址列表)。发送时只连这些地址。"""
+    try:
+        parts = urlsplit(url)
+        host = (parts.hostname or '').lower()
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+    except ValueError:
+        return "webhook_url is not a valid URL", []
+    if parts.scheme not in ('http', 'https') or not host:
+        return "webhook_url must be http(s)", []
+    if not _host_allowed(host):
+        return f"webhook host {host} is not allowed", []
+    try:
+        infos = socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)
+    except socket.gaierror:
+        return f"webhook host {host} does not resolve", []
+    addrs = []
+    for info in infos:
+        ip = ipaddress.ip_address(info[4][0].split('%')[0])
+        if not ip.is_global or ip.is_multicast:
+            return f"webhook host {host} resolves to a non-public address", []
+        addrs.append(str(ip))
+    return None, addrs
+
+
+def _post_pinned(url, ip, job):
+    """POST 到已检查过的地址 ip；Host 头、SNI、证书主机名都还是 url 里的主机。返回状态码。"""
+    parts = urlsplit(url)
+    host = parts.hostname
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+    path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+    timeout = urllib3.Timeout(connect=JOB_WEBHOOK_TIMEOUT, read=JOB_WEBHOOK_TIMEOUT)
+    if parts.scheme == 'https':
+        pool = urllib3.HTTPSConnectionPool(ip, port, timeout=timeout, retries=False,
+                                           server_hostname=host, assert_hostname=host,
+                                           cert_reqs='CERT_REQUIRED',
+                                           ca_certs=requests.certs.where())
+    else:
+        pool = urllib3.HTTPConnectionPool(ip, port, timeout=timeout, retries=False)
+    with pool:
+        r = pool.urlopen('POST', path, body=json.dumps(job, ensure_ascii=False).encode('utf-8'),
+                         headers={'Host': parts.netloc.rpartition('@')[2],
+                                  'Content-Type': 'application/json'},
+                         redirect=False, preload_content=True)
+    return r.status
+
+
+def submit(endpoint, payload, webhook_url=None):
+    """入队并返回 job id。排队已满抛 JobQueueFull。"""
+    ensure_started()
+    job_id = uuid.uuid4().hex
+    with _db() as db:
+        db.execute("BEGIN IMMEDIATE")
+        (queued,) = db.execute("SELECT COUNT(*) FROM jobs WHERE status='queued'").fetchone()
+        if queued >= JOB_MAX_QUEUED:
+            db.execute("ROLLBACK")
+            raise JobQueueFull(f"{queued} jobs already queued")
+        db.execute("INSERT INTO jobs (id, endpoint, payload, webhook_url, status, created_at) "
+                   "VALUES (?, ?, ?, ?, 'queued', ?)",
+                   (job_id, endpoint, json.dumps(payload, ensure_ascii=False),
+                    webhook_url, time.time()))
+        db.execute("COMMIT")
+    _executor.submit(_run, job_id)
+    return job_id
+
+
+def get(job_id):
+    """任务的对外视图；不存在返回 None。"""
+    ensure_started()
+    with _db() as db:
+        row = db.execute("SELECT * FROM jobs WHERE id=?", (job_id,)).fetchone()
+    if row is None:
+        return None
+    job = {
+        "id": row["id"],
+        "endpoint": row["endpoint"],
+        "status": row["status"],
+        "attempts": row["attempts"],
+        "created_at": row["created_at"],
+        "started_at": row["started_at"],
+        "finished_at": row["finished_at"],
+    }
+    if row["status"] in ("done", "error"):
+        job["http_status"] = row["http_status"]
+        job["result"] = json.loads(row["result"]) if row["result"] else None
+        if row["webhook_url"]:
+            job["webhook_status"] = row["webhook_status"]
+    return job
+
+
+def stats():
+    try:
+        with _db() as db:
+            rows = db.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+    except Exception as e:
+        return {"workers_per_process": JOB_WORKERS, "error": str(e)}
+    return {"workers_per_process": JOB_WORKERS, **{r["status"]: r["n"] for r in rows}}
+
+
+def _finish(job_id, status, http_status, result):
+    with _db() as db:
+        db.execute("UPDATE jobs SET status=?, http_status=?, result=?, finished_at=? "
+                   "WHERE id=? AND owner=?",
+                   (status, http_status, json.dumps(result, ensure_ascii=False),
+                    time.time(), job_id, local_store.owner()))
+
+
+def _run(job_id):
+    owner = local_store.owner()
+    with _db() as db:
+        claimed = db.execute(
+            "UPDATE jobs SET status='running', owner=?, started_at=?, attempts=attempts+1 "
+            "WHERE id=? AND status='queued'", (owner, time.time(), job_id)).rowcount
+        if not claimed:
+            return      # 别的 worker 已经认领
+        row = db.execute("SELECT * FROM jobs WHERE id=?", (job_id,)).fetchone()
+
+    if row["attempts"] > JOB_MAX_ATTEMPTS:
+        print(f"Job {job_id}: abandoned after {row['attempts'] - 1} attempts")
+        _finish(job_id, "error", 500,
+                {"error": f"Job abandoned after {row['attempts'] - 1} interrupted attempts"})
+    else:
+        print(f"Job {job_id}: running {row['endpoint']} (attempt {row['attempts']})")
+        try:
+            http_status, body = _runner(row["endpoint"], json.loads(row["payload"]))
+        except Exception as e:
+            print(f"Job {job_id} crashed: {traceback.format_exc()}")
+            http_status, body = 500, {"error": "Internal Server Error", "details": str(e)}
+        status = "done" if 200 <= http_status < 300 else "error"
+        _finish(job_id, status, http_status, body)
+        print(f"Job {job_id}: {status} (HTTP {http_status})")
+
+    if row["webhook_url"]:
+        _fire_webhook(job_id, row["webhook_url"])
+
+
+def _fire_webhook(job_id, url):
+    job = get(job_id)
+    outcome = None
+    for attempt in range(1, 3):
+        # 提交时查过，发送前再查一次：DNS 可能在这期间被改指向内网；查过的地址直接拿去连
+        refused, addrs = _check_webhook(url)
+        if refused:
+            outcome = f"refused: {refused}"
+            print(f"Job {job_id}: webhook {outcome}")
+            break
+        try:
+            status = _post_pinned(url, addrs[0], job)
+            outcome = str(status)
+            if 200 <= status < 400:
+                break
+        except Exception as e:
+            outcome = f"error: {e}"
+        print(f"Job {job_id}: webhook attempt {attempt} -> {outcome}")
+    with _db() as db:
+        db.execute("UPDATE jobs SET webhook_status=? WHERE id=?", (outcome, job_id))
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""llm_breaker.py — 按供应商的熔断器，状态放 SQLite，全机所有 gunicorn worker 共用。
+
+DeepSeek 一降级，每个请求都要各自把重试预算烧完才轮到 Gemini，全队尾延迟一起爆。
+这里在 `_ask_deepseek` / `_ask_gemini`（含流式版）和 ziwei_prompt 的 `ds()` 外面记账：
+
+- 滑动窗口（LLM_BREAKER_WINDOW 秒）里分别统计 错误率 / 空内容率 / 截断率；
+  三者合计的失败率 ≥ LLM_BREAKER_FAILURE_RATE，且样本数 ≥ LLM_BREAKER_MIN_CALLS，就熔断。
+- 熔断（open）后 LLM_BREAKER_COOLDOWN 秒内直接拒绝，`ask_ai` 直奔健康的供应商，
+  `ds()` 快速失败（紫微没有备用供应商）。
+- 冷却结束转半开（half_open）：全机只放**一个**探测请求过去（原子认领），
+  成功即闭合，失败重新熔断。探测请求挂死超过 LLM_BREAKER_PROBE_TIMEOUT 就允许重新认领。
+
+缓存命中、对冲里被取消的一路都不记账 —— 它们说明不了供应商健不健康。
+状态库坏了（锁死、磁盘满）一律按「闭合」处理，熔断器本身不能成为故障点。
+"""
+import os
+import time
+from contextlib import closing
+
+import local_store
+
+LLM_BREAKER_ENABLED = os.getenv("LLM_BREAKER_ENABLED", "1") == "1"
+LLM_BREAKER_WINDOW = int(os.getenv("LLM_BREAKER_WINDOW", "600"))
+LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", "5"))
+LLM_BREAKER_FAILURE_RATE = float(os.getenv("LLM_BREAKER_FAILURE_RATE", "0.5"))
+LLM_BREAKER_COOLDOWN = int(os.getenv("LLM_BREAKER_COOLDOWN", "120"))
+LLM_BREAKER_PROBE_TIMEOUT = int(os.getenv("LLM_BREAKER_PROBE_TIMEOUT", "900"))
+
+OUTCOMES = ("ok", "error", "empty", "truncated")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    provider TEXT NOT NULL,
+    ts       REAL NOT NULL,
+    outcome  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS calls_provider_ts ON calls(provider, ts);
+CREATE TABLE IF NOT EXISTS breaker (
+    provider      TEXT PRIMARY KEY,
+    state         TEXT NOT NULL,      -- closed / open / half_open
+    opened_at     REAL,
+    probe_started REAL,
+    reason        TEXT
+);
+"""
+
+
+def _db():
+    return closing(local_store.connect("llm_breaker", _SCHEMA))
+
+
+def _row(db, provider):
+    return db.execute("SELECT * FROM breaker WHERE provider=?", (provider,)).fetchone()
+
+
+def is_open(provider):
+    """路由用：这个供应商眼下是否该绕开（不认领半开探测名额）。"""
+    if not LLM_BREAKER_ENABLED:
+        return False
+    try:
+        with _db() as db:
+            row = _row(db, provider)
+    except Exception as e:
+        print(f"Breaker read error (treated as closed): {e}")
+        return False
+    if row is None or row["state"] == "closed":
+        return False
+    now = time.time()
+    if row["state"] == "open":
+        return now - row["opened_at"] < LLM_BREAKER_COOLDOWN
+    return now - (row["probe_started"] or 0) < LLM_BREAKER_PROBE_TIMEOUT
+
+
+def allow(provider):
+    """调用前问一句：能不能打这个供应商。半开时只有一个调用方拿到 True（探测请求）。"""
+    if not LLM_BREAKER_ENABLED:
+        return True
+    try:
+        with _db() as db:
+            row = _row(db, provider)
+            if row is None or row["state"] == "closed":
+                return True
+            now = time.time()
+            if row["state"] == "open":
+                if now - row["opened_at"] < LLM_BREAKER_COOLDOWN:
+                    return False
+                claimed = db.execute(
+                    "UPDATE breaker SET state='half_open', probe_started=? "
+                    "WHERE provider=? AND state='open'", (now, provider)).rowcount
+            else:
+                claimed = db.execute(
+                    "UPDATE breaker SET probe_started=? WHERE provider=? "
+                    "AND state='half_open' AND probe_started < ?",
+                    (now, provider, now - LLM_BREAKER_PROBE_TIMEOUT)).rowcount
+    except Exception as e:
+        print(f"Breaker read error (treated as closed): {e}")
+        return True
+    if claimed:
+        print(f"Breaker {provider}: half-open, sending probe")
+    return bool(claimed)
+
+
+def record(provider, outcome):
+    """记一次调用结果：ok / error / empty / truncated。"""
+    if not LLM_BREAKER_ENABLED:
+        return
+    try:
+        now = time.time()
+        with _db() as db:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute("INSERT INTO calls (provider, ts, outcome) VALUES (?, ?, ?)",
+                       (provider, now, outcome))
+            db.execute("DELETE FROM calls WHERE ts < ?", (now - LLM_BREAKER_WINDOW,))
+            row = _row(db, provider)
+            state = row["state"] if row else "closed"
+            if state == "half_open":
+                if outcome == "ok":
+                    # 探测成功：闭合，并清掉熔断前的旧失败，免得窗口里的老账立刻再把它打开
+                    db.execute("DELETE FROM calls WHERE provider=? AND ts < ?", (provider, now))
+                    _set(db, provider, "closed", None, "probe succeeded")
+                else:
+                    _set(db, provider, "open", now, f"probe failed: {outcome}")
+            elif state == "closed" and outcome != "ok":
+                w = _window(db, provider, now)
+                if w["calls"] >= LLM_BREAKER_MIN_CALLS and w["failure_rate"] >= LLM_BREAKER_FAILURE_RATE:
+                    _set(db, provider, "open", now,
+                         f"failure rate {w['failure_rate']:.0%} over {w['calls']} calls")
+            db.execute("COMMIT")
+    except Exception as e:
+        print(f"Breaker write error (ignored): {e}")
+
+
+def _set(db, provider, state, opened_at, reason):
+    db.execute("INSERT OR REPLACE INTO breaker (provider, state, opened_at, probe_started, reason) "
+               "VALUES (?, ?, ?, NULL, ?)", (provider, state, opened_at, reason))
+    print(f"Breaker {provider}: -> {state} ({reason})")
+
+
+def _window(db, provider, now):
+    counts = dict.fromkeys(OUTCOMES, 0)
+    for r in db.execute("SELECT outcome, COUNT(*) AS n FROM calls WHERE provider=? AND ts >= ? "
+                        "GROUP BY outcome", (provider, now - LLM_BREAKER_WINDOW)):
+        counts[r["outcome"]] = r["n"]
+    total = sum(counts.values())
+    rate = (lambda n: round(n / total, 3) if total else 0.0)
+    return {
+        "calls": total,
+        "error_rate": rate(counts["error"]),
+        "empty_rate": rate(counts["empty"]),
+        "truncation_rate": rate(counts["truncated"]),
+        "failure_rate": rate(total - counts["ok"]),
+    }
+
+
+def stats():
+    """`/` 健康检查用：每个供应商的状态 + 窗口内各项失败率。"""
+    out = {"enabled": LLM_BREAKER_ENABLED, "window_seconds": LLM_BREAKER_WINDOW, "providers": {}}
+    try:
+        now = time.time()
+        with _db() as db:
+            providers = {r["provider"] for r in db.execute("SELECT DISTINCT provider FROM calls")}
+            providers |= {r["provider"] for r in db.execute("SELECT provider FROM breaker")}
+            for p in sorted(providers):
+                row = _row(db, p)
+                info = _window(db, p, now)
+                info["state"] = row["state"] if row else "closed"
+                if row and row["state"] != "closed":
+                    info["since"] = row["opened_at"]
+                    info["reason"] = row["reason"]
+                out["providers"][p] = info
+    except Exception as e:
+        out["error"] = str(e)
+    return out
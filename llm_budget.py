@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""llm_budget.py — 按实测用量自适应 max_tokens。
+
+各 builder 的 token 预算都是拍脑袋写死的：forecast 24000、annual 月度 30000、
+紫微 A 章 38000，DeepSeek 全局 65536。给少了截断重来，给多了白白占预算。
+这里把每次调用的 completion_tokens / reasoning_tokens 按
+(产品, 章节, 语言, 供应商) 记进 SQLite，保留最近 LLM_BUDGET_WINDOW 条，
+下次同类章节的 max_tokens = 分位数（LLM_BUDGET_PERCENTILE）× 余量（LLM_BUDGET_HEADROOM），
+再夹在 [LLM_BUDGET_FLOOR, 供应商上限] 里。样本不足时仍用 builder 给的默认值。
+
+截断的调用按它当时的 max_tokens 记一笔（真实需求只会更大），分位数自然往上走，
+不会出现「学到的预算越学越小、越小越截断」的死循环。
+
+⚠️ max_tokens 把思考链算在内（DeepSeek reasoning_tokens / Gemini thoughtsTokenCount），
+   记账用的是 completion 总量，不是正文长度。
+"""
+import os
+import time
+from contextlib import closing
+
+import local_store
+
+LLM_BUDGET_ENABLED = os.getenv("LLM_BUDGET_ENABLED", "1") == "1"
+LLM_BUDGET_PERCENTILE = float(os.getenv("LLM_BUDGET_PERCENTILE", "95"))
+LLM_BUDGET_HEADROOM = float(os.getenv("LLM_BUDGET_HEADROOM", "1.25"))
+LLM_BUDGET_MIN_SAMPLES = int(os.getenv("LLM_BUDGET_MIN_SAMPLES", "10"))
+LLM_BUDGET_WINDOW = int(os.getenv("LLM_BUDGET_WINDOW", "200"))
+LLM_BUDGET_FLOOR = int(os.getenv("LLM_BUDGET_FLOOR", "4000"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    id                INTEGER PRIMARY KEY AUTOINCREMENT,
+    product           TEXT NOT NULL,
+    section           TEXT NOT NULL,
+    language          TEXT NOT NULL,
+    provider          TEXT NOT NULL,
+    nominal           INTEGER NOT NULL,     -- builder 写死的默认预算
+    max_tokens        INTEGER NOT NULL,     -- 这次实际给的预算
+    completion_tokens INTEGER NOT NULL,
+    reasoning_tokens  INTEGER NOT NULL DEFAULT 0,
+    truncated         INTEGER NOT NULL DEFAULT 0,
+    ts                REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS usage_key ON usage(product, section, language, provider, id);
+"""
+
+
+def _db():
+    return closing(local_store.connect("llm_budget", _SCHEMA))
+
+
+def _key(tag, provider):
+    tag = tag or {}
+    return (str(tag.get("product") or "-"), str(tag.get("section") or "-"),
+            str(tag.get("language") or "-"), provider)
+
+
+def _quantile(values, pct):
+    values = sorted(values)
+    idx = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[idx]
+
+
+def _budget(samples, nominal, cap):
+    if len(samples) < LLM_BUDGET_MIN_SAMPLES:
+        return min(nominal, cap)
+    want = int(_quantile(samples, LLM_BUDGET_PERCENTILE) * LLM_BUDGET_HEADROOM)
+    return max(LLM_BUDGET_FLOOR, min(cap, want))
+
+
+def choose(tag, provider, nominal, cap):
+    """这次调用该给多少 max_tokens。tag 缺失（无章节标签的内部调用）或学习关闭时返回 nominal。"""
+    if not LLM_BUDGET_ENABLED or not tag:
+        return min(nominal, cap)
+    try:
+        with _db() as db:
+            rows = db.execute(
+                "SELECT completion_tokens FROM usage WHERE product=? AND section=? "
+                "AND language=? AND provider=? ORDER BY id DESC LIMIT ?",
+                _key(tag, provider) + (LLM_BUDGET_WINDOW,)).fetchall()
+    except Exception as e:
+        print(f"Token budget read error (using default): {e}")
+        return min(nominal, cap)
+    chosen = _budget([r[0] for r in rows], nominal, cap)
+    if chosen != nominal:
+        print(f"Token budget {'/'.join(_key(tag, provider))}: {nominal} -> {chosen} "
+              f"(p{LLM_BUDGET_PERCENTILE:g} of {len(rows)} samples x {LLM_BUDGET_HEADROOM})")
+    return chosen
+
+
+def record(tag, provider, nominal, max_tokens, completion_tokens, reasoning_tokens=0,
+           truncated=False):
+    """记一次用量。completion_tokens 拿不到（上游没回 usage）就不记。"""
+    if not LLM_BUDGET_ENABLED or not tag or not completion_tokens:
+        return
+    if truncated:
+        completion_tokens = max(completion_tokens, max_tokens)
+    try:
+        k = _key(tag, provider)
+        with _db() as db:
+            db.execute("INSERT INTO usage (product, section, language, provider, nominal, "
+                       "max_tokens, completion_tokens, reasoning_tokens, truncated, ts) "
+                       "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                       k + (nominal, max_tokens, int(completion_tokens),
+                            int(reasoning_tokens or 0), int(bool(truncated)), time.time()))
+            db.execute("DELETE FROM usage WHERE product=? AND section=? AND language=? "
+                       "AND provider=? AND id <= (SELECT id FROM usage WHERE product=? "
+                       "AND section=? AND language=? AND provider=? "
+                       "ORDER BY id DESC LIMIT 1 OFFSET ?)", k + k + (LLM_BUDGET_WINDOW,))
+    except Exception as e:
+        print(f"Token budget write error (ignored): {e}")
+
+
+def table(caps):
+    """学到的预算表（admin 端点用）。caps = {provider: 上限}。
+
+    at_risk：窗口内出现过截断，或者学到的需求已经顶到供应商上限 —— 这些章节该改 prompt 了。
+    """
+    with _db() as db:
+        rows = db.execute("SELECT product, section, language, provider, nominal, "
+                          "completion_tokens, reasoning_tokens, truncated FROM usage "
+                          "ORDER BY id DESC").fetchall()
+    groups = {}
+    for r in rows:
+        g = groups.setdefault(tuple(r)[:4], {"nominal": r["nominal"], "out": [], "reasoning": [],
+                                              "truncated": 0})
+        if len(g["out"]) >= LLM_BUDGET_WINDOW:
+            continue
+        g["out"].append(r["completion_tokens"])
+        g["reasoning"].append(r["reasoning_tokens"])
+        g["truncated"] += r["truncated"]
+    out = []
+    for (product, section, language, provider), g in sorted(groups.items()):
+        cap = caps.get(provider, g["nominal"])
+        n = len(g["out"])
+        want = int(_quantile(g["out"], LLM_BUDGET_PERCENTILE) * LLM_BUDGET_HEADROOM)
+        out.append({
+            "product": product, "section": section, "language": language,
+            "provider": provider,
+            "samples": n,
+            "p50": _quantile(g["out"], 50),
+            f"p{LLM_BUDGET_PERCENTILE:g}": _quantile(g["out"], LLM_BUDGET_PERCENTILE),
+            "max": max(g["out"]),
+            "reasoning_share": round(sum(g["reasoning"]) / max(1, sum(g["out"])), 3),
+            "truncation_rate": round(g["truncated"] / n, 3),
+            "nominal": g["nominal"],
+            "budget": _budget(g["out"], g["nominal"], cap),
+            "at_risk": g["truncated"] > 0 or want >= cap,
+        })
+    return {"percentile": LLM_BUDGET_PERCENTILE, "headroom": LLM_BUDGET_HEADROOM,
+            "min_samples": LLM_BUDGET_MIN_SAMPLES, "chapters": out}
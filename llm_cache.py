@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""llm_cache.py — 按内容寻址的 LLM 应答缓存（SQLite 落盘，LRU + TTL）。
+
+worker 网络抖一下重试同一章时，prompt 一字不差，以前照样重新计费、重新等 4 分钟以上。
+这里在 `ask_ai`（`_ask_deepseek` / `_ask_gemini` 及其流式版）和 ziwei_prompt 的 `ds()`
+前面挡一层：
+
+- 键 = sha256(供应商 | 模型 | reasoning effort | max_tokens | 其它影响输出的参数 | 完整 prompt)。
+  客户信息全在 prompt 里，所以不同客户不可能撞键 —— 这和 ziwei_prompt 里删掉的
+  「按章节名缓存」不是一回事，那个才会让客户 B 拿到客户 A 的章节。
+- 只存**完整**应答：空内容、finish_reason=length / MAX_TOKENS 一律不进缓存。
+- 过期（LLM_CACHE_TTL）即删；总大小超过 LLM_CACHE_MAX_MB 时按最近命中时间淘汰。
+- 客户要求重写时请求里带 `"fresh": true`：跳过读缓存，新结果照常写回（覆盖旧的）。
+
+缓存坏了（磁盘满、库锁死）只打日志，绝不影响出稿。
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import closing, contextmanager
+
+import local_store
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 86400)))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "512"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key        TEXT PRIMARY KEY,
+    provider   TEXT NOT NULL,
+    model      TEXT NOT NULL,
+    content    TEXT NOT NULL,
+    size       INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_hit   REAL NOT NULL,
+    hits       INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS llm_cache_last_hit ON llm_cache(last_hit);
+"""
+
+_lock = threading.Lock()
+_counters = {'hits': 0, 'misses': 0, 'stores': 0, 'bypass': 0}
+_local = threading.local()
+
+
+def _db():
+    return closing(local_store.connect("llm_cache", _SCHEMA))
+
+
+def _count(field):
+    with _lock:
+        _counters[field] += 1
+    tally = getattr(_local, 'tally', None)
+    if tally is not None:
+        tally[field] = tally.get(field, 0) + 1
+
+
+@contextmanager
+def tracking():
+    """统计当前线程里的命中情况（ds() 只回字符串，紫微端点靠它拿 meta）。"""
+    _local.tally = tally = {}
+    try:
+        yield tally
+    finally:
+        _local.tally = None
+
+
+def key(provider, model, effort, max_tokens, prompt, **extra):
+    head = json.dumps([provider, model, effort, max_tokens, sorted(extra.items())],
+                      ensure_ascii=False)
+    return hashlib.sha256((head + "\n" + prompt).encode("utf-8")).hexdigest()
+
+
+def get(k, fresh=False):
+    """命中返回内容，否则 None。fresh=True 直接跳过（记一笔 bypass）。"""
+    if not LLM_CACHE_ENABLED:
+        return None
+    if fresh:
+        _count('bypass')
+        return None
+    try:
+        now = time.time()
+        with _db() as db:
+            row = db.execute("SELECT content, created_at FROM llm_cache WHERE key=?",
+                             (k,)).fetchone()
+            if row and now - row["created_at"] > LLM_CACHE_TTL:
+                db.execute("DELETE FROM llm_cache WHERE key=?", (k,))
+                row = None
+            if row:
+                db.execute("UPDATE llm_cache SET last_hit=?, hits=hits+1 WHERE key=?", (now, k))
+    except Exception as e:
+        print(f"LLM cache read error (ignored): {e}")
+        return None
+    _count('hits' if row else 'misses')
+    if row:
+        print(f"LLM cache hit {k[:12]} ({len(row['content'])} chars)")
+        return row["content"]
+    return None
+
+
+def put(k, provider, model, content):
+    """只在调用方确认应答完整（非空、未截断）之后调用。"""
+    if not LLM_CACHE_ENABLED or not content or not content.strip():
+        return
+    try:
+        now = time.time()
+        size = len(content.encode("utf-8"))
+        with _db() as db:
+            db.execute("INSERT OR REPLACE INTO llm_cache "
+                       "(key, provider, model, content, size, created_at, last_hit) "
+                       "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                       (k, provider, model, content, size, now, now))
+            _evict(db, now)
+        _count('stores')
+    except Exception as e:
+        print(f"LLM cache write error (ignored): {e}")
+
+
+def _evict(db, now):
+    db.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - LLM_CACHE_TTL,))
+    limit = int(LLM_CACHE_MAX_MB * 1024 * 1024)
+    (total,) = db.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+    if total <= limit:
+        return
+    # 一次淘汰到 90%，避免每次写入都要扫一遍
+    target = total - int(limit * 0.9)
+    freed = 0
+    victims = []
+    for row in db.execute("SELECT key, size FROM llm_cache ORDER BY last_hit"):
+        victims.append(row["key"])
+        freed += row["size"]
+        if freed >= target:
+            break
+    db.executemany("DELETE FROM llm_cache WHERE key=?", [(v,) for v in victims])
+    print(f"LLM cache evicted {len(victims)} entries ({freed} bytes)")
+
+
+def stats():
+    with _lock:
+        out = dict(_counters)
+    out['enabled'] = LLM_CACHE_ENABLED
+    try:
+        with _db() as db:
+            n, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        out.update(entries=n, bytes=size)
+    except Exception as e:
+        out['error'] = str(e)
+    return out
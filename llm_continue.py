@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""llm_continue.py — finish_reason=length 时续写，而不是整章重来。
+
+`_ask_deepseek` 和 ziwei_prompt 的 `ds()` 以前一遇截断就把整段输出扔掉从头再生成，
+几分钟的思考链和正文全白费。现在保留已写出的部分，追加一轮对话让模型「接着写」：
+
+    user:      原 prompt
+    assistant: 已写出的部分
+    user:      续写指令 + 已写部分的末尾（锚点）
+
+续写结果和已写部分按**重叠去重**拼接：模型常把锚点原样再写一遍，
+拼接时找「已写部分的后缀 == 续写的前缀」的最长重叠并去掉。
+重试成本只剩缺的那一截，而不是一整章。
+
+最多续写 LLM_MAX_CONTINUATIONS 轮；仍未收尾（或续写本身出错）才退回原来的整章重试。
+"""
+import os
+
+LLM_MAX_CONTINUATIONS = int(os.getenv("LLM_MAX_CONTINUATIONS", "2"))
+LLM_CONTINUE_ANCHOR = int(os.getenv("LLM_CONTINUE_ANCHOR", "400"))   # 锚点取末尾多少字符
+LLM_CONTINUE_MIN_OVERLAP = 6    # 短于这个的「重叠」多半是巧合（标点、常用词），不算；中文 6 字已足够特异
+
+_INSTRUCTION = (
+    "Your previous reply was cut off by the output limit. Continue writing from "
+    "exactly where it stopped. The reply currently ends with:\n"
+    "<<<\n{tail}\n>>>\n"
+    "Output ONLY the continuation: start with the very next character after the "
+    "text above, do not repeat anything already written, no preamble, no "
+    "commentary. Keep the same language, formatting and heading structure, and "
+    "finish the chapter as originally specified."
+)
+
+
+def messages(prompt, partial):
+    """续写请求的 messages（OpenAI 兼容格式）。"""
+    return [
+        {"role": "user", "content": prompt},
+        {"role": "assistant", "content": partial},
+        {"role": "user", "content": _INSTRUCTION.format(tail=partial[-LLM_CONTINUE_ANCHOR:])},
+    ]
+
+
+def _overlap(head, tail, max_overlap):
+    for k in range(min(len(head), len(tail), max_overlap), LLM_CONTINUE_MIN_OVERLAP - 1, -1):
+        if head.endswith(tail[:k]):
+            return k
+    return 0
+
+
+def stitch(partial, continuation):
+    """把续写接到已写部分后面，去掉两者的重叠段。"""
+    if not continuation:
+        return partial
+    max_overlap = 2 * LLM_CONTINUE_ANCHOR
+    k = _overlap(partial, continuation, max_overlap)
+    if k:
+        return partial + continuation[k:]
+    # 模型爱在开头多垫一个换行/空格再重复锚点
+    stripped = continuation.lstrip()
+    k = _overlap(partial, stripped, max_overlap)
+    if k:
+        return partial + stripped[k:]
+    return partial + continuation
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""llm_hedge.py — 主备供应商对冲（hedged requests），替代「DeepSeek 打满重试再回退 Gemini」。
+
+以前 `ask_ai` 要等 `_ask_deepseek` 三次重试、最长 DEEPSEEK_BUDGET（1500s）全部烧完，
+才轮到 Gemini。这里改成：主供应商先跑；到了阈值还没出第一个 token、或者还没写完，
+就**并行**拉起备用供应商，谁先拿到合格结果（非空、未截断）用谁，另一路取消。
+
+阈值按**本进程观测到的 p95 延迟**算（按 供应商 + 产品/章节 分桶）：
+- 首 token 阈值 = 首 token 延迟 pXX × factor
+- 完成阈值     = 总耗时 pXX × factor
+两者都夹在 [min_delay, max_delay] 里；样本不足 HEDGE_MIN_SAMPLES 时用 min/max 的保守默认。
+
+章节策略（policy）决定对冲的积极程度：
+- aggressive   —— 便宜短章：早对冲，多花一点钱换尾延迟
+- balanced     —— 默认
+- conservative —— 贵的长章（forecast 等）：主供应商慢是常态，晚对冲，避免白烧两份
+- off          —— 不对冲，走原来的顺序回退
+环境变量 LLM_HEDGE_POLICIES 用 JSON 指定：{"personal/forecast": "conservative",
+"iching": "aggressive", "default": "balanced"}，键可以是 产品/章节、章节、产品。
+没配的章节按 max_tokens 分：≥ HEDGE_EXPENSIVE_TOKENS 的算贵章。
+
+⚠️ 取消是**协作式**的：每一路都是流式读，每收到一个 chunk 检查一次取消标志，
+   检查到就关掉响应（断开上游连接，供应商侧停止生成）。流式下 chunk 间隔是秒级，
+   所以败者最多再多跑一个 chunk。
+"""
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "1") == "1"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "8"))
+HEDGE_WINDOW = int(os.getenv("HEDGE_WINDOW", "200"))          # 每个桶保留的样本数
+HEDGE_EXPENSIVE_TOKENS = int(os.getenv("HEDGE_EXPENSIVE_TOKENS", "20000"))
+
+# factor 乘在 pXX 上；min/max 是夹逼区间（秒），也是冷启动时的默认阈值
+PRESETS = {
+    "aggressive":   {"factor": 0.8, "ttft_min": 20, "ttft_max": 90,
+                     "total_min": 120, "total_max": 420},
+    "balanced":     {"factor": 1.0, "ttft_min": 45, "ttft_max": 180,
+                     "total_min": 240, "total_max": 700},
+    "conservative": {"factor": 1.3, "ttft_min": 90, "ttft_max": 300,
+                     "total_min": 420, "total_max": 1000},
+    "off": None,
+}
+
+
+def _load_policy_map():
+    raw = os.getenv("LLM_HEDGE_POLICIES", "")
+    if not raw:
+        return {}
+    try:
+        m = json.loads(raw)
+    except ValueError as e:
+        print(f"LLM_HEDGE_POLICIES ignored (bad JSON): {e}")
+        return {}
+    bad = [k for k, v in m.items() if v not in PRESETS]
+    for k in bad:
+        print(f"LLM_HEDGE_POLICIES: unknown policy {m.pop(k)!r} for {k!r}, ignored")
+    return m
+
+
+POLICY_MAP = _load_policy_map()
+
+
+def policy_name(tag, max_tokens):
+    """tag = {"product", "section", ...}（见 app.ask_ai）。"""
+    tag = tag or {}
+    product, section = tag.get("product"), tag.get("section")
+    for k in (f"{product}/{section}", section, product, "default"):
+        if k in POLICY_MAP:
+            return POLICY_MAP[k]
+    return "conservative" if max_tokens >= HEDGE_EXPENSIVE_TOKENS else "balanced"
+
+
+# ================= 延迟观测 =================
+
+_lock = threading.Lock()
+_samples = {}   # (provider, bucket, 'ttft'|'total') -> deque[seconds]
+
+
+def bucket(tag):
+    tag = tag or {}
+    return f"{tag.get('product') or '-'}/{tag.get('section') or '-'}"
+
+
+def record(provider, tag, kind, seconds):
+    with _lock:
+        d = _samples.setdefault((provider, bucket(tag), kind), deque(maxlen=HEDGE_WINDOW))
+        d.append(seconds)
+
+
+def percentile(provider, tag, kind):
+    """该桶的 pXX；样本不足返回 None。"""
+    with _lock:
+        d = list(_samples.get((provider, bucket(tag), kind), ()))
+    if len(d) < HEDGE_MIN_SAMPLES:
+        return None
+    d.sort()
+    idx = min(len(d) - 1, int(round(HEDGE_PERCENTILE / 100 * (len(d) - 1))))
+    return d[idx]
+
+
+def thresholds(provider, tag, policy):
+    """返回 (首 token 阈值, 完成阈值)，单位秒。"""
+    p = PRESETS[policy]
+    out = []
+    for kind in ("ttft", "total"):
+        lo, hi = p[f"{kind}_min"], p[f"{kind}_max"]
+        seen = percentile(provider, tag, kind)
+        out.append(hi if seen is None else min(hi, max(lo, seen * p["factor"])))
+    return tuple(out)
+
+
+def stats():
+    with _lock:
+        snap = {k: list(v) for k, v in _samples.items()}
+    out = {}
+    for (provider, b, kind), d in snap.items():
+        d.sort()
+        idx = min(len(d) - 1, int(round(HEDGE_PERCENTILE / 100 * (len(d) - 1))))
+        out.setdefault(f"{provider}:{b}", {})[kind] = {
+            "n": len(d), f"p{HEDGE_PERCENTILE:g}": round(d[idx], 1)}
+    return {"enabled": LLM_HEDGE_ENABLED, "policies": POLICY_MAP, "latency": out}
+
+
+# ================= 对冲执行 =================
+
+class Cancelled(Exception):
+    pass
+
+
+class _Leg(threading.Thread):
+    """一路供应商调用。run_attempt(attempt) 返回第 attempt 次尝试的事件生成器（同 app 的流式事件：
+    delta / thinking / done）；合格 = 收到 done 且 finish_reason 是正常收尾。
+    失败（异常 / 空 / 截断）且未被取消时按 attempts 重试；给了 budget（秒）时，
+    从开跑算起超过它就不再发起下一次尝试（同 app._ask_deepseek_upstream 的 DEEPSEEK_BUDGET）。"""
+
+    def __init__(self, name, run_attempt, attempts, budget=None, *, tag, done_q):
+        super().__init__(daemon=True, name=f"hedge-{name}")
+        self.provider = name
+        self.run_attempt = run_attempt
+        self.attempts = attempts
+        self.budget = budget
+        self.tag = tag
+        self.done_q = done_q
+        self.cancel = threading.Event()
+        self.first_event = threading.Event()
+        self.started = time.time()
+        self.content = None
+        self.info = None
+        self.error = None
+        self.retry_after = None     # 失败原因带 retry_after（排队满）时记下，见 race()
+
+    def run(self):
+        for attempt in range(1, self.attempts + 1):
+            spent = time.time() - self.started
+            if attempt > 1 and self.budget is not None and spent > self.budget:
+                self.error = f"budget exhausted after {int(spent)}s ({self.error})"
+                break
+            parts = []
+            ttft, cached = None, False
+            try:
+                gen = self.run_attempt(attempt)
+                try:
+                    for kind, data in gen:
+                        if self.cancel.is_set():
+                            raise Cancelled()
+                        if not self.first_event.is_set():
+                            self.first_event.set()
+                            ttft = time.time() - self.started
+                        if kind == "delta":
+                            parts.append(data)
+                        elif kind == "done":
+                            cached = data.get("cache") == "hit"
+                            if data["finish_reason"] in ("stop", "STOP"):
+                                self.content, self.info = "".join(parts), data
+                            else:
+                                self.error = f"truncated (finish_reason={data['finish_reason']})"
+                finally:
+                    gen.close()     # 关流 = 断开上游连接
+                    # 缓存命中的首 token ≈ 0s，混进样本会把 pXX 压到 min_delay、对冲得过早：
+                    # 和 total 一样只记真打了上游的尝试（命中时 done 里 cache=hit，读完才知道）
+                    if ttft is not None and not cached:
+                        record(self.provider, self.tag, "ttft", ttft)
+            except Cancelled:
+                print(f"Hedge: {self.provider} cancelled")
+                self.error = "cancelled"
+                break
+            except Exception as e:
+                self.error = str(e)
+                self.retry_after = getattr(e, "retry_after", None)
+            if self.content is not None:
+                if self.info.get("cache") != "hit":
+                    record(self.provider, self.tag, "total", time.time() - self.started)
+                break
+            print(f"Hedge: {self.provider} attempt {attempt} failed: {self.error}")
+            if self.cancel.is_set():
+                break
+        self.done_q.put(self)
+
+
+def race(primary, secondary, tag, policy):
+    """primary / secondary = (provider, run_attempt, attempts[, budget 秒])。
+
+    返回 (winner_leg 或 None, hedged: bool, 失败原因列表, retry_after)。
+    retry_after：全部失败且有一路最后是排队满（异常带 retry_after）时取其中最大的，否则 None ——
+    调用方据此回 429 + Retry-After 而不是 500。
+    """
+    done_q = queue.Queue()
+    legs = [_Leg(*primary, tag=tag, done_q=done_q)]
+    legs[0].start()
+    ttft_limit, total_limit = thresholds(primary[0], tag, policy)
+    t0 = time.time()
+    errors = []
+
+    # 阶段一：只有主供应商在跑，等它完成 / 超首 token 阈值 / 超完成阈值
+    while True:
+        elapsed = time.time() - t0
+        limit = total_limit if legs[0].first_event.is_set() else ttft_limit
+        if elapsed >= limit:
+            reason = "not finished" if legs[0].first_event.is_set() else "no first token"
+            print(f"Hedge: {primary[0]} {reason} after {elapsed:.0f}s "
+                  f"(policy={policy}, ttft<={ttft_limit:.0f}s, total<={total_limit:.0f}s) "
+                  f"-> launching {secondary[0]}")
+            break
+        try:
+            leg = done_q.get(timeout=min(limit - elapsed, 1.0))
+        except queue.Empty:
+            continue
+        if leg.content is not None:
+            return leg, False, errors, None
+        errors.append(f"{leg.provider}: {leg.error}")
+        print(f"Hedge: {primary[0]} failed ({leg.error}) -> launching {secondary[0]}")
+        break
+
+    legs.append(_Leg(*secondary, tag=tag, done_q=done_q))
+    legs[1].start()
+
+    # 阶段二：谁先合格用谁，另一路取消
+    pending = set(legs[1:]) if errors else set(legs)
+    while pending:
+        leg = done_q.get()
+        pending.discard(leg)
+        if leg.content is not None:
+            for other in pending:
+                other.cancel.set()
+            return leg, True, errors, None
+        errors.append(f"{leg.provider}: {leg.error}")
+    busy = [leg.retry_after for leg in legs if leg.retry_after]
+    return None, True, errors, max(busy) if busy else None
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""llm_ledger.py — 每一次 LLM 调用的 token / 耗时 / 成本台账（SQLite，全机共用）。
+
+以前用量只在 `_ask_deepseek` / `_ask_gemini` / `ds()` 里 print 一行，
+「上周紫微每单花了多少钱」「哪一章拖慢了整单」都答不上来。现在每次上游 HTTP 调用
+（含重试、续写、流式、对冲里被取消的一路）都落一行：
+
+    产品 / 章节 / 语言 / 供应商 / 模型 / effort
+    prompt / cached / output / reasoning tokens（output 含思考链）
+    耗时、第几次尝试、第几轮续写、finish_reason、结果（ok/error/empty/truncated/cancelled）
+
+应答缓存（llm_cache）命中不算上游调用，不记。
+
+成本在查询时按 LLM_PRICES 折算（JSON，单位：美元 / 百万 token）：
+    {"deepseek-v4-flash": {"input": 0.5, "cached_input": 0.05, "output": 2.0}}
+没配价格的模型 cost_usd 为 null —— 价格常变，不在代码里写死。
+
+记账失败只打日志，绝不影响出稿。
+"""
+import json
+import os
+import random
+import time
+from contextlib import closing
+
+import local_store
+
+LLM_LEDGER_ENABLED = os.getenv("LLM_LEDGER_ENABLED", "1") == "1"
+LLM_LEDGER_RETENTION_DAYS = int(os.getenv("LLM_LEDGER_RETENTION_DAYS", "90"))
+
+# 可以 group_by 的维度；day 是按 UTC 日期聚合
+DIMENSIONS = ("product", "section", "language", "provider", "model", "effort",
+              "attempt", "continuation", "finish_reason", "outcome", "day")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    id                INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts                REAL NOT NULL,
+    product           TEXT NOT NULL,
+    section           TEXT NOT NULL,
+    language          TEXT NOT NULL,
+    provider          TEXT NOT NULL,
+    model             TEXT NOT NULL,
+    effort            TEXT NOT NULL,
+    prompt_tokens     INTEGER NOT NULL DEFAULT 0,
+    cached_tokens     INTEGER NOT NULL DEFAULT 0,
+    output_tokens     INTEGER NOT NULL DEFAULT 0,
+    reasoning_tokens  INTEGER NOT NULL DEFAULT 0,
+    latency           REAL NOT NULL,
+    attempt           INTEGER NOT NULL DEFAULT 1,
+    continuation      INTEGER NOT NULL DEFAULT 0,
+    finish_reason     TEXT NOT NULL DEFAULT '',
+    outcome           TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS calls_ts ON calls(ts);
+"""
+
+
+def _load_prices():
+    raw = os.getenv("LLM_PRICES", "")
+    if not raw:
+        return {}
+    try:
+        return json.loads(raw)
+    except ValueError as e:
+        print(f"LLM_PRICES ignored (bad JSON): {e}")
+        return {}
+
+
+PRICES = _load_prices()
+
+
+def _db():
+    return closing(local_store.connect("llm_ledger", _SCHEMA))
+
+
+def _tokens(provider, usage):
+    """供应商原始 usage → (prompt, cached, output, reasoning)。"""
+    u = usage or {}
+    if provider == "gemini":
+        thoughts = u.get("thoughtsTokenCount") or 0
+        return (u.get("promptTokenCount") or 0, u.get("cachedContentTokenCount") or 0,
+                (u.get("candidatesTokenCount") or 0) + thoughts, thoughts)
+    return (u.get("prompt_tokens") or 0, u.get("prompt_cache_hit_tokens") or 0,
+            u.get("completion_tokens") or 0,
+            (u.get("completion_tokens_details") or {}).get("reasoning_tokens") or 0)
+
+
+def record(tag, provider, model, effort, usage, latency, attempt=1, continuation=0,
+           finish_reason="", outcome="ok"):
+    """记一次上游调用。usage 传供应商返回的原始 usage / usageMetadata（出错时传 None）。"""
+    if not LLM_LEDGER_ENABLED:
+        return
+    tag = tag or {}
+    try:
+        now = time.time()
+        with _db() as db:
+            db.execute(
+                "INSERT INTO calls (ts, product, section, language, provider, model, effort, "
+                "prompt_tokens, cached_tokens, output_tokens, reasoning_tokens, latency, "
+                "attempt, continuation, finish_reason, outcome) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (now, str(tag.get("product") or "-"), str(tag.get("section") or "-"),
+                 str(tag.get("language") or "-"), provider, model or "", effort or "")
+                + _tokens(provider, usage)
+                + (round(latency, 3), attempt, continuation, finish_reason or "", outcome))
+            # 偶尔顺手清一次过期记录，省得再起一个定时任务
+            if random.random() < 0.01:
+                db.execute("DELETE FROM calls WHERE ts < ?",
+                           (now - LLM_LEDGER_RETENTION_DAYS * 86400,))
+    except Exception as e:
+        print(f"LLM ledger write error (ignored): {e}")
+
+
+def _quantile(values, pct):
+    idx = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[idx]
+
+
+def _cost(model, prompt, cached, output):
+    p = PRICES.get(model)
+    if not p:
+        return None
+    return ((prompt - cached) * p.get("input", 0) + cached * p.get("cached_input", p.get("input", 0))
+            + output * p.get("output", 0)) / 1e6
+
+
+def aggregate(group_by=(), since=None, until=None):
+    """按 group_by 维度聚合 [since, until) 内的调用。维度不合法抛 ValueError。"""
+    bad = [d for d in group_by if d not in DIMENSIONS]
+    if bad:
+        raise ValueError(f"unknown dimension(s): {', '.join(bad)}; allowed: {', '.join(DIMENSIONS)}")
+    until = until or time.time()
+    since = since if since is not None else until - 7 * 86400
+    with _db() as db:
+        rows = db.execute("SELECT *, date(ts, 'unixepoch') AS day FROM calls "
+                          "WHERE ts >= ? AND ts < ?", (since, until)).fetchall()
+    groups = {}
+    for r in rows:
+        g = groups.setdefault(tuple(r[d] for d in group_by), {
+            "latency": [], "prompt": 0, "cached": 0, "output": 0, "reasoning": 0,
+            "failed": 0, "cost": 0.0, "priced": True})
+        g["latency"].append(r["latency"])
+        g["prompt"] += r["prompt_tokens"]
+        g["cached"] += r["cached_tokens"]
+        g["output"] += r["output_tokens"]
+        g["reasoning"] += r["reasoning_tokens"]
+        g["failed"] += r["outcome"] != "ok"
+        c = _cost(r["model"], r["prompt_tokens"], r["cached_tokens"], r["output_tokens"])
+        if c is None:
+            g["priced"] = False
+        else:
+            g["cost"] += c
+    out = []
+    for k, g in sorted(groups.items(), key=lambda kv: [str(x) for x in kv[0]]):
+        lat = sorted(g["latency"])
+        out.append(dict(zip(group_by, k), **{
+            "calls": len(lat),
+            "failure_rate": round(g["failed"] / len(lat), 3),
+            "latency_p50": round(_quantile(lat, 50), 1),
+            "latency_p95": round(_quantile(lat, 95), 1),
+            "latency_total": round(sum(lat), 1),
+            "prompt_tokens": g["prompt"],
+            "cached_tokens": g["cached"],
+            "output_tokens": g["output"],
+            "reasoning_tokens": g["reasoning"],
+            "cache_hit_ratio": round(g["cached"] / g["prompt"], 3) if g["prompt"] else 0.0,
+            "cost_usd": round(g["cost"], 4) if g["priced"] else None,
+        }))
+    return {"since": since, "until": until, "group_by": list(group_by), "groups": out}
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""llm_limiter.py — 全机共用的上游并发 / 速率限制，带优先级排队。
+
+以前整台机器同时打多少个 LLM 调用没人管：一波订单进来，供应商回 429，
+各自重试又把队尾拖得更慢。这里在每个供应商调用（`_ask_deepseek` / `_ask_gemini`
+及其流式版、ziwei_prompt 的 `ds()`）外面加一道闸，状态放 SQLite（local_store），
+所有 gunicorn worker 共用：
+
+- 并发上限：同一供应商同时在跑的调用 ≤ LLM_MAX_CONCURRENCY_<PROVIDER>。
+- 令牌桶：每分钟最多放行 LLM_RATE_PER_MIN_<PROVIDER> 个调用，允许 LLM_RATE_BURST 的突发。
+- 优先级队列：拿不到名额就排队，按 (优先级, 先来后到) 出队。章节生成（带 tag 的调用）
+  优先于 validate_report / generate_customer_message_simple 这类不带 tag 的杂活。
+- 队列超过 LLM_QUEUE_MAX 直接拒绝（LimiterBusy，带 retry_after 秒数），
+  端点据此回 429 + Retry-After；排队超过 LLM_QUEUE_TIMEOUT 同样放弃。
+  异步任务（jobs）在 patient() 里跑，不受队长上限约束，只排队不拒绝。
+
+一个「调用」= 一次逻辑请求（含它自己的重试和续写），名额在整个过程中一直占着。
+排队的进程死了，它的行由后来者按 owner 清掉（见 local_store.owner_alive）。
+限流库坏了一律放行 —— 闸门本身不能成为故障点。
+"""
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import closing, contextmanager
+
+import llm_transport
+import local_store
+
+LLM_LIMITER_ENABLED = os.getenv("LLM_LIMITER_ENABLED", "1") == "1"
+LLM_QUEUE_MAX = int(os.getenv("LLM_QUEUE_MAX", "32"))            # 每个供应商最多排多少个
+LLM_QUEUE_TIMEOUT = int(os.getenv("LLM_QUEUE_TIMEOUT", "600"))   # 最多排多久（秒）
+LLM_RATE_BURST = int(os.getenv("LLM_RATE_BURST", "10"))
+LLM_LIMITER_POLL = 0.25
+
+PRIORITIES = {"chapter": 0, "background": 10}
+
+_DEFAULTS = {"deepseek": (8, 60), "gemini": (8, 60)}   # (并发, 每分钟)
+
+
+def limits(provider):
+    conc, rate = _DEFAULTS.get(provider, (8, 60))
+    p = provider.upper()
+    return (int(os.getenv(f"LLM_MAX_CONCURRENCY_{p}", str(conc))),
+            float(os.getenv(f"LLM_RATE_PER_MIN_{p}", str(rate))))
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS slots (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    provider    TEXT NOT NULL,
+    priority    INTEGER NOT NULL,
+    state       TEXT NOT NULL,        -- waiting / running
+    owner       TEXT NOT NULL,        -- host:pid
+    enqueued_at REAL NOT NULL,
+    started_at  REAL
+);
+CREATE INDEX IF NOT EXISTS slots_queue ON slots(provider, state, priority, id);
+CREATE TABLE IF NOT EXISTS buckets (
+    provider   TEXT PRIMARY KEY,
+    tokens     REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+class LimiterBusy(RuntimeError):
+    """排队已满 / 排队超时。retry_after：建议调用方多少秒后再来。"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+_lock = threading.Lock()
+_local = threading.local()
+_waits = {}         # (provider, priority name) -> deque[排队秒数]
+_holds = {}         # provider -> deque[占用秒数]，估 retry_after 用
+_counters = {"rejected": 0, "timeouts": 0}
+
+
+def _db():
+    return closing(local_store.connect("llm_limiter", _SCHEMA))
+
+
+def priority(tag):
+    """带章节标签的是章节生成；不带的（校验、客户消息）是杂活。tag 里可以显式给 priority。"""
+    tag = tag or {}
+    if tag.get("priority") in PRIORITIES:
+        return tag["priority"]
+    return "chapter" if tag.get("section") else "background"
+
+
+@contextmanager
+def patient():
+    """这个线程里的调用只排队、不因队长被拒（异步任务用：调用方本来就不在线等）。"""
+    _local.patient = True
+    try:
+        yield
+    finally:
+        _local.patient = False
+
+
+def is_patient():
+    """当前线程是否在 patient() 里。把请求派到别的线程跑时，先在原线程取下来再带过去。"""
+    return getattr(_local, "patient", False)
+
+
+def _sample(store, k, seconds):
+    with _lock:
+        store.setdefault(k, deque(maxlen=200)).append(seconds)
+
+
+def _p(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def retry_after(provider, waiting):
+    """粗估排到需要多久：前面排着的人数 / 并发 × 一次调用的中位占用时长。"""
+    conc, _ = limits(provider)
+    with _lock:
+        holds = list(_holds.get(provider, ()))
+    typical = _p(holds, 50) if holds else 60
+    return int(min(600, max(5, (waiting + 1) / max(1, conc) * typical)))
+
+
+def _reap(db):
+    for row in db.execute("SELECT DISTINCT owner FROM slots").fetchall():
+        if not local_store.owner_alive(row["owner"]):
+            n = db.execute("DELETE FROM slots WHERE owner=?", (row["owner"],)).rowcount
+            print(f"Limiter: reclaimed {n} slot(s) of dead process {row['owner']}")
+
+
+def _take_token(db, provider, rate, now):
+    row = db.execute("SELECT tokens, updated_at FROM buckets WHERE provider=?",
+                     (provider,)).fetchone()
+    tokens = LLM_RATE_BURST if row is None else min(
+        LLM_RATE_BURST, row["tokens"] + (now - row["updated_at"]) * rate / 60)
+    if tokens < 1:
+        db.execute("INSERT OR REPLACE INTO buckets (provider, tokens, updated_at) VALUES (?, ?, ?)",
+                   (provider, tokens, now))
+        return False
+    db.execute("INSERT OR REPLACE INTO buckets (provider, tokens, updated_at) VALUES (?, ?, ?)",
+               (provider, tokens - 1, now))
+    return True
+
+
+def acquire(provider, tag=None):
+    """排队拿一个名额，返回 ticket（交给 release）。拿不到抛 LimiterBusy。"""
+    if not LLM_LIMITER_ENABLED:
+        return None
+    prio = priority(tag)
+    conc, rate = limits(provider)
+    t0 = time.time()
+    try:
+        with _db() as db:
+            db.execute("BEGIN IMMEDIATE")
+            _reap(db)
+            (waiting,) = db.execute("SELECT COUNT(*) FROM slots WHERE provider=? AND state='waiting'",
+                                    (provider,)).fetchone()
+            if waiting >= LLM_QUEUE_MAX and not getattr(_local, "patient", False):
+                db.execute("COMMIT")
+                with _lock:
+                    _counters["rejected"] += 1
+                raise LimiterBusy(f"{provider} queue full ({waiting} waiting)",
+                                  retry_after(provider, waiting))
+            ticket = db.execute(
+                "INSERT INTO slots (provider, priority, state, owner, enqueued_at) "
+                "VALUES (?, ?, 'waiting', ?, ?)",
+                (provider, PRIORITIES[prio], local_store.owner(), t0)).lastrowid
+            db.execute("COMMIT")
+    except LimiterBusy:
+        raise
+    except Exception as e:
+        print(f"Limiter error (letting call through): {e}")
+        return None
+
+    announced = False
+    while True:
+        now = time.time()
+        try:
+            with _db() as db:
+                db.execute("BEGIN IMMEDIATE")
+                head = db.execute("SELECT id FROM slots WHERE provider=? AND state='waiting' "
+                                  "ORDER BY priority, id LIMIT 1", (provider,)).fetchone()
+                (running,) = db.execute("SELECT COUNT(*) FROM slots WHERE provider=? "
+                                        "AND state='running'", (provider,)).fetchone()
+                granted = (head is not None and head["id"] == ticket and running < conc
+                           and _take_token(db, provider, rate, now))
+                if granted:
+                    db.execute("UPDATE slots SET state='running', started_at=? WHERE id=?",
+                               (now, ticket))
+                db.execute("COMMIT")
+        except Exception as e:
+            print(f"Limiter error (letting call through): {e}")
+            release((provider, ticket, None))
+            return None
+        if granted:
+            waited = now - t0
+            _sample(_waits, (provider, prio), waited)
+            llm_transport.account("queue", waited)
+            if announced:
+                print(f"Limiter {provider}/{prio}: got slot after {waited:.1f}s")
+            return (provider, ticket, now)
+        if now - t0 > LLM_QUEUE_TIMEOUT:
+            release((provider, ticket, None))
+            with _lock:
+                _counters["timeouts"] += 1
+            raise LimiterBusy(f"{provider} queue wait exceeded {LLM_QUEUE_TIMEOUT}s",
+                              retry_after(provider, LLM_QUEUE_MAX))
+        if not announced:
+            announced = True
+            print(f"Limiter {provider}/{prio}: queued ({running}/{conc} running)")
+        time.sleep(LLM_LIMITER_POLL * (0.5 + random.random()))
+
+
+def release(ticket):
+    """acquire 返回的 ticket（None 表示当时直接放行了，无需归还）。"""
+    if not ticket:
+        return
+    provider, slot_id, started = ticket
+    if started:
+        _sample(_holds, provider, time.time() - started)
+    try:
+        with _db() as db:
+            db.execute("DELETE FROM slots WHERE id=?", (slot_id,))
+    except Exception as e:
+        print(f"Limiter release error (ignored): {e}")
+
+
+def overloaded(provider):
+    """队列已满时返回建议的 retry_after 秒数，否则 None。端点入口快速拒绝用。"""
+    if not LLM_LIMITER_ENABLED or getattr(_local, "patient", False):
+        return None
+    try:
+        with _db() as db:
+            (waiting,) = db.execute("SELECT COUNT(*) FROM slots WHERE provider=? AND state='waiting'",
+                                    (provider,)).fetchone()
+    except Exception as e:
+        print(f"Limiter read error (ignored): {e}")
+        return None
+    if waiting < LLM_QUEUE_MAX:
+        return None
+    with _lock:
+        _counters["rejected"] += 1
+    return retry_after(provider, waiting)
+
+
+def stats():
+    """`/` 健康检查用：各供应商 在跑 / 排队（按优先级）/ 排队等待 p50/p95。"""
+    with _lock:
+        out = dict(_counters)
+        waits = {k: list(v) for k, v in _waits.items()}
+    out.update(enabled=LLM_LIMITER_ENABLED, queue_max=LLM_QUEUE_MAX, providers={})
+    try:
+        with _db() as db:
+            rows = db.execute("SELECT provider, state, priority, COUNT(*) AS n FROM slots "
+                              "GROUP BY provider, state, priority").fetchall()
+    except Exception as e:
+        out["error"] = str(e)
+        rows = []
+    names = {v: k for k, v in PRIORITIES.items()}
+    providers = {r["provider"] for r in rows} | {p for p, _ in waits} | set(_DEFAULTS)
+    for p in sorted(providers):
+        conc, rate = limits(p)
+        info = {"concurrency": conc, "rate_per_min": rate, "running": 0, "waiting": {}}
+        for r in rows:
+            if r["provider"] != p:
+                continue
+            if r["state"] == "running":
+                info["running"] += r["n"]
+            else:
+                name = names.get(r["priority"], str(r["priority"]))
+                info["waiting"][name] = info["waiting"].get(name, 0) + r["n"]
+        for (wp, prio), d in waits.items():
+            if wp == p:
+                info.setdefault("wait_seconds", {})[prio] = {
+                    "n": len(d), "p50": round(_p(d, 50), 2), "p95": round(_p(d, 95), 2)}
+        out["providers"][p] = info
+    return out
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""llm_transport.py — 全进程共享的 LLM 上游连接池。
+
+app.py 的 `_ask_gemini` / `_ask_deepseek` 和 ziwei_prompt.py 的 `ds()` 以前各自裸调
+`requests.post`:每章一次全新的 DNS + TCP + TLS 握手,一份报告 ~6 次调用一个连接都不复用。
+这里按**上游主机**各建一个 `requests.Session`(keep-alive 连接池),所有调用路径都走它。
+
+- 池大小可配:`LLM_POOL_MAXSIZE` 是每个主机保留的长连接数,按 gunicorn 每 worker
+  的最大并发章节数给;`LLM_POOL_CONNECTIONS` 是每个 Session 缓存的主机池数量。
+- 连接超时与读超时分开:连接超时统一 `LLM_CONNECT_TIMEOUT`(上游连不上要快速失败),
+  读超时由调用方按模型给(DeepSeek high 档单章能读 500s 以上)。
+- `stats()` 报连接复用计数器:requests 是发出的请求数,connections 是真正新建的
+  TCP/TLS 连接数,两者之差就是省掉的握手。`/` 健康检查原样带出来,压测时看它证明握手没了。
+
+- 按请求累计等待秒数:`begin_timing()` 开始、`account(kind, 秒)` 记一笔、`end_timing()`
+  取走 {kind: 秒}。upstream = 耗在 post 里的时间;限流排队、在途合并等待由
+  llm_limiter / singleflight 用 account 记成 queue / flight。app 据此在响应头
+  `Server-Timing` 里给出 app = 总耗时 − 各项等待,压测时看的就是这个服务端自身开销。
+
+⚠️ Session 按进程建、懒建。gunicorn `--preload` 时 import 发生在 fork 之前,
+   若在父进程里建好池,子进程会共用同一批 socket —— 所以记下建池的 pid,pid 变了就重建。
+"""
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+LLM_POOL_CONNECTIONS = int(os.getenv("LLM_POOL_CONNECTIONS", "4"))
+LLM_POOL_MAXSIZE = int(os.getenv("LLM_POOL_MAXSIZE", "16"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+
+_lock = threading.Lock()
+_sessions = {}      # host -> requests.Session
+_owner_pid = None   # 建池的进程,fork 之后要重建
+_stats = {}         # host -> {'requests', 'connections', 'errors'}
+_timing = threading.local()     # 当前请求的等待累计,见 begin_timing / account / end_timing
+
+
+def _bump(host, field, n=1):
+    with _lock:
+        st = _stats.setdefault(host, {'requests': 0, 'connections': 0, 'errors': 0})
+        st[field] += n
+
+
+def _counting(base):
+    """给 urllib3 连接池套一层计数:每次真正新建连接(= 一次完整握手)记一笔。"""
+    class _CountingPool(base):
+        def _new_conn(self):
+            _bump(self.host, 'connections')
+            return super()._new_conn()
+    _CountingPool.__name__ = 'Counting' + base.__name__
+    return _CountingPool
+
+
+class _PooledAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _counting(HTTPConnectionPool),
+            'https': _counting(HTTPSConnectionPool),
+        }
+
+
+def _new_session():
+    s = requests.Session()
+    adapter = _PooledAdapter(pool_connections=LLM_POOL_CONNECTIONS,
+                             pool_maxsize=LLM_POOL_MAXSIZE)
+    s.mount('https://', adapter)
+    s.mount('http://', adapter)
+    return s
+
+
+def session_for(url):
+    """该 URL 所在主机的共享 Session(线程安全,懒建,fork 后自动重建)。"""
+    global _owner_pid
+    host = urlsplit(url).hostname or ''
+    with _lock:
+        if _owner_pid != os.getpid():
+            _sessions.clear()
+            _stats.clear()
+            _owner_pid = os.getpid()
+        s = _sessions.get(host)
+        if s is None:
+            s = _sessions[host] = _new_session()
+    return s
+
+
+def begin_timing():
+    """本线程开始一个新请求的等待累计(Flask before_request 调)。"""
+    _timing.waits = {}
+
+
+def end_timing():
+    """取走本线程的等待累计 {kind: 秒} 并结束;没开始过返回 None。"""
+    w = getattr(_timing, 'waits', None)
+    _timing.waits = None
+    return w
+
+
+def account(kind, seconds):
+    """给当前请求记一笔等待。没有请求上下文的线程(对冲的两路、jobs 外的脚本)直接忽略。"""
+    w = getattr(_timing, 'waits', None)
+    if w is not None:
+        w[kind] = w.get(kind, 0.0) + seconds
+
+
+def post(url, *, json=None, headers=None, timeout=None, stream=False):
+    """走连接池的 POST。timeout 是**读超时**(秒),连接超时统一取 LLM_CONNECT_TIMEOUT。
+
+    耗时记为 upstream 等待;stream=True 时只含到响应头为止,读流的时间由调用方自己记。"""
+    s = session_for(url)
+    host = urlsplit(url).hostname or ''
+    _bump(host, 'requests')
+    t0 = time.time()
+    try:
+        return s.post(url, json=json, headers=headers, stream=stream,
+                      timeout=(LLM_CONNECT_TIMEOUT, timeout))
+    except requests.exceptions.ConnectionError:
+        _bump(host, 'errors')
+        raise
+    finally:
+        account('upstream', time.time() - t0)
+
+
+def stats():
+    """按主机的连接复用计数。reused = 走了已有长连接、没有重新握手的请求数。"""
+    with _lock:
+        snap = {h: dict(v) for h, v in _stats.items()}
+    for v in snap.values():
+        v['reused'] = max(0, v['requests'] - v['connections'])
+        v['reuse_ratio'] = round(v['reused'] / v['requests'], 3) if v['requests'] else None
+    return {
+        'pool_maxsize': LLM_POOL_MAXSIZE,
+        'connect_timeout': LLM_CONNECT_TIMEOUT,
+        'hosts': snap,
+    }
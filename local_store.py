@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""local_store.py — 本机共享的小型 SQLite 存储。
+
+同一台机器上的 gunicorn worker 各是独立进程，进程内的 dict 彼此看不见；
+需要跨 worker / 跨重启的状态（异步任务、缓存、熔断……）统一落到 `BAZI_DATA_DIR`
+下的 SQLite 文件里。每个用途一个库文件，互不加锁。
+
+- WAL 模式：读不挡写，多个 worker 同时轮询任务状态不会互相卡住。
+- busy_timeout：写冲突时等锁而不是立刻抛 `database is locked`。
+- 连接按线程各开一个（sqlite3 连接不能跨线程用），用完即关，不做连接池。
+
+⚠️ 这是**单机**存储。多机部署时每台机器各有一份，不会互相同步。
+"""
+import os
+import socket
+import sqlite3
+
+BAZI_DATA_DIR = os.getenv(
+    "BAZI_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", "30"))
+
+HOST = socket.gethostname()
+
+_schema_ready = set()   # (pid, name)：本进程已经跑过建表语句的库
+
+
+def db_path(name):
+    return os.path.join(BAZI_DATA_DIR, f"{name}.sqlite3")
+
+
+def connect(name, schema=None):
+    """打开 `BAZI_DATA_DIR/<name>.sqlite3`；schema 是建表语句（幂等，CREATE ... IF NOT EXISTS）。
+
+    isolation_level=None：自动提交，需要事务的地方自己写 BEGIN IMMEDIATE。
+    """
+    os.makedirs(BAZI_DATA_DIR, exist_ok=True)
+    conn = sqlite3.connect(db_path(name), timeout=SQLITE_BUSY_TIMEOUT,
+                           isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if schema and (os.getpid(), name) not in _schema_ready:
+        conn.executescript(schema)
+        _schema_ready.add((os.getpid(), name))
+    return conn
+
+
+def owner():
+    """当前进程的标识 host:pid，用来标记「这行状态归谁」。"""
+    return f"{HOST}:{os.getpid()}"
+
+
+def owner_alive(owner_id):
+    """owner() 标记的进程还在不在。别的机器上的进程看不见，一律当它活着。"""
+    host, _, pid = (owner_id or "").rpartition(":")
+    if host != HOST:
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError):
+        return True
+    return True
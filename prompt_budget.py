@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""prompt_budget.py — 拼好的 prompt 按块估 token，超预算时从低优先级的块开始砍。
+
+以前一个章节的 prompt 有多大，要等供应商的账单（llm_ledger 的 prompt_tokens）才知道；
+哪一块占了大头更是无从谈起。端点把 prompt 里几个有名字的块交过来：
+
+    bazi_context       命盘数据（format_bazi_context）
+    previous_chapters  前文（format_previous_chapters_context）
+    timeline           流月时间线 / 年度月表
+    calendar           年度报告的个人择日表（personal_calendar）
+    style_contract     写作约定（annual / fengshui 的 STYLE_RULES）
+
+这里按块计数，system prompt 里剩下的记为 base_rules，user prompt 里剩下的（章节任务说明、
+CLIENT FACTS）记为 task。块必须是 prompt 里原样出现的子串 —— 计数和裁剪都靠字符串匹配，
+不需要改各个 builder 的拼法。
+
+预算按 (产品, 章节) 取：PROMPT_BUDGETS='{"annual/monthly": 40000, "iching": 20000}'，
+查找顺序 产品/章节 → 章节 → 产品 → default，都没有用 PROMPT_BUDGET_TOKENS。
+超了就按端点给的裁剪顺序一步步换成更小的版本（例如前文：全文 → 摘要 → 丢最早一章；
+择日表：每月 8 天 → 7 → … → PROMPT_BUDGET_CALENDAR_MIN），够了就停；全砍完还超，照发并记
+over_budget —— 宁可贵一点，也不让章节失败。
+
+token 是估的，不调 tokenizer：中日韩字符按 PROMPT_CJK_TOKENS_PER_CHAR（默认 1，DeepSeek
+实际约 0.6、Gemini 约 1，取偏大的那边），其余按 PROMPT_CHARS_PER_TOKEN（默认 4）个字符一个
+token。偏大估计只会让裁剪早一点发生，不会让请求超过供应商的上下文上限。
+"""
+import json
+import os
+import re
+import threading
+
+PROMPT_BUDGET_ENABLED = os.getenv("PROMPT_BUDGET_ENABLED", "1") == "1"
+PROMPT_BUDGET_TOKENS = int(os.getenv("PROMPT_BUDGET_TOKENS", "60000"))
+PROMPT_BUDGET_KEEP_CHAPTERS = int(os.getenv("PROMPT_BUDGET_KEEP_CHAPTERS", "1"))
+PROMPT_BUDGET_CALENDAR_MIN = int(os.getenv("PROMPT_BUDGET_CALENDAR_MIN", "3"))
+PROMPT_CJK_TOKENS_PER_CHAR = float(os.getenv("PROMPT_CJK_TOKENS_PER_CHAR", "1.0"))
+PROMPT_CHARS_PER_TOKEN = float(os.getenv("PROMPT_CHARS_PER_TOKEN", "4.0"))
+
+_WIDE = re.compile("[\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]")   # 中日韩 + 全角
+
+
+def _load_budgets():
+    raw = os.getenv("PROMPT_BUDGETS", "")
+    if not raw:
+        return {}
+    try:
+        m = json.loads(raw)
+        return {str(k): int(v) for k, v in m.items()}
+    except (ValueError, TypeError, AttributeError) as e:
+        print(f"PROMPT_BUDGETS ignored (bad JSON): {e}")
+        return {}
+
+
+BUDGETS = _load_budgets()
+
+_lock = threading.Lock()
+_counters = {"checked": 0, "trimmed": 0, "over_budget": 0}
+
+
+def estimate(text):
+    """估算 token 数（见模块说明）。"""
+    if not text:
+        return 0
+    wide = len(_WIDE.findall(text))
+    return int(wide * PROMPT_CJK_TOKENS_PER_CHAR
+               + (len(text) - wide) / PROMPT_CHARS_PER_TOKEN + 0.5)
+
+
+def budget_for(tag):
+    """tag = {"product", "section", ...}（见 app.ask_ai）。"""
+    tag = tag or {}
+    product, section = tag.get("product"), tag.get("section")
+    for k in (f"{product}/{section}", section, product, "default"):
+        if k in BUDGETS:
+            return BUDGETS[k]
+    return PROMPT_BUDGET_TOKENS
+
+
+def measure(system_prompt, user_prompt, blocks):
+    """(总 token, {块名: token})。块出现几次算几次；没出现的块不列。"""
+    system_tokens, user_tokens = estimate(system_prompt), estimate(user_prompt)
+    out, in_system, in_user = {}, 0, 0
+    for name, text in blocks.items():
+        if not text:
+            continue
+        n_sys, n_user = system_prompt.count(text), user_prompt.count(text)
+        if not n_sys and not n_user:
+            continue
+        t = estimate(text)
+        out[name] = t * (n_sys + n_user)
+        in_system += t * n_sys
+        in_user += t * n_user
+    out["base_rules"] = system_tokens - in_system
+    out["task"] = user_tokens - in_user
+    return system_tokens + user_tokens, out
+
+
+def fit(tag, system_prompt, user_prompt, blocks, trims=()):
+    """把 prompt 压进预算。
+
+    blocks: {块名: 文本}，要单独计数的块。
+    trims:  [(块名, 逐步变小的候选文本的迭代器)]，按先砍谁排列；迭代器惰性求值，用不到不算。
+    返回 (system_prompt, user_prompt, meta)，meta = {"tokens", "budget", "blocks",
+    "trimmed": {块名: 步数}, "over_budget"}，端点原样放进响应的 meta.prompt。
+    """
+    blocks = dict(blocks)
+    budget = budget_for(tag)
+    tokens, breakdown = measure(system_prompt, user_prompt, blocks)
+    trimmed = {}
+    if PROMPT_BUDGET_ENABLED:
+        for name, candidates in trims:
+            old = blocks.get(name)
+            if tokens <= budget:
+                break
+            if not old or (old not in system_prompt and old not in user_prompt):
+                continue
+            for new in candidates:
+                system_prompt = system_prompt.replace(old, new)
+                user_prompt = user_prompt.replace(old, new)
+                blocks[name] = old = new
+                trimmed[name] = trimmed.get(name, 0) + 1
+                tokens = estimate(system_prompt) + estimate(user_prompt)
+                if tokens <= budget or not new:
+                    break
+        if trimmed:
+            tokens, breakdown = measure(system_prompt, user_prompt, blocks)
+    over = tokens > budget
+    with _lock:
+        _counters["checked"] += 1
+        _counters["trimmed"] += bool(trimmed)
+        _counters["over_budget"] += over
+    tag = tag or {}
+    print(f"Prompt budget {tag.get('product') or '-'}/{tag.get('section') or '-'}: "
+          f"{tokens}/{budget} tok ("
+          + ", ".join(f"{k}={v}" for k, v in breakdown.items()) + ")"
+          + (f" trimmed {trimmed}" if trimmed else "")
+          + (" — OVER BUDGET" if over else ""))
+    return system_prompt, user_prompt, {"tokens": tokens, "budget": budget,
+                                        "blocks": breakdown, "trimmed": trimmed,
+                                        "over_budget": over}
+
+
+def stats():
+    with _lock:
+        out = dict(_counters)
+    out.update(enabled=PROMPT_BUDGET_ENABLED, default_budget=PROMPT_BUDGET_TOKENS,
+               budgets=BUDGETS)
+    return out
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""singleflight.py — 相同章节请求在途合并（single-flight）。
+
+worker 那边等超时了会把同一份 `/api/generate-section` 请求原样再 POST 一次，
+于是两个一模一样、各跑好几分钟的上游调用并行烧钱。llm_cache 只能在第一次**跑完之后**
+挡住重复，挡不住在途的那段时间。
+
+这里按「路径 + 规范化请求体（键排序的 JSON）」的 sha256 做键，状态放 SQLite
+（local_store），所有 gunicorn worker 共用：
+
+- 第一个到的是 leader：登记一行 running，照常执行端点。
+- 在途期间到的重复请求不再执行端点，轮询等 leader 的结果，拿到后原样返回（状态码 + JSON）。
+- leader 进程死了（owner 不在了）由等待者接手成为新 leader；等超过 SINGLEFLIGHT_WAIT_TIMEOUT
+  就放弃合并、自己跑。
+- 成功结果再保留 SINGLEFLIGHT_LINGER 秒，接住「刚跑完时恰好到达」的重复；
+  失败结果只给当时在等的请求，新来的请求照常重跑。
+
+流式请求（Accept: text/event-stream）不参与合并 —— 流没法分给两个连接；
+带 fresh=true 的重写请求也不参与（由 app 判断），它要的就是一份新结果。
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import closing
+
+import llm_transport
+import local_store
+
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "1") == "1"
+SINGLEFLIGHT_WAIT_TIMEOUT = int(os.getenv("SINGLEFLIGHT_WAIT_TIMEOUT", "1800"))
+SINGLEFLIGHT_LINGER = int(os.getenv("SINGLEFLIGHT_LINGER", "60"))
+SINGLEFLIGHT_POLL = 1.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS flights (
+    key         TEXT PRIMARY KEY,
+    flight      TEXT NOT NULL,        -- 这一趟的标识，等待者据此认出「我等的那趟」
+    owner       TEXT NOT NULL,        -- host:pid
+    state       TEXT NOT NULL,        -- running / done
+    status      INTEGER,
+    body        TEXT,
+    mimetype    TEXT,
+    started_at  REAL NOT NULL,
+    finished_at REAL
+);
+"""
+
+_lock = threading.Lock()
+_counters = {"leaders": 0, "joined": 0, "takeovers": 0, "wait_timeouts": 0}
+
+
+def _db():
+    return closing(local_store.connect("singleflight", _SCHEMA))
+
+
+def _count(field):
+    with _lock:
+        _counters[field] += 1
+
+
+def key(path, body):
+    canonical = json.dumps(body, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(f"{path}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+def begin(k):
+    """返回 ("lead", flight) —— 由本请求执行，完了调 finish；
+    ("joined", (status, body, mimetype)) —— 拿到了在途那趟的结果；
+    ("solo", None) —— 合并不可用（关闭 / 等超时 / 存储出错），自己跑、不登记。"""
+    if not SINGLEFLIGHT_ENABLED:
+        return "solo", None
+    t0 = time.time()
+    waiting_for = None
+    while True:
+        now = time.time()
+        try:
+            with _db() as db:
+                db.execute("BEGIN IMMEDIATE")
+                row = db.execute("SELECT * FROM flights WHERE key=?", (k,)).fetchone()
+                if row and row["state"] == "done" and (
+                        row["flight"] == waiting_for
+                        or (200 <= row["status"] < 300
+                            and now - row["finished_at"] < SINGLEFLIGHT_LINGER)):
+                    db.execute("COMMIT")
+                    _count("joined")
+                    llm_transport.account("flight", now - t0)
+                    print(f"Single-flight {k[:12]}: joined finished request "
+                          f"(waited {now - t0:.0f}s)")
+                    return "joined", (row["status"], row["body"], row["mimetype"])
+                dead = row and row["state"] == "running" and not local_store.owner_alive(row["owner"])
+                if row is None or row["state"] == "done" or dead:
+                    flight = f"{local_store.owner()}:{now}"
+                    db.execute("INSERT OR REPLACE INTO flights (key, flight, owner, state, started_at) "
+                               "VALUES (?, ?, ?, 'running', ?)", (k, flight, local_store.owner(), now))
+                    db.execute("COMMIT")
+                    if waiting_for is not None:
+                        llm_transport.account("flight", now - t0)
+                    if dead:
+                        _count("takeovers")
+                        print(f"Single-flight {k[:12]}: leader {row['owner']} gone, taking over")
+                    _count("leaders")
+                    return "lead", flight
+                db.execute("COMMIT")
+        except Exception as e:
+            print(f"Single-flight error (running without coalescing): {e}")
+            return "solo", None
+        if waiting_for is None:
+            waiting_for = row["flight"]
+            print(f"Single-flight {k[:12]}: identical request in flight "
+                  f"(since {now - row['started_at']:.0f}s), waiting for its result")
+        elif row["flight"] != waiting_for:
+            waiting_for = row["flight"]     # 原 leader 死了、别人接手：改等新的那趟
+        if now - t0 > SINGLEFLIGHT_WAIT_TIMEOUT:
+            _count("wait_timeouts")
+            print(f"Single-flight {k[:12]}: gave up waiting after {now - t0:.0f}s, running solo")
+            return "solo", None
+        time.sleep(SINGLEFLIGHT_POLL)
+
+
+def finish(k, flight, status, body, mimetype):
+    """leader 跑完：把结果交给等待者。只认自己那趟（被接手过就不覆盖）。"""
+    try:
+        with _db() as db:
+            db.execute("UPDATE flights SET state='done', status=?, body=?, mimetype=?, finished_at=? "
+                       "WHERE key=? AND flight=?",
+                       (status, body, mimetype, time.time(), k, flight))
+            db.execute("DELETE FROM flights WHERE state='done' AND finished_at < ?",
+                       (time.time() - max(SINGLEFLIGHT_LINGER, 3600),))
+    except Exception as e:
+        print(f"Single-flight finish error (ignored): {e}")
+
+
+def stats():
+    with _lock:
+        out = dict(_counters)
+    out["enabled"] = SINGLEFLIGHT_ENABLED
+    try:
+        with _db() as db:
+            (out["in_flight"],) = db.execute(
+                "SELECT COUNT(*) FROM flights WHERE state='running'").fetchone()
+    except Exception as e:
+        out["error"] = str(e)
+    return out
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""solar_terms.py — 1900–2100 每年 12 个「节」的精确交节时刻（北京时间），O(1) 查表。
+
+月柱按节换月：立春起寅月、惊蛰起卯月 …… 小寒起丑月。以前 app.py 用固定的月/日近似
+（「每年浮动 ±1 天」），交节日前后一天的流月会排错；almanac_2027.py 的月界则是 lunar-python
+算的精确值，两边对不上。
+
+这里的表由 tools/gen_solar_terms.py 用 lunar-python 离线生成，存成 solar_terms.bin：
+
+    b"JIE1" + 起始年、结束年（<HH）+ (结束年 − 起始年 + 1) × 12 个 <I
+    第 (年 − 起始年) × 12 + idx 个数 = 该年 idx 号节的交节时刻，
+    距 1900-01-01 00:00（北京时间）的分钟数（向下取整，日期不会因取整跨天）。
+
+年份是「立春年」：idx 0 = 当年立春（寅月），…，10 = 当年大雪（子月），11 = 次年小寒（丑月）。
+导入时读一次（~10 KB），请求时不再调 lunar-python。表外的年份抛 ValueError，由调用方降级。
+"""
+import os
+import struct
+import sys
+from array import array
+from datetime import date, datetime, timedelta
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "solar_terms.bin")
+MAGIC = b"JIE1"
+EPOCH = datetime(1900, 1, 1)
+TERM_NAMES = ['立春', '惊蛰', '清明', '立夏', '芒种', '小暑',
+              '立秋', '白露', '寒露', '立冬', '大雪', '小寒']
+
+
+def _load(path=TABLE_PATH):
+    with open(path, "rb") as f:
+        raw = f.read()
+    if raw[:4] != MAGIC:
+        raise ValueError(f"{path}: not a solar-term table")
+    first, last = struct.unpack_from("<HH", raw, 4)
+    table = array("I")
+    table.frombytes(raw[8:])
+    if sys.byteorder != "little":
+        table.byteswap()
+    if len(table) != (last - first + 1) * 12:
+        raise ValueError(f"{path}: expected {(last - first + 1) * 12} entries, got {len(table)}")
+    return first, last, table
+
+
+FIRST_YEAR, LAST_YEAR, _TABLE = _load()
+# 按日期查时只比较「北京时间的日序号」，预先算好省掉每次的 datetime 运算
+_EPOCH_ORDINAL = EPOCH.toordinal()
+_DAYS = array("I", (m // 1440 for m in _TABLE))
+
+
+def _index(lunar_year, idx):
+    if not FIRST_YEAR <= lunar_year <= LAST_YEAR or not 0 <= idx < 12:
+        raise ValueError(f"solar term ({lunar_year}, {idx}) outside {FIRST_YEAR}–{LAST_YEAR}")
+    return (lunar_year - FIRST_YEAR) * 12 + idx
+
+
+def term_start(lunar_year, idx):
+    """交节时刻（naive datetime，北京时间）。"""
+    return EPOCH + timedelta(minutes=_TABLE[_index(lunar_year, idx)])
+
+
+def term_date(lunar_year, idx):
+    """交节当天的公历日期（北京时间）。"""
+    return date.fromordinal(_EPOCH_ORDINAL + _DAYS[_index(lunar_year, idx)])
+
+
+def locate(g_date):
+    """公历日期 -> (lunar_year, idx)：这一天属于哪个节月（交节当天算新月）。
+
+    先按公历月份猜出表里的位置（节总在公历月的 4–9 日），最多再前后挪一格。
+    """
+    day = g_date.toordinal() - _EPOCH_ORDINAL
+    k = (g_date.year - FIRST_YEAR) * 12 + g_date.month - 2    # 该公历月里那个节的位置
+    if k < 0 or k >= len(_DAYS):
+        raise ValueError(f"{g_date} outside solar-term table {FIRST_YEAR}–{LAST_YEAR}")
+    if day < _DAYS[k]:
+        k -= 1
+        if k < 0:
+            raise ValueError(f"{g_date} outside solar-term table {FIRST_YEAR}–{LAST_YEAR}")
+    return FIRST_YEAR + k // 12, k % 12
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""tools/bench_calendar.py — 个人择日表：逐月扫全年（改前）vs 位图索引（almanac.index）。
+
+改前的 personal_calendar 每个月把全年 365 天过滤一遍，再逐天查冲 / 六合；这里原样保留一份
+作对照（scan_calendar），和现在的 annual_2027.personal_calendar 比单次调用耗时，
+并逐字对比两者输出（不同命盘、语言、每月条数）。
+
+    python tools/bench_calendar.py
+    python tools/bench_calendar.py -n 500 --year 2031
+    python tools/bench_calendar.py --check       # 只对比输出
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import almanac                                   # noqa: E402
+import annual_2027                               # noqa: E402
+import bench_endpoints                           # noqa: E402
+from annual_2027 import get_user_branches, _tag_labels   # noqa: E402
+
+# 改前 annual_2027 里的字符串表（现在换成了 ganzhi 的整数表），原样留作对照
+LIU_CHONG = {'子': '午', '丑': '未', '寅': '申', '卯': '酉', '辰': '戌', '巳': '亥',
+             '午': '子', '未': '丑', '申': '寅', '酉': '卯', '戌': '辰', '亥': '巳'}
+LIU_HE = {'子': '丑', '丑': '子', '寅': '亥', '亥': '寅', '卯': '戌', '戌': '卯',
+          '辰': '酉', '酉': '辰', '巳': '申', '申': '巳', '午': '未', '未': '午'}
+
+
+def scan_calendar(bazi_json, lang_code='en', per_month=8, year=annual_2027.ANNUAL_YEAR):
+    """改前的实现（只换了数据来源）：逐月过滤全年，逐天判断。"""
+    ub = get_user_branches(bazi_json)
+    day_branch = ub.get('day', '')
+    labels = _tag_labels(lang_code)
+    zh = lang_code in ('zh', 'zh-tw')
+    star_note = ('【六合】(与您的日支六合,格外有利)' if zh
+                 else "[Liu He] (combines with the client's day branch — extra favorable)")
+    protect = {ub.get('day'), ub.get('year')} - {None}
+
+    def ok(day):
+        if day['chong'] in protect:
+            return False
+        return not any(LIU_CHONG.get(day['zhi']) == b for b in protect)
+
+    lines = [
+        f"### THE CLIENT'S PERSONAL {year} DAY CALENDAR",
+        "(pre-computed from the traditional almanac AND this client's own chart: "
+        "generically auspicious days that clash this client's day/year branch have "
+        "already been REMOVED; 'caution days' are days whose branch clashes the "
+        "client's day branch. Reproduce dates and their uses EXACTLY as listed — "
+        "never invent, add or drop dates. The labels are already in the report "
+        "language.)\n",
+    ]
+    all_days = almanac.year_days(year)
+    for m in almanac.months(year):
+        mdays = [d for d in all_days if m['start'] <= d['d'] <= m['end']]
+        good = [d for d in mdays if d['tags'] and ok(d)]
+        good.sort(key=lambda d: (0 if LIU_HE.get(d['zhi']) == day_branch else 1, d['d']))
+        pick = sorted(good[:per_month], key=lambda d: d['d'])
+        caution = [d['d'] for d in mdays
+                   if day_branch and LIU_CHONG.get(d['zhi']) == day_branch]
+        lines.append(f"\n**Month {m['idx']} — {m['start']} ~ {m['end']} "
+                     f"({m['ganzhi']}月)**")
+        if pick:
+            for d in pick:
+                star = ' ' + star_note if LIU_HE.get(d['zhi']) == day_branch else ''
+                tags = ('、' if zh else ', ').join(labels[t] for t in d['tags'])
+                if zh:
+                    lines.append(f"- {d['d']}({d['gz']}日):宜 {tags}{star}")
+                else:
+                    lines.append(f"- {d['d']} ({d['gz']}日): good for {tags}{star}")
+        else:
+            lines.append("- (本月无特别有利的个人吉日,宜守成)" if zh else
+                         "- (no strongly favorable personal days this month — "
+                         "advise consolidation)")
+        if caution:
+            head = ('⚠ 个人忌日(冲您的日支),重大事项避开:' if zh else
+                    "⚠ personal caution days (clash the client's day branch): ")
+            lines.append(f"- {head}{('、' if zh else ', ').join(caution)}")
+    return "\n".join(lines)
+
+
+def charts(n):
+    """n 个不同出生时间的命盘，日支 / 年支覆盖各种组合。"""
+    births = itertools.product(range(1950, 2010, 3), range(1, 13), (3, 11, 19, 27), (1, 9, 17))
+    return [bench_endpoints.sample_bazi(f'C{i}', 'female', (y, m, d, h, 30))
+            for i, (y, m, d, h) in zip(range(n), births)]
+
+
+def check(year, n=300):
+    bad = 0
+    for chart in charts(n):
+        for lang, per_month in (('en', 8), ('zh', 8), ('zh-tw', 3)):
+            if scan_calendar(chart, lang, per_month, year) != annual_2027.personal_calendar(
+                    chart, lang, per_month, year):
+                bad += 1
+    print(f"{year}: {n} charts × 3 variants: " + ("identical" if not bad else f"{bad} differ"))
+    return bad == 0
+
+
+def _per_call_ms(fn, sample, year):
+    fn(sample[0], 'zh', 8, year)        # 建索引 / 缓存全年，不算在单次调用里
+    t0 = time.perf_counter()
+    for chart in sample:
+        fn(chart, 'zh', 8, year)
+    return (time.perf_counter() - t0) / len(sample) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description="个人择日表：逐月扫描 vs 位图索引")
+    ap.add_argument('-n', type=int, default=200, help='命盘数')
+    ap.add_argument('--year', type=int, default=annual_2027.ANNUAL_YEAR)
+    ap.add_argument('--check', action='store_true', help='只对比两种实现的输出')
+    a = ap.parse_args()
+    if a.check:
+        sys.exit(0 if check(a.year) else 1)
+
+    t0 = time.perf_counter()
+    almanac.index(a.year)
+    build = (time.perf_counter() - t0) * 1000
+    sample = charts(a.n)
+    scan = _per_call_ms(scan_calendar, sample, a.year)
+    indexed = _per_call_ms(annual_2027.personal_calendar, sample, a.year)
+    print(f"{a.year}, {a.n} charts, zh, 8 days/month (index built once in {build:.2f} ms)\n")
+    print(f"{'implementation':<16}{'ms / call':>11}")
+    print(f"{'scan (before)':<16}{scan:>11.3f}")
+    print(f"{'index (after)':<16}{indexed:>11.3f}")
+    print(f"\n{scan / indexed:.1f}× faster per call")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""tools/bench_digest.py — 末章（forecast）带前 3 章：全文回灌 vs 已确立结论摘要（chapter_digest）。
+
+前 3 章（core / wealth / love）用合成正文：每章 ~8–9k 字符，结论句（日主强弱、喜用、年份、
+行业、婚期）散在大段铺陈里，和真实章节的比例差不多。对每种模式报：
+  - 前文上下文的字符数 / 估算 token，整个 prompt（system + user）的 token；
+  - 结论句保留率（埋进去的结论句有几句原样出现在摘要里 —— 一致性靠的就是这些）；
+  - 摘要本身的耗时（首次抽取 vs 按内容哈希命中缓存）；
+  - 端到端延迟：进程内 app + fake_llm，延迟模型 = 基础耗时 + 每 1k 个 prompt token 的读入耗时。
+
+延迟模型默认按生产实测标定：首章无前文 ~245s，末章带 3 章全文 ~550s
+（DeepSeek high 档，见 app.py 里 REASONING 的注释）—— 也就是 --base 245、
+--prefill ≈ (550−245)/前文 k token。--scale 把等待缩小着跑，表里报的是换算回去的秒数。
+
+    python tools/bench_digest.py
+    python tools/bench_digest.py -n 5 --scale 0.005
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('BAZI_DATA_DIR', tempfile.mkdtemp(prefix='bazi-bench-'))
+os.environ['SINGLEFLIGHT_ENABLED'] = '0'
+os.environ['LLM_CACHE_ENABLED'] = '0'
+
+import bench_endpoints                           # noqa: E402
+
+CHARS_PER_TOKEN = 3
+
+FACTS = {
+    'core': [
+        "Your Day Master is Yang Fire and it is clearly weak in this chart, so the whole reading leans on support rather than on output.",
+        "The favourable elements are Wood and Fire, while Water is the unfavourable element that drains you most.",
+        "Metal is the secondary unfavourable element, pulling resources away whenever it appears in a Luck Pillar.",
+        "The key turning point of the chart is the Luck Pillar beginning in 2027, when support finally arrives.",
+        "The decade from age 38 to 47 is the peak of your personal authority and visibility.",
+    ],
+    'wealth': [
+        "The industries that suit you best are education, publishing, design and anything built on Wood-type growth.",
+        "Careers in logistics, shipping or finance trading sit on Water and are better avoided as a main profession.",
+        "2026 is the best year to change roles, because the annual Fire reinforces your weak Day Master.",
+        "Avoid large speculative investments in 2029, a Water year that clashes with your month branch.",
+        "A second income stream tied to teaching or consulting is ideal after age 40.",
+    ],
+    'love': [
+        "Your marriage palace is stable, and the spouse star appears as a supportive Wood element.",
+        "The strongest marriage window falls in 2026 and 2028, when the peach blossom star is activated.",
+        "A partner born in a Fire or Wood year is the most harmonious match for your chart.",
+        "Be careful with commitments in 2029, because the clash on the spouse palace tends to bring misunderstandings.",
+    ],
+}
+
+FILLER = [
+    "To understand why this matters, it helps to picture the chart as a landscape rather than a list of symbols. "
+    "Each pillar describes a season of life, and the way those seasons lean on one another tells us far more than any single star. "
+    "When we read slowly, patterns emerge that a quick glance would miss.",
+    "Many people in your position describe a feeling of carrying more than others can see. "
+    "That sense is not imagined; it reflects the way your energy is spread across several demanding areas at once. "
+    "Recognising this is the first step toward organising it.",
+    "In daily life this shows up in small choices: the way you plan a week, the conversations you postpone, "
+    "the projects you start with enthusiasm and then quietly set aside. None of these are flaws. "
+    "They are signals about where your attention naturally wants to go.",
+    "The classical texts describe this configuration with a vivid image of a lantern in the wind. "
+    "The flame is real and bright, yet it depends on shelter to keep burning evenly. "
+    "Much of the practical advice in this reading is about building that shelter.",
+]
+
+
+def synthetic_chapter(section, target_chars=8500):
+    """结论句均匀散在铺陈段落之间，凑到 target_chars。"""
+    facts = FACTS[section]
+    parts, i = [f"## {section.title()} Reading", ""], 0
+    while sum(len(p) for p in parts) < target_chars:
+        parts.append(f"### {i + 1}. Theme")
+        parts.append(" ".join(FILLER[(i + k) % len(FILLER)] for k in range(3)))
+        if i < len(facts):
+            parts.append(facts[i])
+        parts.append("")
+        i += 1
+    return "\n\n".join(parts)
+
+
+def previous_chapters():
+    return [{'type': sec, 'content': synthetic_chapter(sec)} for sec in ('core', 'wealth', 'love')]
+
+
+def context_rows(app):
+    """各模式的前文上下文大小、结论句保留率、摘要耗时。"""
+    import chapter_digest
+    chapters = previous_chapters()
+    full_chars = sum(len(c['content']) for c in chapters)
+    facts = [f for sec in FACTS.values() for f in sec]
+    rows = []
+    for mode in ('full', 'digest'):
+        with contextlib.redirect_stdout(io.StringIO()):
+            chapter_digest._cache.clear()
+            t0 = time.perf_counter()
+            ctx = app.format_previous_chapters_context(chapters, mode)
+            cold = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            for _ in range(20):
+                app.format_previous_chapters_context(chapters, mode)
+            warm = (time.perf_counter() - t0) / 20
+        kept = sum(1 for f in facts if f in ctx)
+        rows.append({'mode': mode, 'chapters_chars': full_chars, 'context_chars': len(ctx),
+                     'context_tokens': len(ctx) // CHARS_PER_TOKEN, 'facts_kept': kept,
+                     'facts_total': len(facts), 'build_cold_ms': cold * 1000,
+                     'build_warm_ms': warm * 1000})
+    return rows
+
+
+def latency_rows(base_url, fake, n, scale):
+    """每种模式 n 个末章请求（客户名不同，不命中任何缓存），记 prompt 大小和换算后的延迟。"""
+    import requests
+    prompts = []
+    orig = fake.answer
+
+    def answer(provider, body, query=None, headers=None):
+        status, out = orig(provider, body, query, headers)
+        if status == 200:
+            prompts.append(out['prompt'])
+        return status, out
+    fake.answer = answer
+
+    rows = []
+    for mode in ('full', 'digest'):
+        lat, sizes = [], []
+        for i in range(n):
+            payload = bench_endpoints._personal(i, 'forecast', f'Digest-{mode}-{i:03d}')
+            payload['previous_chapters'] = previous_chapters()
+            payload['previous_chapters_mode'] = mode
+            del prompts[:]
+            t0 = time.time()
+            r = requests.post(base_url + '/api/generate-section', json=payload, timeout=600)
+            if r.status_code != 200:
+                raise SystemExit(f"{mode}: HTTP {r.status_code} {r.text[:200]}")
+            lat.append((time.time() - t0) / scale)
+            sizes.append(max(prompts) if prompts else 0)
+        lat.sort()
+        rows.append({'mode': mode, 'prompt_tokens': sum(sizes) // len(sizes) // CHARS_PER_TOKEN,
+                     'latency_p50': lat[len(lat) // 2], 'latency_max': lat[-1]})
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description="末章前文：全文回灌 vs 结论摘要")
+    ap.add_argument('-n', type=int, default=3, help='每种模式的端到端请求数')
+    ap.add_argument('--base', type=float, default=245.0, help='无前文时单章耗时（秒，未缩放）')
+    ap.add_argument('--prefill', type=float, default=32.0,
+                    help='每 1k 个未命中缓存的 prompt token 的读入耗时（秒，未缩放）')
+    ap.add_argument('--scale', type=float, default=0.002, help='等待缩放系数')
+    ap.add_argument('--provider', default='deepseek', choices=['gemini', 'deepseek'])
+    a = ap.parse_args()
+
+    a.latency, a.chars, a.reasoning = str(a.base), 'fixed:6000', 'fixed:1000'
+    a.truncate_rate = a.empty_rate = a.error_rate = 0.0
+    a.replay, a.seed = None, 0
+    with contextlib.redirect_stderr(io.StringIO()):
+        base_url, fake = bench_endpoints.start_local(a)
+    import app
+
+    ctx = context_rows(app)
+    with contextlib.redirect_stdout(io.StringIO()):
+        lat = latency_rows(base_url, fake, a.n, a.scale)
+
+    print(f"previous chapters: 3 × ~{ctx[0]['chapters_chars'] // 3} chars; "
+          f"latency model: {a.base:.0f}s + {a.prefill:.0f}s per 1k prompt tokens "
+          f"(run at scale {a.scale})\n")
+    print(f"{'mode':<8}{'context chars':>14}{'context tok':>13}{'facts kept':>12}"
+          f"{'build ms (cold/warm)':>22}{'prompt tok':>12}{'latency p50 s':>15}{'max s':>8}")
+    for c, l in zip(ctx, lat):
+        print(f"{c['mode']:<8}{c['context_chars']:>14}{c['context_tokens']:>13}"
+              f"{c['facts_kept']:>7}/{c['facts_total']:<4}"
+              f"{c['build_cold_ms']:>12.2f} / {c['build_warm_ms']:<7.3f}"
+              f"{l['prompt_tokens']:>12}{l['latency_p50']:>15.0f}{l['latency_max']:>8.0f}")
+    full, dig = lat
+    print(f"\nprompt tokens −{1 - dig['prompt_tokens'] / full['prompt_tokens']:.0%}, "
+          f"final-chapter latency −{1 - dig['latency_p50'] / full['latency_p50']:.0%}")
+
+
+if __name__ == '__main__':
+    main()
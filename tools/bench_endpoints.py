@@ -0,0 +1,387 @@
+# -*- coding: utf-8 -*-
+"""tools/bench_endpoints.py — 端到端压测：每个产品的章节端点 + finalize，报吞吐和延迟分位。
+
+默认自带全套环境：进程内起 tools/fake_llm.py 的假供应商和 app（werkzeug 多线程），
+数据目录用临时目录，不碰真实上游、不花钱。也可以 --base-url 指向已经在跑的服务
+（例如 gunicorn + fake_llm，测 worker 级别的数字）。
+
+每个请求记：
+  - 端到端延迟（客户端看到的）
+  - 服务端开销：响应头 Server-Timing 里的 app（= 总耗时 − upstream − queue − flight），
+    即 Flask 层自己花的时间，不含等上游 / 限流排队 / 在途合并；upstream、queue 另列
+    （llm_limiter 的令牌桶默认每分钟 60 次，压得猛了 queue 一栏会涨，这是限流在干活）
+报表按端点给：请求数、失败数、吞吐（req/s）、延迟 p50/p95/p99、服务端开销 p50/p95/p99。
+
+默认每个请求换一个客户名（Bench-0001 …），prompt 各不相同，走的是真实的上游路径；
+--same-payload 让同一端点的请求一模一样，测应答缓存 / 在途合并的路径。
+
+用法：
+    python tools/bench_endpoints.py                                  # 全部端点，各 20 个请求，并发 8
+    python tools/bench_endpoints.py --endpoints personal,ziwei -n 50 -c 16 --latency lognormal:2,0.5
+    python tools/bench_endpoints.py --provider deepseek --truncate-rate 0.1
+    python tools/bench_endpoints.py --base-url http://127.0.0.1:5000 --json > bench.json
+    python tools/bench_endpoints.py --check     # 对冲 / SSE 路径上的截断续写
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+GAN_ELEMENT = {'甲': 'Wood', '乙': 'Wood', '丙': 'Fire', '丁': 'Fire', '戊': 'Earth',
+               '己': 'Earth', '庚': 'Metal', '辛': 'Metal', '壬': 'Water', '癸': 'Water'}
+WUXING_KEY = {'金': 'metal', '木': 'wood', '水': 'water', '火': 'fire', '土': 'earth'}
+
+_TIMING_RE = re.compile(r"(\w+);dur=([\d.]+)")
+
+
+# ---------------------------------------------------------------- 样例请求
+
+def sample_bazi(name, gender='female', ymdhm=(1990, 5, 15, 14, 30)):
+    """用 lunar-python 现算一张真盘，字段与 worker 发来的 bazi_data 同形。"""
+    from lunar_python import Solar
+    lunar = Solar.fromYmdHms(*ymdhm, 0).getLunar()
+    ec = lunar.getEightChar()
+    pillars, counts = {}, dict.fromkeys(WUXING_KEY.values(), 0)
+    for key, cap in (('year', 'Year'), ('month', 'Month'), ('day', 'Day'), ('hour', 'Time')):
+        g = lambda attr: getattr(ec, f'get{cap}{attr}')()
+        wx = g('WuXing')
+        for ch in wx:
+            counts[WUXING_KEY[ch]] += 1
+        pillars[key] = {
+            'ganZhi': g('Gan') + g('Zhi'), 'gan': g('Gan'), 'zhi': g('Zhi'),
+            'wuXing': wx, 'naYin': g('NaYin'),
+            'shiShenGan': '日主' if key == 'day' else g('ShiShenGan'),
+            'shiShenZhi': ','.join(g('ShiShenZhi')), 'diShi': g('DiShi'),
+            'xunKong': g('XunKong'), 'hideGan': ','.join(g('HideGan')),
+        }
+    yun = ec.getYun(0 if gender == 'female' else 1)
+    this_year = time.localtime().tm_year
+    dayun = []
+    for i, d in enumerate(yun.getDaYun()[1:11], 1):
+        dayun.append({'index': i, 'ganZhi': d.getGanZhi(), 'startAge': d.getStartAge(),
+                      'endAge': d.getEndAge(), 'startYear': d.getStartYear(),
+                      'endYear': d.getEndYear(),
+                      'isCurrent': d.getStartYear() <= this_year <= d.getEndYear()})
+    dm = ec.getDayGan()
+    return {
+        'name': name, 'gender': gender,
+        'birthInfo': {'location': 'Singapore', 'longitude': 103.85, 'timezone': 8,
+                      'solarTime': '%04d-%02d-%02d %02d:%02d' % ymdhm},
+        'dayMaster': dm, 'dayMasterElement': GAN_ELEMENT[dm],
+        'dayMasterYinYang': 'Yang' if '甲丙戊庚壬'.find(dm) >= 0 else 'Yin',
+        'dayMasterFull': f'{dm} {GAN_ELEMENT[dm]}', 'dayMasterStrength': 'strong',
+        'favorableElements': ['water', 'wood'], 'unfavorableElements': ['metal', 'earth'],
+        'pillars': pillars, 'fiveElements': counts,
+        'specialPalaces': {'taiYuan': ec.getTaiYuan(), 'mingGong': ec.getMingGong(),
+                           'shenGong': ec.getShenGong()},
+        'zodiac': {'year': lunar.getYearShengXiao()},
+        'yunInfo': {'startAge': yun.getStartYear(), 'startYear': ymdhm[0] + yun.getStartYear(),
+                    'description': 'forward' if yun.isForward() else 'backward'},
+        'allDayun': dayun,
+        'currentDayun': next((d for d in dayun if d['isCurrent']), {}),
+        'currentLiuNian': {'year': this_year},
+        'shenSha': {'jiShen': '天乙贵人', 'xiongSha': '羊刃'},
+    }
+
+
+SAMPLE_CAST = {
+    'cast_code': '777787', 'was_thrown_for_them': True,
+    'primary': {'number': 1, 'name': '乾', 'english_name': 'The Creative',
+                'trigrams': {
+                    'composition': 'Heaven over Heaven',
+                    'upper': {'name': 'Qian', 'symbol': '☰', 'image': 'Heaven',
+                              'attribute': 'strong', 'family': 'father'},
+                    'lower': {'name': 'Qian', 'symbol': '☰', 'image': 'Heaven',
+                              'attribute': 'strong', 'family': 'father'}},
+                'judgement': 'The Creative works sublime success.',
+                'image': 'The movement of heaven is full of power.'},
+    'changing_lines': [5],
+    'changing_line_texts': [{'line': 'Nine in the fifth place',
+                             'text': 'Flying dragon in the heavens.',
+                             'position': {'yang': True, 'place': 5,
+                                          'note': 'correct, centred'}}],
+    'transformed': {'number': 14, 'name': '大有', 'english_name': 'Possession in Great Measure'},
+    'rule': {'en': 'One moving line: read that line.'},
+    'governing_texts': [{'source': 'Line', 'hexagram': 'The Creative', 'line': 5,
+                         'text': 'Flying dragon in the heavens.'}],
+}
+
+SAMPLE_SCORES = {'total': 78, 'level': {'name': 'Good Match'},
+                 'breakdown': {k: {'score': 15, 'maxScore': 20, 'description': 'sample'}
+                               for k in ('dayMaster', 'zodiac', 'elements', 'spouse',
+                                         'branches', 'dayun')}}
+
+SAMPLE_REPORT = "\n\n".join(f"## Chapter {i}\n\n" + "A sample chapter paragraph. " * 80
+                            for i in range(1, 6))
+
+
+def _personal(i, sec, name):
+    return {'bazi_data': sample_bazi(name), 'section_type': sec, 'language': 'en',
+            'mode': 'gentle'}
+
+
+def _marriage(i, sec, name):
+    return {'bazi_a': sample_bazi(name, 'female'),
+            'bazi_b': sample_bazi(name + ' Partner', 'male', (1988, 11, 2, 8, 15)),
+            'scores': SAMPLE_SCORES, 'section_type': sec, 'language': 'en', 'mode': 'gentle'}
+
+
+def _iching(i, sec, name):
+    return {'cast': SAMPLE_CAST, 'question': f'{name}: should I take the new job?',
+            'section_type': sec, 'language': 'en', 'client_name': name}
+
+
+def _ziwei(i, sec, name):
+    # 紫微的 prompt 只由命盘决定，换客户名不会换 prompt：用出生分钟区分请求
+    return {'birth': {'date': '1990-05-15', 'time': '14:%02d' % (i % 60), 'longitude': 103.85,
+                      'gender': 'female', 'place': name, 'timezone': 'Asia/Singapore'},
+            'section_type': sec, 'language': 'en'}
+
+
+def _finalize(i, sec, name):
+    return {'full_report': SAMPLE_REPORT, 'bazi_data': sample_bazi(name), 'language': 'en'}
+
+
+def _finalize_marriage(i, sec, name):
+    return dict(_marriage(i, sec, name), full_report=SAMPLE_REPORT)
+
+
+# 名字 -> (路径, 轮流使用的 section_type, 请求体构造)
+WORKLOADS = {
+    'personal': ('/api/generate-section', ['core', 'wealth', 'love', 'forecast'], _personal),
+    'marriage': ('/api/generate-marriage-section',
+                 ['overview', 'compatibility', 'communication', 'wealth_career',
+                  'love_marriage', 'forecast'], _marriage),
+    'annual': ('/api/generate-annual-section',
+               ['overview', 'career_wealth', 'love_family', 'health_wellness', 'monthly',
+                'cheatsheet'], _personal),
+    'fengshui': ('/api/generate-fengshui-section',
+                 ['constitution', 'directions', 'rooms', 'wearable', 'annual', 'cheatsheet'],
+                 _personal),
+    'iching': ('/api/generate-iching-section',
+               ['standing', 'line', 'turn', 'conduct', 'oneline'], _iching),
+    'ziwei': ('/api/generate-ziwei-section', ['verdict', 'A', 'B', 'C', 'D', 'E'], _ziwei),
+    'finalize': ('/api/finalize-report', [None], _finalize),
+    'finalize-marriage': ('/api/finalize-marriage-report', [None], _finalize_marriage),
+}
+
+
+# ---------------------------------------------------------------- 压测
+
+def _quantile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def server_timing(header):
+    return {k: float(v) / 1000 for k, v in _TIMING_RE.findall(header or "")}
+
+
+_local = threading.local()
+
+
+def _post(url, payload, timeout):
+    s = getattr(_local, 'session', None)
+    if s is None:
+        s = _local.session = requests.Session()
+    t0 = time.time()
+    try:
+        r = s.post(url, json=payload, timeout=timeout)
+        status, timing = r.status_code, server_timing(r.headers.get('Server-Timing'))
+    except requests.RequestException as e:
+        status, timing = type(e).__name__, {}
+    return {'status': status, 'latency': time.time() - t0, 'timing': timing}
+
+
+def run_workload(base_url, name, n, concurrency, same_payload=False, timeout=1800):
+    path, sections, build = WORKLOADS[name]
+    jobs = []
+    for i in range(n):
+        sec = sections[i % len(sections)]
+        payload = build(0 if same_payload else i, sec,
+                        'Bench' if same_payload else 'Bench-%04d' % i)
+        if sec is not None:
+            payload['section_type'] = sec
+        jobs.append(payload)
+    t0 = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda p: _post(base_url + path, p, timeout), jobs))
+    return summarize(name, results, time.time() - t0)
+
+
+def summarize(name, results, wall):
+    ok = [r for r in results if r['status'] == 200]
+    errors = {}
+    for r in results:
+        if r['status'] != 200:
+            errors[str(r['status'])] = errors.get(str(r['status']), 0) + 1
+    lat = [r['latency'] for r in ok]
+    app_ = [r['timing']['app'] for r in ok if 'app' in r['timing']]
+    upstream = [r['timing'].get('upstream', 0.0) for r in ok if r['timing']]
+    queue = [r['timing'].get('queue', 0.0) for r in ok if r['timing']]
+    out = {'endpoint': name, 'requests': len(results), 'ok': len(ok), 'errors': errors,
+           'wall_s': round(wall, 2),
+           'throughput_rps': round(len(ok) / wall, 3) if wall else None}
+    for label, values, digits in (('latency', lat, 3), ('server_overhead', app_, 4),
+                                  ('upstream', upstream, 3), ('queue', queue, 3)):
+        for pct in (50, 95, 99):
+            q = _quantile(values, pct)
+            out[f'{label}_p{pct}'] = round(q, digits) if q is not None else None
+    return out
+
+
+def print_table(rows):
+    print()
+    print(f"{'endpoint':<18}{'n':>5}{'ok':>5}{'req/s':>8}"
+          f"{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}"
+          f"{'app p50 ms':>12}{'app p95 ms':>12}{'app p99 ms':>12}"
+          f"{'upstream p50':>14}{'queue p50':>11}  errors")
+    fmt = lambda v, k=1: '-' if v is None else f'{v * k:.1f}' if k != 1 else f'{v:.2f}'
+    for r in rows:
+        print(f"{r['endpoint']:<18}{r['requests']:>5}{r['ok']:>5}"
+              f"{fmt(r['throughput_rps']):>8}"
+              f"{fmt(r['latency_p50']):>9}{fmt(r['latency_p95']):>9}{fmt(r['latency_p99']):>9}"
+              f"{fmt(r['server_overhead_p50'], 1000):>12}{fmt(r['server_overhead_p95'], 1000):>12}"
+              f"{fmt(r['server_overhead_p99'], 1000):>12}"
+              f"{fmt(r['upstream_p50']):>14}{fmt(r['queue_p50']):>11}  {r['errors'] or ''}")
+
+
+def start_local(a):
+    """进程内起 fake_llm + app。环境变量必须在 import app 之前设好（配置都是 import 时读的）。"""
+    import fake_llm
+    fake = fake_llm.FakeLLM(latency=a.latency, chars=a.chars, reasoning=a.reasoning,
+                            truncate_rate=a.truncate_rate, empty_rate=a.empty_rate,
+                            error_rate=a.error_rate, scale=a.scale, replay=a.replay,
+                            seed=a.seed, prefill=getattr(a, 'prefill', 0.0))
+    fake_server = fake_llm.serve(fake)
+    fake_base = "http://%s:%d" % fake_server.server_address
+    os.environ.update({
+        'DEEPSEEK_URL': f'{fake_base}/chat/completions',
+        'GEMINI_BASE_URL': f'{fake_base}/v1beta',
+        'DEEPSEEK_API_KEY': 'bench', 'GOOGLE_GEMINI_API_KEY': 'bench',
+        'REPORT_LLM_PROVIDER': a.provider,
+    })
+    os.environ.setdefault('BAZI_DATA_DIR', tempfile.mkdtemp(prefix='bazi-bench-'))
+    sys.path.insert(0, ROOT)
+    from werkzeug.serving import make_server
+    import app as app_module
+    server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Bench: app on http://127.0.0.1:{server.server_port}, fake LLM on {fake_base}, "
+          f"data dir {os.environ['BAZI_DATA_DIR']}", file=sys.stderr)
+    return f"http://127.0.0.1:{server.server_port}", fake
+
+
+def check():
+    """DeepSeek 主、Gemini 可用（默认就走对冲）、假供应商首轮必截断：
+    章节要靠续写收尾 —— 上游只多一次续写请求，不整章重来，拼出来的正文没有重复段。
+    SSE 出口（不走对冲，直接读 DeepSeek 流）同样要续写成功、发 done 而不是 error。"""
+    import fake_llm
+    a = argparse.Namespace(provider='deepseek', latency='0.05', chars='3000', reasoning='50',
+                           truncate_rate=1.0, empty_rate=0.0, error_rate=0.0, scale=1.0,
+                           replay=None, seed=0)
+    base_url, fake = start_local(a)
+    errs = []
+
+    def expect(cond, what):
+        print(("  ✓ " if cond else "  ✗ ") + what)
+        if not cond:
+            errs.append(what)
+
+    def no_repeat(content):
+        head, _, _ = content.partition("### Continued")
+        return "### Continued" in content and content.count(head[-fake_llm.CONTINUE_ECHO:]) == 1
+
+    payload = _personal(0, 'core', 'Check')
+    r = requests.post(base_url + '/api/generate-section', json=payload, timeout=120)
+    body = r.json()
+    meta = body.get('meta') or {}
+    expect(r.status_code == 200 and 'hedge_policy' in meta, "hedged JSON path: 200")
+    expect(meta.get('continuations') == 1 and no_repeat(body.get('content', '')),
+           "hedged JSON path: one continuation, stitched without the echoed tail")
+    expect(fake.counters.get('deepseek/stream') == 2
+           and fake.counters.get('deepseek/continuation') == 1,
+           f"hedged JSON path: 1 truncated stream + 1 continuation, no regeneration "
+           f"({fake.counters})")
+
+    r = requests.post(base_url + '/api/generate-section', json=dict(payload, fresh=True),
+                      headers={'Accept': 'text/event-stream'}, stream=True, timeout=120)
+    r.encoding = 'utf-8'
+    events, event = [], None
+    for line in r.iter_lines(decode_unicode=True):
+        if line.startswith('event:'):
+            event = line[6:].strip()
+        elif line.startswith('data:'):
+            events.append((event, json.loads(line[5:])))
+    deltas = "".join(d['text'] for e, d in events if e == 'delta')
+    done = [d for e, d in events if e == 'done']
+    expect(bool(done) and done[0]['finish_reason'] == 'stop' and done[0]['continuations'] == 1,
+           f"SSE path: done after one continuation ({[e for e, _ in events if e != 'delta']})")
+    expect(bool(done) and deltas == done[0]['content'] and no_repeat(deltas),
+           "SSE path: streamed deltas equal the stitched chapter")
+    print("check: " + ("ok" if not errs else " / ".join(errs)))
+    return not errs
+
+
+def main():
+    ap = argparse.ArgumentParser(description="端到端压测（默认进程内 app + 假供应商）")
+    ap.add_argument('--base-url', help='压已经在跑的服务；不给则进程内起 app + fake_llm')
+    ap.add_argument('--endpoints', default=','.join(WORKLOADS),
+                    help='逗号分隔：' + ','.join(WORKLOADS))
+    ap.add_argument('-n', '--requests', type=int, default=20, help='每个端点的请求数')
+    ap.add_argument('-c', '--concurrency', type=int, default=8)
+    ap.add_argument('--same-payload', action='store_true', help='同一端点的请求完全相同')
+    ap.add_argument('--timeout', type=float, default=1800)
+    ap.add_argument('--json', action='store_true', help='结果以 JSON 输出到 stdout')
+    g = ap.add_argument_group('进程内模式的假供应商参数（见 fake_llm.py）')
+    g.add_argument('--provider', default='gemini', choices=['gemini', 'deepseek'])
+    g.add_argument('--latency', default='lognormal:0.5,0.5')
+    g.add_argument('--scale', type=float, default=1.0)
+    g.add_argument('--chars', default='uniform:4000,9000')
+    g.add_argument('--reasoning', default='uniform:500,4000')
+    g.add_argument('--truncate-rate', type=float, default=0.0)
+    g.add_argument('--empty-rate', type=float, default=0.0)
+    g.add_argument('--error-rate', type=float, default=0.0)
+    g.add_argument('--replay', metavar='DIR')
+    g.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--check', action='store_true', help='只跑截断续写的校验')
+    a = ap.parse_args()
+    if a.check:
+        sys.exit(0 if check() else 1)
+
+    names = [e.strip() for e in a.endpoints.split(',') if e.strip()]
+    unknown = [e for e in names if e not in WORKLOADS]
+    if unknown:
+        ap.error(f"unknown endpoint(s): {', '.join(unknown)}")
+    base_url, fake = (a.base_url.rstrip('/'), None) if a.base_url else start_local(a)
+
+    rows = []
+    for name in names:
+        print(f"Bench: {name} x{a.requests} (concurrency {a.concurrency}) ...", file=sys.stderr)
+        rows.append(run_workload(base_url, name, a.requests, a.concurrency,
+                                 a.same_payload, a.timeout))
+    report = {'base_url': base_url, 'concurrency': a.concurrency, 'endpoints': rows}
+    if fake is not None:
+        report['fake_llm'] = dict(fake.counters)
+    if a.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_table(rows)
+        if fake is not None:
+            print(f"\nfake LLM calls: {report['fake_llm']}")
+
+
+if __name__ == '__main__':
+    main()
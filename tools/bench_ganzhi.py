@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""tools/bench_ganzhi.py — 干支核心的微基准：改前各模块的字符串实现 vs ganzhi 的整数查表。
+
+改前的实现原样留在这里作对照（legacy_*）：app.py 的 ganzhi_month（TIAN_GAN.index + 五虎遁字典）、
+ziwei 的 nayin_element（逐个试 60 次）、annual_2027 的 ten_god（if 链）和 _branch_relation
+（四张字典 + 刑的集合）。--check 把 ganzhi 的每张表和这些实现、以及 lunar-python 的
+纳音 / 十神 / 藏干表逐项对一遍。
+
+    python tools/bench_ganzhi.py
+    python tools/bench_ganzhi.py -n 200000
+    python tools/bench_ganzhi.py --check
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import ganzhi                       # noqa: E402
+
+TIAN_GAN = ['甲', '乙', '丙', '丁', '戊', '己', '庚', '辛', '壬', '癸']
+DI_ZHI = ['子', '丑', '寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌', '亥']
+WU_HU_DUN = {'甲': '丙', '己': '丙', '乙': '戊', '庚': '戊', '丙': '庚', '辛': '庚',
+             '丁': '壬', '壬': '壬', '戊': '甲', '癸': '甲'}
+NAYIN_PAIRS = ['金', '火', '木', '土', '金', '火', '水', '土', '金', '木',
+               '水', '土', '火', '木', '水'] * 2
+STEM_INFO = {'甲': ('木', True), '乙': ('木', False), '丙': ('火', True), '丁': ('火', False),
+             '戊': ('土', True), '己': ('土', False), '庚': ('金', True), '辛': ('金', False),
+             '壬': ('水', True), '癸': ('水', False)}
+SHENG = {'木': '火', '火': '土', '土': '金', '金': '水', '水': '木'}
+KE = {'木': '土', '土': '水', '水': '火', '火': '金', '金': '木'}
+LIU_CHONG = {'子': '午', '丑': '未', '寅': '申', '卯': '酉', '辰': '戌', '巳': '亥',
+             '午': '子', '未': '丑', '申': '寅', '酉': '卯', '戌': '辰', '亥': '巳'}
+LIU_HE = {'子': '丑', '丑': '子', '寅': '亥', '亥': '寅', '卯': '戌', '戌': '卯',
+          '辰': '酉', '酉': '辰', '巳': '申', '申': '巳', '午': '未', '未': '午'}
+LIU_HAI = {'子': '未', '未': '子', '丑': '午', '午': '丑', '寅': '巳', '巳': '寅',
+           '卯': '辰', '辰': '卯', '申': '亥', '亥': '申', '酉': '戌', '戌': '酉'}
+XING_PAIRS = {('寅', '巳'), ('巳', '申'), ('申', '寅'), ('丑', '戌'), ('戌', '未'), ('未', '丑'),
+              ('子', '卯'), ('卯', '子')}
+ZI_XING = {'辰', '午', '酉', '亥'}
+
+
+def legacy_ganzhi_month(lunar_year, month_idx):
+    offset = lunar_year - 1984
+    first_gan = WU_HU_DUN[TIAN_GAN[offset % 10]]
+    return TIAN_GAN[(TIAN_GAN.index(first_gan) + month_idx) % 10] + DI_ZHI[(2 + month_idx) % 12]
+
+
+def legacy_nayin(gan, zhi):
+    g, z = TIAN_GAN.index(gan), DI_ZHI.index(zhi)
+    for i in range(60):
+        if i % 10 == g and i % 12 == z:
+            return NAYIN_PAIRS[i // 2]
+    raise ValueError(f'{gan}{zhi} 不是有效干支')
+
+
+def legacy_ten_god(day_stem, other_stem):
+    de, dy = STEM_INFO[day_stem]
+    oe, oy = STEM_INFO[other_stem]
+    same_pol = (dy == oy)
+    if oe == de:
+        return '比肩' if same_pol else '劫财'
+    if SHENG[de] == oe:
+        return '食神' if same_pol else '伤官'
+    if KE[de] == oe:
+        return '偏财' if same_pol else '正财'
+    if KE[oe] == de:
+        return '七杀' if same_pol else '正官'
+    return '偏印' if same_pol else '正印'
+
+
+def legacy_relation(a, b):
+    if LIU_CHONG.get(a) == b:
+        return '冲'
+    if LIU_HE.get(a) == b:
+        return '合'
+    if (a, b) in XING_PAIRS or (b, a) in XING_PAIRS or (a == b and a in ZI_XING):
+        return '刑'
+    if LIU_HAI.get(a) == b:
+        return '害'
+    return ''
+
+
+def check():
+    from lunar_python.util import LunarUtil
+    bad = []
+    for y in range(1900, 2101):
+        for m in range(12):
+            if ganzhi.name(ganzhi.month_pillar(ganzhi.year_pillar(y) % 10, m)) != legacy_ganzhi_month(y, m):
+                bad.append(f'month pillar {y}/{m}')
+    for i in range(60):
+        g, z = i % 10, i % 12
+        gz = ganzhi.name(i)
+        if ganzhi.sexagenary(gz) != i or ganzhi.SEXAGENARY[g][z] != i:
+            bad.append(f'sexagenary {gz}')
+        if ganzhi.nayin_element(g, z) != legacy_nayin(gz[0], gz[1]) or \
+                ganzhi.nayin_element(g, z) != LunarUtil.NAYIN[gz][-1]:
+            bad.append(f'nayin {gz}')
+    for d in range(10):
+        for o in range(10):
+            want = legacy_ten_god(ganzhi.GAN[d], ganzhi.GAN[o])
+            if ganzhi.ten_god_name(d, o) != want or LunarUtil.SHI_SHEN[ganzhi.GAN[d] + ganzhi.GAN[o]] != want:
+                bad.append(f'ten god {ganzhi.GAN[d]}{ganzhi.GAN[o]}')
+    for a in range(12):
+        for b in range(12):
+            # 改前只有冲 > 合 > 刑 > 害四种，取第一个成立的
+            first = next((n for bit, n in ganzhi.RELATION_NAMES[:4] if ganzhi.RELATION[a][b] & bit), '')
+            if first.replace('六合', '合') != legacy_relation(ganzhi.ZHI[a], ganzhi.ZHI[b]):
+                bad.append(f'relation {ganzhi.ZHI[a]}{ganzhi.ZHI[b]}')
+        hidden = [ganzhi.GAN[g] for g in ganzhi.HIDDEN_STEMS[a]]
+        if hidden != LunarUtil.ZHI_HIDE_GAN[ganzhi.ZHI[a]]:
+            bad.append(f'hidden stems {ganzhi.ZHI[a]}: {hidden}')
+    for b in bad:
+        print('MISMATCH', b)
+    print('month pillars 1900–2100, 60 nayin, 10×10 ten gods, 12×12 relations, 12 hidden-stem sets: '
+          + ('ok' if not bad else f'{len(bad)} mismatches'))
+    return not bad
+
+
+def _ns(fn, args, n):
+    t0 = time.perf_counter()
+    for _ in range(n // len(args) + 1):
+        for a in args:
+            fn(*a)
+    return (time.perf_counter() - t0) / ((n // len(args) + 1) * len(args)) * 1e9
+
+
+def main():
+    ap = argparse.ArgumentParser(description="干支核心：字符串实现 vs 整数查表")
+    ap.add_argument('-n', type=int, default=100000, help='每项调用次数')
+    ap.add_argument('--check', action='store_true', help='只校验表')
+    a = ap.parse_args()
+    if a.check:
+        sys.exit(0 if check() else 1)
+
+    months = [(y, m) for y in range(2020, 2030) for m in range(12)]
+    pillars = [(ganzhi.name(i)[0], ganzhi.name(i)[1]) for i in range(60)]
+    stems = [(d, o) for d in ganzhi.GAN for o in ganzhi.GAN]
+    branches = [(x, y) for x in ganzhi.ZHI for y in ganzhi.ZHI]
+    rows = [
+        ('month pillar', legacy_ganzhi_month, months,
+         lambda y, m: ganzhi.month_pillar(ganzhi.year_pillar(y) % 10, m), months),
+        ('nayin', legacy_nayin, pillars,
+         lambda i: ganzhi.NAYIN[i], [(i,) for i in range(60)]),
+        ('ten god', legacy_ten_god, stems,
+         lambda d, o: ganzhi.TEN_GOD[d][o], [(d, o) for d in range(10) for o in range(10)]),
+        ('branch relation', legacy_relation, branches,
+         lambda x, y: ganzhi.RELATION[x][y], [(x, y) for x in range(12) for y in range(12)]),
+    ]
+    print(f"{a.n} calls each, ns / call\n")
+    print(f"{'lookup':<18}{'strings':>10}{'ganzhi':>10}{'speed-up':>10}")
+    for label, old, old_args, new, new_args in rows:
+        t_old, t_new = _ns(old, old_args, a.n), _ns(new, new_args, a.n)
+        print(f"{label:<18}{t_old:>10.0f}{t_new:>10.0f}{t_old / t_new:>9.1f}×")
+
+
+if __name__ == '__main__':
+    main()
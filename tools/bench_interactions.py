@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""tools/bench_interactions.py — 地支作用引擎（branch_interactions.scan）的校验和耗时。
+
+--check 对两份改前的实现逐项比：
+  - app.find_key_interactions 改前只找六冲、六合：新事件里的冲 / 六合月份必须和它一模一样
+  - annual_2027._branch_relation 改前的冲 > 合 > 刑 > 害：每个月支 × 每柱，新事件里都要有那一种
+另外把三合 / 三会和一个逐字写出的暴力实现对一遍（命盘随机抽样，流年支随机）。
+
+耗时：24 个流月 × 命盘（prompt 的用法），和十年逐日 × 命盘（批量择日的用法）。
+
+    python tools/bench_interactions.py
+    python tools/bench_interactions.py --check
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import almanac                      # noqa: E402
+import branch_interactions as bi    # noqa: E402
+import ganzhi                       # noqa: E402
+
+ZHI = '子丑寅卯辰巳午未申酉戌亥'
+CHONG_PAIRS = {'子': '午', '午': '子', '丑': '未', '未': '丑', '寅': '申', '申': '寅',
+               '卯': '酉', '酉': '卯', '辰': '戌', '戌': '辰', '巳': '亥', '亥': '巳'}
+LIU_HE = {'子': '丑', '丑': '子', '寅': '亥', '亥': '寅', '卯': '戌', '戌': '卯',
+          '辰': '酉', '酉': '辰', '巳': '申', '申': '巳', '午': '未', '未': '午'}
+LIU_HAI = {'子': '未', '未': '子', '丑': '午', '午': '丑', '寅': '巳', '巳': '寅',
+           '卯': '辰', '辰': '卯', '申': '亥', '亥': '申', '酉': '戌', '戌': '酉'}
+XING_PAIRS = {('寅', '巳'), ('巳', '申'), ('申', '寅'), ('丑', '戌'), ('戌', '未'), ('未', '丑'),
+              ('子', '卯'), ('卯', '子')}
+ZI_XING = {'辰', '午', '酉', '亥'}
+SAN_HE = {'申子辰': '水', '亥卯未': '木', '寅午戌': '火', '巳酉丑': '金'}
+SAN_HUI = {'寅卯辰': '木', '巳午未': '火', '申酉戌': '金', '亥子丑': '水'}
+
+
+def legacy_key_months(zhis, chart):
+    """改前的 find_key_interactions：(冲的月份, 合的月份)。"""
+    chong, he = set(), set()
+    for i, mz in enumerate(zhis):
+        if any(CHONG_PAIRS.get(ub) == mz for ub in chart if ub):
+            chong.add(i)
+        if any(LIU_HE.get(ub) == mz for ub in chart if ub):
+            he.add(i)
+    return chong, he
+
+
+def legacy_relation(a, b):
+    if CHONG_PAIRS.get(a) == b:
+        return '冲'
+    if LIU_HE.get(a) == b:
+        return '六合'
+    if (a, b) in XING_PAIRS or (b, a) in XING_PAIRS or (a == b and a in ZI_XING):
+        return '刑'
+    if LIU_HAI.get(a) == b:
+        return '害'
+    return ''
+
+
+def brute_combos(zhi, chart, flow):
+    """三合 / 三会：月支在局里，其余两支由命主各柱（或加流年支）凑齐。"""
+    out = set()
+    for kind, table in (('三合', SAN_HE), ('三会', SAN_HUI)):
+        for members, element in table.items():
+            if zhi not in members:
+                continue
+            rest = set(members) - {zhi}
+            have = rest & set(chart)
+            if have and (have == rest or (flow and have | {flow} == rest)):
+                out.add((kind, element))
+    return out
+
+
+def check(samples=3000):
+    rng = random.Random(7)
+    bad = 0
+    charts = [tuple(rng.choice(ZHI + ' ').strip() for _ in range(4)) for _ in range(samples)]
+    months = list(ZHI) * 2
+    for chart in charts:
+        ev = bi.scan(months, list(chart))
+        chong, he = legacy_key_months(months, chart)
+        if {e['i'] for e in ev if e['kind'] == '冲'} != chong or \
+                {e['i'] for e in ev if e['kind'] == '六合'} != he:
+            print('key months differ', chart)
+            bad += 1
+        for i, mz in enumerate(months[:12]):
+            kinds = {(e['kind'], p) for e in ev if e['i'] == i for p in e['pillars']}
+            for p, ub in zip(bi.PILLARS, chart):
+                rel = legacy_relation(mz, ub) if ub else ''
+                if rel and (rel, p) not in kinds:
+                    print('relation missing', mz, ub, rel)
+                    bad += 1
+            flow = rng.choice(ZHI)
+            got = {(e['kind'], e['element']) for e in bi.scan([mz], list(chart), [flow])
+                   if e['kind'] in ('三合', '三会')}
+            if got != brute_combos(mz, [b for b in chart if b], flow):
+                print('combination differs', mz, chart, flow, got)
+                bad += 1
+    print(f"{samples} charts × 24 months: " + ("ok" if not bad else f"{bad} mismatches"))
+    return bad == 0
+
+
+def _timed(fn, n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description="地支作用引擎：校验与耗时")
+    ap.add_argument('-n', type=int, default=300, help='命盘数')
+    ap.add_argument('--check', action='store_true', help='只对照改前的实现')
+    a = ap.parse_args()
+    if a.check:
+        sys.exit(0 if check() else 1)
+
+    charts = [list(c) for c in itertools.islice(itertools.product(ZHI, repeat=4), 0, 20736,
+                                                20736 // a.n)][:a.n]
+    months = [ZHI[(i + 10) % 12] for i in range(24)]
+    flows = ['午'] * 4 + ['未'] * 12 + ['申'] * 8
+    days = []
+    for y in range(2027, 2037):
+        days += almanac.year_days(y)
+    day_zhi = [d['zhi'] for d in days]
+    day_flow = [ganzhi.ZHI[ganzhi.year_pillar(y) % 12] for y in range(2027, 2037)
+                for _ in almanac.year_days(y)]
+
+    rows = []
+    for label, seq, flow in (('24 months', months, flows), (f'{len(days)} days', day_zhi, day_flow)):
+        bi.events_at.cache_clear()
+        engine = _timed(lambda: [bi.scan(seq, c, flow) for c in charts], 3) / len(charts)
+        legacy = _timed(lambda: [legacy_key_months(seq, c) for c in charts], 3) / len(charts)
+        events = sum(len(bi.scan(seq, c, flow)) for c in charts) / len(charts)
+        rows.append((label, legacy, engine, events))
+    print(f"{a.n} charts, ms per chart (legacy = 冲/合 only; engine = all eight kinds)\n")
+    print(f"{'timeline':<14}{'legacy':>10}{'engine':>10}{'events':>10}")
+    for label, legacy, engine, events in rows:
+        print(f"{label:<14}{legacy:>10.3f}{engine:>10.3f}{events:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
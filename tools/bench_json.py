@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""tools/bench_json.py — JSON 后端与请求 / 响应压缩：4 章中文报告的 finalize 请求。
+
+请求体 = 4 章中文正文（core / wealth / love / forecast，每章 ~10k 字）+ bazi_data，
+和 worker 在报告写完后 POST 给 /api/finalize-report 的那份差不多；另外拿其中一章
+包成章节应答（{content, meta}）测 jsonify 那一侧。三张表：
+
+  1. 编解码：Flask 默认（stdlib, ensure_ascii）/ stdlib 不转义 / orjson —— 解析和输出
+     的耗时、JSON 字节数；
+  2. 压缩：原文 vs gzip（vs br，装了 brotli 才有）的字节数和耗时；
+  3. 端到端：进程内 test client，ask_ai 打桩（不测 LLM），同一个 finalize 请求
+     改前（Flask 默认 JSON、不压缩）vs 改后（fast_json + gzip 请求体 + gzip 应答）：
+     上下行字节和服务端耗时。
+
+    python tools/bench_json.py
+    python tools/bench_json.py -n 200
+    python tools/bench_json.py --check       # 只做正确性自检
+"""
+import argparse
+import contextlib
+import gzip
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('BAZI_DATA_DIR', tempfile.mkdtemp(prefix='bazi-bench-'))
+os.environ['SINGLEFLIGHT_ENABLED'] = '0'
+os.environ['LLM_CACHE_ENABLED'] = '0'
+
+from flask.json.provider import DefaultJSONProvider     # noqa: E402
+
+import bench_endpoints                                  # noqa: E402
+import fast_json                                        # noqa: E402
+
+SECTIONS = ('core', 'wealth', 'love', 'forecast')
+
+PARAGRAPHS = [
+    "您的日主为丙火，生于辰月，火气不旺，全局偏弱。命局中水势较重，官杀透出，"
+    "给人一种外表从容、内里承压的感觉。这样的格局最需要印星生扶，木火为喜用。",
+    "从大运来看，二〇二七年起转入甲寅运，木来生火，是整个命盘的关键转折点。"
+    "此前十年多有奔波，付出多而回报慢；此后贵人渐多，做事更容易得到认可。",
+    "事业方面，适合教育、出版、设计、文化传播等与木火相关的行业。"
+    "不宜以物流、航运、金融交易等偏水的行业为主业，可作副业或投资，但要控制规模。",
+    "感情方面，夫妻宫安稳，配偶星为木，对您多有扶持。二〇二六年与二〇二八年桃花星动，"
+    "是缘分最集中的年份；二〇二九年逢冲，宜多沟通，少做冲动的决定。",
+    "健康方面，火弱水旺，要留意心血管与睡眠质量。冬季宜早睡，多晒太阳，"
+    "饮食上少寒凉，适当增加温补。情绪低落时，户外活动比独处更有帮助。",
+]
+
+
+# 真实章节很少整句重复；只拿上面几段轮流拼，gzip 会把它压到 3% 以下，数字太好看。
+# 所以一半是打乱的原句，一半是从常用字里随机抽的「句子」：gzip 后约为原文的 27%，偏乐观但不离谱。
+COMMON = ("的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动"
+          "同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二"
+          "理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社"
+          "义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命运财官印食"
+          "伤杀比劫木火土金水甲乙丙丁戊己庚辛壬癸子丑寅卯辰巳午未申酉戌亥喜用忌神格局流年大运")
+
+
+def synthetic_chapter(section, target_chars=10000, seed=0):
+    rng = random.Random(f"{section}-{seed}")
+    sentences = [s + "。" for p in PARAGRAPHS for s in p.split("。") if s]
+    parts, i = [f"## {section}", ""], 0
+    while sum(len(p) for p in parts) < target_chars:
+        parts.append(f"### {i + 1}. 要点")
+        para = []
+        for _ in range(6):
+            if rng.random() < 0.5:
+                para.append(rng.choice(sentences))
+            else:
+                para.append("".join(rng.choice(COMMON) for _ in range(rng.randint(12, 30)))
+                            + rng.choice("，。；"))
+        parts.append("".join(para))
+        i += 1
+    return "\n\n".join(parts)
+
+
+def finalize_payload(name='张小明'):
+    chapters = [synthetic_chapter(s) for s in SECTIONS]
+    bazi = bench_endpoints.sample_bazi(name)
+    return {'full_report': "\n\n---\n\n".join(chapters), 'bazi_data': bazi, 'language': 'zh'}
+
+
+def chapter_response():
+    return {'content': synthetic_chapter('core'), 'section_type': 'core',
+            'meta': {'provider': 'deepseek', 'model': 'deepseek-reasoner', 'cached': False,
+                     'usage': {'prompt_tokens': 18234, 'completion_tokens': 9876},
+                     'prompt': {'tokens': 18234, 'budget': 60000, 'trimmed': {},
+                                'over_budget': False,
+                                'blocks': {'bazi_context': 1800, 'previous_chapters': 0,
+                                           'timeline': 2100, 'base_rules': 6000,
+                                           'task': 8334}}}}
+
+
+def _timeit(fn, n):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1000
+
+
+def _providers(app):
+    out = [('flask default', DefaultJSONProvider(app)),
+           ('stdlib utf-8', fast_json.StdlibJSONProvider(app))]
+    if fast_json.orjson is not None:
+        out.append(('orjson', fast_json.OrjsonProvider(app)))
+    return out
+
+
+def codec_rows(app, payload, response_obj, n):
+    rows = []
+    for name, provider in _providers(app):
+        with app.app_context():
+            body = provider.dumps(payload).encode('utf-8')
+            resp = provider.response(response_obj).get_data()
+            rows.append({'backend': name, 'request_bytes': len(body),
+                         'parse_ms': _timeit(lambda: provider.loads(body), n),
+                         'response_bytes': len(resp),
+                         'jsonify_ms': _timeit(lambda: provider.response(response_obj), n)})
+    return rows
+
+
+def compression_rows(app, payload, n):
+    rows = []
+    for name, provider in _providers(app)[:1] + _providers(app)[-1:]:
+        with app.app_context():
+            raw = provider.dumps(payload).encode('utf-8')
+        codecs = [('identity', lambda d: d),
+                  ('gzip', lambda d: gzip.compress(d, fast_json.COMPRESS_GZIP_LEVEL, mtime=0))]
+        if fast_json.brotli is not None:
+            codecs.append(('br', lambda d: fast_json.brotli.compress(
+                d, quality=fast_json.COMPRESS_BROTLI_QUALITY)))
+        for coding, fn in codecs:
+            ms = _timeit(lambda: fn(raw), max(1, n // 10)) if coding != 'identity' else 0.0
+            rows.append({'json': name, 'coding': coding, 'bytes': len(fn(raw)), 'ms': ms})
+    return rows
+
+
+def _stub_llm(app):
+    def fake(system_prompt, user_prompt, max_tokens=0, fresh=False, tag=None):
+        if 'review' in system_prompt.lower() + user_prompt[:400].lower():
+            text = json.dumps({"status": "PASS", "confidence_score": 92, "summary": "报告结构完整",
+                               "issues_found": [], "recommendation": "可以交付"},
+                              ensure_ascii=False)
+        else:
+            text = "您好，您的八字报告已经完成。" + synthetic_chapter('message', 400)
+        return {"choices": [{"message": {"content": text}}], "meta": {"provider": "stub"}}
+    app.ask_ai = fake
+
+
+def _post(client, payload, mode):
+    body = json.dumps(payload).encode('utf-8')      # 改前：客户端也是 ensure_ascii 的默认 json
+    headers = {'Content-Type': 'application/json'}
+    if mode == 'after':
+        body = gzip.compress(json.dumps(payload, ensure_ascii=False).encode('utf-8'), 6, mtime=0)
+        headers.update({'Content-Encoding': 'gzip', 'Accept-Encoding': 'br, gzip'})
+    t0 = time.perf_counter()
+    r = client.post('/api/finalize-report', data=body, headers=headers)
+    elapsed = time.perf_counter() - t0
+    if r.status_code != 200:
+        raise SystemExit(f"{mode}: HTTP {r.status_code} {r.get_data()[:200]!r}")
+    return len(body), len(r.get_data()), elapsed * 1000, r
+
+
+def end_to_end_rows(app, payload, n):
+    flask_app = app.app
+    client = flask_app.test_client()
+    rows = []
+    for mode in ('before', 'after'):
+        if mode == 'before':
+            flask_app.json = DefaultJSONProvider(flask_app)
+            fast_json.COMPRESS_ENABLED = False
+        else:
+            fast_json.install(flask_app)
+            fast_json.COMPRESS_ENABLED = True
+        with contextlib.redirect_stdout(io.StringIO()):
+            up, down, _, _ = _post(client, payload, mode)
+            times = sorted(_post(client, payload, mode)[2] for _ in range(n))
+        rows.append({'mode': mode, 'up_bytes': up, 'down_bytes': down,
+                     'p50_ms': times[len(times) // 2], 'p90_ms': times[int(len(times) * 0.9)]})
+    return rows
+
+
+def check(app, payload):
+    """正确性：各后端解析结果一致；gzip 请求体端到端还原；压缩应答能解回同一份 JSON；炸弹 413。"""
+    flask_app = app.app
+    with flask_app.app_context():
+        decoded = [p.loads(p.dumps(payload)) for _, p in _providers(flask_app)]
+    assert all(d == payload for d in decoded), "backends disagree"
+    fast_json.install(flask_app)
+    fast_json.COMPRESS_ENABLED = True
+    client = flask_app.test_client()
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, _, _, plain = _post(client, payload, 'before')
+        _, _, _, packed = _post(client, payload, 'after')
+    assert plain.headers.get('Content-Encoding') is None or plain.headers['Content-Encoding'] == ''
+    coding = packed.headers.get('Content-Encoding')
+    body = packed.get_data()
+    if coding == 'gzip':
+        body = gzip.decompress(body)
+    elif coding == 'br':
+        body = fast_json.brotli.decompress(body)
+    assert json.loads(body) == json.loads(plain.get_data()), "compressed response differs"
+    assert 'Accept-Encoding' in packed.headers.get('Vary', '')
+    bomb = gzip.compress(b'{"full_report": "' + b'0' * int(fast_json.MAX_REQUEST_MB * 1024 * 1024)
+                         + b'"}', 9, mtime=0)
+    r = client.post('/api/finalize-report', data=bomb,
+                    headers={'Content-Type': 'application/json', 'Content-Encoding': 'gzip'})
+    assert r.status_code == 413, r.status_code
+    r = client.post('/api/finalize-report', data=b'not gzip',
+                    headers={'Content-Type': 'application/json', 'Content-Encoding': 'gzip'})
+    assert r.status_code == 400, r.status_code
+    print(f"ok: backends agree ({len(decoded)}), gzip request decoded, "
+          f"{coding} response round-trips, bomb -> 413, garbage -> 400")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="JSON 后端 + 压缩：4 章 finalize 请求")
+    ap.add_argument('-n', type=int, default=100, help='每项计时的重复次数')
+    ap.add_argument('--check', action='store_true', help='只做正确性自检')
+    a = ap.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+    _stub_llm(app)
+    payload = finalize_payload()
+
+    if a.check:
+        check(app, payload)
+        return
+
+    print(f"finalize payload: 4 chapters, {len(payload['full_report'])} chars of report; "
+          f"orjson {'yes' if fast_json.orjson else 'no'}, "
+          f"brotli {'yes' if fast_json.brotli else 'no'}\n")
+
+    print(f"{'backend':<15}{'request B':>11}{'parse ms':>10}{'response B':>12}{'jsonify ms':>12}")
+    for r in codec_rows(app.app, payload, chapter_response(), a.n):
+        print(f"{r['backend']:<15}{r['request_bytes']:>11}{r['parse_ms']:>10.3f}"
+              f"{r['response_bytes']:>12}{r['jsonify_ms']:>12.3f}")
+
+    print(f"\n{'request JSON':<15}{'coding':<10}{'bytes':>9}{'encode ms':>11}")
+    for r in compression_rows(app.app, payload, a.n):
+        print(f"{r['json']:<15}{r['coding']:<10}{r['bytes']:>9}{r['ms']:>11.3f}")
+
+    print(f"\n{'finalize':<9}{'up B':>9}{'down B':>9}{'server p50 ms':>15}{'p90 ms':>9}")
+    rows = end_to_end_rows(app, payload, a.n)
+    for r in rows:
+        print(f"{r['mode']:<9}{r['up_bytes']:>9}{r['down_bytes']:>9}{r['p50_ms']:>15.2f}"
+              f"{r['p90_ms']:>9.2f}")
+    before, after = rows
+    print(f"\nupload −{1 - after['up_bytes'] / before['up_bytes']:.0%}, "
+          f"download −{1 - after['down_bytes'] / before['down_bytes']:.0%}, "
+          f"server time {after['p50_ms'] - before['p50_ms']:+.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
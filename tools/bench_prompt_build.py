@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""tools/bench_prompt_build.py — system prompt 编译缓存（prompt_templates）前后的构建开销对比。
+
+两层：
+  1. system prompt 本身：每次现拼（被装饰函数的 __wrapped__，即改动前的做法）vs 缓存命中。
+  2. 整个章节请求（Flask test client，ask_ai 换成桩，不打上游）：每次清空模板缓存（冷）vs 热。
+每项报 每次耗时（µs）和 每次分配峰值（tracemalloc，KiB）。
+
+    python tools/bench_prompt_build.py            # 默认各 2000 / 200 次
+    python tools/bench_prompt_build.py -n 5000 --requests 500
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('BAZI_DATA_DIR', tempfile.mkdtemp(prefix='bazi-bench-'))
+os.environ['SINGLEFLIGHT_ENABLED'] = '0'       # 同一请求反复打，别被合并掉
+
+import app                                     # noqa: E402
+import prompt_templates                        # noqa: E402
+from bench_endpoints import _marriage, _personal   # noqa: E402
+
+COMBOS = [(lang, mode, gender) for lang in ('en', 'zh', 'de')
+          for mode in ('gentle', 'authentic') for gender in ('male', 'female', 'non-binary')]
+
+
+def measure(fn, n):
+    """(每次 µs, 每次分配峰值 KiB)。计时和 tracemalloc 分两轮跑，免得追踪拖慢计时。"""
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    per_call = (time.perf_counter() - t0) / n * 1e6
+    tracemalloc.start()
+    peaks = []
+    for _ in range(min(n, 200)):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn()
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    return per_call, sum(peaks) / len(peaks) / 1024
+
+
+def _cycle(builders):
+    it = [0]
+
+    def call():
+        f = builders[it[0] % len(builders)]
+        it[0] += 1
+        return f()
+    return call
+
+
+def system_prompts(n):
+    personal = [lambda c=c, s=s: app._personal_system_prompt(s, c[0], None, c[1], c[2])
+                for c in COMBOS for s in ('core', 'forecast')]
+    personal_raw = [lambda c=c, s=s: app._personal_system_prompt.__wrapped__(s, c[0], None, c[1], c[2])
+                    for c in COMBOS for s in ('core', 'forecast')]
+    marriage = [lambda c=c: app._marriage_system_prompt(c[0], None, c[1], c[2], 'male')
+                for c in COMBOS]
+    marriage_raw = [lambda c=c: app._marriage_system_prompt.__wrapped__(c[0], None, c[1], c[2], 'male')
+                    for c in COMBOS]
+    return [('personal system prompt', measure(_cycle(personal_raw), n), measure(_cycle(personal), n)),
+            ('marriage system prompt', measure(_cycle(marriage_raw), n), measure(_cycle(marriage), n))]
+
+
+def whole_requests(n):
+    app.ask_ai = lambda *a, **kw: {"choices": [{"message": {"content": "x"}}]}
+    client = app.app.test_client()
+    rows = []
+    for label, path, build in (('personal request (core)', '/api/generate-section',
+                                lambda: _personal(0, 'core', 'Bench')),
+                               ('marriage request (overview)', '/api/generate-marriage-section',
+                                lambda: _marriage(0, 'overview', 'Bench'))):
+        payload = build()
+
+        def cold():
+            prompt_templates.clear()
+            client.post(path, json=payload)
+
+        def warm():
+            client.post(path, json=payload)
+        rows.append((label, measure(cold, n), measure(warm, n)))
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description="system prompt 编译缓存前后的构建开销")
+    ap.add_argument('-n', type=int, default=2000, help='system prompt 构建次数')
+    ap.add_argument('--requests', type=int, default=200, help='整请求次数')
+    a = ap.parse_args()
+    import contextlib, io
+    with contextlib.redirect_stdout(io.StringIO()):     # 端点的 print 太多，压掉
+        rows = system_prompts(a.n) + whole_requests(a.requests)
+    print(f"{'':<30}{'before µs':>11}{'after µs':>11}{'speedup':>9}"
+          f"{'before KiB':>12}{'after KiB':>11}")
+    for label, (t_before, m_before), (t_after, m_after) in rows:
+        print(f"{label:<30}{t_before:>11.1f}{t_after:>11.1f}{t_before / t_after:>8.1f}x"
+              f"{m_before:>12.1f}{m_after:>11.1f}")
+    print(f"\nprompt_templates: {prompt_templates.stats()['templates']}")
+
+
+if __name__ == '__main__':
+    main()
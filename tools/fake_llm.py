@@ -0,0 +1,663 @@
+# -*- coding: utf-8 -*-
+"""tools/fake_llm.py — 本地假 LLM 供应商：合成 / 录制 / 回放，压测 Flask 层不花钱。
+
+同一个端口同时说两种协议（app.py 与 ziwei_prompt.py 原样可用，只需改上游地址）：
+
+    DeepSeek  POST …/chat/completions                       （stream / 非 stream，含 usage）
+    Gemini    POST …/models/<model>:generateContent
+              POST …/models/<model>:streamGenerateContent?alt=sse
+              POST …/cachedContents                          （显式缓存，见 gemini_cache）
+
+应答来源（按顺序）：
+  1. --replay DIR：录下来的真实应答。先按请求内容精确匹配；prompt 里有日期等会变的东西
+     匹配不上时，按 (供应商, 是否 JSON 模式) 轮流取一条 —— 长度、思考量都是真的。
+  2. 合成：--chars 个字符的 markdown 正文 + --reasoning 个思考 token。
+--record DIR 时不合成，转发给真实上游（一律用非流式接口），把应答存成 DIR/<provider>.jsonl
+再按客户端要的格式（流 / 非流）吐回去。API key 只转发、不落盘。
+
+故障注入：--error-rate（返回 --error-status）、--truncate-rate（DeepSeek length /
+Gemini MAX_TOKENS，正文只给一半，触发续写）、--empty-rate（正文为空）。
+续写请求（DeepSeek messages 里带 assistant 轮，见 llm_continue）不注入截断，合成的续写
+先把已写部分的末尾重复一段再往下写 —— 和真模型一样，拼接时的去重要能把它吃掉。
+
+延迟：--latency 是整个应答的耗时分布，流式时前 --ttft-share 是首 token 前的思考，
+其余均匀摊到各个 chunk 上。分布写法：`2.5`、`fixed:2.5`、`uniform:1,4`、
+`lognormal:<中位数>,<sigma>`；回放时可用 `recorded`（录制时的真实耗时）。
+--prefill 是每 1k 个未命中缓存的 prompt token 额外加的秒数（长上下文读得慢）。
+--scale 把所有等待按比例缩放（回放 300s 的真实章节时用 0.01 之类）。
+
+上下文缓存也模拟了：同一前缀第二次出现时按 256 字符粒度算命中（DeepSeek
+prompt_cache_hit_tokens / Gemini cachedContentTokenCount），台账、命中率面板能看到数。
+
+用法：
+    python tools/fake_llm.py --port 8999 --latency lognormal:20,0.5 --truncate-rate 0.05
+    DEEPSEEK_URL=http://127.0.0.1:8999/chat/completions \\
+    GEMINI_BASE_URL=http://127.0.0.1:8999/v1beta  gunicorn app:app
+
+    python tools/fake_llm.py --record recordings/           # 指向它跑几单真实报告
+    python tools/fake_llm.py --replay recordings/ --latency recorded --scale 0.05
+    python tools/fake_llm.py --check                        # 自检
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+DEEPSEEK_UPSTREAM = "https://api.deepseek.com/chat/completions"
+GEMINI_UPSTREAM = "https://generativelanguage.googleapis.com/v1beta"
+CHARS_PER_TOKEN = 3          # 中英混排粗估，只用来凑 usage 数字
+CACHE_BLOCK = 256            # 前缀缓存命中粒度（字符）
+STREAM_CHUNK = 200           # 流式每个 chunk 的字符数
+CONTINUE_ECHO = 120          # 合成续写开头重复已写部分末尾的字符数
+
+_GEMINI_RE = re.compile(r"/models/([^/:]+):(generateContent|streamGenerateContent)$")
+
+_PARAGRAPH = (
+    "The Day Master sits in its own season and draws steady support from the month branch, "
+    "so the chart reads as firm rather than brittle. 日主得令，月令有根，格局稳而不僵。 "
+    "Across the coming luck pillars the pressure shifts from the resource star to output, "
+    "which favours building something visible over waiting for recognition. "
+)
+
+
+# ---------------------------------------------------------------- 分布
+
+def parse_dist(spec):
+    """'2.5' / 'fixed:2.5' / 'uniform:a,b' / 'lognormal:median,sigma' / 'recorded'
+    → f(rng, recorded) 返回一个样本（recorded 为回放条目里的真实值，没有时为 None）。"""
+    kind, _, args = str(spec).partition(":")
+    if not args:
+        if kind == "recorded":
+            return lambda rng, recorded: recorded if recorded is not None else 1.0
+        kind, args = "fixed", kind
+    nums = [float(x) for x in args.split(",")]
+    if kind == "fixed":
+        return lambda rng, recorded: nums[0]
+    if kind == "uniform":
+        return lambda rng, recorded: rng.uniform(nums[0], nums[1])
+    if kind == "lognormal":
+        mu = math.log(nums[0])
+        return lambda rng, recorded: rng.lognormvariate(mu, nums[1])
+    raise ValueError(f"unknown distribution: {spec}")
+
+
+def _tokens(text):
+    return max(1, len(text) // CHARS_PER_TOKEN) if text else 0
+
+
+# ---------------------------------------------------------------- 请求归一化
+
+def _deepseek_prompt(body):
+    return "\n\n".join(str(m.get("content") or "") for m in body.get("messages") or [])
+
+
+def _gemini_prompt(body):
+    texts = [p.get("text", "") for p in (body.get("systemInstruction") or {}).get("parts") or []]
+    for c in body.get("contents") or []:
+        texts += [p.get("text", "") for p in c.get("parts") or []]
+    return "\n\n".join(texts)
+
+
+def request_key(provider, body):
+    """回放精确匹配用：只看决定应答内容的字段（prompt、JSON 模式），不看 max_tokens / stream。"""
+    if provider == "deepseek":
+        basis = {"messages": body.get("messages"), "format": body.get("response_format")}
+    else:
+        basis = {"system": body.get("systemInstruction"), "contents": body.get("contents")}
+    raw = json.dumps(basis, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f"{provider}\n{raw}".encode("utf-8")).hexdigest()
+
+
+def _written(provider, body):
+    """续写请求里已写出的部分（messages 里 assistant 轮的内容）；不是续写返回 None。"""
+    if provider != "deepseek":
+        return None
+    for m in body.get("messages") or []:
+        if m.get("role") == "assistant":
+            return str(m.get("content") or "")
+    return None
+
+
+def _json_mode(provider, body):
+    if provider == "deepseek":
+        return (body.get("response_format") or {}).get("type") == "json_object"
+    return (body.get("generationConfig") or {}).get("responseMimeType") == "application/json"
+
+
+# ---------------------------------------------------------------- 假供应商
+
+class FakeLLM:
+    """应答的产生（合成 / 录制 / 回放）与计数；HTTP 协议细节在 _Handler 里。"""
+
+    def __init__(self, latency="1.0", ttft_share=0.3, chars="6000", reasoning="2000",
+                 truncate_rate=0.0, empty_rate=0.0, error_rate=0.0, error_status=503,
+                 scale=1.0, replay=None, record=None, seed=None, prefill=0.0,
+                 deepseek_upstream=DEEPSEEK_UPSTREAM, gemini_upstream=GEMINI_UPSTREAM):
+        self.latency = parse_dist(latency)
+        self.ttft_share = ttft_share
+        self.chars = parse_dist(chars)
+        self.reasoning = parse_dist(reasoning)
+        self.truncate_rate = truncate_rate
+        self.empty_rate = empty_rate
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.scale = scale
+        self.prefill = prefill
+        self.record_dir = record
+        self.deepseek_upstream = deepseek_upstream
+        self.gemini_upstream = gemini_upstream.rstrip("/")
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._prefixes = OrderedDict()      # 前缀块哈希 -> None（LRU）
+        self._cached_contents = {}          # cachedContents 名字 -> 前缀文本
+        self._by_key = {}
+        self._pools = {}                    # (provider, json_mode) -> [条目]
+        self._cursor = {}
+        self.counters = {}
+        if replay:
+            self._load(replay)
+        if record:
+            os.makedirs(record, exist_ok=True)
+
+    # ---- 计数 / 随机数（多线程共用一个 rng，要加锁）
+    def count(self, *path):
+        with self._lock:
+            k = "/".join(path)
+            self.counters[k] = self.counters.get(k, 0) + 1
+
+    def _draw(self, f, recorded=None):
+        with self._lock:
+            return f(self._rng, recorded)
+
+    def _roll(self, rate):
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self._rng.random() < rate
+
+    # ---- 回放
+    def _load(self, directory):
+        n = 0
+        for fn in sorted(os.listdir(directory)):
+            if not fn.endswith(".jsonl"):
+                continue
+            with open(os.path.join(directory, fn), encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    rec = json.loads(line)
+                    self._by_key[rec["key"]] = rec
+                    self._pools.setdefault((rec["provider"], bool(rec.get("json_mode"))),
+                                           []).append(rec)
+                    n += 1
+        print(f"Fake LLM: loaded {n} recorded response(s) from {directory}")
+
+    def _replayed(self, provider, key, json_mode):
+        rec = self._by_key.get(key)
+        if rec is not None:
+            self.count(provider, "replay_exact")
+            return rec
+        pool = self._pools.get((provider, json_mode))
+        if not pool:
+            return None
+        with self._lock:
+            i = self._cursor.get((provider, json_mode), 0)
+            self._cursor[(provider, json_mode)] = i + 1
+        self.count(provider, "replay_nearest")
+        return pool[i % len(pool)]
+
+    # ---- 前缀缓存模拟
+    def _cached_prefix(self, text, skip=0):
+        """text 的前缀里有多少字符以前见过（按 CACHE_BLOCK 对齐），并登记本次的前缀块。"""
+        h = hashlib.sha256()
+        hit, seen = skip, True
+        for end in range(CACHE_BLOCK, len(text) + 1, CACHE_BLOCK):
+            h.update(text[end - CACHE_BLOCK:end].encode("utf-8"))
+            d = h.hexdigest()
+            with self._lock:
+                if seen and d in self._prefixes and end > hit:
+                    hit = end
+                    self._prefixes.move_to_end(d)
+                else:
+                    seen = seen and d in self._prefixes
+                    self._prefixes[d] = None
+                    if len(self._prefixes) > 100000:
+                        self._prefixes.popitem(last=False)
+        return hit
+
+    def create_cache(self, body):
+        prefix = _gemini_prompt(body)
+        with self._lock:
+            name = f"cachedContents/fake-{len(self._cached_contents) + 1}"
+            self._cached_contents[name] = prefix
+        self.count("gemini", "cache_created")
+        return {"name": name, "model": body.get("model"),
+                "usageMetadata": {"totalTokenCount": _tokens(prefix)}}
+
+    # ---- 产生一次应答
+    def answer(self, provider, body, query=None, headers=None):
+        """返回 (status, 应答) —— 应答是归一化的 dict：
+        content / reasoning / finish / prompt / cached（字符数）/ latency / usage（录制的原样 usage，可为 None）；
+        出错时 status != 200，应答是要原样回给客户端的错误 JSON。"""
+        json_mode = _json_mode(provider, body)
+        if provider == "deepseek":
+            prompt = _deepseek_prompt(body)
+            cached = self._cached_prefix(prompt)
+        else:
+            prompt = _gemini_prompt(body)
+            prefix = self._cached_contents.get(body.get("cachedContent") or "", "")
+            cached = self._cached_prefix(prefix + prompt, skip=len(prefix))
+            prompt = prefix + prompt
+        if self.record_dir:
+            return self._record(provider, body, query or {}, headers or {}, prompt, cached,
+                                json_mode)
+        if self._roll(self.error_rate):
+            self.count(provider, "error")
+            return self.error_status, {"error": {"code": self.error_status,
+                                                 "message": "injected failure (fake_llm)"}}
+        rec = self._replayed(provider, request_key(provider, body), json_mode)
+        if rec is not None:
+            out = dict(rec, prompt=len(prompt), cached=cached)
+            out["latency"] = self._draw(self.latency, rec.get("latency"))
+        else:
+            self.count(provider, "synthetic")
+            out = {"content": self._synthetic(json_mode, _written(provider, body)),
+                   "reasoning": int(self._draw(self.reasoning)),
+                   "finish": "stop", "prompt": len(prompt), "cached": cached,
+                   "latency": self._draw(self.latency), "usage": None}
+        if self._roll(self.empty_rate):
+            self.count(provider, "empty")
+            out.update(content="", usage=None)
+        elif _written(provider, body) is not None:
+            self.count(provider, "continuation")
+        elif self._roll(self.truncate_rate):
+            self.count(provider, "truncated")
+            out.update(content=out["content"][:len(out["content"]) // 2], finish="length",
+                       usage=None)
+        out["latency"] += self.prefill * _tokens(prompt[cached:]) / 1000
+        out["latency"] *= self.scale
+        return 200, out
+
+    def _synthetic(self, json_mode, written=None):
+        if written is not None:
+            # 续写：先把已写部分的末尾原样重复一段（模型常这么干），再补一截新内容
+            return written[-CONTINUE_ECHO:] + f"\n\n### Continued\n\n{_PARAGRAPH * 2}"
+        if json_mode:
+            # ziwei 定调（build_verdict）要的键；其它 JSON 调用拿到多余的键也无妨
+            return json.dumps({
+                "dingdiao": "外刚内柔，先立后破", "peak": "43-52岁 官禄限",
+                "peak_evidence": ["化禄入命", "三方会吉", "大限逢禄存"],
+                "secondary": "", "turning": "2031 年换大限"}, ensure_ascii=False)
+        n = int(self._draw(self.chars))
+        parts, i = [], 0
+        while sum(map(len, parts)) < n:
+            i += 1
+            parts.append(f"### {i}. Reading\n\n{_PARAGRAPH * 3}\n\n")
+        return "".join(parts)[:n]
+
+    # ---- 录制：转发真实上游（非流式），存下来
+    def _record(self, provider, body, query, headers, prompt, cached, json_mode):
+        t0 = time.time()
+        if provider == "deepseek":
+            up = dict(body, stream=False)
+            up.pop("stream_options", None)
+            r = requests.post(self.deepseek_upstream, json=up, timeout=1200,
+                              headers={"Authorization": headers.get("Authorization", ""),
+                                       "Content-Type": "application/json"})
+        else:
+            model = query.get("_model", "")
+            key = (query.get("key") or [""])[0]
+            r = requests.post(f"{self.gemini_upstream}/models/{model}:generateContent?key={key}",
+                              json=body, timeout=1200)
+        latency = time.time() - t0
+        try:
+            data = r.json()
+        except ValueError:
+            data = {"error": {"code": r.status_code, "message": r.text[:500]}}
+        if not r.ok:
+            self.count(provider, "record_error")
+            return r.status_code, data
+        if provider == "deepseek":
+            choice = data["choices"][0]
+            msg = choice.get("message") or {}
+            rec = {"content": msg.get("content") or "", "finish": choice.get("finish_reason") or "",
+                   "reasoning": ((data.get("usage") or {}).get("completion_tokens_details")
+                                 or {}).get("reasoning_tokens") or 0}
+        else:
+            cand = (data.get("candidates") or [{}])[0]
+            rec = {"content": "".join(p.get("text", "") for p in (cand.get("content") or {})
+                                      .get("parts") or [] if not p.get("thought")),
+                   "finish": "stop" if cand.get("finishReason") == "STOP" else "length",
+                   "reasoning": (data.get("usageMetadata") or {}).get("thoughtsTokenCount") or 0}
+        rec.update(key=request_key(provider, body), provider=provider, json_mode=json_mode,
+                   latency=round(latency, 3),
+                   usage=data.get("usage") if provider == "deepseek" else data.get("usageMetadata"),
+                   ts=time.time())
+        with self._lock:
+            with open(os.path.join(self.record_dir, f"{provider}.jsonl"), "a",
+                      encoding="utf-8") as f:
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self.count(provider, "recorded")
+        # 已经真等过上游了，不再额外睡
+        return 200, dict(rec, prompt=len(prompt), cached=cached, latency=0.0)
+
+
+# ---------------------------------------------------------------- 线路格式
+
+def _deepseek_usage(a):
+    if a.get("usage") and a["finish"] != "length" and a["content"]:
+        return a["usage"]
+    out = _tokens(a["content"]) + a["reasoning"]
+    prompt, cached = _tokens("x" * a["prompt"]), _tokens("x" * a["cached"])
+    return {"prompt_tokens": prompt, "completion_tokens": out, "total_tokens": prompt + out,
+            "prompt_cache_hit_tokens": cached, "prompt_cache_miss_tokens": prompt - cached,
+            "completion_tokens_details": {"reasoning_tokens": a["reasoning"]}}
+
+
+def _gemini_usage(a):
+    if a.get("usage") and a["finish"] != "length" and a["content"]:
+        return a["usage"]
+    out = _tokens(a["content"])
+    prompt, cached = _tokens("x" * a["prompt"]), _tokens("x" * a["cached"])
+    um = {"promptTokenCount": prompt, "candidatesTokenCount": out,
+          "thoughtsTokenCount": a["reasoning"], "totalTokenCount": prompt + out + a["reasoning"]}
+    if cached:
+        um["cachedContentTokenCount"] = cached
+    return um
+
+
+def _gemini_finish(a):
+    return "STOP" if a["finish"] == "stop" else "MAX_TOKENS"
+
+
+def deepseek_body(a, model):
+    return {"id": "fake-" + os.urandom(6).hex(), "object": "chat.completion",
+            "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "finish_reason": a["finish"],
+                         "message": {"role": "assistant", "content": a["content"],
+                                     "reasoning_content": "…" if a["reasoning"] else ""}}],
+            "usage": _deepseek_usage(a)}
+
+
+def gemini_body(a, model):
+    return {"candidates": [{"content": {"role": "model", "parts": [{"text": a["content"]}]},
+                            "finishReason": _gemini_finish(a), "index": 0}],
+            "usageMetadata": _gemini_usage(a), "modelVersion": model}
+
+
+def _chunks(text):
+    return [text[i:i + STREAM_CHUNK] for i in range(0, len(text), STREAM_CHUNK)] or [""]
+
+
+def deepseek_events(a, model):
+    base = {"id": "fake-" + os.urandom(6).hex(), "object": "chat.completion.chunk",
+            "created": int(time.time()), "model": model}
+    if a["reasoning"]:
+        yield dict(base, choices=[{"index": 0, "delta": {"reasoning_content": "…"}}])
+    for piece in _chunks(a["content"]):
+        yield dict(base, choices=[{"index": 0, "delta": {"content": piece}}])
+    yield dict(base, choices=[{"index": 0, "delta": {}, "finish_reason": a["finish"]}])
+    yield dict(base, choices=[], usage=_deepseek_usage(a))
+
+
+def gemini_events(a, model):
+    pieces = _chunks(a["content"])
+    for i, piece in enumerate(pieces):
+        cand = {"content": {"role": "model", "parts": [{"text": piece}]}, "index": 0}
+        ev = {"candidates": [cand], "modelVersion": model}
+        if i == len(pieces) - 1:
+            cand["finishReason"] = _gemini_finish(a)
+            ev["usageMetadata"] = _gemini_usage(a)
+        yield ev
+
+
+# ---------------------------------------------------------------- HTTP
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"      # keep-alive：连接池复用要看得出来
+    fake = None                        # serve() 里绑定
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _send_json(self, status, obj, extra=None):
+        raw = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(raw)))
+        for k, v in (extra or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _send_sse(self, events, ttft, rest, done_marker):
+        events = list(events)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        time.sleep(ttft)
+        gap = rest / max(1, len(events))
+        lines = [f"data: {json.dumps(ev, ensure_ascii=False)}\n\n" for ev in events]
+        if done_marker:
+            lines.append("data: [DONE]\n\n")
+        for i, line in enumerate(lines):
+            if i:
+                time.sleep(gap)
+            raw = line.encode("utf-8")
+            self.wfile.write(f"{len(raw):x}\r\n".encode() + raw + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_GET(self):
+        if urlsplit(self.path).path.rstrip("/") in ("", "/stats"):
+            with self.fake._lock:
+                counters = dict(self.fake.counters)
+            return self._send_json(200, {"status": "ok", "counters": counters})
+        self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        except ValueError:
+            return self._send_json(400, {"error": {"code": 400, "message": "bad JSON"}})
+        m = _GEMINI_RE.search(parts.path)
+        if parts.path.endswith("/chat/completions"):
+            provider, model = "deepseek", body.get("model", "fake")
+            stream = bool(body.get("stream"))
+        elif m:
+            provider, model = "gemini", m.group(1)
+            stream = m.group(2) == "streamGenerateContent"
+            query["_model"] = model
+        elif parts.path.endswith("/cachedContents"):
+            return self._send_json(200, self.fake.create_cache(body))
+        else:
+            return self._send_json(404, {"error": {"code": 404, "message": parts.path}})
+        self.fake.count(provider, "stream" if stream else "requests")
+        status, a = self.fake.answer(provider, body, query, dict(self.headers))
+        if status != 200:
+            extra = {"Retry-After": "5"} if status == 429 else None
+            return self._send_json(status, a, extra)
+        ttft = a["latency"] * self.fake.ttft_share
+        if not stream:
+            time.sleep(a["latency"])
+            make = deepseek_body if provider == "deepseek" else gemini_body
+            return self._send_json(200, make(a, model))
+        events = (deepseek_events if provider == "deepseek" else gemini_events)(a, model)
+        try:
+            self._send_sse(events, ttft, a["latency"] - ttft, provider == "deepseek")
+        except (BrokenPipeError, ConnectionResetError):
+            self.fake.count(provider, "client_cancelled")      # 对冲输掉的一路会被掐断
+            self.close_connection = True
+
+
+def serve(fake, host="127.0.0.1", port=0):
+    """在后台线程起服务，返回 server（server.server_address 是实际端口，用完 shutdown()）。"""
+    handler = type("Handler", (_Handler,), {"fake": fake})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ---------------------------------------------------------------- 自检
+
+def _check():
+    errs = []
+
+    def expect(cond, what):
+        print(("  ✓ " if cond else "  ✗ ") + what)
+        if not cond:
+            errs.append(what)
+
+    def sse(r):
+        r.encoding = "utf-8"
+        out = []
+        for line in r.iter_lines(decode_unicode=True):
+            if line.startswith("data:") and line[5:].strip() != "[DONE]":
+                out.append(json.loads(line[5:]))
+        return out
+
+    fake = FakeLLM(latency="0.01", chars="1000", reasoning="50", seed=1)
+    server = serve(fake)
+    base = "http://%s:%d" % server.server_address
+    ds = {"model": "m", "messages": [{"role": "user", "content": "P" * 1000}], "max_tokens": 10}
+    gm = {"systemInstruction": {"parts": [{"text": "S" * 1000}]},
+          "contents": [{"role": "user", "parts": [{"text": "U"}]}]}
+    try:
+        r = requests.post(f"{base}/chat/completions", json=ds).json()
+        expect(len(r["choices"][0]["message"]["content"]) == 1000
+               and r["choices"][0]["finish_reason"] == "stop"
+               and r["usage"]["completion_tokens_details"]["reasoning_tokens"] == 50,
+               "deepseek non-stream")
+        expect(r["usage"]["prompt_cache_hit_tokens"] == 0, "deepseek first call: no cache hit")
+        r = requests.post(f"{base}/chat/completions", json=ds).json()
+        expect(r["usage"]["prompt_cache_hit_tokens"] > 0, "deepseek repeated prefix: cache hit")
+        evs = sse(requests.post(f"{base}/chat/completions", json=dict(ds, stream=True), stream=True))
+        text = "".join((c.get("delta") or {}).get("content") or ""
+                       for ev in evs for c in ev.get("choices") or [])
+        expect(len(text) == 1000 and evs[-1].get("usage"), "deepseek stream (+usage chunk)")
+        r = requests.post(f"{base}/v1beta/models/g:generateContent?key=k", json=gm).json()
+        expect(r["candidates"][0]["finishReason"] == "STOP"
+               and len(r["candidates"][0]["content"]["parts"][0]["text"]) == 1000,
+               "gemini generateContent")
+        evs = sse(requests.post(f"{base}/v1beta/models/g:streamGenerateContent?alt=sse&key=k",
+                                json=gm, stream=True))
+        expect(evs[-1]["candidates"][0]["finishReason"] == "STOP" and evs[-1]["usageMetadata"],
+               "gemini stream")
+        name = requests.post(f"{base}/v1beta/cachedContents?key=k",
+                             json={"model": "models/g", "contents": [
+                                 {"role": "user", "parts": [{"text": "S" * 1000}]}]}).json()["name"]
+        r = requests.post(f"{base}/v1beta/models/g:generateContent?key=k",
+                          json={"cachedContent": name, "contents": gm["contents"]}).json()
+        expect(r["usageMetadata"].get("cachedContentTokenCount", 0) >= 300, "gemini cachedContent")
+
+        fake.truncate_rate = 1.0
+        r = requests.post(f"{base}/chat/completions", json=ds).json()
+        half = r["choices"][0]["message"]["content"]
+        expect(r["choices"][0]["finish_reason"] == "length" and len(half) == 500,
+               "truncation injection")
+        cont = dict(ds, messages=ds["messages"] + [{"role": "assistant", "content": half},
+                                                   {"role": "user", "content": "continue"}])
+        r = requests.post(f"{base}/chat/completions", json=cont).json()
+        expect(r["choices"][0]["finish_reason"] == "stop"
+               and r["choices"][0]["message"]["content"].startswith(half[-CONTINUE_ECHO:]),
+               "continuation: never truncated, echoes the written tail")
+        fake.truncate_rate, fake.empty_rate = 0.0, 1.0
+        r = requests.post(f"{base}/v1beta/models/g:generateContent?key=k", json=gm).json()
+        expect(r["candidates"][0]["content"]["parts"][0]["text"] == "", "empty injection")
+        fake.empty_rate, fake.error_rate, fake.error_status = 0.0, 1.0, 429
+        r = requests.post(f"{base}/chat/completions", json=ds)
+        expect(r.status_code == 429 and r.headers.get("Retry-After"), "error injection")
+        r = requests.post(f"{base}/chat/completions",
+                          json=dict(ds, response_format={"type": "json_object"}))
+        expect(r.status_code == 429, "error injection applies to JSON mode too")
+    finally:
+        server.shutdown()
+
+    with tempfile.TemporaryDirectory() as d:
+        rec = {"key": request_key("deepseek", ds), "provider": "deepseek", "json_mode": False,
+               "content": "RECORDED", "reasoning": 7, "finish": "stop", "latency": 3.0,
+               "usage": {"prompt_tokens": 11, "completion_tokens": 9,
+                         "completion_tokens_details": {"reasoning_tokens": 7}}}
+        other = dict(rec, key="x", content="NEAREST")
+        with open(os.path.join(d, "deepseek.jsonl"), "w", encoding="utf-8") as f:
+            f.write(json.dumps(rec) + "\n" + json.dumps(other) + "\n")
+        fake = FakeLLM(latency="recorded", scale=0.001, replay=d)
+        server = serve(fake)
+        base = "http://%s:%d" % server.server_address
+        try:
+            t0 = time.time()
+            r = requests.post(f"{base}/chat/completions", json=ds).json()
+            expect(r["choices"][0]["message"]["content"] == "RECORDED"
+                   and r["usage"]["prompt_tokens"] == 11 and time.time() - t0 < 1,
+                   "replay: exact match, recorded usage, scaled latency")
+            r = requests.post(f"{base}/chat/completions",
+                              json=dict(ds, messages=[{"role": "user", "content": "new"}])).json()
+            expect(r["choices"][0]["message"]["content"] in ("RECORDED", "NEAREST"),
+                   "replay: unmatched prompt falls back to a recording")
+        finally:
+            server.shutdown()
+    print("自检:" + ("✓ 全部通过" if not errs else " / ".join(errs)))
+    return not errs
+
+
+def main():
+    ap = argparse.ArgumentParser(description="本地假 LLM 供应商（DeepSeek + Gemini 协议）")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8999)
+    ap.add_argument("--latency", default="lognormal:20,0.5",
+                    help="整个应答的耗时（秒）：2.5 / uniform:1,4 / lognormal:中位数,sigma / recorded")
+    ap.add_argument("--ttft-share", type=float, default=0.3, help="流式首 token 前的耗时占比")
+    ap.add_argument("--prefill", type=float, default=0.0,
+                    help="每 1k 个未命中缓存的 prompt token 额外的秒数")
+    ap.add_argument("--scale", type=float, default=1.0, help="所有等待乘以这个系数")
+    ap.add_argument("--chars", default="uniform:4000,9000", help="合成正文长度（字符）")
+    ap.add_argument("--reasoning", default="uniform:500,4000", help="合成思考 token 数")
+    ap.add_argument("--truncate-rate", type=float, default=0.0)
+    ap.add_argument("--empty-rate", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--error-status", type=int, default=503)
+    ap.add_argument("--replay", metavar="DIR", help="回放录制的应答")
+    ap.add_argument("--record", metavar="DIR", help="转发真实上游并录制")
+    ap.add_argument("--deepseek-upstream", default=DEEPSEEK_UPSTREAM)
+    ap.add_argument("--gemini-upstream", default=GEMINI_UPSTREAM)
+    ap.add_argument("--seed", type=int)
+    ap.add_argument("--check", action="store_true", help="自检后退出")
+    a = ap.parse_args()
+    if a.check:
+        sys.exit(0 if _check() else 1)
+    fake = FakeLLM(latency=a.latency, ttft_share=a.ttft_share, chars=a.chars,
+                   reasoning=a.reasoning, truncate_rate=a.truncate_rate,
+                   empty_rate=a.empty_rate, error_rate=a.error_rate,
+                   error_status=a.error_status, scale=a.scale, replay=a.replay,
+                   record=a.record, seed=a.seed, prefill=a.prefill,
+                   deepseek_upstream=a.deepseek_upstream, gemini_upstream=a.gemini_upstream)
+    server = serve(fake, a.host, a.port)
+    host, port = server.server_address
+    print(f"Fake LLM listening on http://{host}:{port}")
+    print(f"  DEEPSEEK_URL=http://{host}:{port}/chat/completions")
+    print(f"  GEMINI_BASE_URL=http://{host}:{port}/v1beta")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
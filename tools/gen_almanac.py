@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""tools/gen_almanac.py — 用 lunar-python 生成 almanac.bin（逐日干支 / 冲 / 宜标签）。
+
+表的格式见 almanac.py。覆盖范围按立春年给，默认 2020–2050（约 1.1 万天、45 KB）。
+节月边界取自 solar_terms.bin，所以起止年要在 solar_terms 的范围里。
+
+    python tools/gen_almanac.py                          # 默认 2020–2050
+    python tools/gen_almanac.py --first 2000 --last 2099
+    python tools/gen_almanac.py --check                  # 逐日对照 lunar-python
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lunar_python import Solar      # noqa: E402
+
+import almanac                      # noqa: E402
+import ganzhi                       # noqa: E402
+import solar_terms                  # noqa: E402
+
+
+def day_record(d):
+    """(六十甲子序号, 冲支序号, 标签位图)"""
+    lunar = Solar.fromYmd(d.year, d.month, d.day).getLunar()
+    gz = lunar.getDayInGanZhi()
+    yi = set(lunar.getDayYi())
+    mask = 0
+    for bit, sources in enumerate(almanac.TAG_SOURCES.values()):
+        if yi.intersection(sources):
+            mask |= 1 << bit
+    return ganzhi.sexagenary(gz), ganzhi.branch(lunar.getDayChong()), mask
+
+
+def span(first_year, last_year):
+    """从 first_year 立春到 last_year 次年立春前一天。"""
+    return (solar_terms.term_date(first_year, 0),
+            solar_terms.term_date(last_year + 1, 0) - timedelta(days=1))
+
+
+def generate(first_year, last_year):
+    start, end = span(first_year, last_year)
+    n = (end - start).days + 1
+    out = bytearray(almanac.HEADER.pack(almanac.MAGIC, first_year, last_year, start.toordinal(), n))
+    for i in range(n):
+        out += almanac.RECORD.pack(*day_record(start + timedelta(days=i)))
+    return bytes(out)
+
+
+def check():
+    bad = 0
+    start, end = almanac.coverage()
+    for ordinal, gz, chong, mask in almanac.records(start, end):
+        d = start + timedelta(days=ordinal - start.toordinal())
+        want = day_record(d)
+        if (gz, chong, mask) != want:
+            print(f"MISMATCH {d}: table {(gz, chong, mask)}, lunar-python {want}")
+            bad += 1
+    first, last = almanac._load()[:2]
+    for y in range(first, last + 1):
+        ms = almanac.months(y)
+        if ms[0]['start'] != span(y, y)[0].isoformat() or ms[-1]['end'] != span(y, y)[1].isoformat():
+            print(f"MONTHS {y}: {ms[0]['start']} ~ {ms[-1]['end']}")
+            bad += 1
+    print(f"{start} ~ {end}: {(end - start).days + 1} days, {last - first + 1} years: "
+          + ("ok" if not bad else f"{bad} mismatches"))
+    return bad == 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="生成 / 校验 almanac.bin")
+    ap.add_argument('--first', type=int, default=2020, help='起始立春年')
+    ap.add_argument('--last', type=int, default=2050, help='结束立春年（含）')
+    ap.add_argument('--check', action='store_true', help='对照 lunar-python 校验现有的表')
+    a = ap.parse_args()
+    if a.check:
+        sys.exit(0 if check() else 1)
+
+    t0 = time.time()
+    data = generate(a.first, a.last)
+    with open(almanac.ALMANAC_PATH, 'wb') as f:
+        f.write(data)
+    print(f"wrote {almanac.ALMANAC_PATH}: {a.first}–{a.last}, {len(data)} bytes "
+          f"in {time.time() - t0:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
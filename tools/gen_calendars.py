@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""tools/gen_calendars.py — 给一批客户预生成年度个人吉日 / 忌日（JSONL 进，JSONL 出）。
+
+输入每行一个客户：{"id": ..., "bazi_data": {...}}，或者已经编码好的
+{"id": ..., "day_branch": 0-11, "year_branch": 0-11}（缺的写 -1）。
+输出每行一个客户，见 calendar_batch.iter_results。需要 NumPy（不在 requirements.txt 里，
+Web 服务用不到）：先 `pip install numpy`。
+
+    python tools/gen_calendars.py customers.jsonl -o calendars.jsonl --year 2027
+    python tools/gen_calendars.py --bench 20000       # 合成客户：逐个 personal_calendar vs 整批
+    python tools/gen_calendars.py --check             # 和 personal_calendar 的结果逐个对比
+"""
+import argparse
+import io
+import json
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import annual_2027                   # noqa: E402
+import calendar_batch                # noqa: E402
+import ganzhi                        # noqa: E402
+
+
+def read_clients(path):
+    ids, day_branch, year_branch = [], [], []
+    with (sys.stdin if path == '-' else open(path, encoding='utf-8')) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if 'bazi_data' in row:
+                db, yb = calendar_batch.encode_chart(row['bazi_data'])
+            else:
+                db, yb = int(row.get('day_branch', -1)), int(row.get('year_branch', -1))
+            ids.append(row.get('id', len(ids)))
+            day_branch.append(db)
+            year_branch.append(yb)
+    return ids, day_branch, year_branch
+
+
+def _markdown_days(md):
+    """从 personal_calendar 的英文 Markdown 里抠出 (吉日, 其中六合的, 忌日)。"""
+    fav = re.findall(r"^- (\d{4}-\d\d-\d\d) \(", md, re.M)
+    he = re.findall(r"^- (\d{4}-\d\d-\d\d) \(.*Liu He", md, re.M)
+    caution = [d for line in md.splitlines() if line.startswith("- ⚠ personal caution")
+               for d in re.findall(r"\d{4}-\d\d-\d\d", line)]
+    return fav, he, caution
+
+
+def check(year):
+    import bench_calendar
+    charts = bench_calendar.charts(500) + [{'pillars': {}}]
+    enc = [calendar_batch.encode_chart(c) for c in charts]
+    results = calendar_batch.iter_results(list(range(len(charts))), [e[0] for e in enc],
+                                          [e[1] for e in enc], year)
+    bad = 0
+    for chart, r in zip(charts, results):
+        want = _markdown_days(annual_2027.personal_calendar(chart, 'en', 8, year))
+        got = ([f['d'] for f in r['favorable']], [f['d'] for f in r['favorable'] if f['liu_he']],
+               r['caution'])
+        if got != want:
+            bad += 1
+    print(f"{year}: {len(charts)} charts vs personal_calendar: "
+          + ("identical" if not bad else f"{bad} differ"))
+    return bad == 0
+
+
+def bench(n, year):
+    import numpy as np
+    rng = np.random.default_rng(0)
+    day_branch, year_branch = rng.integers(0, 12, n), rng.integers(0, 12, n)
+    ids = list(range(n))
+    # 逐个：每个客户一次 personal_calendar（按日支 / 年支造一个最小命盘）
+    sample = min(n, 2000)
+    t0 = time.perf_counter()
+    for i in range(sample):
+        chart = {'pillars': {'day': {'ganZhi': '甲' + ganzhi.ZHI[day_branch[i]]},
+                             'year': {'ganZhi': '甲' + ganzhi.ZHI[year_branch[i]]}}}
+        annual_2027.personal_calendar(chart, 'en', 8, year)
+    per_client = (time.perf_counter() - t0) / sample
+    t0 = time.perf_counter()
+    calendar_batch.batch(day_branch, year_branch, year)
+    matrix = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    out = io.StringIO()
+    calendar_batch.write_jsonl(out, ids, day_branch, year_branch, year)
+    total = time.perf_counter() - t0
+    print(f"{n} clients, {year}\n")
+    print(f"{'':<34}{'seconds':>10}{'µs / client':>13}")
+    print(f"{'personal_calendar, one by one':<34}{per_client * n:>10.2f}{per_client * 1e6:>13.1f}"
+          f"   (timed on {sample})")
+    print(f"{'batch matrices only':<34}{matrix:>10.2f}{matrix / n * 1e6:>13.1f}")
+    print(f"{'batch + JSONL':<34}{total:>10.2f}{total / n * 1e6:>13.1f}"
+          f"   ({len(out.getvalue()) / n:.0f} B / line)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="批量生成个人年度吉日 / 忌日")
+    ap.add_argument('input', nargs='?', help="客户 JSONL（- 为标准输入）")
+    ap.add_argument('-o', '--output', default='-', help="输出 JSONL（默认标准输出）")
+    ap.add_argument('--year', type=int, default=annual_2027.ANNUAL_YEAR)
+    ap.add_argument('--per-month', type=int, default=8)
+    ap.add_argument('--bench', type=int, metavar='N', help="合成 N 个客户测速")
+    ap.add_argument('--check', action='store_true', help="和 personal_calendar 逐个对比")
+    a = ap.parse_args()
+    if a.check:
+        sys.exit(0 if check(a.year) else 1)
+    if a.bench:
+        bench(a.bench, a.year)
+        return
+    if not a.input:
+        ap.error("input JSONL required")
+
+    ids, day_branch, year_branch = read_clients(a.input)
+    t0 = time.time()
+    out = sys.stdout if a.output == '-' else open(a.output, 'w', encoding='utf-8')
+    try:
+        n = calendar_batch.write_jsonl(out, ids, day_branch, year_branch, a.year, a.per_month)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"{n} calendars for {a.year} in {time.time() - t0:.1f}s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""tools/gen_solar_terms.py — 用 lunar-python 生成 solar_terms.bin（1900–2100 的 12 节交节时刻）。
+
+表的格式见 solar_terms.py。lunar-python 只在这里用，请求时不调用。
+
+    python tools/gen_solar_terms.py              # 重新生成 solar_terms.bin
+    python tools/gen_solar_terms.py --check      # 逐条对照 lunar-python，另查逐日定位
+"""
+import argparse
+import os
+import struct
+import sys
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lunar_python import Lunar      # noqa: E402
+
+FIRST_YEAR, LAST_YEAR = 1900, 2100
+NAMES = ['立春', '惊蛰', '清明', '立夏', '芒种', '小暑',
+         '立秋', '白露', '寒露', '立冬', '大雪', 'XIAO_HAN']     # 最后一个是次年一月的小寒
+
+
+def exact_terms(lunar_year):
+    """该立春年 12 个节的交节时刻（北京时间）。"""
+    table = Lunar.fromYmd(lunar_year, 1, 1).getJieQiTable()
+    return [datetime.strptime(table[n].toYmdHms(), "%Y-%m-%d %H:%M:%S") for n in NAMES]
+
+
+def generate():
+    epoch = datetime(1900, 1, 1)
+    minutes = []
+    for y in range(FIRST_YEAR, LAST_YEAR + 1):
+        minutes.extend(int((t - epoch).total_seconds() // 60) for t in exact_terms(y))
+    return minutes
+
+
+def check():
+    import solar_terms
+    bad = 0
+    for y in range(solar_terms.FIRST_YEAR, solar_terms.LAST_YEAR + 1):
+        for i, t in enumerate(exact_terms(y)):
+            got = solar_terms.term_start(y, i)
+            if not timedelta(0) <= t - got < timedelta(minutes=1) or solar_terms.term_date(y, i) != t.date():
+                print(f"MISMATCH {y} {solar_terms.TERM_NAMES[i]}: table {got}, lunar-python {t}")
+                bad += 1
+    # 逐日定位：每一天都落在 [本节, 下一节) 之间
+    d, end, days = date(1900, 2, 10), date(2101, 1, 1), 0
+    while d < end:
+        y, i = solar_terms.locate(d)
+        nxt = (y + (i == 11), (i + 1) % 12)
+        if not (solar_terms.term_date(y, i) <= d and
+                (nxt[0] > solar_terms.LAST_YEAR or d < solar_terms.term_date(*nxt))):
+            print(f"LOCATE {d}: got {y}/{solar_terms.TERM_NAMES[i]}")
+            bad += 1
+        d += timedelta(days=1)
+        days += 1
+    n = (solar_terms.LAST_YEAR - solar_terms.FIRST_YEAR + 1) * 12
+    print(f"{n} terms, {days} days located: "
+          + ("ok" if not bad else f"{bad} mismatches"))
+    return bad == 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="生成 / 校验 solar_terms.bin")
+    ap.add_argument('--check', action='store_true', help='对照 lunar-python 校验现有的表')
+    a = ap.parse_args()
+    if a.check:
+        sys.exit(0 if check() else 1)
+
+    minutes = generate()
+    data = b"JIE1" + struct.pack(f"<HH{len(minutes)}I", FIRST_YEAR, LAST_YEAR, *minutes)
+    path = os.path.join(ROOT, 'solar_terms.bin')
+    with open(path, 'wb') as f:
+        f.write(data)
+    print(f"wrote {path}: {FIRST_YEAR}–{LAST_YEAR}, {len(data)} bytes")
+
+
+if __name__ == '__main__':
+    main()
@@ -20,12 +20,13 @@
 """
 import argparse, math, sys, datetime, json
 
+import ganzhi
+
 for _s in (sys.stdout, sys.stderr):
     try: _s.reconfigure(encoding='utf-8', errors='replace')
     except Exception: pass
 
-ZHI = ['子','丑','寅','卯','辰','巳','午','未','申','酉','戌','亥']
-GAN = ['甲','乙','丙','丁','戊','己','庚','辛','壬','癸']
+ZHI, GAN = ganzhi.ZHI, ganzhi.GAN
 Z = {z: i for i, z in enumerate(ZHI)}
 
 # 十二宫名。命宫定下后**逆行**安其余十一宫(地支索引递减)。
@@ -33,18 +34,8 @@ Z = {z: i for i, z in enumerate(ZHI)}
 PALACES = ['命宫','兄弟','夫妻','子女','财帛','疾厄',
            '迁移','交友','官禄','田宅','福德','父母']
 
-# 五虎遁:由生年天干定寅宫天干,其余顺排。命宫天干靠它,而命宫干支决定五行局。
-WU_HU = {'甲':'丙','己':'丙','乙':'戊','庚':'戊','丙':'庚','辛':'庚',
-         '丁':'壬','壬':'壬','戊':'甲','癸':'甲'}
-
-# 六十甲子纳音 → 五行局。index = 甲子起的序号 // 2(每两位共一个纳音)。
-# 纳音五行以 **15 对为周期**重复,所以只写一轮再乘 2。
-# 逐条对照:海中金 炉中火 大林木 路旁土 剑锋金 / 山头火 涧下水 城头土 白蜡金 杨柳木 /
-#           泉中水 屋上土 霹雳火 松柏木 长流水
-_NAYIN_CYCLE = ['金','火','木','土','金',
-                '火','水','土','金','木',
-                '水','土','火','木','水']
-NAYIN_PAIRS = _NAYIN_CYCLE * 2
+# 五虎遁(ganzhi.WU_HU_DUN):由生年天干定寅宫天干,其余顺排。命宫天干靠它,而命宫干支决定五行局。
+# 纳音五行(ganzhi.NAYIN)→ 五行局。纳音表逐条对照口诀的注释在 ganzhi.py。
 JU = {'水': (2, '水二局'), '木': (3, '木三局'), '金': (4, '金四局'),
       '土': (5, '土五局'), '火': (6, '火六局')}
 
@@ -124,12 +115,8 @@ def true_solar(dt: datetime.datetime, lng: float, tz: str | None = None):
 
 
 def nayin_element(gan: str, zhi: str) -> str:
-    """六十甲子序号 → 纳音五行。甲子=0,每两位共一个纳音。"""
-    g, z = GAN.index(gan), Z[zhi]
-    for i in range(60):
-        if i % 10 == g and i % 12 == z:
-            return NAYIN_PAIRS[i // 2]
-    raise ValueError(f'{gan}{zhi} 不是有效干支')
+    """干支 → 纳音五行(查 ganzhi.NAYIN)。"""
+    return ganzhi.nayin_element(ganzhi.stem(gan), Z[zhi])
 
 
 def ziwei_position(ju: int, day: int) -> int:
@@ -157,7 +144,7 @@ def chart_from_lunar(y_gan, y_zhi, lmonth, lday, ti, gender):
     # ⚠️ 曾写成 (zi-2) 不取模 —— 丑宫算出 -1,变成"从寅倒退一位",干支错两位。
     #    命宫落子/丑的盘(1/6)因此五行局全错、紫微错位、全盘报废;
     #    2026-08-11 用户拿庚辰年丑命宫的盘(应为己丑火六局)当场戳穿。
-    yin_gan = GAN.index(WU_HU[y_gan])
+    yin_gan = ganzhi.WU_HU_DUN[ganzhi.stem(y_gan)]
     gong_gan = {zi: GAN[(yin_gan + (zi - 2) % 12) % 10] for zi in range(12)}
 
     elem = nayin_element(gong_gan[ming], ZHI[ming])
@@ -231,7 +218,7 @@ def chart_from_lunar(y_gan, y_zhi, lmonth, lday, ti, gender):
         palace[(ming - k2) % 12] = nm
 
     # 大限:阳男阴女顺行,阴男阳女逆行;起运岁=局数,每宫十年
-    yang_year = GAN.index(y_gan) % 2 == 0
+    yang_year = ganzhi.stem(y_gan) % 2 == 0
     forward = (yang_year and gender == 'male') or (not yang_year and gender == 'female')
     daxian = {}
     for k2 in range(12):
@@ -462,7 +449,7 @@ def _selftest(c):
     #       我第一版不变量就是从子起走整圈,反而把正确的盘判成错的。
     for k in range(11):
         cur, nxt_zi = (2 + k) % 12, (2 + k + 1) % 12
-        want = GAN[(GAN.index(c['gong_gan'][cur]) + 1) % 10]
+        want = GAN[(ganzhi.stem(c['gong_gan'][cur]) + 1) % 10]
         if c['gong_gan'][nxt_zi] != want:
             errs.append(f'宫干不连续:{ZHI[cur]}={c["gong_gan"][cur]} 之后应是{want},'
                         f'实为{c["gong_gan"][nxt_zi]}')
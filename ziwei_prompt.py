@@ -19,65 +19,162 @@
 """
 import json, os, re, time
 
-import requests
+import ganzhi
+import llm_breaker
+import llm_budget
+import llm_cache
+import llm_continue
+import llm_ledger
+import llm_limiter
+import llm_transport
 from ziwei import (build, features, san_fang,
                    ZHI, GAN, PALACES, MAIN14, SHA6, HUA_DISPUTED, SI_HUA)
 from ziwei_i18n import L as T, PALACE_EN, STAR_EN_BARE, HUA_EN_BARE
 
 Z_ = {z: i for i, z in enumerate(ZHI)}
 
-DS_URL = "https://api.deepseek.com/chat/completions"
+DS_URL = os.getenv("DEEPSEEK_URL", "https://api.deepseek.com/chat/completions")
 DS_MODEL = os.getenv("DEEPSEEK_MODEL_ID", "deepseek-v4-flash")
 DS_TIMEOUT = int(os.getenv("DEEPSEEK_TIMEOUT", "900"))
+DS_MAX_TOKENS = int(os.getenv("DEEPSEEK_MAX_TOKENS", "65536"))   # llm_budget 学到的预算的上限
+DS_BUDGET = int(os.getenv("DEEPSEEK_BUDGET", "1500"))            # 一段(含重试、续写)的总耗时上限
 
 
-def ds(prompt, effort='high', max_tokens=32000, retries=3, json_mode=False):
+def ds(prompt, effort='high', max_tokens=32000, retries=3, json_mode=False, fresh=False,
+       tag=None):
     """DeepSeek 调用。thinking 模式下 temperature 无效,不传。
 
     ⚠️ **max_tokens 把思考链算在内**,必须为它留出预算。
        effort=high 时思考链能占到总输出的 70-86%。
 
-    防线照 app.py `_ask_deepseek`:空 content 和 finish_reason=length 都要重试 ——
-    截断的章节绝不能交付。
+    防线照 app.py `_ask_deepseek`:空 content 要重试;finish_reason=length 先续写
+    (`_continue`),续不上再整段重试 —— 截断的章节绝不能交付。
+
+    完整应答进 llm_cache(键含 effort/max_tokens/json_mode);fresh=True 跳过读缓存。
+
+    tag = {product, section, language}:带了就按 llm_budget 学到的用量改 max_tokens
+    (传进来的 max_tokens 是章节规格里的默认值,缓存键仍用它)。
     """
     key = os.getenv("DEEPSEEK_API_KEY", "")
     if not key:
         raise RuntimeError('DEEPSEEK_API_KEY 未设置')
+    ck = llm_cache.key('deepseek', DS_MODEL, effort, max_tokens, prompt, json_mode=json_mode)
+    hit = llm_cache.get(ck, fresh=fresh)
+    if hit is not None:
+        return hit
+    # 排不上队直接抛 LimiterBusy(RuntimeError 子类),端点转成 429
+    ticket = llm_limiter.acquire('deepseek', tag)
+    try:
+        return _ds_upstream(ck, key, prompt, effort, max_tokens, retries, json_mode, tag)
+    finally:
+        llm_limiter.release(ticket)
+
+
+def _ds_upstream(ck, key, prompt, effort, max_tokens, retries, json_mode, tag):
+    # 紫微没有备用供应商:熔断时快速失败,别让这一段再把重试预算烧完
+    if not llm_breaker.allow('deepseek'):
+        raise RuntimeError('DeepSeek 熔断中(circuit open),快速失败')
+    budget = llm_budget.choose(tag, 'deepseek', max_tokens, max(max_tokens, DS_MAX_TOKENS))
     body = {
         "model": DS_MODEL,
         "messages": [{"role": "user", "content": prompt}],
-        "max_tokens": max_tokens,
+        "max_tokens": budget,
         "reasoning_effort": effort,
         "thinking": {"type": "enabled"},
     }
     if json_mode:
         body["response_format"] = {"type": "json_object"}
     last = None
+    started = time.time()
     for attempt in range(1, retries + 1):
+        if time.time() - started > DS_BUDGET:
+            last = f'budget exhausted after {int(time.time() - started)}s ({last})'; break
+        if attempt > 1 and llm_breaker.is_open('deepseek'):
+            last = f'circuit opened ({last})'; break
+        t0 = time.time()
         try:
-            r = requests.post(DS_URL, json=body, timeout=DS_TIMEOUT,
-                              headers={"Authorization": f"Bearer {key}",
-                                       "Content-Type": "application/json"})
+            r = llm_transport.post(DS_URL, json=body, timeout=DS_TIMEOUT,
+                                   headers={"Authorization": f"Bearer {key}",
+                                            "Content-Type": "application/json"})
             r.raise_for_status()
             j = r.json()
             ch = j["choices"][0]
             txt = (ch.get("message") or {}).get("content") or ""
             fin = ch.get("finish_reason", "")
             u = j.get("usage", {})
-            print(f"    DS {effort}/{max_tokens}: finish={fin} out={u.get('completion_tokens')} "
+            _ledger(tag, effort, u, t0, attempt, 0, fin, txt)
+            print(f"    DS {effort}/{budget}: finish={fin} out={u.get('completion_tokens')} "
                   f"(reasoning={(u.get('completion_tokens_details') or {}).get('reasoning_tokens')})")
+            llm_budget.record(tag, 'deepseek', max_tokens, budget, u.get('completion_tokens'),
+                              (u.get('completion_tokens_details') or {}).get('reasoning_tokens'),
+                              truncated=fin == 'length')
             if not txt.strip():
+                llm_breaker.record('deepseek', 'empty')
                 last = 'empty content'; continue
             if fin == 'length':
-                last = 'truncated (finish_reason=length)'; continue
+                llm_breaker.record('deepseek', 'truncated')
+                # json_mode 的半截 JSON 续不出合法对象,只能整段重来
+                txt = None if json_mode else _continue(body, key, prompt, txt, started, tag,
+                                                       attempt)
+                if txt is None:
+                    last = 'truncated (finish_reason=length)'; continue
+            else:
+                llm_breaker.record('deepseek', 'ok')
+            llm_cache.put(ck, 'deepseek', DS_MODEL, txt.strip())
             return txt.strip()
         except Exception as e:
             last = str(e)
+            llm_breaker.record('deepseek', 'error')
+            llm_ledger.record(tag, 'deepseek', DS_MODEL, effort, None, time.time() - t0, attempt,
+                              outcome='error')
             print(f"    DS attempt {attempt} error: {e}")
         time.sleep(2 * attempt)
     raise RuntimeError(f'DeepSeek 失败: {last}')
 
 
+def _ledger(tag, effort, usage, t0, attempt, continuation, fin, txt):
+    """记台账(llm_ledger),结果分类同熔断器。"""
+    outcome = 'empty' if not txt.strip() else 'truncated' if fin == 'length' else 'ok'
+    llm_ledger.record(tag, 'deepseek', DS_MODEL, effort, usage, time.time() - t0, attempt,
+                      continuation, fin, outcome)
+
+
+def _continue(body, key, prompt, partial, started, tag=None, attempt=1):
+    """截断续写(见 llm_continue):保留已写部分接着写,收不了尾返回 None 交给整段重试。
+    started = _ds_upstream 开跑的时刻,续写同样受 DS_BUDGET 约束。
+    续写请求出错也返回 None:台账 / 熔断在这里记一次,不抛给 _ds_upstream 再记一遍。"""
+    txt = partial
+    for n in range(1, llm_continue.LLM_MAX_CONTINUATIONS + 1):
+        if time.time() - started > DS_BUDGET:
+            print(f"    DS 续写 {n}: 超出总耗时预算 ({int(time.time() - started)}s)")
+            return None
+        t0 = time.time()
+        try:
+            r = llm_transport.post(DS_URL, json=dict(body, messages=llm_continue.messages(prompt, txt)),
+                                   timeout=DS_TIMEOUT,
+                                   headers={"Authorization": f"Bearer {key}",
+                                            "Content-Type": "application/json"})
+            r.raise_for_status()
+            j = r.json()
+        except Exception as e:
+            llm_breaker.record('deepseek', 'error')
+            llm_ledger.record(tag, 'deepseek', DS_MODEL, body.get('reasoning_effort', ''), None,
+                              time.time() - t0, attempt, n, outcome='error')
+            print(f"    DS 续写 {n} error: {e}")
+            return None
+        ch = j["choices"][0]
+        more = (ch.get("message") or {}).get("content") or ""
+        fin = ch.get("finish_reason", "")
+        _ledger(tag, body.get('reasoning_effort', ''), j.get('usage'), t0, attempt, n, fin, more)
+        txt = llm_continue.stitch(txt, more)
+        print(f"    DS 续写 {n}: +{len(more)} 字, finish={fin}")
+        if fin != 'length' and more.strip():
+            llm_breaker.record('deepseek', 'ok')
+            return txt
+        llm_breaker.record('deepseek', 'truncated' if more.strip() else 'empty')
+    return None
+
+
 def facts(c, lang='zh'):
     """所有断语必须能回溯到这里的某一行。AI 不许自己发明盘上没有的东西。
     中英共用 ziwei_i18n 的名表 —— 渲染与校对同源,不会各写一套飘掉。"""
@@ -244,8 +341,8 @@ def year_scan_facts(c, start=2026, n=15):
     dx_start = {a: i for i, (a, b) in c['daxian'].items() if a <= 92}
     rows = []
     for y in range(start, start + n):
-        gan = GAN[(y - 1984) % 10]; zhi = ZHI[(y - 1984) % 12]
-        pos = ZHI.index(zhi)
+        yp = ganzhi.year_pillar(y)
+        gan, zhi, pos = GAN[yp % 10], ZHI[yp % 12], yp % 12
         age = y - born + 1
         lu, _, _, ji = SI_HUA[gan]
         pj = _star_palace(c, ji)
@@ -437,7 +534,7 @@ def _gans_in(seg):
     out |= set(_re.findall(r'stem\s*[((]?([甲乙丙丁戊己庚辛壬癸])', seg))
     out |= set(_re.findall(r'[((]([甲乙丙丁戊己庚辛壬癸])[))]', seg))
     for y in _re.findall(r'20\d{2}', seg):
-        out.add(GAN[(int(y) - 1984) % 10])
+        out.add(GAN[ganzhi.year_pillar(int(y)) % 10])
     return out
 
 
@@ -909,7 +1006,7 @@ def verifiable(lang):
     return lang in ('zh', 'en')
 
 
-def build_verdict(c, lang='zh', lang_instruction=''):
+def build_verdict(c, lang='zh', lang_instruction='', fresh=False):
     """定调预判 —— 峰值十年只能有一个答案,先定下来再写正文。
 
     五段独立生成,不做这步就会出现"事业章说 43-52、地图章说 63-72"的自打架。
@@ -941,7 +1038,10 @@ def build_verdict(c, lang='zh', lang_instruction=''):
     li = (f'\n{lang_instruction}\n' if lang_instruction else '')
     try:
         v = json.loads(ds((VEN if lang == 'en' else VZH) + li + F,
-                          effort='high', max_tokens=32000, json_mode=True))
+                          effort='high', max_tokens=32000, json_mode=True, fresh=fresh,
+                          tag={'product': 'ziwei', 'section': 'verdict', 'language': lang}))
+    except llm_limiter.LimiterBusy:
+        raise       # 排队满不是「定调失败」,让端点回 429,别降级成无定调的报告
     except Exception as e:
         print(f'    定调失败,各段自行判断(有打架风险): {e!r:.90}')
         return ''
@@ -969,7 +1069,7 @@ def _spec_for(tag, lang):
     raise KeyError(f'未知章节 {tag}')
 
 
-def generate_section(tag, c, lang='zh', verdict='', lang_instruction=''):
+def generate_section(tag, c, lang='zh', verdict='', lang_instruction='', fresh=False):
     """出一段正文 + 机器校对 + 最多两轮打回重写。
 
     返回 (text, residual)。硬错误(确定性的星曜落宫/四化归属错误)修不掉就抛 ——
@@ -980,6 +1080,8 @@ def generate_section(tag, c, lang='zh', verdict='', lang_instruction=''):
     用英文脚手架 + lang_instruction 让模型改用目标语言写 —— 和八字/风水/2027
     三条线同一个做法。这时校对器无正则可用(见 verifiable),整段跳过校对,
     由调用方把这个事实记进审计表,不假装校过。
+
+    fresh:客户要求重写时为 True,首稿跳过应答缓存(修稿 prompt 里带着新稿,本来就不会命中)。
     """
     effort, mt, spec = _spec_for(tag, lang)
     ST = STYLE_EN if lang == 'en' else STYLE
@@ -990,7 +1092,8 @@ def generate_section(tag, c, lang='zh', verdict='', lang_instruction=''):
     base = head + '\n' + spec + ('\n\n直接输出 Markdown 正文,不要前言,'
                                  '不要代码块包裹,不要重复标题层级以外的编号。')
 
-    txt = ds(base, effort=effort, max_tokens=mt)
+    txt = ds(base, effort=effort, max_tokens=mt, fresh=fresh,
+             tag={'product': 'ziwei', 'section': tag, 'language': lang})
     if lang_instruction:
         return txt, []                        # 非中英:生成得了,校对不了,如实返回
     hard, soft = verify_text(txt, c, lang)
@@ -1005,7 +1108,8 @@ def generate_section(tag, c, lang='zh', verdict='', lang_instruction=''):
                  '只修正清单里的问题(及被牵连的语句),其余一字不改,'
                  '输出修正后的全文,不要前言。\n\n【问题清单】\n'
                  + '\n'.join('- ' + e for e in allerr)
-                 + '\n\n【草稿】\n' + txt, effort='low', max_tokens=mt)
+                 + '\n\n【草稿】\n' + txt, effort='low', max_tokens=mt,
+                 tag={'product': 'ziwei', 'section': f'{tag}:fix', 'language': lang})
         hard, soft = verify_text(txt, c, lang)
         h2, s2 = verify_claims(txt, c, lang)
         hard += h2; soft += s2